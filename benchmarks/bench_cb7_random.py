@@ -0,0 +1,88 @@
+"""
+CB7 随机读取延迟基准测试
+
+按不同的页数生成合成漫画，分别以单个固实块、按大小分块、按页数分块和非固实方式
+输出为 cb7，打印压缩耗时、体积、首页读取延迟以及随机页面读取延迟（中位数和 p95）。
+每次读取都重新打开压缩包，模拟阅读服务器对每个请求独立打开文件的情形。
+
+用法:
+    python benchmarks/bench_cb7_random.py [--pages 100,400] [--page-size 200000]
+        [--layouts solid,16M,4M,8p,off] [--samples 10] [--backend python]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from ccb.archive_handler import get_handler, open_reader  # noqa: E402
+from ccb.exceptions import ArchiveError  # noqa: E402
+
+
+def make_source(root: Path, pages: int, page_size: int) -> int:
+    """生成合成漫画文件夹（随机字节模拟 JPEG 页面），返回总字节数。"""
+    root.mkdir(parents=True)
+    for i in range(pages):
+        (root / f"{i:04d}.jpg").write_bytes(os.urandom(page_size))
+    return pages * page_size
+
+
+def read_latency(archive: Path, page: int) -> float:
+    """重新打开压缩包并读取一页，返回耗时（毫秒）。"""
+    start = time.perf_counter()
+    with open_reader(archive) as reader:
+        reader.read_page(page)
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", default="100,400", help="comma separated")
+    parser.add_argument("--page-size", type=int, default=200_000)
+    parser.add_argument("--layouts", default="solid,16M,4M,8p,off")
+    parser.add_argument("--samples", type=int, default=10)
+    parser.add_argument("--level", default="fast")
+    parser.add_argument("--backend", default="python")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(
+        f"{'pages':>6} {'layout':<7} {'build s':>8} {'MB':>8} "
+        f"{'first ms':>9} {'p50 ms':>8} {'p95 ms':>8}"
+    )
+    with tempfile.TemporaryDirectory(prefix="ccb_bench_") as tmp:
+        tmp_path = Path(tmp)
+        for pages in (int(p) for p in args.pages.split(",")):
+            source = tmp_path / f"source_{pages}"
+            make_source(source, pages, args.page_size)
+            targets = [rng.randrange(pages) for _ in range(args.samples)]
+            for layout in args.layouts.split(","):
+                archive = tmp_path / f"{pages}_{layout}.cb7"
+                handler = get_handler(
+                    "cb7", level=args.level, backend=args.backend, solid_block=layout
+                )
+                start = time.perf_counter()
+                try:
+                    handler.compress(source, archive)
+                except ArchiveError as e:
+                    print(f"{pages:>6} {layout:<7} skipped: {e}")
+                    continue
+                build = time.perf_counter() - start
+                first = read_latency(archive, 0)
+                latencies = sorted(read_latency(archive, page) for page in targets)
+                p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+                print(
+                    f"{pages:>6} {layout:<7} {build:>8.2f} "
+                    f"{archive.stat().st_size / 1e6:>8.1f} {first:>9.1f} "
+                    f"{statistics.median(latencies):>8.1f} {p95:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+输出格式的体积/耗时对比基准测试
+
+生成一个合成漫画文件夹（默认以随机字节模拟已压缩的 JPEG 页面，附带少量可压缩的元数据），
+分别输出为 cbz、cb7 以及不同流压缩方式的 cbt，打印每种格式的耗时和压缩率。
+
+用法:
+    python benchmarks/bench_formats.py [--pages 200] [--page-size 300000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from ccb.archive_handler import get_handler  # noqa: E402
+from ccb.exceptions import ArchiveError  # noqa: E402
+
+
+def make_source(root: Path, pages: int, page_size: int) -> int:
+    """生成合成漫画文件夹，返回总字节数。"""
+    root.mkdir(parents=True)
+    total = 0
+    for i in range(pages):
+        data = os.urandom(page_size)
+        (root / f"{i:04d}.jpg").write_bytes(data)
+        total += len(data)
+    info = ("<ComicInfo><Title>Benchmark</Title></ComicInfo>\n" * 100).encode()
+    (root / "ComicInfo.xml").write_bytes(info)
+    return total + len(info)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=300_000)
+    args = parser.parse_args()
+
+    cases = [
+        ("cbz", None),
+        ("cb7", None),
+        ("cbt", None),
+        ("cbt", "gz"),
+        ("cbt", "xz"),
+        ("cbt", "zst"),
+    ]
+
+    with tempfile.TemporaryDirectory(prefix="ccb_bench_") as tmp:
+        tmp_path = Path(tmp)
+        source = tmp_path / "source"
+        total = make_source(source, args.pages, args.page_size)
+        print(f"Source: {args.pages} pages, {total / 1e6:.1f} MB\n")
+        print(f"{'format':<10} {'seconds':>8} {'MB':>8} {'ratio':>7} {'MB/s':>8}")
+
+        for archive_type, compression in cases:
+            label = archive_type if compression is None else f"cbt+{compression}"
+            output = tmp_path / f"out_{label.replace('+', '_')}.{archive_type}"
+            handler = get_handler(archive_type, tar_compression=compression)
+            start = time.perf_counter()
+            try:
+                handler.compress(source, output)
+            except ArchiveError as e:
+                print(f"{label:<10} skipped: {e}")
+                continue
+            elapsed = time.perf_counter() - start
+            size = output.stat().st_size
+            print(
+                f"{label:<10} {elapsed:>8.2f} {size / 1e6:>8.1f} "
+                f"{size / total:>7.3f} {total / 1e6 / elapsed:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+超大压缩包（ZIP64）基准测试
+
+生成一个合成漫画文件夹（默认 200000 页、共约 10 GB，每 1000 页一个章节子文件夹），
+压缩为 cbz 后重新打开并顺序读取所有页面，打印每个阶段的耗时、吞吐量和进程峰值内存（RSS）。
+输出超过 4 GB 或 65535 个成员时会检查压缩包中是否写入了 ZIP64 结构。
+运行时需要约两倍于总大小的临时磁盘空间，可用 --tmp 指定位置。
+
+用法:
+    python benchmarks/bench_zip64.py [--pages 200000] [--page-size 50000] [--level 0]
+"""
+
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from ccb.archive_handler import ZipHandler, open_reader  # noqa: E402
+from ccb.zip_io import (  # noqa: E402
+    ZIP64_COUNT_LIMIT,
+    ZIP64_EOCD_SIGNATURE,
+    ZIP64_LIMIT,
+    MmapZipFile,
+)
+
+PAGES_PER_CHAPTER = 1000
+
+
+def peak_rss_mb() -> float:
+    """进程到目前为止的峰值常驻内存（MB）。"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / 1024 if sys.platform != "darwin" else peak / 1024**2
+
+
+def make_source(root: Path, pages: int, page_size: int) -> int:
+    """生成合成漫画文件夹，返回总字节数。
+
+    页面内容为共享的随机字节加上页码，模拟不可再压缩的 JPEG 数据且无需逐页生成随机数。
+    """
+    block = os.urandom(page_size)
+    total = 0
+    for i in range(pages):
+        chapter = root / f"chapter{i // PAGES_PER_CHAPTER:04d}"
+        if i % PAGES_PER_CHAPTER == 0:
+            chapter.mkdir(parents=True)
+        data = i.to_bytes(8, "little") + block[8:]
+        (chapter / f"{i:06d}.jpg").write_bytes(data)
+        total += len(data)
+    return total
+
+
+def report(label: str, seconds: float, size: int) -> None:
+    print(
+        f"{label:<10} {seconds:>8.2f} {size / 1e6 / max(seconds, 1e-9):>8.1f} "
+        f"{peak_rss_mb():>10.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200_000)
+    parser.add_argument("--page-size", type=int, default=50_000)
+    parser.add_argument("--level", type=int, default=0, help="cbz deflate level")
+    parser.add_argument("--tmp", type=Path, default=None, help="temp directory")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="ccb_bench_", dir=args.tmp) as tmp:
+        tmp_path = Path(tmp)
+        source = tmp_path / "source"
+        archive = tmp_path / "big.cbz"
+
+        start = time.perf_counter()
+        total = make_source(source, args.pages, args.page_size)
+        print(f"Source: {args.pages} pages, {total / 1e9:.2f} GB\n")
+        print(f"{'phase':<10} {'seconds':>8} {'MB/s':>8} {'peak RSS MB':>10}")
+        report("generate", time.perf_counter() - start, total)
+
+        start = time.perf_counter()
+        ZipHandler(level=args.level).compress(source, archive)
+        report("compress", time.perf_counter() - start, total)
+
+        start = time.perf_counter()
+        with MmapZipFile(archive) as zf:
+            count = len(zf)
+        report("open", time.perf_counter() - start, 0)
+
+        start = time.perf_counter()
+        read = 0
+        with open_reader(archive) as reader:
+            for name in reader.pages:
+                with reader.open(name) as stream:
+                    while True:
+                        chunk = stream.read(1024 * 1024)
+                        if not chunk:
+                            break
+                        read += len(chunk)
+        report("read", time.perf_counter() - start, read)
+
+        size = archive.stat().st_size
+        with open(archive, "rb") as f:
+            f.seek(max(size - 1024 * 1024, 0))
+            has_zip64 = ZIP64_EOCD_SIGNATURE in f.read()
+        needs_zip64 = count > ZIP64_COUNT_LIMIT or size >= ZIP64_LIMIT
+        print(f"\nArchive: {count} members, {size / 1e9:.2f} GB, ZIP64: {has_zip64}")
+        if count != args.pages or read != total or needs_zip64 and not has_zip64:
+            sys.exit("Archive does not round-trip")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ Convert to Comic Book - 将图片文件夹或压缩包转换为漫画书格式
 
 __author__ = "kongolou"
 
-from .converter import ComicBookConverter
+from .converter import ComicBookConverter, ConversionResult
 from .file_detector import detect_file_type
 from .exceptions import (
     ComicBookError,
@@ -21,6 +21,7 @@ except PackageNotFoundError:
 
 __all__ = [
     "ComicBookConverter",
+    "ConversionResult",
     "detect_file_type",
     "ComicBookError",
     "UnsupportedFormatError",
@@ -4,20 +4,238 @@
 该模块提供了处理各种压缩格式的抽象基类和具体实现，支持漫画书格式如CBZ、CBR、CB7、CBT等。
 """
 
+import gzip
+import io
+import lzma
+import os
+import sys
 import zipfile
 import tarfile
 import shutil
-from pathlib import Path
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from pathlib import Path, PurePosixPath
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import (
+    BinaryIO,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 import logging
 import tempfile
 import subprocess
 
+from .backends import select_backend, tar_compression_of
 from .exceptions import ArchiveError
+from .file_detector import (
+    COMPRESSED_IMAGE_EXTENSIONS,
+    IMAGE_EXTENSIONS,
+    RAR_SIGNATURES,
+    SEVENZIP_SIGNATURE,
+    detect_file_type,
+)
+from .utils import (
+    PeekableStream,
+    iter_files,
+    iter_reading_order,
+    natural_sort_key,
+    output_timestamp,
+    parse_size,
+    run_tool,
+    zip_output_timestamp,
+)
+from .zip_io import MmapZipFile, RawZipWriter, StreamZipWriter, iter_zip_stream
 
 logger = logging.getLogger(__name__)
 
+# TAR/CBT 支持的流压缩格式
+TAR_COMPRESSIONS = ("gz", "xz", "zst")
+
+# zstd 帧的魔数
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# 源数据超过该大小时，优先使用多线程的外部压缩工具
+THREADED_COMPRESSION_THRESHOLD = 32 * 1024 * 1024
+
+# 可用于 TAR 流压缩的多线程外部工具：压缩格式 -> [(命令, 额外参数)]
+THREADED_TAR_COMPRESSORS = {
+    "gz": [("pigz", ["-p", str(os.cpu_count() or 1)])],
+    "xz": [("xz", ["-T0"])],
+    "zst": [("zstd", ["-T0", "-q"])],
+}
+
+# 统一的压缩预设名称
+LEVEL_PRESETS = ("fast", "balanced", "max")
+
+# 各压缩算法的预设级别：
+# zip 为 zlib 级别（0 表示不压缩），7z 为 LZMA2 预设（0 表示不压缩），
+# rar 对应 -m0..-m5，gz/xz/zst 为 TAR 流压缩级别
+COMPRESSION_PRESETS = {
+    "zip": {"fast": 1, "balanced": 6, "max": 9},
+    "7z": {"fast": 1, "balanced": 5, "max": 9},
+    "rar": {"fast": 1, "balanced": 3, "max": 5},
+    "gz": {"fast": 1, "balanced": 6, "max": 9},
+    "xz": {"fast": 0, "balanced": 6, "max": 9},
+    "zst": {"fast": 1, "balanced": 3, "max": 19},
+}
+
+# 各压缩算法允许的显式级别范围（含两端）
+COMPRESSION_LEVEL_RANGES = {
+    "zip": (0, 9),
+    "7z": (0, 9),
+    "rar": (0, 5),
+    "gz": (0, 9),
+    "xz": (0, 9),
+    "zst": (1, 22),
+}
+
+# 7z 预设对应的 LZMA2 字典大小
+SEVENZIP_DICT_SIZES = {
+    0: 256 * 1024,
+    1: 1024 * 1024,
+    2: 2 * 1024 * 1024,
+    3: 4 * 1024 * 1024,
+    4: 4 * 1024 * 1024,
+    5: 16 * 1024 * 1024,
+    6: 16 * 1024 * 1024,
+    7: 32 * 1024 * 1024,
+    8: 64 * 1024 * 1024,
+    9: 64 * 1024 * 1024,
+}
+
+# CB7 默认的固实块大小：按阅读顺序每累计这么多字节的成员开始新的固实块，
+# 读取某一页只需解压它所在的块，而不是它之前的所有页面
+SOLID_BLOCK_SIZE = 4 * 1024 * 1024
+
+# 随机读取 CB7 页面时，在同一固实块中顺带解压并缓存的后续成员字节数上限
+SEVENZIP_READ_AHEAD = 4 * 1024 * 1024
+
+# 压缩包类型到压缩级别所属格式族的映射
+LEVEL_FAMILIES = {
+    "zip": "zip",
+    "cbz": "zip",
+    "7z": "7z",
+    "cb7": "7z",
+    "rar": "rar",
+    "cbr": "rar",
+    "tar": "tar",
+    "cbt": "tar",
+}
+
+# 压缩级别：预设名称、显式整数，或以格式族为键的映射
+Level = Union[str, int, Dict[str, Union[str, int]], None]
+
+# 解压 zstd 压缩的 TAR 时，内存中缓存的最大字节数，超过后溢出到临时文件
+_ZSTD_SPOOL_SIZE = 64 * 1024 * 1024
+
+# 无法廉价读取成员头时（流压缩的 TAR），按该倍数估算解压后的大小
+COMPRESSED_TAR_RATIO = 3
+
+# 同时运行的 rar 外部进程上限，与 --jobs 分开设置
+_rar_semaphore = threading.BoundedSemaphore(os.cpu_count() or 1)
+
+
+def set_rar_concurrency(limit: Optional[int] = None) -> None:
+    """
+    设置同时运行的 rar 外部进程数上限。
+
+    Args:
+        limit: 进程数上限，None 表示 CPU 核心数
+
+    Raises:
+        ValueError: limit 小于 1 时抛出
+    """
+    global _rar_semaphore
+    limit = limit if limit is not None else (os.cpu_count() or 1)
+    if limit < 1:
+        raise ValueError(f"RAR concurrency must be at least 1: {limit}")
+    _rar_semaphore = threading.BoundedSemaphore(limit)
+
+
+@contextmanager
+def rar_slot() -> Iterator[None]:
+    """占用一个 rar 外部进程槽位，退出时释放。"""
+    semaphore = _rar_semaphore
+    with semaphore:
+        yield
+
+
+def resolve_level(algorithm: str, level: Union[str, int, None]) -> Optional[int]:
+    """
+    将压缩预设或显式级别解析为指定压缩算法的数值级别。
+
+    Args:
+        algorithm: 压缩算法 (zip, 7z, rar, gz, xz, zst)
+        level: 预设名称 (fast, balanced, max)、显式整数或None
+
+    Returns:
+        数值级别，level 为None时返回None（使用算法默认值）
+
+    Raises:
+        ArchiveError: 预设名称未知或级别超出范围时抛出
+    """
+    if level is None:
+        return None
+    if isinstance(level, str):
+        if level.isdigit():
+            level = int(level)
+        elif level in LEVEL_PRESETS:
+            return COMPRESSION_PRESETS[algorithm][level]
+        else:
+            raise ArchiveError(f"Unknown compression preset: {level}")
+    low, high = COMPRESSION_LEVEL_RANGES[algorithm]
+    if not low <= level <= high:
+        raise ArchiveError(
+            f"Compression level {level} out of range for {algorithm} ({low}-{high})"
+        )
+    return level
+
+
+def resolve_solid_block(spec: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """
+    将 CB7 固实块设置解析为块的字节数上限和成员数上限。
+
+    Args:
+        spec: "solid" 表示整个压缩包为一个固实块，"off" 表示非固实（每个成员单独一个块），
+            "32p" 形式表示每块的页数，"16M" 形式表示每块的字节数，
+            None 表示默认的 SOLID_BLOCK_SIZE
+
+    Returns:
+        (块字节数上限, 块成员数上限)，None 表示不按该项分块
+
+    Raises:
+        ArchiveError: 设置无效时抛出
+    """
+    if spec is None:
+        return SOLID_BLOCK_SIZE, None
+    value = spec.strip().lower()
+    if value == "solid":
+        return None, None
+    if value in ("off", "none"):
+        return None, 1
+    if value.endswith("p") and value[:-1].strip().isdigit():
+        pages = int(value[:-1])
+        if pages < 1:
+            raise ArchiveError(f"Solid block must hold at least one page: {spec}")
+        return None, pages
+    try:
+        size = parse_size(value)
+    except ValueError:
+        raise ArchiveError(
+            f"Invalid solid block setting: {spec} (use solid, off, a page count "
+            f"like 32p or a size like 16M)"
+        )
+    if size < 1:
+        raise ArchiveError(f"Solid block size must be positive: {spec}")
+    return size, None
+
 
 class ArchiveHandler(ABC):
     """压缩包处理器抽象基类。
@@ -39,6 +257,61 @@ class ArchiveHandler(ABC):
         """
         pass
 
+    def extract_stream(self, fileobj: BinaryIO, output_path: Path) -> None:
+        """
+        从可定位的二进制流（如嵌套在另一个压缩包中的成员）解压到指定目录。
+
+        默认实现把流写入临时文件后调用 extract()，能直接读取文件对象的子类应覆盖此方法。
+
+        Args:
+            fileobj: 已定位到开头的可定位二进制流
+            output_path: 输出目录路径
+
+        Raises:
+            ArchiveError: 解压失败时抛出
+        """
+        fd, name = tempfile.mkstemp(prefix="ccb_stream_", dir=output_path.parent)
+        spill = Path(name)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                shutil.copyfileobj(fileobj, f, 1024 * 1024)
+            self.extract(spill, output_path)
+        finally:
+            spill.unlink(missing_ok=True)
+
+    def iter_stream(self, fileobj: BinaryIO) -> Iterator[Tuple[str, BinaryIO]]:
+        """
+        从不可定位的二进制流（如标准输入）按存储顺序读取文件成员。
+
+        Args:
+            fileobj: 二进制只读流
+
+        Yields:
+            (成员名, 成员内容的二进制流)，成员流只在取下一个成员之前有效
+
+        Raises:
+            ArchiveError: 当前格式不支持流式读取或读取失败时抛出
+        """
+        raise ArchiveError(f"{type(self).__name__} does not support stream input")
+
+    def write_stream(
+        self, members: Iterable[Tuple[str, BinaryIO]], fileobj: BinaryIO
+    ) -> int:
+        """
+        把成员按给定顺序写入不可定位的二进制流（如标准输出）。
+
+        Args:
+            members: (成员名, 成员内容的二进制流) 序列
+            fileobj: 二进制只写流，由调用方负责关闭
+
+        Returns:
+            写入的成员数
+
+        Raises:
+            ArchiveError: 当前格式不支持流式写入或写入失败时抛出
+        """
+        raise ArchiveError(f"{type(self).__name__} does not support stream output")
+
     @abstractmethod
     def compress(self, source_path: Path, archive_path: Path) -> None:
         """
@@ -66,6 +339,64 @@ class ArchiveHandler(ABC):
         """
         pass
 
+    def quick_check(self, archive_path: Path) -> bool:
+        """
+        快速检查压缩包结构，只读取文件头或目录，不解压数据。
+
+        默认实现调用 is_valid()，子类可提供更轻量的实现。
+
+        Args:
+            archive_path: 压缩包文件路径
+
+        Returns:
+            如果结构看起来有效则返回True，否则返回False
+        """
+        return self.is_valid(archive_path)
+
+    def uncompressed_sizes(self, archive_path: Path) -> List[int]:
+        """
+        从中央目录或成员头估算各成员解压后的大小，不解压数据。
+
+        默认实现把整个压缩包视为一个成员（漫画图片几乎不可再压缩），
+        子类可读取目录给出准确的大小。
+
+        Args:
+            archive_path: 压缩包文件路径
+
+        Returns:
+            各文件成员解压后的字节数列表
+        """
+        return [archive_path.stat().st_size]
+
+    def describe(self, operation: str = "read") -> str:
+        """
+        返回实际执行某种操作的实现名称，用于日志和转换计划。
+
+        Args:
+            operation: "read" 或 "write"
+
+        Returns:
+            实现名称
+        """
+        return type(self).__name__
+
+    def open_reader(self, archive_path: Path) -> "ArchiveReader":
+        """
+        打开压缩包的随机访问读取器。
+
+        Args:
+            archive_path: 压缩包文件路径
+
+        Returns:
+            已建立成员索引的 ArchiveReader 实例
+
+        Raises:
+            ArchiveError: 当前格式不支持随机访问或打开失败时抛出
+        """
+        raise ArchiveError(
+            f"{type(self).__name__} does not support random access reading"
+        )
+
 
 class ZipHandler(ArchiveHandler):
     """ZIP/CBZ 格式处理器。
@@ -73,6 +404,18 @@ class ZipHandler(ArchiveHandler):
     处理标准ZIP压缩格式和漫画书CBZ格式。
     """
 
+    def __init__(self, level: Union[str, int, None] = None):
+        """初始化 ZIP 处理器。
+
+        Args:
+            level: 压缩预设 (fast, balanced, max) 或 deflate 级别 0-9，0 表示仅存储，
+                None 使用 zlib 默认级别
+
+        Raises:
+            ArchiveError: 级别无效时抛出
+        """
+        self.level = resolve_level("zip", level)
+
     def extract(self, archive_path: Path, output_path: Path) -> None:
         """解压 ZIP/CBZ 文件到指定目录。
 
@@ -91,9 +434,67 @@ class ZipHandler(ArchiveHandler):
         except Exception as e:
             raise ArchiveError(f"Failed to extract ZIP archive {archive_path}: {e}")
 
+    def extract_stream(self, fileobj: BinaryIO, output_path: Path) -> None:
+        """从可定位的二进制流解压 ZIP/CBZ 数据，不写入中间文件。
+
+        Args:
+            fileobj: 已定位到开头的可定位二进制流
+            output_path: 输出目录路径
+
+        Raises:
+            ArchiveError: 解压失败时抛出
+        """
+        try:
+            output_path.mkdir(parents=True, exist_ok=True)
+            with zipfile.ZipFile(fileobj, "r") as zipf:
+                zipf.extractall(output_path)
+        except Exception as e:
+            raise ArchiveError(f"Failed to extract ZIP stream to {output_path}: {e}")
+
+    def iter_stream(self, fileobj: BinaryIO) -> Iterator[Tuple[str, BinaryIO]]:
+        """按本地文件头顺序读取 ZIP/CBZ 流中的成员，不需要中央目录。
+
+        Args:
+            fileobj: 二进制只读流
+
+        Yields:
+            (成员名, 成员内容的二进制流)
+
+        Raises:
+            ArchiveError: 读取失败时抛出
+        """
+        for name, data in iter_zip_stream(fileobj):
+            yield name, io.BytesIO(data)
+
+    def write_stream(
+        self, members: Iterable[Tuple[str, BinaryIO]], fileobj: BinaryIO
+    ) -> int:
+        """使用数据描述符把成员写入不可定位的流，得到有效的 ZIP/CBZ。
+
+        Args:
+            members: (成员名, 成员内容的二进制流) 序列
+            fileobj: 二进制只写流
+
+        Returns:
+            写入的成员数
+
+        Raises:
+            ArchiveError: 写入失败时抛出
+        """
+        date_time = zip_output_timestamp()
+        count = 0
+        with StreamZipWriter(fileobj, self.level) as writer:
+            for name, stream in members:
+                writer.write_stream(name, stream, date_time=date_time)
+                count += 1
+        return count
+
     def compress(self, source_path: Path, archive_path: Path) -> None:
         """将源文件或文件夹压缩为 ZIP/CBZ 格式。
 
+        成员按阅读顺序写入（ComicInfo.xml、按自然顺序排列的页面、其他文件），
+        修改时间统一为 zip_output_timestamp()，相同输入得到相同的输出。
+
         Args:
             source_path: 源文件或文件夹路径
             archive_path: 输出 ZIP/CBZ 文件路径
@@ -107,14 +508,12 @@ class ZipHandler(ArchiveHandler):
             # 如果输出文件已存在，先删除（Windows 上可能需要）
             if archive_path.exists():
                 archive_path.unlink()
-            with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-                if source_path.is_file():
-                    zipf.write(source_path, source_path.name)
-                elif source_path.is_dir():
-                    for file_path in source_path.rglob("*"):
-                        if file_path.is_file():
-                            arcname = file_path.relative_to(source_path)
-                            zipf.write(file_path, arcname)
+            # RawZipWriter 按 1 MB 分块流式压缩，并在成员大小、偏移或成员数
+            # 超出限制时自动写入 ZIP64 结构
+            date_time = zip_output_timestamp()
+            with RawZipWriter(archive_path, self.level) as writer:
+                for file_path, arcname in iter_reading_order(source_path):
+                    writer.write_file(file_path, arcname, date_time=date_time)
             logger.debug(f"Compressed {source_path} to {archive_path}")
         except Exception as e:
             raise ArchiveError(f"Failed to create ZIP archive {archive_path}: {e}")
@@ -135,13 +534,190 @@ class ZipHandler(ArchiveHandler):
         except Exception:
             return False
 
+    def quick_check(self, archive_path: Path) -> bool:
+        """只读取 ZIP 中央目录结尾记录，快速检查 ZIP/CBZ 文件。
+
+        Args:
+            archive_path: ZIP/CBZ 压缩包路径
+
+        Returns:
+            如果结构有效返回True，否则返回False
+        """
+        return zipfile.is_zipfile(archive_path)
+
+    def uncompressed_sizes(self, archive_path: Path) -> List[int]:
+        """从中央目录读取 ZIP/CBZ 成员解压后的大小。
+
+        Args:
+            archive_path: ZIP/CBZ 压缩包路径
+
+        Returns:
+            各文件成员解压后的字节数列表
+        """
+        try:
+            with MmapZipFile(archive_path) as zf:
+                return [e.file_size for e in zf if not e.is_dir()]
+        except ArchiveError:
+            return super().uncompressed_sizes(archive_path)
+
+    def open_reader(self, archive_path: Path) -> "ArchiveReader":
+        """打开 ZIP/CBZ 文件的随机访问读取器。
+
+        Args:
+            archive_path: ZIP/CBZ 压缩包路径
+
+        Returns:
+            ZipReader 实例
+        """
+        return ZipReader(archive_path)
+
+
+def _iter_source_files(source_path: Path) -> Iterator[Path]:
+    """遍历源文件或文件夹下的所有文件。"""
+    if source_path.is_file():
+        yield source_path
+    elif source_path.is_dir():
+        yield from iter_files(source_path)
+
+
+def _zstandard_module():
+    """导入可选的 zstandard 库，未安装时返回None。"""
+    try:
+        import zstandard
+
+        return zstandard
+    except ImportError:
+        return None
+
+
+def _decompress_zstd(archive_path: Path) -> BinaryIO:
+    """
+    将 zstd 压缩的文件解压到可随机访问的临时文件中。
+
+    优先使用 zstandard 库，否则调用外部命令 zstd。
+    """
+    zstandard = _zstandard_module()
+    if zstandard is not None:
+        spool = tempfile.SpooledTemporaryFile(max_size=_ZSTD_SPOOL_SIZE)
+        with open(archive_path, "rb") as src:
+            zstandard.ZstdDecompressor().copy_stream(src, spool)
+    else:
+        tool = shutil.which("zstd")
+        if tool is None:
+            raise ArchiveError(
+                "zstandard library or zstd command is required for zstd-compressed CBT"
+            )
+        spool = tempfile.TemporaryFile()
+        subprocess.run(
+            [tool, "-dcq", str(archive_path)],
+            check=True,
+            stdout=spool,
+            stderr=subprocess.PIPE,
+        )
+    spool.seek(0)
+    return spool
+
+
+def _open_tar(archive_path: Path) -> Tuple[tarfile.TarFile, Optional[BinaryIO]]:
+    """
+    以只读方式打开 TAR 文件，自动识别 gz/bz2/xz/zst 压缩。
+
+    Returns:
+        (TarFile 实例, 需要由调用方在关闭 TarFile 后关闭的临时文件或None)
+    """
+    with open(archive_path, "rb") as f:
+        magic = f.read(len(ZSTD_MAGIC))
+    if magic != ZSTD_MAGIC:
+        return tarfile.open(archive_path, "r:*"), None
+    if sys.version_info >= (3, 14):
+        return tarfile.open(archive_path, "r:zst"), None
+    spool = _decompress_zstd(archive_path)
+    try:
+        return tarfile.open(fileobj=spool, mode="r:"), spool
+    except Exception:
+        spool.close()
+        raise
+
+
+@contextmanager
+def open_tar(archive_path: Path) -> Iterator[tarfile.TarFile]:
+    """
+    以只读方式打开 TAR 文件的上下文管理器，自动识别 gz/bz2/xz/zst 压缩。
+
+    Args:
+        archive_path: TAR/CBT 文件路径
+
+    Yields:
+        TarFile 实例
+    """
+    tar, spool = _open_tar(archive_path)
+    try:
+        yield tar
+    finally:
+        tar.close()
+        if spool is not None:
+            spool.close()
+
+
+def _extract_tar(tar: tarfile.TarFile, output_path: Path) -> None:
+    """
+    解压 TAR 的全部成员，拒绝逃出输出目录的成员。
+
+    Python 提供解压过滤器时使用 "data" 过滤器（拒绝绝对路径、.. 和指向目录外的链接，
+    去掉设备文件和特殊权限）；否则只解压普通文件和目录，并逐个校验成员路径。
+
+    Args:
+        tar: 以随机访问模式打开的 TarFile
+        output_path: 输出目录路径
+
+    Raises:
+        ArchiveError: 成员路径逃出输出目录时抛出
+    """
+    if hasattr(tarfile, "data_filter"):
+        tar.extractall(output_path, filter="data")
+        return
+    root = os.path.realpath(output_path)
+    members = []
+    for member in tar.getmembers():
+        if not (member.isfile() or member.isdir()):
+            logger.warning(f"Skipping TAR member that is not a file: {member.name}")
+            continue
+        target = os.path.realpath(os.path.join(root, member.name))
+        if os.path.commonpath([root, target]) != root:
+            raise ArchiveError(f"TAR member escapes the output folder: {member.name}")
+        members.append(member)
+    tar.extractall(output_path, members=members)
+
 
 class TarHandler(ArchiveHandler):
     """TAR/CBT 格式处理器。
 
     处理标准TAR压缩格式和漫画书CBT格式。
+    支持输出 gzip、xz 或 zstd 压缩的 TAR，读取时自动识别压缩格式。
     """
 
+    def __init__(
+        self,
+        compression: Optional[str] = None,
+        level: Union[str, int, None] = None,
+    ):
+        """初始化 TAR 处理器。
+
+        Args:
+            compression: 输出时使用的流压缩格式 (gz, xz, zst)，None 或 "none" 表示不压缩
+            level: 流压缩的预设 (fast, balanced, max) 或对应算法的显式级别，
+                None 时根据内容自动选择
+
+        Raises:
+            ArchiveError: 压缩格式不被支持或级别无效时抛出
+        """
+        if compression == "none":
+            compression = None
+        if compression is not None and compression not in TAR_COMPRESSIONS:
+            raise ArchiveError(f"Unsupported TAR compression: {compression}")
+        self.compression = compression
+        self.level = resolve_level(compression, level) if compression else None
+
     def extract(self, archive_path: Path, output_path: Path) -> None:
         """解压 TAR/CBT 文件到指定目录。
 
@@ -154,15 +730,147 @@ class TarHandler(ArchiveHandler):
         """
         try:
             output_path.mkdir(parents=True, exist_ok=True)
-            with tarfile.open(archive_path, "r:*") as tar:
-                tar.extractall(output_path)
+            with open_tar(archive_path) as tar:
+                _extract_tar(tar, output_path)
             logger.debug(f"Extracted {archive_path} to {output_path}")
         except Exception as e:
             raise ArchiveError(f"Failed to extract TAR archive {archive_path}: {e}")
 
+    def extract_stream(self, fileobj: BinaryIO, output_path: Path) -> None:
+        """从可定位的二进制流解压 TAR/CBT 数据（支持 gz、bz2、xz 流压缩）。
+
+        Zstandard 压缩的数据需要先解压为 TAR，回退到写入临时文件的默认实现。
+
+        Args:
+            fileobj: 已定位到开头的可定位二进制流
+            output_path: 输出目录路径
+
+        Raises:
+            ArchiveError: 解压失败时抛出
+        """
+        magic = fileobj.read(len(ZSTD_MAGIC))
+        fileobj.seek(0)
+        if magic == ZSTD_MAGIC:
+            super().extract_stream(fileobj, output_path)
+            return
+        try:
+            output_path.mkdir(parents=True, exist_ok=True)
+            with tarfile.open(fileobj=fileobj, mode="r:*") as tar:
+                _extract_tar(tar, output_path)
+        except Exception as e:
+            raise ArchiveError(f"Failed to extract TAR stream to {output_path}: {e}")
+
+    def iter_stream(self, fileobj: BinaryIO) -> Iterator[Tuple[str, BinaryIO]]:
+        """按顺序读取 TAR/CBT 流中的成员，自动识别 gz、bz2、xz、zst 流压缩。
+
+        Args:
+            fileobj: 二进制只读流
+
+        Yields:
+            (成员名, 成员内容的二进制流)
+
+        Raises:
+            ArchiveError: 读取失败或缺少 zstd 支持时抛出
+        """
+        stream = (
+            fileobj if isinstance(fileobj, PeekableStream) else PeekableStream(fileobj)
+        )
+        mode = "r|*"
+        if stream.peek(len(ZSTD_MAGIC)) == ZSTD_MAGIC:
+            if sys.version_info >= (3, 14):
+                mode = "r|zst"
+            elif _zstandard_module() is not None:
+                stream = _zstandard_module().ZstdDecompressor().stream_reader(stream)
+                mode = "r|"
+            else:
+                raise ArchiveError(
+                    "zstandard library is required for zstd-compressed CBT streams"
+                )
+        try:
+            with tarfile.open(fileobj=stream, mode=mode) as tar:
+                for info in tar:
+                    if info.isfile():
+                        yield info.name, tar.extractfile(info)
+        except tarfile.TarError as e:
+            raise ArchiveError(f"Failed to read TAR stream: {e}")
+
+    def write_stream(
+        self, members: Iterable[Tuple[str, BinaryIO]], fileobj: BinaryIO
+    ) -> int:
+        """把成员写入不可定位的流，按 compression 进行流压缩。
+
+        TAR 头中需要成员大小，因此每个成员先读入内存，内存占用以最大的成员为上限。
+        未指定级别时使用 fast 预设：流中的页面大多是已压缩的图片。
+
+        Args:
+            members: (成员名, 成员内容的二进制流) 序列
+            fileobj: 二进制只写流
+
+        Returns:
+            写入的成员数
+
+        Raises:
+            ArchiveError: 写入失败或缺少 zstd 支持时抛出
+        """
+        mtime = int(output_timestamp())
+        count = 0
+        try:
+            with self._compressed_writer(fileobj) as out:
+                with tarfile.open(fileobj=out, mode="w|") as tar:
+                    for name, stream in members:
+                        data = stream.read()
+                        info = tarfile.TarInfo(name)
+                        info.size = len(data)
+                        info.mtime = mtime
+                        info.mode = 0o644
+                        tar.addfile(info, io.BytesIO(data))
+                        count += 1
+            fileobj.flush()
+        except tarfile.TarError as e:
+            raise ArchiveError(f"Failed to write TAR stream: {e}")
+        return count
+
+    @contextmanager
+    def _compressed_writer(self, fileobj: BinaryIO) -> Iterator[BinaryIO]:
+        """按 compression 包装输出流，退出时结束压缩流但不关闭 fileobj。"""
+        if self.compression is None:
+            yield fileobj
+            return
+        level = self.level
+        if level is None:
+            level = COMPRESSION_PRESETS[self.compression]["fast"]
+        if self.compression == "gz":
+            writer = gzip.GzipFile(
+                fileobj=fileobj,
+                mode="wb",
+                compresslevel=level,
+                mtime=int(output_timestamp()),
+            )
+        elif self.compression == "xz":
+            writer = lzma.LZMAFile(fileobj, "wb", preset=level)
+        elif sys.version_info >= (3, 14):
+            from compression import zstd
+
+            writer = zstd.ZstdFile(fileobj, "wb", level=level)
+        elif _zstandard_module() is not None:
+            writer = (
+                _zstandard_module()
+                .ZstdCompressor(level=level, threads=-1)
+                .stream_writer(fileobj, closefd=False)
+            )
+        else:
+            raise ArchiveError(
+                "zstandard library is required for zstd-compressed CBT streams"
+            )
+        with writer:
+            yield writer
+
     def compress(self, source_path: Path, archive_path: Path) -> None:
         """将源文件或文件夹压缩为 TAR/CBT 格式。
 
+        未指定压缩格式时输出普通 TAR；否则按 compression 进行流压缩，
+        源数据较大且存在多线程外部压缩工具时使用外部工具。
+
         Args:
             source_path: 源文件或文件夹路径
             archive_path: 输出 TAR/CBT 文件路径
@@ -176,15 +884,122 @@ class TarHandler(ArchiveHandler):
             # 如果输出文件已存在，先删除（Windows 上可能需要）
             if archive_path.exists():
                 archive_path.unlink()
-            with tarfile.open(archive_path, "w") as tar:
-                if source_path.is_file():
-                    tar.add(source_path, arcname=source_path.name)
-                elif source_path.is_dir():
-                    tar.add(source_path, arcname=source_path.name, recursive=True)
+            if self.compression is None:
+                with tarfile.open(archive_path, "w") as tar:
+                    self._add_source(tar, source_path)
+            else:
+                self._compress_stream(source_path, archive_path)
             logger.debug(f"Compressed {source_path} to {archive_path}")
         except Exception as e:
             raise ArchiveError(f"Failed to create TAR archive {archive_path}: {e}")
 
+    @staticmethod
+    def _add_source(tar: tarfile.TarFile, source_path: Path) -> None:
+        """按阅读顺序添加源文件或文件夹，统一成员的修改时间和属主。"""
+        mtime = int(output_timestamp())
+
+        def _normalize(info: tarfile.TarInfo) -> tarfile.TarInfo:
+            info.mtime = mtime
+            info.uid = info.gid = 0
+            info.uname = info.gname = ""
+            return info
+
+        if source_path.is_file():
+            tar.add(source_path, arcname=source_path.name, filter=_normalize)
+        elif source_path.is_dir():
+            tar.add(
+                source_path,
+                arcname=source_path.name,
+                recursive=False,
+                filter=_normalize,
+            )
+            for file_path, arcname in iter_reading_order(source_path):
+                tar.add(
+                    file_path,
+                    arcname=f"{source_path.name}/{arcname}",
+                    filter=_normalize,
+                )
+
+    def _choose_level(self, source_path: Path) -> Tuple[int, int]:
+        """
+        根据源数据选择压缩级别。
+
+        显式指定了级别时直接使用；否则如果源数据主要（按字节数超过一半）由已压缩的图片组成，
+        流压缩几乎无法减小体积，此时使用 fast 预设以避免浪费 CPU，其余情况使用 balanced 预设。
+
+        Returns:
+            (压缩级别, 源数据总字节数)
+        """
+        total = 0
+        compressed = 0
+        for file_path in _iter_source_files(source_path):
+            size = file_path.stat().st_size
+            total += size
+            if file_path.suffix.lower() in COMPRESSED_IMAGE_EXTENSIONS:
+                compressed += size
+        if self.level is not None:
+            return self.level, total
+        presets = COMPRESSION_PRESETS[self.compression]
+        if total and compressed * 2 > total:
+            return presets["fast"], total
+        return presets["balanced"], total
+
+    def _compress_stream(self, source_path: Path, archive_path: Path) -> None:
+        level, total = self._choose_level(source_path)
+
+        if total >= THREADED_COMPRESSION_THRESHOLD:
+            for tool, extra_args in THREADED_TAR_COMPRESSORS[self.compression]:
+                tool_path = shutil.which(tool)
+                if tool_path:
+                    cmd = [tool_path, f"-{level}", *extra_args, "-c"]
+                    self._compress_external(cmd, source_path, archive_path)
+                    return
+
+        if self.compression == "gz":
+            with tarfile.open(archive_path, "w:gz", compresslevel=level) as tar:
+                self._add_source(tar, source_path)
+        elif self.compression == "xz":
+            with tarfile.open(archive_path, "w:xz", preset=level) as tar:
+                self._add_source(tar, source_path)
+        elif sys.version_info >= (3, 14):
+            with tarfile.open(archive_path, "w:zst", level=level) as tar:
+                self._add_source(tar, source_path)
+        elif _zstandard_module() is not None:
+            zstandard = _zstandard_module()
+            # threads=-1 使用所有 CPU 核心
+            cctx = zstandard.ZstdCompressor(level=level, threads=-1)
+            with open(archive_path, "wb") as f:
+                with cctx.stream_writer(f, closefd=False) as writer:
+                    with tarfile.open(fileobj=writer, mode="w|") as tar:
+                        self._add_source(tar, source_path)
+        elif shutil.which("zstd"):
+            cmd = [shutil.which("zstd"), f"-{level}", "-T0", "-q", "-c"]
+            self._compress_external(cmd, source_path, archive_path)
+        else:
+            raise ArchiveError(
+                "zstandard library or zstd command is required for zstd-compressed CBT"
+            )
+
+    def _compress_external(
+        self, cmd: List[str], source_path: Path, archive_path: Path
+    ) -> None:
+        """将 TAR 流通过管道写入外部压缩命令。"""
+        with open(archive_path, "wb") as out, tempfile.TemporaryFile() as err:
+            proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=out, stderr=err)
+            try:
+                with tarfile.open(fileobj=proc.stdin, mode="w|") as tar:
+                    self._add_source(tar, source_path)
+            finally:
+                proc.stdin.close()
+                returncode = proc.wait()
+            if returncode != 0:
+                err.seek(0)
+                raise ArchiveError(
+                    f"{Path(cmd[0]).name} exited with code {returncode}: "
+                    f"{err.read().decode(errors='ignore').strip()}"
+                )
+        logger.debug(f"Compressed {source_path} with external tool {cmd}")
+
     def is_valid(self, archive_path: Path) -> bool:
         """验证 TAR/CBT 文件是否有效。
 
@@ -195,27 +1010,80 @@ class TarHandler(ArchiveHandler):
             如果文件有效返回True，否则返回False
         """
         try:
-            with tarfile.open(archive_path, "r:*") as tar:
+            with open_tar(archive_path) as tar:
                 tar.getmembers()
             return True
         except Exception:
             return False
 
+    def quick_check(self, archive_path: Path) -> bool:
+        """只读取第一个成员头，快速检查 TAR/CBT 文件。
 
-class RarHandler(ArchiveHandler):
-    """RAR/CBR 格式处理器。
+        Args:
+            archive_path: TAR/CBT 压缩包路径
 
-    处理标准RAR压缩格式和漫画书CBR格式。
-    需要手动安装WinRAR软件，将其安装路径添加到环境变量Path，以调用rar命令。
-    需要安装rarfile库，用于在没有外部命令rar时提供基础的解压缩功能。
-    """
+        Returns:
+            如果结构有效返回True，否则返回False
+        """
+        try:
+            with open_tar(archive_path) as tar:
+                return tar.next() is not None
+        except Exception:
+            return False
 
-    def __init__(self):
-        """初始化 RAR 处理器。
+    def uncompressed_sizes(self, archive_path: Path) -> List[int]:
+        """读取 TAR/CBT 成员头获取成员大小。
 
-        检测外部命令rar，否则尝试导入rarfile库。
-        """
-        self._external_tool = shutil.which("rar")
+        流压缩的 TAR 需要解压整个流才能读到全部成员头，因此按 COMPRESSED_TAR_RATIO 估算。
+
+        Args:
+            archive_path: TAR/CBT 压缩包路径
+
+        Returns:
+            各文件成员解压后的字节数列表
+        """
+        try:
+            if tar_compression_of(archive_path) is not None:
+                return [archive_path.stat().st_size * COMPRESSED_TAR_RATIO]
+            with tarfile.open(archive_path, "r:") as tar:
+                return [m.size for m in tar if m.isfile()]
+        except (OSError, tarfile.TarError):
+            return super().uncompressed_sizes(archive_path)
+
+    def open_reader(self, archive_path: Path) -> "ArchiveReader":
+        """打开 TAR/CBT 文件的随机访问读取器。
+
+        Args:
+            archive_path: TAR/CBT 压缩包路径
+
+        Returns:
+            TarReader 实例
+        """
+        return TarReader(archive_path)
+
+
+class RarHandler(ArchiveHandler):
+    """RAR/CBR 格式处理器。
+
+    处理标准RAR压缩格式和漫画书CBR格式。
+    需要手动安装WinRAR软件，将其安装路径添加到环境变量Path，以调用rar命令。
+    需要安装rarfile库，用于在没有外部命令rar时提供基础的解压缩功能。
+    """
+
+    def __init__(self, level: Union[str, int, None] = None):
+        """初始化 RAR 处理器。
+
+        检测外部命令rar，否则尝试导入rarfile库。
+
+        Args:
+            level: 压缩预设 (fast, balanced, max) 或 rar 的 -m0..-m5 级别，
+                None 使用 rar 默认级别
+
+        Raises:
+            ArchiveError: 级别无效时抛出
+        """
+        self.level = resolve_level("rar", level)
+        self._external_tool = shutil.which("rar")
         if self._external_tool:
             logger.debug(f"Found external rar command: {self._external_tool}")
         else:
@@ -229,6 +1097,38 @@ class RarHandler(ArchiveHandler):
             except ImportError:
                 logger.warning("rarfile not installed, RAR/CBR support unavailable")
 
+    def _run_variants(self, cmds: List[List[str]], timeout: float, action: str) -> None:
+        """依次尝试命令变体（-switch 和 /switch 两种写法），直到有一个成功。
+
+        每次运行都占用一个 RAR 并发槽位，输出以流式读取。
+
+        Raises:
+            ArchiveError: 超时、被取消或所有变体都失败时抛出
+        """
+        last_err = None
+        for cmd in cmds:
+            try:
+                with rar_slot():
+                    rc, output = run_tool(cmd, timeout)
+            except subprocess.TimeoutExpired:
+                # 超时直接失败，避免再次长时间等待
+                raise ArchiveError(f"rar timed out after {timeout}s: {action}")
+            except InterruptedError:
+                raise ArchiveError(f"rar was cancelled: {action}")
+            except OSError as e:
+                rc, output = -1, str(e)
+            if rc == 0:
+                return
+            # record last non-empty error
+            last_err = output or last_err
+
+        # all external attempts failed
+        msg = (
+            last_err
+            or f"external tool exited with non-zero code using {self._external_tool}"
+        ).strip()
+        raise ArchiveError(f"Failed to {action}: {msg}")
+
     def extract(self, archive_path: Path, output_path: Path) -> None:
         """解压 RAR/CBR 文件到指定目录。
 
@@ -266,53 +1166,8 @@ class RarHandler(ArchiveHandler):
                     str(output_path),
                 ],
             ]
-
-            # helper to run a single command and return (returncode, stdout, stderr, timeout_flag)
-            def _run(cmd, timeout_sec=120):
-                try:
-                    completed = subprocess.run(
-                        cmd,
-                        check=False,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        timeout=timeout_sec,
-                    )
-                    out_s = (
-                        completed.stdout.decode(errors="ignore")
-                        if completed.stdout
-                        else ""
-                    )
-                    err_s = (
-                        completed.stderr.decode(errors="ignore")
-                        if completed.stderr
-                        else ""
-                    )
-                    return completed.returncode, out_s, err_s, False
-                except subprocess.TimeoutExpired as e:
-                    return -1, "", f"Timeout after {e.timeout}s", True
-                except FileNotFoundError as e:
-                    return -2, "", str(e), False
-
-            last_err = None
-            for cmd in cmds:
-                rc, out, err, timed_out = _run(cmd)
-                if rc == 0:
-                    logger.debug(
-                        f"Extracted {archive_path} to {output_path} using external tool {cmd}"
-                    )
-                    return
-                # if timed out, raise immediately (avoid long waits)
-                if timed_out:
-                    raise ArchiveError(f"External extractor timeout for {archive_path}")
-                # record last non-empty error
-                last_err = err or out or last_err
-
-            # all external attempts failed
-            msg = (
-                last_err
-                or f"external tool exited with non-zero code using {self._external_tool}"
-            ).strip()
-            logger.debug(f"External extractor attempts failed: {msg}")
+            self._run_variants(cmds, 120, f"extract {archive_path}")
+            logger.debug(f"Extracted {archive_path} to {output_path} using rar")
 
         # Fallback to rarfile library if present
         elif self._has_rarfile:
@@ -344,11 +1199,17 @@ class RarHandler(ArchiveHandler):
                 "RAR compression requires rar command. Install WinRAR or use ZIP/CBZ instead."
             )
 
+        # 指定级别时同时启用与 CPU 核心数相同的压缩线程
+        switches = []
+        if self.level is not None:
+            switches = [f"m{self.level}", f"mt{os.cpu_count() or 1}"]
+
         cmds = [
             [
                 self._external_tool,
                 "a",
                 "-r",
+                *(f"-{switch}" for switch in switches),
                 str(archive_path),
                 str(source_path),
             ],
@@ -356,44 +1217,14 @@ class RarHandler(ArchiveHandler):
                 self._external_tool,
                 "a",
                 "/r",
+                *(f"/{switch}" for switch in switches),
                 str(archive_path),
                 str(source_path),
             ],
         ]
 
-        # helper to run a single command and return (returncode, stdout, stderr, timeout_flag)
-        def _run(cmd, timeout_sec=300):
-            try:
-                completed = subprocess.run(
-                    cmd,
-                    check=False,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    timeout=timeout_sec,
-                )
-                out_s = completed.stdout.decode(errors="ignore") if completed.stdout else ""
-                err_s = completed.stderr.decode(errors="ignore") if completed.stderr else ""
-                return completed.returncode, out_s, err_s, False
-            except subprocess.TimeoutExpired as e:
-                return -1, "", f"Timeout after {e.timeout}s", True
-            except FileNotFoundError as e:
-                return -2, "", str(e), False
-
-        last_err = None
-        for cmd in cmds:
-            rc, out, err, timed_out = _run(cmd)
-            if rc == 0:
-                logger.debug(f"Compressed {source_path} to {archive_path} using external tool {cmd}")
-                return
-            # if timed out, raise immediately
-            if timed_out:
-                raise ArchiveError(f"External compressor timeout for {source_path}")
-            # record last non-empty error
-            last_err = err or out or last_err
-
-        # all external attempts failed
-        msg = (last_err or f"external tool exited with non-zero code using {self._external_tool}").strip()
-        raise ArchiveError(f"Failed to compress {source_path} to {archive_path}: {msg}")
+        self._run_variants(cmds, 300, f"compress {source_path} to {archive_path}")
+        logger.debug(f"Compressed {source_path} to {archive_path} using rar")
 
     def is_valid(self, archive_path: Path) -> bool:
         """验证 RAR/CBR 文件是否有效。
@@ -407,33 +1238,16 @@ class RarHandler(ArchiveHandler):
         # If external tool available, use it to test the archive
         if self._external_tool:
             try:
-                # try a few variants for the test command
-                test_cmds = [[self._external_tool, "t", str(archive_path)]]
-                for cmd in test_cmds:
-                    try:
-                        completed = subprocess.run(
-                            cmd,
-                            check=False,
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.PIPE,
-                            timeout=30,
-                        )
-                        if completed.returncode == 0:
-                            return True
-                    except subprocess.TimeoutExpired:
-                        logger.warning(
-                            f"External extractor timeout while testing archive: {archive_path}"
-                        )
-                        return False
-                logger.debug("External tool test commands all returned non-zero")
-                return False
+                with rar_slot():
+                    rc, _ = run_tool([self._external_tool, "t", str(archive_path)], 30)
+                return rc == 0
             except subprocess.TimeoutExpired:
                 logger.warning(
                     f"External extractor timeout while testing archive: {archive_path}"
                 )
                 return False
-            except FileNotFoundError:
-                return False
+            except InterruptedError:
+                raise
             except Exception as e:
                 logger.debug(f"External extractor test error for {archive_path}: {e}")
                 return False
@@ -448,6 +1262,68 @@ class RarHandler(ArchiveHandler):
         else:
             return False
 
+    def quick_check(self, archive_path: Path) -> bool:
+        """只检查文件头签名，快速检查 RAR/CBR 文件（不调用外部命令）。
+
+        Args:
+            archive_path: RAR/CBR 压缩包路径
+
+        Returns:
+            如果签名匹配 RAR4 或 RAR5 返回True，否则返回False
+        """
+        try:
+            with open(archive_path, "rb") as f:
+                head = f.read(8)
+        except OSError:
+            return False
+        return head.startswith(RAR_SIGNATURES)
+
+    def describe(self, operation: str = "read") -> str:
+        """返回实现名称，标明使用外部命令 rar 还是 rarfile 库。"""
+        if self._external_tool:
+            return "RarHandler (rar)"
+        return "RarHandler (rarfile)"
+
+    def uncompressed_sizes(self, archive_path: Path) -> List[int]:
+        """读取 RAR/CBR 成员头获取成员大小（需要 rarfile 库）。
+
+        Args:
+            archive_path: RAR/CBR 压缩包路径
+
+        Returns:
+            各文件成员解压后的字节数列表
+        """
+        if getattr(self, "_has_rarfile", False):
+            try:
+                with self.rarfile.RarFile(archive_path) as rar:
+                    return [i.file_size for i in rar.infolist() if not i.is_dir()]
+            except Exception as e:
+                logger.debug(f"Failed to read RAR headers of {archive_path}: {e}")
+        return super().uncompressed_sizes(archive_path)
+
+    def open_reader(self, archive_path: Path) -> "ArchiveReader":
+        """打开 RAR/CBR 文件的随机访问读取器。
+
+        优先使用 rarfile 库，否则通过外部命令 rar 逐个读取成员。
+
+        Args:
+            archive_path: RAR/CBR 压缩包路径
+
+        Returns:
+            RarReader 实例
+
+        Raises:
+            ArchiveError: 既没有 rar 命令也没有 rarfile 库时抛出
+        """
+        rarfile = self.rarfile if getattr(self, "_has_rarfile", False) else None
+        if rarfile is None and not self._external_tool:
+            raise ArchiveError(
+                "rar command or rarfile library is required for RAR/CBR support"
+            )
+        return RarReader(
+            archive_path, rarfile=rarfile, external_tool=self._external_tool
+        )
+
 
 class SevenZipHandler(ArchiveHandler):
     """7Z/CB7 格式处理器。
@@ -456,11 +1332,29 @@ class SevenZipHandler(ArchiveHandler):
     需要安装py7zr库。
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        level: Union[str, int, None] = None,
+        solid_block_size: Optional[int] = SOLID_BLOCK_SIZE,
+        solid_block_pages: Optional[int] = None,
+    ):
         """初始化7Z处理器。
 
         尝试导入py7zr库，如果导入失败则禁用7Z支持。
+        两个固实块上限都为None时整个压缩包为一个固实块；solid_block_pages 为 1 时输出非固实压缩包。
+
+        Args:
+            level: 压缩预设 (fast, balanced, max) 或 LZMA2 预设 0-9，0 表示仅存储，
+                None 使用 py7zr 默认设置
+            solid_block_size: 每个固实块包含的成员字节数上限，None 表示不按字节数分块
+            solid_block_pages: 每个固实块包含的成员数上限，None 表示不按成员数分块
+
+        Raises:
+            ArchiveError: 级别无效时抛出
         """
+        self.level = resolve_level("7z", level)
+        self.solid_block_size = solid_block_size
+        self.solid_block_pages = solid_block_pages
         self._has_py7zr = False
         try:
             import py7zr
@@ -490,9 +1384,31 @@ class SevenZipHandler(ArchiveHandler):
         except Exception as e:
             raise ArchiveError(f"Failed to extract 7Z archive {archive_path}: {e}")
 
+    def extract_stream(self, fileobj: BinaryIO, output_path: Path) -> None:
+        """从可定位的二进制流解压 7Z/CB7 数据，不写入中间文件。
+
+        Args:
+            fileobj: 已定位到开头的可定位二进制流
+            output_path: 输出目录路径
+
+        Raises:
+            ArchiveError: 解压失败时抛出
+        """
+        if not self._has_py7zr:
+            raise ArchiveError("py7zr library is required for 7Z/CB7 support")
+        try:
+            output_path.mkdir(parents=True, exist_ok=True)
+            with self.py7zr.SevenZipFile(fileobj, mode="r") as archive:
+                archive.extractall(output_path)
+        except Exception as e:
+            raise ArchiveError(f"Failed to extract 7Z stream to {output_path}: {e}")
+
     def compress(self, source_path: Path, archive_path: Path) -> None:
         """将源文件或文件夹压缩为 7Z/CB7 格式。
 
+        成员按阅读顺序写入，并按 solid_block_size 和 solid_block_pages 分成多个固实块。
+        压缩包只打开一次，每个块结束时结束当前的压缩流并开始新的块，头部只在关闭时写入一次。
+
         Args:
             source_path: 源文件或文件夹路径
             archive_path: 输出 7Z/CB7 文件路径
@@ -508,18 +1424,89 @@ class SevenZipHandler(ArchiveHandler):
             # 如果输出文件已存在，先删除（Windows 上可能需要）
             if archive_path.exists():
                 archive_path.unlink()
-            with self.py7zr.SevenZipFile(archive_path, mode="w") as archive:
-                if source_path.is_file():
-                    archive.write(source_path, source_path.name)
-                elif source_path.is_dir():
-                    for file_path in source_path.rglob("*"):
-                        if file_path.is_file():
-                            arcname = file_path.relative_to(source_path)
-                            archive.write(file_path, arcname)
+            with self.py7zr.SevenZipFile(
+                archive_path, mode="w", filters=self._filters()
+            ) as archive:
+                for index, (block, block_bytes) in enumerate(
+                    self._solid_blocks(source_path)
+                ):
+                    if index > 0:
+                        self._end_block(archive)
+                    archive.header.filters = self._filters(block_bytes)
+                    for file_path, arcname in block:
+                        archive.write(file_path, arcname)
             logger.debug(f"Compressed {source_path} to {archive_path}")
         except Exception as e:
             raise ArchiveError(f"Failed to create 7Z archive {archive_path}: {e}")
 
+    @staticmethod
+    def _end_block(archive) -> None:
+        """结束当前固实块的压缩流，之后写入的成员进入一个新的块。
+
+        py7zr 没有公开的分块接口：这里完成当前块的压缩并记录其大小（与关闭压缩包时相同），
+        再将头部标记为未初始化，下一次 write() 会像追加模式一样新建一个块，
+        但不需要重写头部或重新打开文件。
+        """
+        header = archive.header
+        if not header._initialized:
+            return
+        folder = header.main_streams.unpackinfo.folders[-1]
+        archive.worker.flush_archive(archive.fp, folder)
+        # 头部只需要块的编码器参数和大小，释放 LZMA 编码器占用的内存（每个可达数百 MB）
+        folder.compressor = None
+        header._initialized = False
+
+    def _solid_blocks(
+        self, source_path: Path
+    ) -> Iterator[Tuple[List[Tuple[Path, str]], int]]:
+        """按阅读顺序将源文件分组为固实块，产出每个块的 (文件路径, 成员名) 列表及其字节数。"""
+        block: List[Tuple[Path, str]] = []
+        block_bytes = 0
+        size_limit, page_limit = self.solid_block_size, self.solid_block_pages
+        for file_path, arcname in iter_reading_order(source_path):
+            block.append((file_path, arcname))
+            block_bytes += file_path.stat().st_size
+            if (size_limit is not None and block_bytes >= size_limit) or (
+                page_limit is not None and len(block) >= page_limit
+            ):
+                yield block, block_bytes
+                block, block_bytes = [], 0
+        if block:
+            yield block, block_bytes
+
+    def _filters(
+        self, block_bytes: Optional[int] = None
+    ) -> Optional[List[Dict[str, int]]]:
+        """
+        根据压缩级别生成 py7zr 过滤器链。
+
+        与 7-Zip 相同，字典不会大于块内的数据量：每个块都会新建一个 LZMA2 编码器，
+        按级别分配的完整字典（最高 64 MB）在小块上只会拖慢压缩，不会提高压缩率。
+
+        Args:
+            block_bytes: 当前固实块的字节数，None 表示不限制字典大小
+
+        Returns:
+            过滤器列表，未指定级别且未给出块大小时返回None（使用 py7zr 默认的 LZMA2 预设）
+        """
+        if self.level == 0:
+            return [{"id": self.py7zr.FILTER_COPY}]
+        if self.level is None:
+            if block_bytes is None:
+                return None
+            # 与 py7zr 默认的过滤器链一致：BCJ x86 + LZMA2 预设 7（16 MB 字典）
+            filters = [{"id": self.py7zr.FILTER_X86}]
+            preset, dict_size = 7, 16 * 1024 * 1024
+        else:
+            filters = []
+            preset, dict_size = self.level, SEVENZIP_DICT_SIZES[self.level]
+        if block_bytes is not None:
+            dict_size = min(dict_size, max(block_bytes, 4096))
+        filters.append(
+            {"id": self.py7zr.FILTER_LZMA2, "preset": preset, "dict_size": dict_size}
+        )
+        return filters
+
     def is_valid(self, archive_path: Path) -> bool:
         """验证 7Z/CB7 文件是否有效。
 
@@ -538,19 +1525,948 @@ class SevenZipHandler(ArchiveHandler):
         except Exception:
             return False
 
+    def quick_check(self, archive_path: Path) -> bool:
+        """只检查文件头签名，快速检查 7Z/CB7 文件。
+
+        Args:
+            archive_path: 7Z/CB7 压缩包路径
+
+        Returns:
+            如果签名匹配返回True，否则返回False
+        """
+        try:
+            with open(archive_path, "rb") as f:
+                head = f.read(len(SEVENZIP_SIGNATURE))
+        except OSError:
+            return False
+        return head == SEVENZIP_SIGNATURE
+
+    def uncompressed_sizes(self, archive_path: Path) -> List[int]:
+        """读取 7Z/CB7 头部获取成员大小。
+
+        Args:
+            archive_path: 7Z/CB7 压缩包路径
+
+        Returns:
+            各文件成员解压后的字节数列表
+        """
+        if self._has_py7zr:
+            try:
+                with self.py7zr.SevenZipFile(archive_path, mode="r") as archive:
+                    return [
+                        i.uncompressed for i in archive.list() if not i.is_directory
+                    ]
+            except Exception as e:
+                logger.debug(f"Failed to read 7Z headers of {archive_path}: {e}")
+        return super().uncompressed_sizes(archive_path)
+
+    def open_reader(self, archive_path: Path) -> "ArchiveReader":
+        """打开 7Z/CB7 文件的随机访问读取器。
+
+        Args:
+            archive_path: 7Z/CB7 压缩包路径
+
+        Returns:
+            SevenZipReader 实例
+
+        Raises:
+            ArchiveError: 未安装 py7zr 时抛出
+        """
+        if not self._has_py7zr:
+            raise ArchiveError("py7zr library is required for 7Z/CB7 support")
+        return SevenZipReader(archive_path, py7zr=self.py7zr)
+
+
+def _raise_if_cancelled(error: Exception) -> None:
+    """后端因取消而失败时重新抛出，不再回退到 Python 处理器。"""
+    if isinstance(error.__cause__, InterruptedError):
+        raise error
+
+
+class BackendHandler(ArchiveHandler):
+    """通过外部后端（原生 7-Zip、bsdtar）处理压缩包的处理器。
 
-def get_handler(archive_type: str) -> ArchiveHandler:
+    每次操作时按能力和基准测试排名选择后端；没有合适的后端或后端执行失败时，
+    回退到对应的纯 Python 处理器。
+    """
+
+    def __init__(self, fallback: ArchiveHandler, archive_format: str, preference: str):
+        """初始化后端处理器。
+
+        Args:
+            fallback: 回退使用的 Python 处理器，同时提供压缩级别等选项
+            archive_format: 格式族 (7z, rar, tar)
+            preference: 后端名称 (auto, 7z, bsdtar)
+        """
+        self.fallback = fallback
+        self.archive_format = archive_format
+        self.preference = preference
+
+    def _slot(self) -> ContextManager[None]:
+        """读取 RAR 的外部进程与 rar 命令共用并发槽位。"""
+        return rar_slot() if self.archive_format == "rar" else nullcontext()
+
+    def _select(self, operation: str, compression: Optional[str] = None):
+        if self.archive_format == "rar" and getattr(
+            self.fallback, "_external_tool", None
+        ):
+            # 已有原生 rar 命令时直接使用
+            return None
+        return select_backend(
+            self.archive_format,
+            operation,
+            self.preference,
+            compression=compression,
+            python_handler=self.fallback,
+        )
+
+    def extract(self, archive_path: Path, output_path: Path) -> None:
+        """使用选中的后端解压，失败时回退到 Python 处理器。
+
+        Args:
+            archive_path: 压缩包路径
+            output_path: 输出目录路径
+
+        Raises:
+            ArchiveError: 解压失败时抛出
+        """
+        compression = None
+        if self.archive_format == "tar":
+            compression = tar_compression_of(archive_path)
+        backend = self._select("read", compression)
+        if backend is not None:
+            try:
+                with self._slot():
+                    backend.extract(archive_path, output_path)
+                logger.debug(
+                    f"Extracted {archive_path} to {output_path} using {backend}"
+                )
+                return
+            except ArchiveError as e:
+                _raise_if_cancelled(e)
+                logger.warning(f"Backend {backend.name} failed, falling back: {e}")
+        self.fallback.extract(archive_path, output_path)
+
+    def extract_stream(self, fileobj: BinaryIO, output_path: Path) -> None:
+        """外部后端只能读取文件，流式解压直接交给 Python 处理器。
+
+        Args:
+            fileobj: 已定位到开头的可定位二进制流
+            output_path: 输出目录路径
+
+        Raises:
+            ArchiveError: 解压失败时抛出
+        """
+        self.fallback.extract_stream(fileobj, output_path)
+
+    def iter_stream(self, fileobj: BinaryIO) -> Iterator[Tuple[str, BinaryIO]]:
+        """外部后端只能读取文件，流式读取直接交给 Python 处理器。
+
+        Args:
+            fileobj: 二进制只读流
+
+        Yields:
+            (成员名, 成员内容的二进制流)
+
+        Raises:
+            ArchiveError: 读取失败时抛出
+        """
+        return self.fallback.iter_stream(fileobj)
+
+    def write_stream(
+        self, members: Iterable[Tuple[str, BinaryIO]], fileobj: BinaryIO
+    ) -> int:
+        """外部后端只能写入文件，流式写入直接交给 Python 处理器。
+
+        Args:
+            members: (成员名, 成员内容的二进制流) 序列
+            fileobj: 二进制只写流
+
+        Returns:
+            写入的成员数
+
+        Raises:
+            ArchiveError: 写入失败时抛出
+        """
+        return self.fallback.write_stream(members, fileobj)
+
+    def compress(self, source_path: Path, archive_path: Path) -> None:
+        """使用选中的后端压缩，失败时回退到 Python 处理器。
+
+        Args:
+            source_path: 源文件或文件夹路径
+            archive_path: 输出压缩包路径
+
+        Raises:
+            ArchiveError: 压缩失败时抛出
+        """
+        compression = getattr(self.fallback, "compression", None)
+        solid_block_size = getattr(self.fallback, "solid_block_size", None)
+        solid_block_pages = getattr(self.fallback, "solid_block_pages", None)
+        backend = self._select("write", compression)
+        if (
+            backend is not None
+            and (solid_block_size is not None or solid_block_pages is not None)
+            and not backend.solid_blocks
+        ):
+            logger.debug(
+                f"Backend {backend.name} cannot limit solid block size, "
+                f"using {self.fallback.describe('write')}"
+            )
+            backend = None
+        if backend is not None:
+            try:
+                archive_path.parent.mkdir(parents=True, exist_ok=True)
+                if archive_path.exists():
+                    archive_path.unlink()
+                backend.compress(
+                    source_path,
+                    archive_path,
+                    self.archive_format,
+                    level=getattr(self.fallback, "level", None),
+                    compression=compression,
+                    solid_block_size=solid_block_size,
+                    solid_block_pages=solid_block_pages,
+                )
+                logger.debug(
+                    f"Compressed {source_path} to {archive_path} using {backend}"
+                )
+                return
+            except (ArchiveError, OSError) as e:
+                _raise_if_cancelled(e)
+                logger.warning(f"Backend {backend.name} failed, falling back: {e}")
+        self.fallback.compress(source_path, archive_path)
+
+    def is_valid(self, archive_path: Path) -> bool:
+        """使用选中的后端验证压缩包。
+
+        Args:
+            archive_path: 压缩包路径
+
+        Returns:
+            如果压缩包有效则返回True，否则返回False
+        """
+        try:
+            compression = None
+            if self.archive_format == "tar":
+                compression = tar_compression_of(archive_path)
+            backend = self._select("read", compression)
+        except OSError:
+            return False
+        if backend is not None:
+            with self._slot():
+                return backend.test(archive_path)
+        return self.fallback.is_valid(archive_path)
+
+    def quick_check(self, archive_path: Path) -> bool:
+        """快速检查始终使用 Python 处理器（只读取文件头）。"""
+        return self.fallback.quick_check(archive_path)
+
+    def uncompressed_sizes(self, archive_path: Path) -> List[int]:
+        """成员大小始终由 Python 处理器读取（只读取头部）。"""
+        return self.fallback.uncompressed_sizes(archive_path)
+
+    def describe(self, operation: str = "read") -> str:
+        """返回该操作会选中的后端，没有合适的后端时返回 Python 处理器的名称。"""
+        compression = None
+        if operation == "write":
+            compression = getattr(self.fallback, "compression", None)
+        backend = self._select(operation, compression)
+        if backend is not None:
+            return f"{backend.name} backend"
+        return self.fallback.describe(operation)
+
+    def open_reader(self, archive_path: Path) -> "ArchiveReader":
+        """随机访问读取始终使用 Python 处理器。"""
+        return self.fallback.open_reader(archive_path)
+
+
+def is_page_name(name: str) -> bool:
+    """
+    判断压缩包成员名是否为漫画页（图片文件）。
+
+    Args:
+        name: 压缩包内的成员路径
+
+    Returns:
+        如果成员为图片文件则返回True，否则返回False
+    """
+    return PurePosixPath(name).suffix.lower() in IMAGE_EXTENSIONS
+
+
+class ArchiveReader(ABC):
+    """压缩包随机访问读取器抽象基类。
+
+    读取器只打开压缩包一次并保留成员索引，之后按名称查找成员为 O(1) 的字典查找。
+    页面列表由图片成员按自然顺序排序得到，可按页码读取字节或打开只读流。
+    """
+
+    def __init__(self, archive_path: Path):
+        """初始化读取器并建立成员索引。
+
+        Args:
+            archive_path: 压缩包文件路径
+
+        Raises:
+            ArchiveError: 打开压缩包或读取索引失败时抛出
+        """
+        self.archive_path = Path(archive_path)
+        self._lock = threading.Lock()
+        try:
+            self._index: Dict[str, object] = self._build_index()
+        except ArchiveError:
+            self._close()
+            raise
+        except Exception as e:
+            self._close()
+            raise ArchiveError(f"Failed to open archive {archive_path}: {e}")
+        self._pages: List[str] = sorted(
+            (name for name in self._index if is_page_name(name)),
+            key=natural_sort_key,
+        )
+
+    @abstractmethod
+    def _build_index(self) -> Dict[str, object]:
+        """
+        打开压缩包并返回成员名到成员信息的映射（仅包含文件成员）。
+        """
+        pass
+
+    @abstractmethod
+    def _read_member(self, info: object) -> bytes:
+        """
+        读取单个成员的完整内容，调用方已持有锁。
+        """
+        pass
+
+    def _read_member_view(self, info: object) -> memoryview:
+        """
+        以 memoryview 读取单个成员，调用方已持有锁。
+
+        默认实现包装 _read_member() 的结果，子类可提供零拷贝实现。
+        """
+        return memoryview(self._read_member(info))
+
+    def _open_member(self, info: object) -> BinaryIO:
+        """
+        打开单个成员的只读流，调用方已持有锁。
+
+        默认实现读取完整内容后包装为 BytesIO，子类可提供真正的流式实现。
+        """
+        return io.BytesIO(self._read_member(info))
+
+    def _close(self) -> None:
+        """
+        释放底层文件句柄，调用方已持有锁（或索引尚未建立完成）。
+        """
+        pass
+
+    def close(self) -> None:
+        """关闭底层文件句柄，正在进行的读取会先完成。"""
+        with self._lock:
+            self._close()
+
+    def __enter__(self) -> "ArchiveReader":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def names(self) -> List[str]:
+        """
+        获取所有文件成员名。
+
+        Returns:
+            成员名列表（保持压缩包内顺序）
+        """
+        return list(self._index)
+
+    @property
+    def pages(self) -> List[str]:
+        """按自然顺序排序的页面（图片成员）名列表。"""
+        return list(self._pages)
+
+    @property
+    def page_count(self) -> int:
+        """页面数量。"""
+        return len(self._pages)
+
+    def _lookup(self, name: str) -> object:
+        try:
+            return self._index[name]
+        except KeyError:
+            raise ArchiveError(f"Member not found in {self.archive_path}: {name}")
+
+    def _page_name(self, page: int) -> str:
+        if not 0 <= page < len(self._pages):
+            raise ArchiveError(
+                f"Page {page} out of range for {self.archive_path} "
+                f"({len(self._pages)} pages)"
+            )
+        return self._pages[page]
+
+    def read(self, name: str) -> bytes:
+        """
+        按成员名读取完整内容。
+
+        Args:
+            name: 成员名
+
+        Returns:
+            成员内容
+
+        Raises:
+            ArchiveError: 成员不存在或读取失败时抛出
+        """
+        info = self._lookup(name)
+        try:
+            with self._lock:
+                return self._read_member(info)
+        except Exception as e:
+            raise ArchiveError(f"Failed to read {name} from {self.archive_path}: {e}")
+
+    def read_view(self, name: str) -> memoryview:
+        """
+        按成员名以 memoryview 读取内容，支持的格式下为零拷贝视图。
+
+        返回的视图可能直接引用底层文件映射，应在关闭读取器之前释放。
+
+        Args:
+            name: 成员名
+
+        Returns:
+            成员内容的 memoryview
+
+        Raises:
+            ArchiveError: 成员不存在或读取失败时抛出
+        """
+        info = self._lookup(name)
+        try:
+            with self._lock:
+                return self._read_member_view(info)
+        except Exception as e:
+            raise ArchiveError(f"Failed to read {name} from {self.archive_path}: {e}")
+
+    def open(self, name: str) -> BinaryIO:
+        """
+        按成员名打开只读流。
+
+        Args:
+            name: 成员名
+
+        Returns:
+            二进制只读流
+
+        Raises:
+            ArchiveError: 成员不存在或读取失败时抛出
+        """
+        info = self._lookup(name)
+        try:
+            with self._lock:
+                return self._open_member(info)
+        except Exception as e:
+            raise ArchiveError(f"Failed to open {name} from {self.archive_path}: {e}")
+
+    def read_page(self, page: int) -> bytes:
+        """
+        读取第 page 页（从0开始）的内容。
+
+        Args:
+            page: 页码
+
+        Returns:
+            页面内容
+        """
+        return self.read(self._page_name(page))
+
+    def open_page(self, page: int) -> BinaryIO:
+        """
+        打开第 page 页（从0开始）的只读流。
+
+        Args:
+            page: 页码
+
+        Returns:
+            二进制只读流
+        """
+        return self.open(self._page_name(page))
+
+
+class ZipReader(ArchiveReader):
+    """ZIP/CBZ 随机访问读取器。
+
+    优先通过 MmapZipFile 内存映射读取：STORED 成员以零拷贝视图返回，DEFLATED 成员
+    直接从映射中解压。无法映射的文件或不受支持的成员（加密、其他压缩方法）回退到 zipfile。
+    """
+
+    def _build_index(self) -> Dict[str, object]:
+        self._mmap_zip: Optional[MmapZipFile] = None
+        self._zip: Optional[zipfile.ZipFile] = None
+        try:
+            self._mmap_zip = MmapZipFile(self.archive_path)
+        except ArchiveError as e:
+            logger.debug(f"Falling back to zipfile for {self.archive_path}: {e}")
+            self._zip = zipfile.ZipFile(self.archive_path, "r")
+            return {
+                info.filename: info
+                for info in self._zip.infolist()
+                if not info.is_dir()
+            }
+        return {
+            entry.filename: entry
+            for entry in self._mmap_zip.infolist()
+            if not entry.is_dir()
+        }
+
+    def _fallback_zip(self) -> zipfile.ZipFile:
+        if self._zip is None:
+            self._zip = zipfile.ZipFile(self.archive_path, "r")
+        return self._zip
+
+    def _read_member_view(self, info: object) -> memoryview:
+        if self._mmap_zip is not None and self._mmap_zip.supports(info):
+            return self._mmap_zip.read_view(info)
+        return memoryview(self._fallback_zip().read(info.filename))
+
+    def _read_member(self, info: object) -> bytes:
+        return bytes(self._read_member_view(info))
+
+    def _open_member(self, info: object) -> BinaryIO:
+        if self._mmap_zip is not None and self._mmap_zip.supports(info):
+            return io.BytesIO(self._mmap_zip.read_view(info))
+        return self._fallback_zip().open(info.filename)
+
+    def _close(self) -> None:
+        mmap_zip = getattr(self, "_mmap_zip", None)
+        if mmap_zip is not None:
+            mmap_zip.close()
+            self._mmap_zip = None
+        zipf = getattr(self, "_zip", None)
+        if zipf is not None:
+            zipf.close()
+            self._zip = None
+
+
+class TarReader(ArchiveReader):
+    """TAR/CBT 随机访问读取器。"""
+
+    def _build_index(self) -> Dict[str, object]:
+        self._tar, self._spool = _open_tar(self.archive_path)
+        return {
+            member.name: member for member in self._tar.getmembers() if member.isfile()
+        }
+
+    def _read_member(self, info: object) -> bytes:
+        return self._tar.extractfile(info).read()
+
+    def _close(self) -> None:
+        tar = getattr(self, "_tar", None)
+        if tar is not None:
+            tar.close()
+            self._tar = None
+        spool = getattr(self, "_spool", None)
+        if spool is not None:
+            spool.close()
+            self._spool = None
+
+
+class SevenZipReader(ArchiveReader):
+    """7Z/CB7 随机访问读取器。
+
+    7Z 的成员按固实块存储，读取某个成员只需解压它所在的块，但块内位于它之前的成员
+    也必须一并解压。因此读取一页时会顺带保留同一块中紧随其后的成员
+    （最多 SEVENZIP_READ_AHEAD 字节），顺序翻页时每个块只解压一次。
+    """
+
+    def __init__(self, archive_path: Path, py7zr):
+        self.py7zr = py7zr
+        # 最近一次解压得到的成员内容
+        self._block_cache: Dict[str, bytes] = {}
+        super().__init__(archive_path)
+
+    def _build_index(self) -> Dict[str, object]:
+        self._archive = self.py7zr.SevenZipFile(self.archive_path, mode="r")
+        index = {
+            info.filename: info
+            for info in self._archive.list()
+            if not info.is_directory
+        }
+        # 成员名 -> 同一固实块中的 (成员名, 大小) 列表，按块内顺序排列
+        self._blocks: Dict[str, List[Tuple[str, int]]] = {}
+        folders: Dict[int, List[Tuple[str, int]]] = {}
+        for f in getattr(self._archive, "files", []):
+            folder = getattr(f, "folder", None)
+            if folder is None or f.filename not in index:
+                continue
+            block = folders.setdefault(id(folder), [])
+            block.append((f.filename, index[f.filename].uncompressed))
+            self._blocks[f.filename] = block
+        return index
+
+    def _extract(self, names: List[str]) -> Dict[str, bytes]:
+        """解压指定成员，py7zr 只会解压包含这些成员的固实块。"""
+        try:
+            if hasattr(self._archive, "read"):
+                # py7zr < 1.0
+                data = self._archive.read(targets=names)
+                return {name: data[name].read() for name in names}
+            limit = max(self._index[name].uncompressed for name in names) + 1
+            factory = self.py7zr.io.BytesIOFactory(limit)
+            self._archive.extract(targets=names, factory=factory)
+            return {name: factory.get(name).read() for name in names}
+        finally:
+            self._archive.reset()
+
+    def _read_member(self, info: object) -> bytes:
+        name = info.filename
+        data = self._block_cache.get(name)
+        if data is not None:
+            return data
+        targets = [name]
+        block = self._blocks.get(name, [])
+        position = next((i for i, (n, _) in enumerate(block) if n == name), None)
+        if position is not None:
+            budget = SEVENZIP_READ_AHEAD - info.uncompressed
+            for following, size in block[position + 1 :]:
+                if size > budget:
+                    break
+                targets.append(following)
+                budget -= size
+        self._block_cache = self._extract(targets)
+        return self._block_cache[name]
+
+    def _close(self) -> None:
+        self._block_cache = {}
+        archive = getattr(self, "_archive", None)
+        if archive is not None:
+            archive.close()
+
+
+class RarReader(ArchiveReader):
+    """RAR/CBR 随机访问读取器。
+
+    优先使用 rarfile 库；否则使用外部命令 rar 列出成员并逐个输出到标准输出。
+    """
+
+    def __init__(self, archive_path: Path, rarfile=None, external_tool=None):
+        self.rarfile = rarfile
+        self._external_tool = external_tool
+        super().__init__(archive_path)
+
+    def _build_index(self) -> Dict[str, object]:
+        if self.rarfile is not None:
+            self._rar = self.rarfile.RarFile(str(self.archive_path))
+            return {
+                info.filename: info
+                for info in self._rar.infolist()
+                if not info.is_dir()
+            }
+        listing = io.BytesIO()
+        self._run_external(["lb", str(self.archive_path)], listing, "list")
+        members = {}
+        for name in listing.getvalue().decode(errors="ignore").splitlines():
+            if name and not name.endswith(("/", "\\")):
+                members[name.replace("\\", "/")] = name
+        # rar lb 同样列出目录（不带结尾的分隔符）：去掉作为其他成员父目录的条目
+        parents = set()
+        for member in members:
+            parts = member.split("/")[:-1]
+            parents.update("/".join(parts[: i + 1]) for i in range(len(parts)))
+        return {
+            member: name for member, name in members.items() if member not in parents
+        }
+
+    def _read_member(self, info: object) -> bytes:
+        if self.rarfile is not None:
+            return self._rar.read(info)
+        data = io.BytesIO()
+        self._run_external(
+            ["p", "-inul", str(self.archive_path), str(info)], data, f"read {info} from"
+        )
+        return data.getvalue()
+
+    def _run_external(self, args: List[str], stdout: BinaryIO, action: str) -> None:
+        """
+        通过 run_tool() 运行外部 rar 命令，标准输出按块写入 stdout，取消转换时会被终止。
+        """
+        with rar_slot():
+            rc, output = run_tool([self._external_tool] + args, stdout=stdout)
+        if rc != 0:
+            raise ArchiveError(
+                f"{self._external_tool} failed to {action} {self.archive_path} "
+                f"(exit code {rc}): {output}"
+            )
+
+    def _close(self) -> None:
+        rar = getattr(self, "_rar", None)
+        if rar is not None:
+            rar.close()
+
+
+class PageCache:
+    """按字节数限制容量的页面 LRU 缓存。
+
+    缓存已解码的页面内容，并统计命中、未命中和淘汰次数。线程安全。
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """初始化页面缓存。
+
+        Args:
+            max_bytes: 缓存内容的最大总字节数，单个超过该大小的页面不会被缓存
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        """
+        获取缓存的页面内容，并将其标记为最近使用。
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            页面内容，未命中时返回None
+        """
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: Tuple, data: bytes) -> None:
+        """
+        写入页面内容，超出容量时淘汰最久未使用的页面。
+
+        Args:
+            key: 缓存键
+            data: 页面内容
+        """
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """清空缓存（不重置统计数据）。"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    @property
+    def size(self) -> int:
+        """当前缓存内容的总字节数。"""
+        return self._size
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取缓存统计数据。
+
+        Returns:
+            包含 hits、misses、evictions、entries 和 bytes 的字典
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+            }
+
+
+class ReaderPool:
+    """已打开读取器的连接池，附带页面缓存。
+
+    按路径复用已打开的 ArchiveReader，超过 max_readers 时淘汰最久未使用的读取器。
+    读取器通过 reader() 租用，被淘汰的读取器要等所有租用结束后才会关闭。
+    页面通过 PageCache 缓存，缓存键包含文件的修改时间和大小，文件变化后自动失效。
+    """
+
+    def __init__(self, max_readers: int = 16, cache: Optional[PageCache] = None):
+        """初始化读取器池。
+
+        Args:
+            max_readers: 同时保持打开的读取器数量上限
+            cache: 页面缓存，为None时创建默认大小的缓存
+        """
+        self.max_readers = max_readers
+        self.cache = cache if cache is not None else PageCache()
+        self._readers: "OrderedDict[Tuple, ArchiveReader]" = OrderedDict()
+        # 每个读取器当前的租用数；已淘汰但仍被租用的读取器保留在这里直到归还
+        self._leases: Dict[ArchiveReader, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(archive_path: Path) -> Tuple:
+        path = Path(archive_path).resolve()
+        st = path.stat()
+        return (str(path), st.st_mtime_ns, st.st_size)
+
+    @contextmanager
+    def reader(self, archive_path: Path) -> Iterator[ArchiveReader]:
+        """
+        租用压缩包的读取器，必要时打开新的读取器。
+
+        租用期间读取器不会被关闭，即使它已被其他线程的请求淘汰出池。
+
+        Args:
+            archive_path: 压缩包文件路径
+
+        Yields:
+            ArchiveReader 实例（由池管理，调用方不应关闭）
+        """
+        reader = self._acquire(archive_path)
+        try:
+            yield reader
+        finally:
+            self._release(reader)
+
+    def _acquire(self, archive_path: Path) -> ArchiveReader:
+        key = self._key(archive_path)
+        with self._lock:
+            reader = self._readers.get(key)
+            if reader is not None:
+                self._readers.move_to_end(key)
+                self._leases[reader] += 1
+                return reader
+        reader = open_reader(Path(archive_path))
+        with self._lock:
+            existing = self._readers.get(key)
+            if existing is not None:
+                self._leases[existing] += 1
+                idle = [reader]
+                reader = existing
+            else:
+                self._readers[key] = reader
+                self._leases[reader] = 1
+                idle = self._evict()
+        for stale in idle:
+            stale.close()
+        return reader
+
+    def _release(self, reader: ArchiveReader) -> None:
+        with self._lock:
+            self._leases[reader] -= 1
+            if self._leases[reader] or reader in self._readers.values():
+                return
+            del self._leases[reader]
+        reader.close()
+
+    def _evict(self) -> List[ArchiveReader]:
+        """
+        将超出上限的读取器移出池，返回其中可以立即关闭的空闲读取器。调用方已持有锁。
+        """
+        idle = []
+        while len(self._readers) > self.max_readers:
+            _, stale = self._readers.popitem(last=False)
+            if not self._leases[stale]:
+                del self._leases[stale]
+                idle.append(stale)
+        return idle
+
+    def read_page(self, archive_path: Path, page: int) -> bytes:
+        """
+        读取压缩包第 page 页的内容，优先从缓存获取。
+
+        Args:
+            archive_path: 压缩包文件路径
+            page: 页码（从0开始）
+
+        Returns:
+            页面内容
+        """
+        key = self._key(archive_path) + (page,)
+        data = self.cache.get(key)
+        if data is None:
+            with self.reader(archive_path) as reader:
+                data = reader.read_page(page)
+            self.cache.put(key, data)
+        return data
+
+    def open_page(self, archive_path: Path, page: int) -> BinaryIO:
+        """
+        以只读流的形式打开压缩包第 page 页。
+
+        Args:
+            archive_path: 压缩包文件路径
+            page: 页码（从0开始）
+
+        Returns:
+            二进制只读流
+        """
+        return io.BytesIO(self.read_page(archive_path, page))
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取池与缓存的统计数据。
+
+        Returns:
+            缓存统计数据，外加当前打开的读取器数量 readers
+        """
+        stats = self.cache.stats()
+        with self._lock:
+            stats["readers"] = len(self._readers)
+        return stats
+
+    def close(self) -> None:
+        """关闭所有空闲读取器并清空缓存，仍被租用的读取器在归还时关闭。"""
+        with self._lock:
+            self._readers.clear()
+            idle = [reader for reader, leases in self._leases.items() if not leases]
+            for reader in idle:
+                del self._leases[reader]
+        for reader in idle:
+            reader.close()
+        self.cache.clear()
+
+    def __enter__(self) -> "ReaderPool":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+def get_handler(
+    archive_type: str,
+    tar_compression: Optional[str] = None,
+    level: Level = None,
+    backend: Optional[str] = None,
+    solid_block: Optional[str] = None,
+) -> ArchiveHandler:
     """
     根据压缩包类型获取对应的处理器实例。
 
     Args:
         archive_type: 压缩包类型 (cbz, cbr, cb7, cbt, zip, rar, 7z, tar)
+        tar_compression: TAR/CBT 输出的流压缩格式 (gz, xz, zst)，None 表示不压缩
+        level: 压缩级别，可以是预设名称 (fast, balanced, max)、显式整数，
+            或以格式 (zip/cbz, 7z/cb7, rar/cbr, tar/cbt) 为键的映射
+        backend: CB7、CBR（只读）和 CBT 使用的后端 (auto, python, 7z, bsdtar)，
+            None 等同于 "python"
+        solid_block: CB7 输出的固实块设置，见 resolve_solid_block()
 
     Returns:
         对应的ArchiveHandler子类实例
 
     Raises:
-        ArchiveError: 如果压缩包类型不被支持
+        ArchiveError: 如果压缩包类型不被支持、级别或固实块设置无效
     """
     handler_map = {
         "zip": ZipHandler,
@@ -563,8 +2479,52 @@ def get_handler(archive_type: str) -> ArchiveHandler:
         "cbt": TarHandler,
     }
 
-    handler_class = handler_map.get(archive_type.lower())
+    archive_type = archive_type.lower()
+    handler_class = handler_map.get(archive_type)
     if handler_class is None:
         raise ArchiveError(f"Unsupported archive type: {archive_type}")
 
-    return handler_class()
+    if isinstance(level, dict):
+        family = LEVEL_FAMILIES[archive_type]
+        level = next(
+            (v for k, v in level.items() if LEVEL_FAMILIES.get(k, k) == family),
+            None,
+        )
+
+    if handler_class is TarHandler:
+        handler = TarHandler(compression=tar_compression, level=level)
+    elif handler_class is SevenZipHandler:
+        size, pages = resolve_solid_block(solid_block)
+        handler = SevenZipHandler(
+            level=level, solid_block_size=size, solid_block_pages=pages
+        )
+    else:
+        handler = handler_class(level=level)
+
+    family = LEVEL_FAMILIES[archive_type]
+    if backend not in (None, "python") and family in ("7z", "rar", "tar"):
+        return BackendHandler(handler, family, backend)
+    return handler
+
+
+def open_reader(
+    archive_path: Path, archive_type: Optional[str] = None
+) -> ArchiveReader:
+    """
+    打开压缩包的随机访问读取器。
+
+    Args:
+        archive_path: 压缩包文件路径
+        archive_type: 压缩包类型，为None时根据文件自动检测
+
+    Returns:
+        已建立成员索引的 ArchiveReader 实例
+
+    Raises:
+        ArchiveError: 如果压缩包类型不被支持或打开失败
+    """
+    if archive_type is None:
+        archive_type = detect_file_type(archive_path)
+        if archive_type is None or archive_type == "folder":
+            raise ArchiveError(f"Cannot detect archive type: {archive_path}")
+    return get_handler(archive_type).open_reader(archive_path)
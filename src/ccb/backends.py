@@ -0,0 +1,567 @@
+"""
+外部压缩后端模块
+
+该模块为 CB7、CBR（只读）和 CBT 提供可插拔的外部后端：原生 7-Zip 命令（7zz/7z/7za）
+和 libarchive 的 bsdtar 命令。后端按能力自动检测，可通过名称显式选择；
+自动模式下使用内置的微基准测试对可用后端和纯 Python 实现进行排序，选择最快的一个。
+现有的 Python 处理器始终作为回退实现。
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+import logging
+
+from .exceptions import ArchiveError
+from .utils import iter_reading_order, run_tool
+
+logger = logging.getLogger(__name__)
+
+# 可选择的后端名称
+BACKEND_CHOICES = ("auto", "python", "7z", "bsdtar")
+
+# 基准测试结果缓存的格式版本，测试负载变化时递增
+_BENCHMARK_VERSION = 2
+
+# TAR 流压缩格式的魔数
+_TAR_MAGICS = (
+    (b"\x1f\x8b", "gz"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zst"),
+    (b"BZh", "bz2"),
+)
+
+
+def tar_compression_of(archive_path: Path) -> Optional[str]:
+    """
+    根据文件头识别 TAR 文件的流压缩格式。
+
+    Args:
+        archive_path: TAR 文件路径
+
+    Returns:
+        压缩格式 (gz, xz, zst, bz2)，未压缩时返回None
+    """
+    with open(archive_path, "rb") as f:
+        head = f.read(6)
+    for magic, compression in _TAR_MAGICS:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def _run(
+    cmd: List[str],
+    cwd: Optional[Path] = None,
+    timeout: Optional[float] = None,
+    tail_lines: int = 50,
+) -> str:
+    """
+    运行外部命令，失败时抛出 ArchiveError。
+
+    命令通过 run_tool() 在独立的进程组中运行，超时或当前线程的取消事件触发时
+    （见 cancel_scope）整个进程组会被终止。
+
+    Args:
+        cmd: 命令及参数
+        cwd: 工作目录
+        timeout: 超时时间（秒），None 表示不限制
+        tail_lines: 返回的输出行数
+
+    Returns:
+        最后 tail_lines 行输出（标准输出与标准错误合并）
+
+    Raises:
+        ArchiveError: 命令无法启动、超时、被取消或返回非零退出码时抛出
+    """
+    name = Path(cmd[0]).name
+    try:
+        returncode, output = run_tool(cmd, timeout, cwd=cwd, tail_lines=tail_lines)
+    except subprocess.TimeoutExpired:
+        raise ArchiveError(f"{name} timed out after {timeout}s")
+    except InterruptedError as e:
+        raise ArchiveError(f"{name} was cancelled") from e
+    except OSError as e:
+        raise ArchiveError(f"Failed to run {cmd[0]}: {e}")
+    if returncode != 0:
+        raise ArchiveError(f"{name} exited with code {returncode}: {output}")
+    return output
+
+
+def _write_list_file(source_path: Path) -> str:
+    """将源文件夹中的文件按阅读顺序写入临时列表文件，返回文件路径。"""
+    fd, list_path = tempfile.mkstemp(prefix="ccb_list_", suffix=".txt")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for _, arcname in iter_reading_order(source_path):
+            f.write(arcname + "\n")
+    return list_path
+
+
+class Backend(ABC):
+    """外部压缩后端抽象基类。
+
+    Attributes:
+        name (str): 后端名称
+        executable (str): 外部命令路径
+        solid_blocks (bool): 写入 7Z 时能否限制固实块的大小和成员数
+    """
+
+    name = ""
+    solid_blocks = False
+
+    def __init__(self, executable: str):
+        self.executable = executable
+
+    @classmethod
+    @abstractmethod
+    def detect(cls) -> Optional["Backend"]:
+        """
+        检测后端是否可用。
+
+        Returns:
+            可用时返回后端实例，否则返回None
+        """
+        pass
+
+    @abstractmethod
+    def supports(
+        self, archive_format: str, operation: str, compression: Optional[str] = None
+    ) -> bool:
+        """
+        判断后端是否支持某种操作。
+
+        Args:
+            archive_format: 格式族 (7z, rar, tar)
+            operation: "read" 或 "write"
+            compression: TAR 的流压缩格式，None 表示未压缩
+
+        Returns:
+            支持时返回True
+        """
+        pass
+
+    @abstractmethod
+    def extract(self, archive_path: Path, output_path: Path) -> None:
+        """解压压缩包到指定目录。"""
+        pass
+
+    @abstractmethod
+    def compress(
+        self,
+        source_path: Path,
+        archive_path: Path,
+        archive_format: str,
+        level: Optional[int] = None,
+        compression: Optional[str] = None,
+        solid_block_size: Optional[int] = None,
+        solid_block_pages: Optional[int] = None,
+    ) -> None:
+        """
+        将源文件或文件夹压缩为指定格式。
+
+        成员相对于源文件夹并按阅读顺序添加，与对应的 Python 处理器保持一致。
+        外部命令无法固定 TAR 成员的修改时间，因此 TAR 始终由 Python 处理器写入。
+        固实块的字节数上限 solid_block_size 和成员数上限 solid_block_pages
+        只对支持 solid_blocks 的后端有效，solid_block_pages 为 1 表示非固实。
+        """
+        pass
+
+    @abstractmethod
+    def test(self, archive_path: Path) -> bool:
+        """验证压缩包是否有效。"""
+        pass
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.executable!r})"
+
+
+class SevenZipBackend(Backend):
+    """原生 7-Zip 后端（7zz、7z 或 7za 命令）。
+
+    支持读写 7Z、读取未压缩的 TAR；如果 7-Zip 带有 RAR 解码器，也支持读取 RAR。
+    """
+
+    name = "7z"
+    executables = ("7zz", "7z", "7za")
+    solid_blocks = True
+
+    def __init__(self, executable: str):
+        super().__init__(executable)
+        self._formats: Optional[str] = None
+
+    @classmethod
+    def detect(cls) -> Optional["Backend"]:
+        for exe in cls.executables:
+            path = shutil.which(exe)
+            if path:
+                return cls(path)
+        return None
+
+    def _format_list(self) -> str:
+        if self._formats is None:
+            try:
+                self._formats = _run(
+                    [self.executable, "i"], timeout=30, tail_lines=10000
+                )
+            except ArchiveError:
+                self._formats = ""
+        return self._formats
+
+    def supports(
+        self, archive_format: str, operation: str, compression: Optional[str] = None
+    ) -> bool:
+        if archive_format == "7z":
+            return True
+        if archive_format == "tar":
+            # 7-Zip 对压缩的 TAR 只会解开外层压缩，因此仅读取未压缩的 TAR
+            return operation == "read" and compression is None
+        if archive_format == "rar":
+            return operation == "read" and "Rar" in self._format_list()
+        return False
+
+    def extract(self, archive_path: Path, output_path: Path) -> None:
+        output_path.mkdir(parents=True, exist_ok=True)
+        _run([self.executable, "x", "-y", "-bd", f"-o{output_path}", str(archive_path)])
+
+    def compress(
+        self,
+        source_path: Path,
+        archive_path: Path,
+        archive_format: str,
+        level: Optional[int] = None,
+        compression: Optional[str] = None,
+        solid_block_size: Optional[int] = None,
+        solid_block_pages: Optional[int] = None,
+    ) -> None:
+        # 不记录修改时间，相同输入得到相同的输出
+        cmd = [self.executable, "a", "-y", "-bd", "-t7z", "-mmt=on", "-mtm=off"]
+        if level is not None:
+            cmd.append(f"-mx={level}")
+        if solid_block_pages == 1:
+            cmd.append("-ms=off")
+        elif solid_block_size is not None or solid_block_pages is not None:
+            limits = ""
+            if solid_block_pages is not None:
+                limits += f"{solid_block_pages}f"
+            if solid_block_size is not None:
+                limits += f"{solid_block_size}b"
+            cmd.append(f"-ms={limits}")
+        archive_path = archive_path.resolve()
+        if source_path.is_file():
+            _run(cmd + [str(archive_path), source_path.name], cwd=source_path.parent)
+            return
+        list_path = _write_list_file(source_path)
+        try:
+            # 列表文件按 UTF-8 写入，不能按区域设置的字符集解析
+            _run(
+                cmd + ["-scsUTF-8", str(archive_path), f"@{list_path}"], cwd=source_path
+            )
+        finally:
+            os.unlink(list_path)
+
+    def test(self, archive_path: Path) -> bool:
+        try:
+            _run([self.executable, "t", "-bd", str(archive_path)])
+            return True
+        except ArchiveError:
+            return False
+
+
+class BsdtarBackend(Backend):
+    """libarchive 后端（bsdtar 命令）。
+
+    支持读取 TAR（按编译选项支持各种流压缩）、7Z 和 RAR，写入 7Z。
+    """
+
+    name = "bsdtar"
+
+    # TAR 流压缩格式在 --version 中对应的库名
+    _COMPRESSION_LIBS = {"gz": "zlib", "xz": "liblzma", "zst": "libzstd", "bz2": "bz2lib"}
+
+    def __init__(self, executable: str):
+        super().__init__(executable)
+        self._version: Optional[str] = None
+
+    @classmethod
+    def detect(cls) -> Optional["Backend"]:
+        path = shutil.which("bsdtar")
+        return cls(path) if path else None
+
+    def _version_info(self) -> str:
+        if self._version is None:
+            try:
+                self._version = _run([self.executable, "--version"], timeout=30)
+            except ArchiveError:
+                self._version = ""
+        return self._version
+
+    def supports(
+        self, archive_format: str, operation: str, compression: Optional[str] = None
+    ) -> bool:
+        if compression is not None and (
+            self._COMPRESSION_LIBS[compression] not in self._version_info()
+        ):
+            return False
+        if archive_format == "7z":
+            return True
+        if archive_format in ("tar", "rar"):
+            return operation == "read"
+        return False
+
+    def extract(self, archive_path: Path, output_path: Path) -> None:
+        output_path.mkdir(parents=True, exist_ok=True)
+        _run([self.executable, "-x", "-f", str(archive_path), "-C", str(output_path)])
+
+    def compress(
+        self,
+        source_path: Path,
+        archive_path: Path,
+        archive_format: str,
+        level: Optional[int] = None,
+        compression: Optional[str] = None,
+        solid_block_size: Optional[int] = None,
+        solid_block_pages: Optional[int] = None,
+    ) -> None:
+        cmd = [self.executable, "-c", "-f", str(archive_path.resolve())]
+        cmd += ["--format", "7zip"]
+        if level is not None:
+            cmd += ["--options", f"7zip:compression-level={level}"]
+        if source_path.is_file():
+            _run(cmd + ["-C", str(source_path.parent), source_path.name])
+            return
+        list_path = _write_list_file(source_path)
+        try:
+            _run(cmd + ["-C", str(source_path), "-T", list_path])
+        finally:
+            os.unlink(list_path)
+
+    def test(self, archive_path: Path) -> bool:
+        try:
+            _run([self.executable, "-t", "-f", str(archive_path)])
+            return True
+        except ArchiveError:
+            return False
+
+
+# 已知的外部后端，按名称索引
+BACKEND_CLASSES = {
+    SevenZipBackend.name: SevenZipBackend,
+    BsdtarBackend.name: BsdtarBackend,
+}
+
+_detected: Optional[Dict[str, Backend]] = None
+_scores: Dict[str, Dict[str, float]] = {}
+_lock = threading.Lock()
+
+
+def available_backends() -> Dict[str, Backend]:
+    """
+    检测所有可用的外部后端（结果在进程内缓存）。
+
+    Returns:
+        后端名称到后端实例的映射
+    """
+    global _detected
+    with _lock:
+        if _detected is None:
+            _detected = {}
+            for name, backend_class in BACKEND_CLASSES.items():
+                backend = backend_class.detect()
+                if backend is not None:
+                    logger.debug(f"Detected backend {name}: {backend.executable}")
+                    _detected[name] = backend
+        return dict(_detected)
+
+
+def cache_dir() -> Path:
+    """用户缓存目录中存放基准测试和吞吐量测量结果的目录。"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA")
+    root = Path(base) if base else Path.home() / ".cache"
+    return root / "ccb"
+
+
+def _fingerprint(backends: Dict[str, Backend]) -> str:
+    """根据后端命令路径和修改时间生成指纹，工具升级后缓存失效。"""
+    parts = [f"v{_BENCHMARK_VERSION}"]
+    for name in sorted(backends):
+        exe = backends[name].executable
+        try:
+            mtime = os.stat(exe).st_mtime_ns
+        except OSError:
+            mtime = 0
+        parts.append(f"{name}={exe}@{mtime}")
+    return ";".join(parts)
+
+
+def make_sample(root: Path) -> None:
+    """生成基准测试用的小型漫画文件夹：已压缩的"页面"加少量可压缩元数据。"""
+    root.mkdir(parents=True)
+    for i in range(16):
+        (root / f"{i:02d}.jpg").write_bytes(os.urandom(128 * 1024))
+    (root / "ComicInfo.xml").write_bytes(b"<ComicInfo></ComicInfo>\n" * 2000)
+
+
+def _time_round_trip(compress, extract) -> float:
+    """测量一次压缩加解压的耗时（秒），失败时返回正无穷。"""
+    start = time.perf_counter()
+    try:
+        compress()
+        extract()
+    except Exception as e:
+        logger.debug(f"Backend benchmark failed: {e}")
+        return float("inf")
+    return time.perf_counter() - start
+
+
+def benchmark_backends(archive_format: str, python_handler=None) -> Dict[str, float]:
+    """
+    对支持读取该格式的后端运行微基准测试（压缩加解压一次）。
+
+    不能写入该格式的后端（如 TAR）由 python_handler 写入测试样本，未提供时跳过。
+
+    结果（耗时秒数，越小越快）会缓存在进程内和用户缓存目录中，
+    外部命令路径或版本变化后自动重新测试。
+
+    Args:
+        archive_format: 格式族 (7z, tar)
+        python_handler: 纯 Python 处理器实例，提供时一并参与测试，名称为 "python"
+
+    Returns:
+        后端名称到耗时的映射
+    """
+    backends = available_backends()
+    fingerprint = _fingerprint(backends)
+    with _lock:
+        if archive_format in _scores:
+            return dict(_scores[archive_format])
+
+        cache_file = cache_dir() / "backends.json"
+        cached = {}
+        try:
+            cached = json.loads(cache_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            pass
+        if cached.get("fingerprint") == fingerprint and archive_format in cached.get(
+            "scores", {}
+        ):
+            _scores[archive_format] = cached["scores"][archive_format]
+            return dict(_scores[archive_format])
+
+        scores: Dict[str, float] = {}
+        with tempfile.TemporaryDirectory(prefix="ccb_bench_") as tmp:
+            tmp_path = Path(tmp)
+            sample = tmp_path / "sample"
+            make_sample(sample)
+            # 只能读取的后端用 Python 处理器生成测试样本，各后端的耗时仍可比较
+            candidates: Dict[str, object] = {
+                name: backend
+                for name, backend in backends.items()
+                if backend.supports(archive_format, "read")
+                and (
+                    backend.supports(archive_format, "write")
+                    or python_handler is not None
+                )
+            }
+            if python_handler is not None:
+                candidates["python"] = python_handler
+            for name, candidate in candidates.items():
+                archive = tmp_path / f"{name}.{archive_format}"
+                out = tmp_path / f"{name}_out"
+                if name == "python" or not candidate.supports(archive_format, "write"):
+                    compress = lambda: python_handler.compress(  # noqa: E731
+                        sample, archive
+                    )
+                else:
+                    compress = lambda: candidate.compress(  # noqa: E731
+                        sample, archive, archive_format, level=1
+                    )
+                scores[name] = _time_round_trip(
+                    compress, lambda: candidate.extract(archive, out)
+                )
+                logger.debug(
+                    f"Backend benchmark {archive_format}/{name}: {scores[name]:.3f}s"
+                )
+
+        _scores[archive_format] = scores
+        cached_scores = cached.get("scores", {}) if cached.get(
+            "fingerprint"
+        ) == fingerprint else {}
+        cached_scores[archive_format] = scores
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            cache_file.write_text(
+                json.dumps({"fingerprint": fingerprint, "scores": cached_scores}),
+                encoding="utf-8",
+            )
+        except OSError as e:
+            logger.debug(f"Cannot write backend benchmark cache {cache_file}: {e}")
+        return dict(scores)
+
+
+def select_backend(
+    archive_format: str,
+    operation: str,
+    preference: Optional[str] = "auto",
+    compression: Optional[str] = None,
+    python_handler=None,
+) -> Optional[Backend]:
+    """
+    选择处理某种格式的外部后端。
+
+    Args:
+        archive_format: 格式族 (7z, rar, tar)
+        operation: "read" 或 "write"
+        preference: 后端名称 (auto, python, 7z, bsdtar)，None 等同于 "python"
+        compression: TAR 的流压缩格式
+        python_handler: 纯 Python 处理器，自动模式下参与基准测试排序
+
+    Returns:
+        选中的后端；应使用纯 Python 实现时返回None
+
+    Raises:
+        ArchiveError: 后端名称未知时抛出
+    """
+    if preference is None or preference == "python":
+        return None
+    if preference not in BACKEND_CHOICES:
+        raise ArchiveError(f"Unknown backend: {preference}")
+
+    backends = available_backends()
+    if preference != "auto":
+        backend = backends.get(preference)
+        if backend is None:
+            logger.warning(f"Backend {preference} not available, using Python")
+            return None
+        if not backend.supports(archive_format, operation, compression):
+            logger.debug(
+                f"Backend {preference} cannot {operation} {archive_format}, using Python"
+            )
+            return None
+        return backend
+
+    candidates = {
+        name: backend
+        for name, backend in backends.items()
+        if backend.supports(archive_format, operation, compression)
+    }
+    if not candidates:
+        return None
+    # RAR 无法在本地生成测试样本，沿用 7Z 的测试排名
+    bench_format = "7z" if archive_format == "rar" else archive_format
+    scores = benchmark_backends(
+        bench_format, python_handler if archive_format != "rar" else None
+    )
+    ranked = sorted(
+        list(candidates) + (["python"] if "python" in scores else []),
+        key=lambda name: scores.get(name, float("inf")),
+    )
+    best = ranked[0]
+    logger.debug(f"Selected backend for {operation} {archive_format}: {best}")
+    return candidates.get(best)
@@ -4,25 +4,254 @@
 
 import argparse
 import asyncio
+import json
 import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple, Union
 import time
 
 from . import __version__
+from .archive_handler import (
+    LEVEL_FAMILIES,
+    LEVEL_PRESETS,
+    resolve_solid_block,
+    set_rar_concurrency,
+)
+from .backends import BACKEND_CHOICES
 from .converter import ComicBookConverter
-from .file_detector import detect_file_type, get_comic_format, is_archive_file
-from .exceptions import ComicBookError
+from .dedupe import build_index, find_archives, load_blocklist, write_blocklist
+from .file_detector import (
+    detect_file_type,
+    get_comic_format,
+    get_extension_type,
+    is_archive_file,
+)
+from .exceptions import ArchiveError, ComicBookError
+from .journal import Journal, JournalState
+from .scheduler import ResourceScheduler, default_max_jobs, free_temp_bytes
+from .throughput import ThroughputTable
+from .utils import (
+    PARTIAL_SUFFIX,
+    STAGING_PREFIX,
+    format_size,
+    get_output_path,
+    parse_size,
+)
+from .watcher import watch
 
 logger = logging.getLogger(__name__)
 
 PROG_NAME = "Convert to Comic Book"
 
 
-def parse_args() -> argparse.Namespace:
+def parse_level(value: str) -> Union[str, Dict[str, str]]:
+    """
+    解析 --level 参数
+
+    Args:
+        value: 预设名称 (fast, balanced, max)、显式整数，
+            或按格式指定的级别列表，如 "cbz=9,cb7=fast,cbt=19"
+
+    Returns:
+        预设名称或整数字符串；按格式指定时返回格式到级别的映射
+
+    Raises:
+        argparse.ArgumentTypeError: 参数格式无效时抛出
+    """
+
+    def _check(level: str) -> str:
+        if level not in LEVEL_PRESETS and not level.isdigit():
+            raise argparse.ArgumentTypeError(
+                f"invalid level '{level}' (use {', '.join(LEVEL_PRESETS)} or an integer)"
+            )
+        return level
+
+    if "=" not in value:
+        return _check(value.strip().lower())
+
+    levels = {}
+    for item in value.split(","):
+        archive_type, _, level = item.partition("=")
+        archive_type = archive_type.strip().lower()
+        if archive_type not in LEVEL_FAMILIES:
+            raise argparse.ArgumentTypeError(
+                f"unknown format in level: '{archive_type}'"
+            )
+        levels[archive_type] = _check(level.strip().lower())
+    return levels
+
+
+def parse_solid_block(value: str) -> str:
+    """
+    解析 --solid-block 参数
+
+    Args:
+        value: solid、off、页数（如 32p）或大小（如 16M）
+
+    Returns:
+        原样返回的设置字符串
+
+    Raises:
+        argparse.ArgumentTypeError: 参数格式无效时抛出
+    """
+    try:
+        resolve_solid_block(value)
+    except ArchiveError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
+def _add_archive_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    添加转换、watch 和 merge 子命令共用的输出格式与暂存参数
+
+    Args:
+        parser: 参数解析器
+    """
+    parser.add_argument(
+        "--tar-compression",
+        choices=["none", "gz", "xz", "zst"],
+        default="none",
+        help="Stream compression for cbt output (default: none)",
+    )
+
+    parser.add_argument(
+        "--level",
+        type=parse_level,
+        default=None,
+        help="Compression preset (fast, balanced, max), explicit level, "
+        "or per-format levels like cbz=9,cb7=fast (default: format default)",
+    )
+
+    parser.add_argument(
+        "--backend",
+        choices=BACKEND_CHOICES,
+        default="auto",
+        help="Backend for cb7, cbr (read) and cbt: auto picks the fastest available "
+        "of native 7-Zip, bsdtar and Python (default: auto)",
+    )
+
+    parser.add_argument(
+        "--temp-dir",
+        type=str,
+        default=None,
+        help="Staging directory for archive to archive conversions "
+        "(default: a hidden directory next to each output)",
+    )
+
+    parser.add_argument(
+        "--drop-pages",
+        type=str,
+        default=None,
+        metavar="BLOCKLIST",
+        help="Drop pages whose sha256 is listed in this file (one hash per line, "
+        "e.g. written by ccb dedupe --write-blocklist)",
+    )
+
+    parser.add_argument(
+        "--solid-block",
+        type=parse_solid_block,
+        default=None,
+        metavar="SPEC",
+        help="Solid block layout for cb7 output: a size such as 16M, a page count "
+        "such as 32p, off for a non-solid archive, or solid for a single block "
+        "(default: 4M)",
+    )
+
+
+def _add_conversion_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    添加批量转换和 watch 子命令共用的转换参数
+
+    Args:
+        parser: 参数解析器
+    """
+    parser.add_argument(
+        "-t",
+        "--to-type",
+        choices=["folder", "cbz", "cbr", "cb7", "cbt"],
+        default="cbz",
+        help="Target type (default: cbz)",
+    )
+
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        type=str,
+        default=None,
+        help="Output directory (default: source directory)",
+    )
+
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="Quiet mode: show only errors"
+    )
+
+    parser.add_argument(
+        "-R",
+        "--remove",
+        action="store_true",
+        help="Remove sources after processing (excluding already matching targets)",
+    )
+
+    parser.add_argument(
+        "-F", "--force", action="store_true", help="Force replace existing targets"
+    )
+
+    _add_archive_arguments(parser)
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Maximum number of concurrent conversions "
+        "(default: CPU count + 4, up to 32)",
+    )
+
+    parser.add_argument(
+        "--rar-jobs",
+        type=int,
+        default=None,
+        help="Maximum number of rar processes running at once, "
+        "independent of --jobs (default: CPU count)",
+    )
+
+    parser.add_argument(
+        "--flatten-nested",
+        choices=["merge", "split"],
+        default=None,
+        help="Extract archives nested inside the input (detected by signature and "
+        "buffered in memory): merge them into one comic, or split "
+        "each into its own comic in a folder named after the input",
+    )
+
+    parser.add_argument(
+        "--split-size",
+        type=parse_size,
+        default=None,
+        metavar="SIZE",
+        help="Split archive output into volumes of at most SIZE each, e.g. 1.9G, "
+        "cutting between pages; volumes go into a folder named after the output",
+    )
+
+    parser.add_argument(
+        "--split-pages",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Split archive output into volumes of at most N pages each",
+    )
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     """
     解析命令行参数
 
+    Args:
+        argv: 参数列表，None 表示使用 sys.argv
+
     Returns:
         解析后的参数对象
     """
@@ -43,13 +272,27 @@ Examples:
   ccb -f cbz -t folder comic1.cbz comic2.zip
 
   ccb /path/to/source -o /dir/to/output -F
+
+  # Keep converting archives dropped into a hot folder
+  ccb watch /path/to/hot_folder -t cbz
+
+  # Report pages and comics duplicated across a library
+  ccb dedupe /path/to/library
+
+  # Merge chapters into one volume
+  ccb merge ch01.cbz ch02.cbr ch03.cbz -o vol01.cbz
+
+  # Stream through a pipeline: - reads stdin, -o - writes stdout (cbz or cbt)
+  curl -s https://example.com/book.cbt | ccb - -f cbt -t cbz > book.cbz
+  ccb book.cb7 -o - | ssh host "cat > book.cbz"
         """,
     )
 
     parser.add_argument(
         "paths",
         nargs="*",
-        help="Input files or directories (supports cbz, cbr, cb7, cbt, zip, rar, 7z, tar)",
+        help="Input files or directories (supports cbz, cbr, cb7, cbt, zip, rar, 7z, "
+        "tar), or - to read a zip or tar stream from stdin and write to stdout",
     )
 
     parser.add_argument(
@@ -72,48 +315,233 @@ Examples:
     )
 
     parser.add_argument(
-        "-t",
-        "--to-type",
-        choices=["folder", "cbz", "cbr", "cb7", "cbt"],
-        default="cbz",
-        help="Target type (default: cbz)",
+        "-c",
+        "--collect",
+        action="store_true",
+        help="Collect leaf sources under given paths, and use them as new input",
     )
 
+    _add_conversion_arguments(parser)
+
     parser.add_argument(
-        "-o",
-        "--output-dir",
-        type=str,
+        "--max-temp-bytes",
+        type=parse_size,
         default=None,
-        help="Output directory (default: source directory)",
+        help="Temp disk budget shared by running conversions, e.g. 10G "
+        "(default: free space of the staging filesystem)",
     )
 
     parser.add_argument(
-        "-c",
-        "--collect",
+        "--max-memory",
+        type=parse_size,
+        default=None,
+        help="Memory budget shared by running conversions, e.g. 2G "
+        "(default: unlimited)",
+    )
+
+    parser.add_argument(
+        "--plan",
         action="store_true",
-        help="Collect leaf sources under given paths, and use them as new input",
+        help="Print the planned conversions with sizes, fast paths and estimated "
+        "durations without converting (reads only archive directories and headers)",
     )
 
     parser.add_argument(
-        "-q", "--quiet", action="store_true", help="Quiet mode: show only errors"
+        "--journal",
+        type=str,
+        default=None,
+        help="Append completed, failed and in-progress items to this journal file",
     )
 
     parser.add_argument(
-        "-R",
-        "--remove",
+        "--resume",
         action="store_true",
-        help="Remove sources after processing (excluding already matching targets)",
+        help="Skip items the journal records as completed and clean up "
+        "interrupted ones (requires --journal)",
     )
 
     parser.add_argument(
-        "-F", "--force", action="store_true", help="Force replace existing targets"
+        "--output-format",
+        choices=["text", "jsonl"],
+        default="text",
+        help="Result format on stdout: text summary, or one JSON object per item "
+        "written as soon as it completes (input, output, status, error class, "
+        "bytes, phase timings, handlers); logs always go to stderr",
     )
 
     parser.add_argument(
         "-v", "--version", action="version", version=f"{PROG_NAME} v{__version__}"
     )
 
-    return parser.parse_args()
+    return parser.parse_args(argv)
+
+
+def parse_watch_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    解析 watch 子命令的参数
+
+    Args:
+        argv: watch 之后的参数列表
+
+    Returns:
+        解析后的参数对象
+    """
+    parser = argparse.ArgumentParser(
+        prog="ccb watch",
+        description="Watch a directory and convert archives dropped into it.",
+    )
+
+    parser.add_argument(
+        "directory", help="Directory to watch (including subdirectories)"
+    )
+
+    _add_conversion_arguments(parser)
+
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="Seconds between directory polls (default: 1.0)",
+    )
+
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=2.0,
+        help="Seconds a file's size and mtime must stay unchanged before it is "
+        "converted (default: 2.0)",
+    )
+
+    return parser.parse_args(argv)
+
+
+def parse_dedupe_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    解析 dedupe 子命令的参数
+
+    Args:
+        argv: dedupe 之后的参数列表
+
+    Returns:
+        解析后的参数对象
+    """
+    parser = argparse.ArgumentParser(
+        prog="ccb dedupe",
+        description="Find pages and comics duplicated across archives by content hash.",
+    )
+
+    parser.add_argument(
+        "paths", nargs="+", help="Archives or directories to scan (recursively)"
+    )
+
+    parser.add_argument(
+        "--min-archives",
+        type=int,
+        default=2,
+        help="Report pages found in at least this many archives (default: 2)",
+    )
+
+    parser.add_argument(
+        "--show",
+        type=int,
+        default=20,
+        help="Number of duplicate pages to list, 0 for all (default: 20)",
+    )
+
+    parser.add_argument(
+        "--write-blocklist",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Write the hashes of the reported duplicate pages to FILE "
+        "for use with --drop-pages",
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of archives hashed in parallel (default: CPU count + 4, up to 32)",
+    )
+
+    parser.add_argument("-q", "--quiet", action="store_true", help="Quiet mode")
+
+    return parser.parse_args(argv)
+
+
+def parse_merge_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    解析 merge 子命令的参数
+
+    Args:
+        argv: merge 之后的参数列表
+
+    Returns:
+        解析后的参数对象
+    """
+    parser = argparse.ArgumentParser(
+        prog="ccb merge",
+        description="Merge chapters (archives or folders) into one comic in a single "
+        "pass. Members are prefixed with the chapter name and written in natural "
+        "order; cbz members are copied without recompression.",
+    )
+
+    parser.add_argument("inputs", nargs="+", help="Chapter archives or folders")
+
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        required=True,
+        help="Output archive; the format follows its extension (e.g. vol01.cbz)",
+    )
+
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="Quiet mode: show only errors"
+    )
+
+    parser.add_argument(
+        "-F", "--force", action="store_true", help="Force replace an existing output"
+    )
+
+    _add_archive_arguments(parser)
+
+    # merge 不使用的转换参数，供 _make_converter 读取
+    parser.set_defaults(
+        rar_jobs=None, flatten_nested=None, split_size=None, split_pages=None
+    )
+
+    return parser.parse_args(argv)
+
+
+def _configure_logging(quiet: bool) -> None:
+    """根据 quiet 参数配置日志级别"""
+    if quiet:
+        logging.basicConfig(level=logging.ERROR, format="%(levelname)s %(message)s")
+    else:
+        logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+
+def _make_converter(args: argparse.Namespace) -> ComicBookConverter:
+    """根据命令行参数创建转换器"""
+    temp_dir = Path(args.temp_dir.strip("\"'")) if args.temp_dir else None
+    set_rar_concurrency(args.rar_jobs)
+    page_blocklist = None
+    if args.drop_pages:
+        page_blocklist = load_blocklist(Path(args.drop_pages.strip("\"'")))
+        logger.info(f"Loaded {len(page_blocklist)} blocklisted page hash(es)")
+    return ComicBookConverter(
+        tar_compression=args.tar_compression,
+        level=args.level,
+        backend=args.backend,
+        temp_dir=temp_dir,
+        page_blocklist=page_blocklist,
+        solid_block=args.solid_block,
+        flatten_nested=args.flatten_nested,
+        split_size=args.split_size,
+        split_pages=args.split_pages,
+    )
 
 
 def collect_sources(path: Path, exclude_to_type: Optional[str] = None) -> List[Path]:
@@ -135,7 +563,8 @@ def collect_sources(path: Path, exclude_to_type: Optional[str] = None) -> List[P
     if path.is_file():
         # 叶子文件，检查是否是支持的压缩格式
         if is_archive_file(path):
-            detected = detect_file_type(path)
+            # 按扩展名判断，内容与扩展名不符的文件仍需转换为正确命名的输出
+            detected = get_extension_type(path)
             # 如果提供了排除的 to-type，仅跳过那些已经是目标漫画书格式的文件（例如已为 cbz/cbr/cb7/cbt）
             if exclude_to_type and detected is not None and detected == exclude_to_type:
                 return sources
@@ -149,10 +578,15 @@ def collect_sources(path: Path, exclude_to_type: Optional[str] = None) -> List[P
             before_recursive = len(sources)
 
             for item in path.iterdir():
+                # 跳过暂存目录和未完成的输出
+                if item.name.startswith(STAGING_PREFIX) or item.name.endswith(
+                    PARTIAL_SUFFIX
+                ):
+                    continue
                 if item.is_file():
                     # 检查是否是支持的压缩格式
                     if is_archive_file(item):
-                        detected_item = detect_file_type(item)
+                        detected_item = get_extension_type(item)
                         # 如果提供了排除的 to-type，跳过已经是目标漫画书格式的文件
                         if (
                             exclude_to_type
@@ -184,52 +618,121 @@ def collect_sources(path: Path, exclude_to_type: Optional[str] = None) -> List[P
     return sources
 
 
-async def convert_single(
+def _build_items(
+    args: argparse.Namespace,
+    paths_to_process: List[Union[Path, str]],
+    journal_state: Optional[JournalState] = None,
+) -> Tuple[List[Tuple[Path, str]], int]:
+    """
+    确定每个输入的输出类型，恢复模式下跳过日志中已完成的条目
+
+    Args:
+        args: 命令行参数
+        paths_to_process: 输入路径（Path 或来自 -c 模式的带引号字符串）
+        journal_state: 恢复模式下读取的任务日志状态
+
+    Returns:
+        ((输入路径, 输出类型) 列表, 跳过的条目数)
+    """
+    items = []
+    skipped = 0
+    for input_path in paths_to_process:
+        # 支持 paths_to_process 中既有 Path 对象也有带引号的字符串（来自 -c 模式）
+        if isinstance(input_path, str):
+            path_str = input_path.strip("\"'")
+            input_path = Path(path_str)
+
+        # 恢复模式下跳过已完成的条目，不再重复检测
+        if journal_state is not None and journal_state.is_done(input_path):
+            skipped += 1
+            continue
+
+        # 确定输入类型
+        from_type = args.from_type
+        detected = detect_file_type(input_path)
+        if from_type == "auto":
+            from_type = detected
+        elif detected != from_type:
+            logger.warning(
+                f"Specified type '{from_type}' does not match detected type '{detected}' "
+                f"for {input_path}"
+            )
+
+        # 确定输出类型
+        to_type = args.to_type
+        if args.collect and from_type in ["zip", "rar", "7z", "tar"]:
+            # 收集模式下，标准格式自动映射到对应的漫画书格式
+            # 但如果用户指定了输出类型，使用用户指定的类型
+            if to_type == "cbz":  # 默认值，使用映射
+                to_type = get_comic_format(from_type)
+
+        items.append((input_path, to_type))
+    return items, skipped
+
+
+def print_plan(
     converter: ComicBookConverter,
-    input_path: Path,
-    from_type: Optional[str],
-    to_type: str,
+    items: List[Tuple[Path, str]],
     output_dir: Optional[Path],
     remove_source: bool,
-    force: bool,
-) -> Optional[Path]:
+    max_jobs: int,
+) -> None:
     """
-    异步转换单个文件或文件夹
+    打印转换计划：每个条目的执行方式、处理器、字节数和估算耗时
+
+    计划只读取压缩包目录或成员头，不解压数据，也不创建任何输出。
 
     Args:
-        converter: 转换器实例
-        input_path: 输入路径
-        from_type: 输入类型（如果为None则自动检测）
-        to_type: 输出类型
+        converter: 转换器
+        items: (输入路径, 输出类型) 列表
         output_dir: 输出目录
-        remove_source: 是否删除源文件
-
-    Returns:
-        输出路径，如果失败返回None
+        remove_source: 是否会删除源文件
+        max_jobs: 并发任务数，用于估算总耗时
     """
-    try:
-        # 如果指定了输入类型，需要验证
-        if from_type:
-            detected_type = detect_file_type(input_path)
-            if detected_type != from_type:
-                logger.warning(
-                    f"Specified type '{from_type}' does not match detected type '{detected_type}' "
-                    f"for {input_path}"
-                )
+    table = ThroughputTable()
+    total_in = total_unpacked = 0
+    total_seconds = 0.0
+    unknown = failed = 0
 
-        result = await asyncio.get_event_loop().run_in_executor(
-            None,
-            converter.convert,
-            input_path,
-            to_type,
-            output_dir,
-            remove_source,
-            force,
+    print(f"Plan for {len(items)} item(s):")
+    for input_path, to_type in items:
+        try:
+            plan = converter.plan(input_path, to_type, output_dir, remove_source)
+        except ComicBookError as e:
+            failed += 1
+            print(f"  {input_path}\n    cannot plan: {e}")
+            continue
+        seconds = table.estimate(plan, converter)
+        handlers = " -> ".join(
+            h for h in (plan.read_handler, plan.write_handler) if h is not None
         )
-        return result
-    except Exception as e:
-        logger.error(f"Failed to convert {input_path}: {e}")
-        return None
+        if plan.read_handler is not None and plan.read_handler == plan.write_handler:
+            handlers = plan.read_handler
+        duration = f"~{seconds:.2f}s" if seconds is not None else "unknown duration"
+        print(f"  {input_path} -> {plan.output_path or '(skipped)'}")
+        print(
+            f"    {plan.input_type} -> {plan.output_type}  {plan.method}"
+            + (f" [{handlers}]" if handlers else "")
+            + f"  in {format_size(plan.input_bytes)}"
+            + f", unpacked ~{format_size(plan.uncompressed_bytes)}, {duration}"
+        )
+        total_in += plan.input_bytes
+        total_unpacked += plan.uncompressed_bytes
+        if seconds is None:
+            unknown += 1
+        else:
+            total_seconds += seconds
+
+    print(
+        f"\nTotal: {format_size(total_in)} in, ~{format_size(total_unpacked)} unpacked, "
+        f"~{total_seconds:.2f}s of work, "
+        f"~{total_seconds / max(1, min(max_jobs, len(items))):.2f}s "
+        f"with {max_jobs} job(s)"
+    )
+    if unknown:
+        print(f"No throughput measurement for {unknown} item(s)")
+    if failed:
+        print(f"Cannot plan {failed} item(s)")
 
 
 def process_paths(args: argparse.Namespace) -> None:
@@ -240,18 +743,24 @@ def process_paths(args: argparse.Namespace) -> None:
         args: 命令行参数
     """
     # 配置日志
-    if args.quiet:
-        logging.basicConfig(level=logging.ERROR, format="%(levelname)s %(message)s")
-    else:
-        logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    _configure_logging(args.quiet)
 
     if not args.paths:
         logger.error("No input paths provided")
         return
 
-    converter = ComicBookConverter()
-    # 处理输出目录路径，移除可能的引号
+    if args.resume and not args.journal:
+        logger.error("--resume requires --journal")
+        return
+
+    if "-" in args.paths or args.output_dir == "-":
+        process_stream(args)
+        return
+
+    # 处理输出目录和暂存目录路径，移除可能的引号
     output_dir = Path(args.output_dir.strip("\"'")) if args.output_dir else None
+    temp_dir = Path(args.temp_dir.strip("\"'")) if args.temp_dir else None
+    converter = _make_converter(args)
 
     # 收集要处理的路径
     paths_to_process = []
@@ -305,43 +814,71 @@ def process_paths(args: argparse.Namespace) -> None:
         logger.warning("No valid paths to process")
         return
 
+    # 恢复模式下读取任务日志，跳过已完成的条目
+    journal_state = None
+    if args.journal and args.resume:
+        journal_state = Journal.load(Path(args.journal.strip("\"'")))
+
+    items, skipped = _build_items(args, paths_to_process, journal_state)
+    max_jobs = args.jobs or default_max_jobs()
+
+    if args.plan:
+        print_plan(converter, items, output_dir, args.remove, max_jobs)
+        return
+
+    # 清理上次中断时进行中的条目，并打开任务日志
+    journal = None
+    if args.journal:
+        if journal_state is not None:
+            cleaned = journal_state.cleanup_in_progress()
+            if cleaned:
+                logger.info(f"Cleaned up {cleaned} leftover(s) of interrupted items")
+        journal = Journal(Path(args.journal.strip("\"'")))
+
     # 异步处理所有路径
     start_time = time.time()
 
-    async def process_all():
-        tasks = []
-        for input_path in paths_to_process:
-            # 支持 paths_to_process 中既有 Path 对象也有带引号的字符串（来自 -c 模式）
-            if isinstance(input_path, str):
-                path_str = input_path.strip("\"'")
-                input_path = Path(path_str)
-
-            # 确定输入类型
-            from_type = args.from_type
-            if from_type == "auto":
-                detected = detect_file_type(input_path)
-                from_type = detected
-
-            # 确定输出类型
-            to_type = args.to_type
-            if args.collect and from_type in ["zip", "rar", "7z", "tar"]:
-                # 收集模式下，标准格式自动映射到对应的漫画书格式
-                # 但如果用户指定了输出类型，使用用户指定的类型
-                if to_type == "cbz":  # 默认值，使用映射
-                    to_type = get_comic_format(from_type)
-
-            task = convert_single(
-                converter,
-                input_path,
-                from_type,
-                to_type,
-                output_dir,
-                args.remove,
-                args.force,
-            )
-            tasks.append(task)
+    max_temp_bytes = args.max_temp_bytes
+    if max_temp_bytes is None:
+        staging_root = temp_dir or output_dir or Path.cwd()
+        max_temp_bytes = free_temp_bytes(
+            str(staging_root) if staging_root.exists() else None
+        )
+    scheduler = ResourceScheduler(
+        max_temp_bytes=max_temp_bytes, max_memory=args.max_memory, max_jobs=max_jobs
+    )
+
+    jsonl = args.output_format == "jsonl"
 
-        results = await asyncio.gather(*tasks)
+    def on_start(input_path: Path, to_type: str) -> None:
+        if journal is not None:
+            journal.started(input_path, get_output_path(input_path, to_type, output_dir))
+
+    async def process_all():
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=max_jobs)
+        )
+        # 按完成顺序收集结果，资源调度器控制并发和临时空间/内存预算
+        results = []
+        async for result in converter.aconvert_many(
+            items,
+            output_dir=output_dir,
+            remove_source=args.remove,
+            force=args.force,
+            scheduler=scheduler,
+            on_start=on_start,
+            on_stage=journal.staged if journal is not None else None,
+        ):
+            if result.ok:
+                if journal is not None:
+                    journal.done(result.input_path, result.output_path)
+            else:
+                logger.error(f"Failed to convert {result.input_path}: {result.error}")
+                if journal is not None:
+                    journal.failed(result.input_path, str(result.error))
+            if jsonl:
+                print(json.dumps(result.to_record(), ensure_ascii=False), flush=True)
+            results.append(result.output_path)
         return results
 
     try:
@@ -351,8 +888,16 @@ def process_paths(args: argparse.Namespace) -> None:
         successful = sum(1 for r in results if r is not None)
         total = len(results)
 
-        if not args.quiet:
+        if jsonl:
+            # 标准输出只包含 JSON 记录，汇总信息写入日志
+            logger.info(
+                f"Processed {successful}/{total} files successfully "
+                f"in {elapsed_time:.2f}s"
+            )
+        elif not args.quiet:
             print(f"\nDone in {elapsed_time:.2f}s")
+            if skipped:
+                print(f"Skipped {skipped} completed item(s) from journal")
             print(f"Processed {successful}/{total} files successfully")
         elif successful < total:
             print(f"Processed {successful}/{total} files successfully")
@@ -360,13 +905,166 @@ def process_paths(args: argparse.Namespace) -> None:
         logger.info("Interrupted by user")
     except Exception as e:
         logger.error(f"Error during processing: {e}")
+    finally:
+        if journal is not None:
+            journal.close()
+
+
+def process_stream(args: argparse.Namespace) -> None:
+    """
+    流式转换单个输入：- 表示从标准输入读取，输出写入标准输出
+
+    标准输出只写入压缩包数据，日志和进度信息都写入标准错误。
+
+    Args:
+        args: 命令行参数
+    """
+    if len(args.paths) != 1:
+        logger.error("Streaming to stdout takes exactly one input")
+        return
+    if args.output_dir not in (None, "-"):
+        logger.error("Reading from stdin writes to stdout; use -o - or omit -o")
+        return
+    if args.collect or args.plan or args.journal or args.remove:
+        logger.error(
+            "--collect, --plan, --journal and -R cannot be used when streaming"
+        )
+        return
+
+    path_str = args.paths[0].strip("\"'")
+    if path_str == "-":
+        source = sys.stdin.buffer
+    else:
+        source = Path(path_str)
+        if not source.exists():
+            logger.error(f"Path does not exist: {source}")
+            return
+    start_time = time.time()
+    count = _make_converter(args).convert_stream(
+        source, sys.stdout.buffer, args.to_type, args.from_type
+    )
+    sys.stdout.buffer.flush()
+    logger.info(f"Streamed {count} member(s) in {time.time() - start_time:.2f}s")
+
+
+def run_watch(args: argparse.Namespace) -> None:
+    """
+    运行 watch 子命令，直到被中断
+
+    Args:
+        args: watch 子命令参数
+    """
+    _configure_logging(args.quiet)
+
+    directory = Path(args.directory.strip("\"'"))
+    if not directory.is_dir():
+        logger.error(f"Not a directory: {directory}")
+        return
+
+    output_dir = Path(args.output_dir.strip("\"'")) if args.output_dir else None
+    watch(
+        _make_converter(args),
+        directory,
+        args.to_type,
+        output_dir=output_dir,
+        remove_source=args.remove,
+        force=args.force,
+        interval=args.interval,
+        stable_seconds=args.settle,
+        max_jobs=args.jobs or default_max_jobs(),
+    )
+
+
+def run_dedupe(args: argparse.Namespace) -> None:
+    """
+    运行 dedupe 子命令，输出重复页面和重复漫画的报告
+
+    Args:
+        args: dedupe 子命令参数
+    """
+    _configure_logging(args.quiet)
+
+    archives = find_archives(Path(p.strip("\"'")) for p in args.paths)
+    if not archives:
+        logger.error("No archives found")
+        return
+
+    start_time = time.time()
+    index = build_index(archives, jobs=args.jobs)
+    duplicates = index.duplicate_pages(args.min_archives)
+    comics = index.duplicate_comics()
+
+    print(
+        f"Indexed {index.page_count} page(s) in {len(index.archives)} archive(s) "
+        f"in {time.time() - start_time:.2f}s"
+    )
+    if index.errors:
+        print(f"Failed to read {len(index.errors)} archive(s)")
+
+    print(
+        f"\nDuplicate pages: {len(duplicates)} "
+        f"({format_size(index.wasted_bytes(args.min_archives))} in extra copies)"
+    )
+    shown = duplicates if args.show <= 0 else duplicates[: args.show]
+    for digest, size, locations in shown:
+        archive_count = len({archive for archive, _ in locations})
+        print(
+            f"  {digest}  {format_size(size)}  "
+            f"{len(locations)} copies in {archive_count} archive(s)"
+        )
+        for archive, name in locations[:3]:
+            print(f"    {archive} :: {name}")
+        if len(locations) > 3:
+            print(f"    ... and {len(locations) - 3} more")
+    if len(shown) < len(duplicates):
+        print(f"  ... {len(duplicates) - len(shown)} more (use --show 0 to list all)")
+
+    print(f"\nDuplicate comics: {len(comics)} group(s)")
+    for group in comics:
+        print(f"  {len(index.archives[group[0]])} identical page(s):")
+        for archive in group:
+            print(f"    {archive}")
+
+    if args.write_blocklist:
+        write_blocklist(
+            Path(args.write_blocklist.strip("\"'")),
+            (digest for digest, _, _ in duplicates),
+        )
+        print(f"\nWrote {len(duplicates)} hash(es) to {args.write_blocklist}")
+
+
+def run_merge(args: argparse.Namespace) -> None:
+    """
+    运行 merge 子命令
+
+    Args:
+        args: merge 子命令参数
+    """
+    _configure_logging(args.quiet)
+
+    inputs = [Path(p.strip("\"'")) for p in args.inputs]
+    output_path = Path(args.output.strip("\"'"))
+    start_time = time.time()
+    _make_converter(args).merge(inputs, output_path, force=args.force)
+    print(
+        f"Merged {len(inputs)} input(s) into {output_path} "
+        f"in {time.time() - start_time:.2f}s"
+    )
 
 
 def main() -> None:
     """主程序入口"""
-    args = parse_args()
+    argv = sys.argv[1:]
+    if argv[:1] == ["watch"]:
+        args, runner = parse_watch_args(argv[1:]), run_watch
+    elif argv[:1] == ["dedupe"]:
+        args, runner = parse_dedupe_args(argv[1:]), run_dedupe
+    elif argv[:1] == ["merge"]:
+        args, runner = parse_merge_args(argv[1:]), run_merge
+    else:
+        args, runner = parse_args(argv), process_paths
     try:
-        process_paths(args)
+        runner(args)
     except ComicBookError as e:
         logger.error(f"ComicBook error: {e}")
         exit(1)
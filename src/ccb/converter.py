@@ -4,19 +4,289 @@
 该模块提供了漫画书格式转换的核心功能，支持在不同格式之间进行转换。
 """
 
+import asyncio
+import hashlib
+import io
+import itertools
+import os
 import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, ThreadPoolExecutor, wait
+from contextlib import ExitStack, contextmanager, nullcontext
 from pathlib import Path
-from typing import Optional
+from typing import (
+    AsyncIterator,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 import logging
-import tempfile
 
-from .file_detector import detect_file_type, get_comic_format, is_valid_comic_format
-from .archive_handler import get_handler
-from .utils import get_output_path, safe_remove, is_empty_directory
+from .file_detector import (
+    SNIFF_SIZE,
+    detect_file_type,
+    get_comic_format,
+    get_extension_type,
+    is_alias_conversion,
+    is_valid_comic_format,
+    sniff_archive_bytes,
+)
+from .archive_handler import LEVEL_FAMILIES, Level, get_handler, is_page_name
+from .utils import (
+    PeekableStream,
+    atomic_output,
+    cancel_scope,
+    get_output_path,
+    is_empty_directory,
+    iter_files,
+    iter_reading_order,
+    member_order_key,
+    move_or_copy,
+    path_size,
+    safe_remove,
+)
+from .zip_io import MmapZipFile, repack_zip
 from .exceptions import ConversionError, UnsupportedFormatError
+from .scheduler import ResourceScheduler, default_max_jobs
+from .dedupe import HASH_ALGORITHM, blocked_files, blocked_members
+from .merge import merge_to_directory, merge_to_zip, open_sources
+from .nested import FLATTEN_MODES, extract_flattened
+from .volumes import plan_volumes, volume_stem
+from .workspace import Workspace
 
 logger = logging.getLogger(__name__)
 
+# 支持流式读写（标准输入/输出）的格式族
+STREAM_FAMILIES = ("zip", "tar")
+
+# 批量转换的条目：输入路径，或 (输入路径, 输出类型)
+Item = Union[Path, str, Tuple[Union[Path, str], str]]
+
+
+class ConversionResult:
+    """批量转换中单个条目的结果。"""
+
+    __slots__ = (
+        "input_path",
+        "output_type",
+        "output_path",
+        "error",
+        "elapsed",
+        "bytes_in",
+        "bytes_out",
+        "phases",
+        "handlers",
+        "skipped",
+    )
+
+    def __init__(
+        self,
+        input_path: Path,
+        output_type: str,
+        output_path: Optional[Path] = None,
+        error: Optional[BaseException] = None,
+        elapsed: float = 0.0,
+        bytes_in: int = 0,
+        bytes_out: int = 0,
+        skipped: bool = False,
+    ):
+        """初始化结果。
+
+        Args:
+            input_path: 输入路径
+            output_type: 输出类型
+            output_path: 输出路径，失败时为None
+            error: 失败原因，成功时为None
+            elapsed: 转换耗时（秒），不含排队等待的时间
+            bytes_in: 输入文件（文件夹为其中所有文件）的字节数
+            bytes_out: 输出的字节数，失败时为0
+            skipped: 是否因输入已是目标格式或为空而未转换
+        """
+        self.input_path = input_path
+        self.output_type = output_type
+        self.output_path = output_path
+        self.error = error
+        self.elapsed = elapsed
+        self.bytes_in = bytes_in
+        self.bytes_out = bytes_out
+        self.skipped = skipped
+        # 各阶段（queue、extract、compress、rewrite 等）的耗时（秒）
+        self.phases: Dict[str, float] = {}
+        # 实际使用的处理器：read/write -> 实现名称
+        self.handlers: Dict[str, str] = {}
+
+    @property
+    def ok(self) -> bool:
+        """是否转换成功。"""
+        return self.error is None
+
+    @property
+    def status(self) -> str:
+        """结果状态：ok、skipped（输入已是目标格式或为空，未转换）或 failed。"""
+        if not self.ok:
+            return "failed"
+        return "skipped" if self.skipped else "ok"
+
+    def to_record(self) -> Dict[str, object]:
+        """
+        转换为可序列化为 JSON 的记录，供机器读取（如 --output-format jsonl）。
+
+        error_class 为抛出的异常类型，error_cause 为异常链中最初的异常类型
+        （如被包装为 ConversionError 的 ArchiveError）。
+
+        Returns:
+            记录字典
+        """
+        cause = self.error
+        while cause is not None and (cause.__cause__ or cause.__context__):
+            cause = cause.__cause__ or cause.__context__
+        return {
+            "input": str(self.input_path),
+            "output": None if self.output_path is None else str(self.output_path),
+            "output_type": self.output_type,
+            "status": self.status,
+            "error": None if self.error is None else str(self.error),
+            "error_class": None if self.error is None else type(self.error).__name__,
+            "error_cause": None if cause is None else type(cause).__name__,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "elapsed": round(self.elapsed, 6),
+            "phases": {name: round(t, 6) for name, t in self.phases.items()},
+            "handlers": dict(self.handlers),
+        }
+
+    def __repr__(self) -> str:
+        status = f"output={self.output_path}" if self.ok else f"error={self.error!r}"
+        return (
+            f"<ConversionResult {self.input_path} -> {self.output_type} "
+            f"{status} elapsed={self.elapsed:.3f}s>"
+        )
+
+
+# 转换计划中的执行方式
+PLAN_SKIP = "skip"
+PLAN_ALIAS_RENAME = "alias-rename"
+PLAN_ALIAS_COPY = "alias-copy"
+PLAN_ZIP_REWRITE = "zip-rewrite"
+PLAN_COMPRESS = "compress"
+PLAN_EXTRACT = "extract"
+PLAN_RECOMPRESS = "extract-recompress"
+
+
+class ConversionPlan:
+    """转换计划中的单个条目，只根据目录或成员头得出，不解压数据。"""
+
+    __slots__ = (
+        "input_path",
+        "input_type",
+        "output_type",
+        "output_path",
+        "method",
+        "read_handler",
+        "write_handler",
+        "input_bytes",
+        "uncompressed_bytes",
+        "estimated_seconds",
+    )
+
+    def __init__(
+        self,
+        input_path: Path,
+        input_type: Optional[str],
+        output_type: str,
+        output_path: Optional[Path],
+        method: str,
+        read_handler: Optional[str] = None,
+        write_handler: Optional[str] = None,
+        input_bytes: int = 0,
+        uncompressed_bytes: int = 0,
+    ):
+        """初始化计划条目。
+
+        Args:
+            input_path: 输入路径
+            input_type: 检测到的输入类型
+            output_type: 输出类型
+            output_path: 输出路径，跳过时为None
+            method: 执行方式 (skip, alias-rename, alias-copy, zip-rewrite,
+                compress, extract, extract-recompress)
+            read_handler: 读取输入的实现名称
+            write_handler: 写入输出的实现名称
+            input_bytes: 输入的字节数
+            uncompressed_bytes: 估算的解压后字节数
+        """
+        self.input_path = input_path
+        self.input_type = input_type
+        self.output_type = output_type
+        self.output_path = output_path
+        self.method = method
+        self.read_handler = read_handler
+        self.write_handler = write_handler
+        self.input_bytes = input_bytes
+        self.uncompressed_bytes = uncompressed_bytes
+        # 由 ThroughputTable.estimate() 填写，无法估算时为None
+        self.estimated_seconds: Optional[float] = None
+
+    def __repr__(self) -> str:
+        return (
+            f"<ConversionPlan {self.input_path} -> {self.output_type} "
+            f"{self.method} in={self.input_bytes} unpacked={self.uncompressed_bytes}>"
+        )
+
+
+def _link_or_copy(src: str, dst: str) -> str:
+    """建立硬链接，跨文件系统或不支持时复制文件（shutil.copytree 的 copy_function）。"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+    return dst
+
+
+def _remove_members(root: Path, names: Iterable[str]) -> None:
+    """删除解压目录中的指定成员，忽略指向目录外的成员名。"""
+    root = root.resolve()
+    for name in names:
+        path = (root / name).resolve()
+        if path.is_relative_to(root):
+            safe_remove(path)
+
+
+def _same_file(a: Path, b: Path) -> bool:
+    """两个已存在的路径是否指向同一个文件或目录。"""
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def _clear_directory_output(path: Path) -> None:
+    """删除将被整体替换的输出文件夹（默认行为是覆盖）。"""
+    if path.exists():
+        logger.info(f"Output already exists, will overwrite: {path}")
+        safe_remove(path)
+
+
+def _normalize_items(
+    items: Iterable[Item], output_type: str
+) -> Iterator[Tuple[Path, str]]:
+    """将批量条目统一为 (输入路径, 输出类型)。"""
+    for item in items:
+        if isinstance(item, tuple):
+            input_path, item_type = item
+        else:
+            input_path, item_type = item, output_type
+        yield Path(input_path), item_type
+
 
 class ComicBookConverter:
     """漫画书格式转换器类。
@@ -29,12 +299,167 @@ class ComicBookConverter:
     - 压缩包格式之间的转换
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        tar_compression: Optional[str] = None,
+        level: Level = None,
+        backend: Optional[str] = None,
+        temp_dir: Optional[Path] = None,
+        page_blocklist: Optional[Iterable[str]] = None,
+        solid_block: Optional[str] = None,
+        flatten_nested: Optional[str] = None,
+        split_size: Optional[int] = None,
+        split_pages: Optional[int] = None,
+    ):
         """初始化转换器实例。
 
-        创建临时目录列表，用于跟踪需要清理的临时目录。
+        转换器只保存转换选项，每次转换的暂存目录由各自的 Workspace 管理，
+        因此同一个实例可以在多个线程中并发使用。
+
+        Args:
+            tar_compression: CBT 输出的流压缩格式 (gz, xz, zst)，None 或 "none" 表示不压缩
+            level: 压缩级别，预设名称 (fast, balanced, max)、显式整数或按格式指定的映射
+            backend: CB7、CBR（只读）和 CBT 使用的后端 (auto, python, 7z, bsdtar)，
+                None 表示仅使用纯 Python 实现
+            temp_dir: 解压暂存目录，None 表示在输出旁边创建隐藏目录，
+                使暂存文件与输出位于同一文件系统
+            page_blocklist: 页面哈希黑名单（sha256），内容匹配的页面在转换时被丢弃，
+                None 表示保留所有页面
+            solid_block: CB7 输出的固实块设置 (solid, off, 32p, 16M)，None 表示默认的 4 MB
+            flatten_nested: 展开压缩包中的内层压缩包：merge 合并为一本漫画，
+                split 每个内层压缩包输出一本，None 表示把内层压缩包当作普通文件
+            split_size: 压缩包输出每个分卷的最大字节数，超出时按页面拆分为多个分卷，
+                None 表示不限制
+            split_pages: 压缩包输出每个分卷的最大页数，None 表示不限制
+
+        Raises:
+            ConversionError: flatten_nested 不是支持的展开方式或分卷上限不是正数时抛出
+        """
+        if flatten_nested is not None and flatten_nested not in FLATTEN_MODES:
+            raise ConversionError(f"Unsupported flatten mode: {flatten_nested}")
+        for limit in (split_size, split_pages):
+            if limit is not None and limit <= 0:
+                raise ConversionError(f"Volume limit must be positive: {limit}")
+        self.tar_compression = tar_compression
+        self.level = level
+        self.backend = backend
+        self.temp_dir = temp_dir
+        self.page_blocklist = (
+            frozenset(page_blocklist) if page_blocklist is not None else None
+        )
+        self.solid_block = solid_block
+        self.flatten_nested = flatten_nested
+        self.split_size = split_size
+        self.split_pages = split_pages
+        self._handlers = {}  # 按类型缓存的处理器，长时间运行时复用
+        # 当前线程中正在转换的条目结果，用于记录各阶段耗时和使用的处理器
+        self._local = threading.local()
+
+    def handler_for(self, archive_type: str):
+        """
+        获取带有当前转换选项的压缩包处理器，同一类型的处理器只创建一次。
+
+        Args:
+            archive_type: 压缩包类型
+
+        Returns:
+            ArchiveHandler 实例
+        """
+        handler = self._handlers.get(archive_type)
+        if handler is None:
+            handler = get_handler(
+                archive_type,
+                tar_compression=self.tar_compression,
+                level=self.level,
+                backend=self.backend,
+                solid_block=self.solid_block,
+            )
+            self._handlers[archive_type] = handler
+        return handler
+
+    def _workspace(self) -> Workspace:
+        """创建转换工作区，批量转换时把新建的暂存目录报告给当前条目的 on_stage 回调。"""
+        return Workspace(
+            self.temp_dir, on_create=getattr(self._local, "on_stage", None)
+        )
+
+    def _mark_skipped(self) -> None:
+        """将当前线程中正在转换的条目标记为未转换（跳过）。"""
+        result = getattr(self._local, "result", None)
+        if result is not None:
+            result.skipped = True
+
+    @contextmanager
+    def _phase(self, name: str, read=None, write=None) -> Iterator[None]:
+        """
+        记录当前线程中正在转换的条目在某个阶段的耗时（同名阶段累加）和使用的处理器。
+
+        不是通过批量转换调用（如直接调用 convert()）时不做任何记录。
+
+        Args:
+            name: 阶段名称
+            read: 读取输入的处理器
+            write: 写入输出的处理器
+        """
+        result = getattr(self._local, "result", None)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if result is not None:
+                elapsed = time.perf_counter() - start
+                result.phases[name] = result.phases.get(name, 0.0) + elapsed
+                for operation, handler in (("read", read), ("write", write)):
+                    if handler is not None and operation not in result.handlers:
+                        result.handlers[operation] = handler.describe(operation)
+
+    @property
+    def splits_volumes(self) -> bool:
+        """是否设置了分卷的大小或页数上限。"""
+        return bool(self.split_size or self.split_pages)
+
+    @property
+    def rewrites_members(self) -> bool:
+        """
+        转换是否需要改写压缩包成员（丢弃黑名单页面、展开内层压缩包或拆分分卷），
+        不能走快速路径。
+        """
+        return bool(self.page_blocklist or self.flatten_nested or self.splits_volumes)
+
+    def estimate_resources(self, input_path: Path, output_type: str) -> Tuple[int, int]:
+        """
+        在转换前估算任务占用的临时空间和内存，只读取目录或成员头。
+
+        压缩包之间的转换需要先解压到临时目录，临时空间按解压后的总大小估算；
+        内存按最大的单个成员估算（部分处理器会整块读取成员）。
+        别名转换和 ZIP 之间的重写不使用临时目录。
+
+        Args:
+            input_path: 输入文件或文件夹路径
+            output_type: 输出类型 (folder, cbz, cbr, cb7, cbt)
+
+        Returns:
+            (临时空间字节数, 内存字节数)
         """
-        self.temp_dirs = []  # 跟踪临时目录，用于清理
+        input_type = detect_file_type(input_path)
+        if input_type is None or input_type == output_type:
+            return 0, 0
+
+        if input_type == "folder":
+            sizes = [p.stat().st_size for p in iter_files(input_path)]
+            return 0, max(sizes, default=0)
+        if self._can_alias(input_type, output_type):
+            return 0, 0
+
+        sizes = self.handler_for(input_type).uncompressed_sizes(input_path)
+        largest = max(sizes, default=0)
+        if output_type == "folder" or (
+            LEVEL_FAMILIES.get(input_type) == "zip"
+            and LEVEL_FAMILIES.get(output_type) == "zip"
+            and not self.flatten_nested
+        ):
+            return 0, largest
+        return sum(sizes), largest
 
     def convert(
         self,
@@ -73,21 +498,31 @@ class ComicBookConverter:
 
         logger.info(f"Converting {input_path} ({input_type}) to {output_type}")
 
+        # 扩展名与内容不符的压缩包（如实际是 ZIP 的 .cbr），内容已是目标格式时只需改名
+        misnamed = (
+            input_type != "folder" and get_extension_type(input_path) != input_type
+        )
+
         # 如果输入和输出类型相同，直接返回
-        if input_type == output_type:
+        if input_type == output_type and not (misnamed or self.rewrites_members):
             logger.info(f"Input and output types are the same, skipping conversion")
+            self._mark_skipped()
             return input_path
             
         # 如果输入为空目录，直接返回
         if input_type == "folder" and is_empty_directory(input_path):
             logger.info(f"{input_path} is empty, skipping conversion")
+            self._mark_skipped()
             return input_path
 
         # 生成输出路径
         output_path = get_output_path(input_path, output_type, output_dir)
 
-        # 检查输出路径是否存在
-        if output_path.exists():
+        # 检查输出路径是否存在；扩展名与内容不符的压缩包（如实际是 ZIP 的 .cbt）转换后
+        # 替换自身，此时不能预先删除，由 atomic_output 在转换成功后替换
+        if output_path.exists() and _same_file(output_path, input_path):
+            logger.info(f"Output replaces the input in place: {output_path}")
+        elif output_path.exists():
             if force:
                 logger.info(f"Force replacing existing output: {output_path}")
                 safe_remove(output_path)
@@ -96,27 +531,37 @@ class ComicBookConverter:
                 logger.info(f"Output already exists, will overwrite: {output_path}")
 
         try:
-            # 根据转换类型选择处理方法
-            if input_type == "folder" and output_type != "folder":
-                # 文件夹 -> 压缩包
-                result = self.convert_folder_to_archive(
-                    input_path, output_type, output_path
-                )
-            elif input_type != "folder" and output_type == "folder":
-                # 压缩包 -> 文件夹
-                result = self.convert_archive_to_folder(input_path, output_path)
-            elif input_type != "folder" and output_type != "folder":
-                # 压缩包 -> 压缩包
-                result = self.convert_archive_to_archive(
-                    input_path, output_type, output_path
-                )
-            else:
-                # folder -> folder (不应该发生)
-                result = input_path
+            # 每次转换使用独立的工作区，退出时只清理自己的暂存目录
+            with self._workspace() as workspace:
+                # 根据转换类型选择处理方法
+                if (
+                    input_type == output_type and not self.rewrites_members
+                ) or self._can_alias(input_type, output_type):
+                    # 同一容器格式（如 zip -> cbz），直接重命名或复制
+                    result = self.convert_alias(
+                        input_path, input_type, output_path, remove_source
+                    )
+                elif input_type == "folder" and output_type != "folder":
+                    # 文件夹 -> 压缩包
+                    result = self.convert_folder_to_archive(
+                        input_path, output_type, output_path, workspace
+                    )
+                elif input_type != "folder" and output_type == "folder":
+                    # 压缩包 -> 文件夹
+                    result = self.convert_archive_to_folder(input_path, output_path)
+                elif input_type != "folder" and output_type != "folder":
+                    # 压缩包 -> 压缩包
+                    result = self.convert_archive_to_archive(
+                        input_path, output_type, output_path, workspace
+                    )
+                else:
+                    # folder -> folder (不应该发生)
+                    result = input_path
 
             # 删除源文件
             if remove_source and result != input_path:
-                safe_remove(input_path)
+                with self._phase("remove"):
+                    safe_remove(input_path)
                 logger.info(f"Removed source file: {input_path}")
 
             logger.info(f"Conversion completed: {result}")
@@ -125,30 +570,311 @@ class ComicBookConverter:
         except Exception as e:
             logger.error(f"Conversion failed: {e}")
             raise ConversionError(f"Failed to convert {input_path}: {e}")
-        finally:
-            # 清理临时目录
-            self._cleanup_temp_dirs()
+
+    def plan(
+        self,
+        input_path: Path,
+        output_type: str,
+        output_dir: Optional[Path] = None,
+        remove_source: bool = False,
+    ) -> ConversionPlan:
+        """
+        生成单个条目的转换计划，选择与 convert() 相同的执行方式，但只读取目录或
+        成员头，不解压数据，也不创建输出。
+
+        Args:
+            input_path: 输入文件或文件夹路径
+            output_type: 输出类型 (folder, cbz, cbr, cb7, cbt)
+            output_dir: 输出目录，None 表示与输入相同的目录
+            remove_source: 是否会在转换后删除源文件（决定别名转换是重命名还是复制）
+
+        Returns:
+            ConversionPlan 实例
+
+        Raises:
+            ConversionError: 输入不存在或无法识别类型时抛出
+            UnsupportedFormatError: 不支持的输出格式时抛出
+        """
+        if not input_path.exists():
+            raise ConversionError(f"Input path does not exist: {input_path}")
+        if not is_valid_comic_format(output_type):
+            raise UnsupportedFormatError(f"Unsupported output format: {output_type}")
+        input_type = detect_file_type(input_path)
+        if input_type is None:
+            raise ConversionError(f"Cannot detect input file type: {input_path}")
+
+        if input_type == "folder":
+            sizes = [p.stat().st_size for p in iter_files(input_path)]
+            input_bytes = uncompressed_bytes = sum(sizes)
+        else:
+            input_bytes = input_path.stat().st_size
+            uncompressed_bytes = sum(
+                self.handler_for(input_type).uncompressed_sizes(input_path)
+            )
+
+        misnamed = (
+            input_type != "folder" and get_extension_type(input_path) != input_type
+        )
+        if (input_type == output_type and not (misnamed or self.rewrites_members)) or (
+            input_type == "folder" and is_empty_directory(input_path)
+        ):
+            return ConversionPlan(
+                input_path,
+                input_type,
+                output_type,
+                None,
+                PLAN_SKIP,
+                input_bytes=input_bytes,
+                uncompressed_bytes=uncompressed_bytes,
+            )
+
+        output_path = get_output_path(
+            input_path, output_type, output_dir, create_dir=False
+        )
+        read_handler = write_handler = None
+        if (
+            input_type == output_type and not self.rewrites_members
+        ) or self._can_alias(input_type, output_type):
+            method = PLAN_ALIAS_RENAME if remove_source else PLAN_ALIAS_COPY
+        elif input_type == "folder":
+            method = PLAN_COMPRESS
+            write_handler = self.handler_for(output_type).describe("write")
+        elif output_type == "folder":
+            method = PLAN_EXTRACT
+            read_handler = self.handler_for(input_type).describe("read")
+        elif (
+            LEVEL_FAMILIES.get(input_type) == "zip"
+            and LEVEL_FAMILIES.get(output_type) == "zip"
+            and not self.flatten_nested
+        ):
+            method = PLAN_ZIP_REWRITE
+            read_handler = write_handler = "RawZipWriter"
+        else:
+            method = PLAN_RECOMPRESS
+            read_handler = self.handler_for(input_type).describe("read")
+            write_handler = self.handler_for(output_type).describe("write")
+        return ConversionPlan(
+            input_path,
+            input_type,
+            output_type,
+            output_path,
+            method,
+            read_handler,
+            write_handler,
+            input_bytes,
+            uncompressed_bytes,
+        )
+
+    def _can_alias(self, input_type: str, output_type: str) -> bool:
+        """
+        判断能否走别名快速路径。
+
+        CBT 输出需要流压缩、需要按黑名单丢弃页面或展开内层压缩包时内容必须重写，
+        不能走快速路径。
+        """
+        if not is_alias_conversion(input_type, output_type) or self.rewrites_members:
+            return False
+        if get_comic_format(output_type) == "cbt" and self.tar_compression not in (
+            None,
+            "none",
+        ):
+            return False
+        return True
+
+    def convert_alias(
+        self,
+        input_path: Path,
+        input_type: str,
+        output_path: Path,
+        remove_source: bool = False,
+    ) -> Path:
+        """
+        同一容器格式之间的别名转换（zip<->cbz、rar<->cbr、7z<->cb7、tar<->cbt）。
+
+        两种格式的字节完全相同，因此先快速检查压缩包结构，然后在 remove_source 为True时
+        使用 os.replace 重命名（跨文件系统时回退为复制后删除），否则在内核中复制文件。
+
+        Args:
+            input_path: 输入压缩包路径
+            input_type: 输入压缩包类型
+            output_path: 输出压缩包路径
+            remove_source: 是否删除源文件
+
+        Returns:
+            输出压缩包路径
+
+        Raises:
+            ConversionError: 输入压缩包结构无效时抛出
+        """
+        handler = get_handler(input_type)
+        with self._phase("check", read=handler):
+            if not handler.quick_check(input_path):
+                raise ConversionError(f"Invalid {input_type} archive: {input_path}")
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._phase("alias"):
+            method = move_or_copy(input_path, output_path, remove_source)
+        logger.info(f"Aliased {input_path} to {output_path} ({method})")
+        return output_path
 
     def convert_folder_to_archive(
         self,
         folder_path: Path,
         archive_type: str,
         output_path: Path,
+        workspace: Optional[Workspace] = None,
     ) -> Path:
         """
         将文件夹转换为指定类型的压缩包。
 
+        设置了页面黑名单且文件夹中有匹配的页面时，先在暂存目录中建立不含这些页面的
+        副本（尽量使用硬链接），源文件夹不会被修改。超出分卷上限时输出为多个分卷，
+        见 _compress()。
+
         Args:
             folder_path: 源文件夹路径
             archive_type: 压缩包类型 (cbz, cbr, cb7, cbt)
             output_path: 输出压缩包路径
+            workspace: 暂存目录所属的工作区，None 表示创建临时工作区并在返回前清理
 
         Returns:
-            输出压缩包路径
+            输出压缩包路径，拆分为分卷时为存放各分卷的文件夹路径
         """
-        handler = get_handler(archive_type)
-        handler.compress(folder_path, output_path)
-        return output_path
+        handler = self.handler_for(archive_type)
+        blocked = []
+        if self.page_blocklist:
+            with self._phase("blocklist"):
+                blocked = blocked_files(folder_path, self.page_blocklist)
+        if not blocked and not self.splits_volumes:
+            with self._phase("compress", write=handler):
+                with atomic_output(output_path) as partial:
+                    handler.compress(folder_path, partial)
+            return output_path
+
+        if workspace is None:
+            owner = self._workspace()
+        else:
+            owner = nullcontext(workspace)
+
+        with owner as workspace:
+            source_path = folder_path
+            if blocked:
+                logger.info(
+                    f"Dropping {len(blocked)} blocklisted page(s) from {folder_path}"
+                )
+                skip = set(blocked)
+                source_path = workspace.make_temp_dir(output_path) / folder_path.name
+                shutil.copytree(
+                    folder_path,
+                    source_path,
+                    ignore=lambda root, names: [
+                        name for name in names if Path(root) / name in skip
+                    ],
+                    copy_function=_link_or_copy,
+                )
+            return self._compress(handler, source_path, output_path, workspace)
+
+    def _compress(
+        self, handler, source_path: Path, output_path: Path, workspace: Workspace
+    ) -> Path:
+        """
+        压缩文件夹；设置了分卷上限且超出时，在 output_path 去掉扩展名的文件夹中
+        写入多个分卷（如 book/book.part01.cbz），每个分卷都是独立有效的压缩包。
+
+        Args:
+            handler: 输出格式的处理器
+            source_path: 源文件夹路径
+            output_path: 未分卷时的输出压缩包路径
+            workspace: 分卷暂存目录所属的工作区
+
+        Returns:
+            输出压缩包路径，拆分为分卷时为存放各分卷的文件夹路径
+        """
+        with self._phase("compress", write=handler):
+            files, volumes = self._plan_source_volumes(source_path)
+            if len(volumes) <= 1:
+                with atomic_output(output_path) as partial:
+                    handler.compress(source_path, partial)
+                return output_path
+
+            volume_dir = output_path.with_suffix("")
+            _clear_directory_output(volume_dir)
+            with atomic_output(volume_dir) as partial:
+                self._write_volumes(
+                    handler,
+                    files,
+                    volumes,
+                    partial,
+                    output_path.stem,
+                    output_path.suffix,
+                    workspace.make_temp_dir(output_path),
+                )
+            logger.info(f"Split {output_path.name} into {len(volumes)} volumes")
+            return volume_dir
+
+    def _plan_source_volumes(
+        self, source_path: Path
+    ) -> Tuple[Dict[str, Path], List[List[str]]]:
+        """
+        按压缩前的文件大小划分分卷，不读取文件内容。
+
+        Args:
+            source_path: 源文件夹路径
+
+        Returns:
+            (成员名到文件路径的映射, 各分卷的成员名列表)，未设置分卷上限时分卷列表为空
+        """
+        if not self.splits_volumes:
+            return {}, []
+        files = {arcname: path for path, arcname in iter_reading_order(source_path)}
+        volumes = plan_volumes(
+            ((arcname, path.stat().st_size) for arcname, path in files.items()),
+            self.split_size,
+            self.split_pages,
+        )
+        return files, volumes
+
+    def _write_volumes(
+        self,
+        handler,
+        files: Dict[str, Path],
+        volumes: List[List[str]],
+        directory: Path,
+        stem: str,
+        suffix: str,
+        stage_root: Path,
+    ) -> List[Path]:
+        """
+        并行写入各分卷：每个分卷先在暂存目录中建立成员的硬链接，再独立压缩。
+
+        Args:
+            handler: 输出格式的处理器
+            files: 成员名到文件路径的映射
+            volumes: 各分卷的成员名列表
+            directory: 分卷所在的文件夹
+            stem: 未分卷时的输出文件名（不含扩展名）
+            suffix: 输出扩展名
+            stage_root: 存放各分卷暂存目录的目录，由调用方的工作区清理
+
+        Returns:
+            各分卷的路径
+        """
+
+        def write(index: int) -> Path:
+            name = volume_stem(stem, index, len(volumes))
+            archive_path = directory / (name + suffix)
+            # 暂存目录以分卷名命名，避免暂存目录名出现在 CBT 的成员路径中
+            stage = Path(tempfile.mkdtemp(prefix="ccb_", dir=stage_root)) / name
+            for arcname in volumes[index]:
+                target = stage / arcname
+                target.parent.mkdir(parents=True, exist_ok=True)
+                _link_or_copy(str(files[arcname]), str(target))
+            handler.compress(stage, archive_path)
+            return archive_path
+
+        directory.mkdir(parents=True, exist_ok=True)
+        workers = min(len(volumes), default_max_jobs())
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(write, range(len(volumes))))
 
     def convert_archive_to_folder(
         self,
@@ -158,6 +884,10 @@ class ComicBookConverter:
         """
         将压缩包转换为文件夹。
 
+        输出文件夹不存在时先解压到 name.partial 再整体重命名；
+        已存在时直接解压到其中（覆盖同名文件）。设置了 flatten_nested 时，
+        内层压缩包解压为同名子文件夹（merge 和 split 的结果相同）。
+
         Args:
             archive_path: 源压缩包路径
             output_path: 输出文件夹路径
@@ -169,63 +899,681 @@ class ComicBookConverter:
         if archive_type is None:
             raise ConversionError(f"Cannot detect archive type: {archive_path}")
 
-        handler = get_handler(archive_type)
-        handler.extract(archive_path, output_path)
+        handler = self.handler_for(archive_type)
+        blocked = set()
+        if self.page_blocklist:
+            with self._phase("blocklist"):
+                blocked = blocked_members(archive_path, self.page_blocklist)
+        if output_path.exists():
+            self._extract(handler, archive_path, output_path)
+            _remove_members(output_path, blocked)
+        else:
+            with atomic_output(output_path) as partial:
+                self._extract(handler, archive_path, partial)
+                _remove_members(partial, blocked)
         return output_path
 
+    def _extract(self, handler, archive_path: Path, output_path: Path) -> List[Path]:
+        """
+        解压压缩包，设置了 flatten_nested 时同时展开内层压缩包。
+
+        Args:
+            handler: 外层压缩包的处理器
+            archive_path: 压缩包路径
+            output_path: 输出目录路径
+
+        Returns:
+            内层压缩包解压得到的子文件夹列表，未展开时为空列表
+        """
+        with self._phase("extract", read=handler):
+            if not self.flatten_nested:
+                handler.extract(archive_path, output_path)
+                return []
+            nested = extract_flattened(archive_path, output_path, self.handler_for)
+        if self.page_blocklist:
+            # 外层成员由调用方按成员名删除，内层压缩包中的页面只能在解压后按内容匹配
+            for directory in nested:
+                for path in blocked_files(directory, self.page_blocklist):
+                    logger.debug(f"Dropping blocklisted page {path}")
+                    safe_remove(path)
+        return nested
+
     def convert_archive_to_archive(
         self,
         input_path: Path,
         output_type: str,
         output_path: Path,
+        workspace: Optional[Workspace] = None,
     ) -> Path:
         """
         将压缩包转换为另一种压缩包格式。
 
-        这个方法会先将输入压缩包解压到临时目录，然后再压缩为目标格式。
+        这个方法会先将输入压缩包解压到暂存目录，然后再压缩为目标格式。
+        输出先写入 name.partial，完成后再原子地替换为最终文件名。
+        flatten_nested 为 split 且存在内层压缩包时，每个内层压缩包输出为
+        与 output_path 同名（去掉扩展名）的文件夹中的一本漫画，其余成员另成一本。
 
         Args:
             input_path: 输入压缩包路径
             output_type: 输出压缩包类型 (cbz, cbr, cb7, cbt)
             output_path: 输出压缩包路径
+            workspace: 暂存目录所属的工作区，None 表示创建临时工作区并在返回前清理
+
+        Returns:
+            输出压缩包路径，按内层压缩包拆分时为存放各输出的文件夹路径
+        """
+        input_type = detect_file_type(input_path)
+        if (
+            input_type is not None
+            and LEVEL_FAMILIES.get(input_type) == "zip"
+            and LEVEL_FAMILIES.get(output_type) == "zip"
+            and not self.flatten_nested
+        ):
+            # ZIP -> ZIP 直接拷贝压缩数据，无需解压再压缩；成员同时调整为阅读顺序
+            select = None
+            if self.page_blocklist:
+                with self._phase("blocklist"):
+                    blocked = blocked_members(input_path, self.page_blocklist)
+                if blocked:
+                    logger.info(
+                        f"Dropping {len(blocked)} blocklisted page(s) from {input_path}"
+                    )
+                select = lambda name: name not in blocked  # noqa: E731
+            zip_handler = self.handler_for(output_type)
+            with self._phase("rewrite", read=zip_handler, write=zip_handler):
+                if self.splits_volumes:
+                    # 按中央目录中的压缩大小划分分卷，各分卷同样直接拷贝压缩数据
+                    with MmapZipFile(input_path) as zf:
+                        members = [
+                            (entry.filename, entry.compress_size)
+                            for entry in zf
+                            if not entry.is_dir()
+                            and (select is None or select(entry.filename))
+                        ]
+                    volumes = plan_volumes(members, self.split_size, self.split_pages)
+                    if len(volumes) > 1:
+                        return self._rewrite_zip_volumes(
+                            input_path, output_path, volumes
+                        )
+                return self.rewrite_zip(
+                    input_path, output_path, select=select, sort_key=member_order_key
+                )
+
+        if workspace is None:
+            owner = self._workspace()
+        else:
+            owner = nullcontext(workspace)
+
+        with owner as workspace:
+            # 创建暂存目录
+            # 以输出名命名内容目录，避免暂存目录名出现在 CBT 的成员路径中
+            temp_path = workspace.make_temp_dir(output_path) / output_path.stem
+
+            try:
+                # 先解压到临时目录
+                input_type = detect_file_type(input_path)
+                if input_type is None:
+                    raise ConversionError(
+                        f"Cannot detect input archive type: {input_path}"
+                    )
+
+                input_handler = self.handler_for(input_type)
+                nested = self._extract(input_handler, input_path, temp_path)
+                if self.page_blocklist:
+                    with self._phase("blocklist"):
+                        for path in blocked_files(temp_path, self.page_blocklist):
+                            logger.debug(f"Dropping blocklisted page {path}")
+                            safe_remove(path)
+
+                # 再压缩为目标格式
+                output_handler = self.handler_for(output_type)
+                if self.flatten_nested == "split" and nested:
+                    with self._phase("compress", write=output_handler):
+                        return self._compress_split(
+                            temp_path, nested, output_handler, output_path, workspace
+                        )
+                return self._compress(output_handler, temp_path, output_path, workspace)
+            except Exception as e:
+                logger.error(f"Archive to archive conversion failed: {e}")
+                raise
+
+    def _compress_split(
+        self,
+        temp_path: Path,
+        nested: List[Path],
+        handler,
+        output_path: Path,
+        workspace: Workspace,
+    ) -> Path:
+        """
+        把每个内层压缩包的解压目录分别压缩为一本漫画，写入 output_path 去掉扩展名的文件夹。
+
+        内层压缩包之外剩余的成员（如外层的封面）压缩为与 output_path 同名的一本。
+        超出分卷上限的一本在同一文件夹中拆分为多个分卷（如 ch01.part01.cbz）。
+
+        Args:
+            temp_path: 外层压缩包的解压目录
+            nested: 内层压缩包解压得到的子文件夹列表
+            handler: 输出格式的处理器
+            output_path: 未拆分时的输出压缩包路径
+            workspace: 暂存目录所属的工作区
+
+        Returns:
+            存放各输出的文件夹路径
+        """
+        split_dir = output_path.with_suffix("")
+        _clear_directory_output(split_dir)
+        stage_root = workspace.make_temp_dir(output_path)
+        with atomic_output(split_dir) as partial:
+            for directory in nested:
+                relative = directory.relative_to(temp_path)
+                self._write_split_item(
+                    handler,
+                    directory,
+                    partial / relative.parent,
+                    relative.name,
+                    output_path.suffix,
+                    stage_root,
+                )
+                shutil.rmtree(directory)
+            if next(iter_files(temp_path), None) is not None:
+                self._write_split_item(
+                    handler,
+                    temp_path,
+                    partial,
+                    output_path.stem,
+                    output_path.suffix,
+                    stage_root,
+                )
+        logger.info(f"Split {len(nested)} nested archive(s) into {split_dir}")
+        return split_dir
+
+    def _write_split_item(
+        self,
+        handler,
+        source_path: Path,
+        directory: Path,
+        stem: str,
+        suffix: str,
+        stage_root: Path,
+    ) -> None:
+        """在拆分输出的文件夹中写入一本漫画，超出分卷上限时写为多个分卷。"""
+        files, volumes = self._plan_source_volumes(source_path)
+        if len(volumes) > 1:
+            self._write_volumes(
+                handler, files, volumes, directory, stem, suffix, stage_root
+            )
+        else:
+            directory.mkdir(parents=True, exist_ok=True)
+            handler.compress(source_path, directory / (stem + suffix))
+
+    def _rewrite_zip_volumes(
+        self, input_path: Path, output_path: Path, volumes: List[List[str]]
+    ) -> Path:
+        """
+        把 ZIP 按分卷并行重写为多个 CBZ，直接拷贝成员的压缩数据。
+
+        Args:
+            input_path: 输入压缩包路径
+            output_path: 未分卷时的输出压缩包路径
+            volumes: 各分卷的成员名列表
+
+        Returns:
+            存放各分卷的文件夹路径
+        """
+        level = self.handler_for("cbz").level
+        volume_dir = output_path.with_suffix("")
+        _clear_directory_output(volume_dir)
+
+        def write(index: int) -> Path:
+            name = volume_stem(output_path.stem, index, len(volumes))
+            members = set(volumes[index])
+            return repack_zip(
+                input_path,
+                partial / (name + output_path.suffix),
+                select=members.__contains__,
+                sort_key=member_order_key,
+                level=level,
+            )
+
+        with atomic_output(volume_dir) as partial:
+            partial.mkdir()
+            workers = min(len(volumes), default_max_jobs())
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(write, range(len(volumes))))
+        logger.info(f"Split {output_path.name} into {len(volumes)} volumes")
+        return volume_dir
+
+    def rewrite_zip(
+        self,
+        input_path: Path,
+        output_path: Path,
+        select: Optional[Callable[[str], bool]] = None,
+        rename: Optional[Callable[[str], str]] = None,
+        sort_key: Optional[Callable[[str], object]] = None,
+        add_files: Optional[Dict[str, bytes]] = None,
+    ) -> Path:
+        """
+        重写 CBZ/ZIP 压缩包（筛选、重命名、重新排序成员或添加元数据文件）。
+
+        未修改的成员直接拷贝原有的压缩数据、CRC 和大小，只有 add_files 中的新内容
+        按当前压缩级别重新压缩。
+
+        Args:
+            input_path: 输入压缩包路径
+            output_path: 输出压缩包路径
+            select: 成员筛选函数，返回False的成员会被丢弃
+            rename: 成员重命名函数
+            sort_key: 成员排序键函数，None 时保持原顺序
+            add_files: 需要添加或替换的成员，成员名到内容的映射
 
         Returns:
             输出压缩包路径
         """
-        # 创建临时目录
-        temp_dir = tempfile.mkdtemp(prefix="ccb_")
-        self.temp_dirs.append(temp_dir)
-        temp_path = Path(temp_dir)
+        handler = self.handler_for("cbz")
+        with atomic_output(output_path) as partial:
+            repack_zip(
+                input_path,
+                partial,
+                select=select,
+                rename=rename,
+                sort_key=sort_key,
+                add_files=add_files,
+                level=handler.level,
+            )
+        return output_path
+
+    def merge(
+        self, inputs: Iterable[Path], output_path: Path, force: bool = False
+    ) -> Path:
+        """
+        把多个章节（压缩包或文件夹）合并为一本漫画，只读取和写入一次数据。
 
+        每个输入的成员加上以输入名命名的前缀（如 ch01/001.jpg），整体按阅读顺序写入。
+        输出为 CBZ 时 ZIP 输入的成员直接拷贝压缩数据，其他输入以流的方式读取后压缩；
+        其他输出格式先把成员写入暂存目录（文件夹输入尽量使用硬链接），再由处理器压缩。
+
+        Args:
+            inputs: 输入压缩包或文件夹路径
+            output_path: 输出压缩包路径，格式由扩展名决定
+            force: 是否强制替换已存在的输出
+
+        Returns:
+            输出压缩包路径
+
+        Raises:
+            ConversionError: 没有输入、输入不存在或合并失败时抛出
+            UnsupportedFormatError: 输出扩展名不是支持的压缩包格式时抛出
+        """
+        inputs = [Path(path) for path in inputs]
+        if not inputs:
+            raise ConversionError("No inputs to merge")
+        for path in inputs:
+            if not path.exists():
+                raise ConversionError(f"Input path does not exist: {path}")
+        output_type = get_extension_type(output_path)
+        if output_type is None:
+            raise UnsupportedFormatError(
+                f"Unsupported output format: {output_path.suffix}"
+            )
+        if output_path.exists() and any(_same_file(output_path, p) for p in inputs):
+            # 输出是输入之一时不能预先删除，由 atomic_output 在合并成功后替换
+            logger.info(f"Output replaces an input in place: {output_path}")
+        elif output_path.exists():
+            if force:
+                logger.info(f"Force replacing existing output: {output_path}")
+                safe_remove(output_path)
+            else:
+                logger.info(f"Output already exists, will overwrite: {output_path}")
+
+        logger.info(f"Merging {len(inputs)} input(s) into {output_path}")
+        try:
+            skip = self._merge_skip(inputs) if self.page_blocklist else None
+            with ExitStack() as stack:
+                sources = open_sources(stack, inputs, skip)
+                if LEVEL_FAMILIES.get(output_type) == "zip":
+                    with atomic_output(output_path) as partial:
+                        count = merge_to_zip(
+                            sources, partial, self.handler_for(output_type).level
+                        )
+                else:
+                    with self._workspace() as workspace:
+                        stage = workspace.make_temp_dir(output_path) / output_path.stem
+                        count = merge_to_directory(sources, stage)
+                        with atomic_output(output_path) as partial:
+                            self.handler_for(output_type).compress(stage, partial)
+        except Exception as e:
+            logger.error(f"Merge failed: {e}")
+            raise ConversionError(f"Failed to merge into {output_path}: {e}")
+        logger.info(f"Merged {count} member(s) into {output_path}")
+        return output_path
+
+    def _merge_skip(self, inputs: List[Path]) -> Dict[Path, set]:
+        """按页面黑名单找出每个输入中需要丢弃的成员名。"""
+        skip = {}
+        for path in inputs:
+            if path.is_dir():
+                skip[path] = {
+                    file_path.relative_to(path).as_posix()
+                    for file_path in blocked_files(path, self.page_blocklist)
+                }
+            else:
+                skip[path] = blocked_members(path, self.page_blocklist)
+        return skip
+
+    def convert_stream(
+        self,
+        source: Union[Path, BinaryIO],
+        output: BinaryIO,
+        output_type: str,
+        input_type: Optional[str] = None,
+    ) -> int:
+        """
+        把输入转换为压缩包并写入不可定位的流（如标准输出），用于管道。
+
+        输入为流（如标准输入）时只支持 ZIP 和 TAR 族，成员按存储顺序读取并写出，
+        格式由 input_type 指定或按开头的字节识别；输入为文件或文件夹时可以是任何支持的格式，
+        成员按阅读顺序写出。页面黑名单在读取每个页面时按内容过滤。
+        每次只处理一个成员，内存占用以最大的成员为上限。
+
+        Args:
+            source: 输入的二进制只读流，或输入文件/文件夹路径
+            output: 输出的二进制只写流，由调用方负责关闭
+            output_type: 输出类型，只支持 ZIP 和 TAR 族 (cbz, cbt)
+            input_type: 输入类型，None 或 "auto" 表示自动识别
+
+        Returns:
+            写入的成员数
+
+        Raises:
+            UnsupportedFormatError: 输入或输出格式不支持流式处理时抛出
+            ConversionError: 转换失败时抛出
+        """
+        if LEVEL_FAMILIES.get(output_type) not in STREAM_FAMILIES:
+            raise UnsupportedFormatError(
+                f"Cannot write {output_type} to a stream (supported: cbz, cbt)"
+            )
+        if input_type == "auto":
+            input_type = None
+        members = self._stream_members(source, input_type)
+        if self.page_blocklist:
+            members = self._drop_blocked_members(members)
         try:
-            # 先解压到临时目录
-            input_type = detect_file_type(input_path)
+            count = self.handler_for(output_type).write_stream(members, output)
+        except UnsupportedFormatError:
+            raise
+        except Exception as e:
+            logger.error(f"Stream conversion failed: {e}")
+            raise ConversionError(f"Failed to convert stream to {output_type}: {e}")
+        logger.debug(f"Wrote {count} member(s) as {output_type} to the output stream")
+        return count
+
+    def _stream_members(
+        self, source: Union[Path, BinaryIO], input_type: Optional[str]
+    ) -> Iterator[Tuple[str, BinaryIO]]:
+        """按顺序逐个打开输入的文件成员。"""
+        if isinstance(source, Path):
+            input_type = input_type or detect_file_type(source)
+            if input_type == "folder":
+                for file_path, arcname in iter_reading_order(source):
+                    with open(file_path, "rb") as f:
+                        yield arcname, f
+                return
             if input_type is None:
-                raise ConversionError(f"Cannot detect input archive type: {input_path}")
+                raise UnsupportedFormatError(f"Cannot detect input type: {source}")
+            with self.handler_for(input_type).open_reader(source) as reader:
+                for name in sorted(reader.names(), key=member_order_key):
+                    with reader.open(name) as f:
+                        yield name, f
+            return
 
-            input_handler = get_handler(input_type)
-            input_handler.extract(input_path, temp_path)
+        stream = PeekableStream(source)
+        if input_type is None:
+            input_type = sniff_archive_bytes(stream.peek(SNIFF_SIZE))
+            if input_type == "compressed":
+                input_type = "tar"
+        if LEVEL_FAMILIES.get(input_type) not in STREAM_FAMILIES:
+            raise UnsupportedFormatError(
+                f"Cannot read {input_type or 'unknown'} input from a stream "
+                "(supported: zip/cbz, tar/cbt)"
+            )
+        yield from self.handler_for(input_type).iter_stream(stream)
 
-            # 再压缩为目标格式
-            output_handler = get_handler(output_type)
-            output_handler.compress(temp_path, output_path)
+    def _drop_blocked_members(
+        self, members: Iterable[Tuple[str, BinaryIO]]
+    ) -> Iterator[Tuple[str, BinaryIO]]:
+        """读取页面内容计算哈希，丢弃命中页面黑名单的页面。"""
+        for name, stream in members:
+            if is_page_name(name):
+                data = stream.read()
+                if hashlib.new(HASH_ALGORITHM, data).hexdigest() in self.page_blocklist:
+                    logger.debug(f"Dropping blocklisted page {name}")
+                    continue
+                stream = io.BytesIO(data)
+            yield name, stream
 
-            return output_path
+    def _convert_item(
+        self,
+        input_path: Path,
+        output_type: str,
+        output_dir: Optional[Path],
+        remove_source: bool,
+        force: bool,
+        on_start: Optional[Callable[[Path, str], None]] = None,
+        cancel: Optional[threading.Event] = None,
+        queued_at: Optional[float] = None,
+        on_stage: Optional[Callable[[Path, Path], None]] = None,
+    ) -> ConversionResult:
+        """转换单个条目，将异常、耗时、字节数和各阶段耗时记录到结果中而不是抛出。
+
+        cancel 被设置时，正在运行的外部压缩工具会被终止。queued_at 为条目开始排队时的
+        time.perf_counter()，到开始转换为止的时间记为 queue 阶段。条目每创建一个暂存目录，
+        都以输入路径和该目录调用 on_stage。
+        """
+        if on_start is not None:
+            on_start(input_path, output_type)
+        result = ConversionResult(input_path, output_type)
+        if queued_at is not None:
+            result.phases["queue"] = time.perf_counter() - queued_at
+        result.bytes_in = path_size(input_path)
+        self._local.result = result
+        if on_stage is not None:
+            self._local.on_stage = lambda stage: on_stage(input_path, stage)
+        start = time.perf_counter()
+        try:
+            with cancel_scope(cancel):
+                result.output_path = self.convert(
+                    input_path, output_type, output_dir, remove_source, force
+                )
         except Exception as e:
-            logger.error(f"Archive to archive conversion failed: {e}")
-            raise
+            result.error = e
+        finally:
+            self._local.result = None
+            self._local.on_stage = None
+        result.elapsed = time.perf_counter() - start
+        if result.output_path is not None:
+            result.bytes_out = path_size(result.output_path)
+        return result
 
-    def _cleanup_temp_dirs(self) -> None:
+    def convert_many(
+        self,
+        items: Iterable[Item],
+        output_type: str = "cbz",
+        output_dir: Optional[Path] = None,
+        remove_source: bool = False,
+        force: bool = False,
+        jobs: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ) -> Iterator[ConversionResult]:
         """
-        清理所有临时目录。
+        并发转换多个条目，按完成顺序逐个产出结果。
+
+        单个条目失败不会中断批量任务，错误记录在结果的 error 中。
+        同时提交的条目数不超过 jobs，提前停止迭代时尚未开始的条目会被取消。
+
+        Args:
+            items: 输入路径，或 (输入路径, 输出类型) 的可迭代对象
+            output_type: 未单独指定时的输出类型
+            output_dir: 输出目录，None 表示与输入相同的目录
+            remove_source: 是否在转换后删除源文件
+            force: 是否强制替换同名的输出
+            jobs: 最大并发数，None 表示 CPU 数 + 4（最多 32）
+            executor: 执行转换的线程池，None 表示临时创建
 
-        该方法会尝试删除所有由转换器创建的临时目录，
-        处理文件锁定情况，包括重试机制和文件级别的删除。
+        Yields:
+            ConversionResult 实例
         """
-        for temp_dir in self.temp_dirs:
-            try:
-                shutil.rmtree(temp_dir)
-                logger.debug(f"Cleaned up temp directory: {temp_dir}")
-            except Exception as e:
-                logger.warning(f"Failed to cleanup temp directory {temp_dir}: {e}")
-        self.temp_dirs.clear()
+        jobs = jobs or default_max_jobs()
+        own_executor = executor is None
+        if own_executor:
+            executor = ThreadPoolExecutor(max_workers=jobs)
+        pending = set()
+        queue = _normalize_items(items, output_type)
+
+        def fill() -> None:
+            for input_path, item_type in queue:
+                pending.add(
+                    executor.submit(
+                        self._convert_item,
+                        input_path,
+                        item_type,
+                        output_dir,
+                        remove_source,
+                        force,
+                        queued_at=time.perf_counter(),
+                    )
+                )
+                if len(pending) >= jobs:
+                    return
+
+        try:
+            fill()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                pending.difference_update(done)
+                fill()
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+            if own_executor:
+                executor.shutdown(wait=True)
+
+    async def aconvert_many(
+        self,
+        items: Iterable[Item],
+        output_type: str = "cbz",
+        output_dir: Optional[Path] = None,
+        remove_source: bool = False,
+        force: bool = False,
+        jobs: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        timeout: Optional[float] = None,
+        scheduler: Optional[ResourceScheduler] = None,
+        on_start: Optional[Callable[[Path, str], None]] = None,
+        on_stage: Optional[Callable[[Path, Path], None]] = None,
+    ) -> AsyncIterator[ConversionResult]:
+        """
+        convert_many 的异步版本，按完成顺序逐个产出结果。
+
+        转换在 executor（None 表示事件循环的默认线程池）中执行。取消迭代的任务或
+        提前关闭生成器会取消尚未开始的条目；超过 timeout 的条目以超时错误结束。
+        超时或取消时，正在运行的外部工具（如 rar）会被终止，纯 Python 的转换步骤
+        无法被中断，会在后台继续执行直到完成。事件循环本身不会被阻塞。
+
+        Args:
+            items: 输入路径，或 (输入路径, 输出类型) 的可迭代对象
+            output_type: 未单独指定时的输出类型
+            output_dir: 输出目录，None 表示与输入相同的目录
+            remove_source: 是否在转换后删除源文件
+            force: 是否强制替换同名的输出
+            jobs: 最大并发数，None 表示 CPU 数 + 4（最多 32）；指定 scheduler 时由其控制
+            executor: 执行转换的线程池
+            timeout: 单个条目的超时时间（秒），None 表示不限制
+            scheduler: 资源调度器，指定时先估算每个条目的临时空间和内存，预算足够才开始。
+                同时在途（估算中、等待预算或转换中）的条目最多为并发数的两倍
+            on_start: 条目开始转换时在工作线程中调用，参数为输入路径和输出类型
+            on_stage: 条目创建暂存目录时在工作线程中调用，参数为输入路径和暂存目录
+
+        Yields:
+            ConversionResult 实例
+        """
+        loop = asyncio.get_running_loop()
+        limit = asyncio.Semaphore(jobs or default_max_jobs())
+
+        async def run(input_path: Path, item_type: str) -> ConversionResult:
+            queued_at = time.perf_counter()
+            if scheduler is not None:
+                try:
+                    temp_bytes, memory_bytes = await loop.run_in_executor(
+                        executor, self.estimate_resources, input_path, item_type
+                    )
+                except Exception as e:
+                    logger.debug(
+                        f"Failed to estimate resources for {input_path}: {e}"
+                    )
+                    temp_bytes, memory_bytes = 0, 0
+                slot = scheduler.reserve(temp_bytes, memory_bytes)
+            else:
+                slot = limit
+            async with slot:
+                start = time.perf_counter()
+                cancel = threading.Event()
+                try:
+                    return await asyncio.wait_for(
+                        loop.run_in_executor(
+                            executor,
+                            self._convert_item,
+                            input_path,
+                            item_type,
+                            output_dir,
+                            remove_source,
+                            force,
+                            on_start,
+                            cancel,
+                            queued_at,
+                            on_stage,
+                        ),
+                        timeout,
+                    )
+                except asyncio.CancelledError:
+                    cancel.set()
+                    raise
+                except asyncio.TimeoutError:
+                    cancel.set()
+                    return ConversionResult(
+                        input_path,
+                        item_type,
+                        error=ConversionError(
+                            f"Timed out after {timeout}s: {input_path}"
+                        ),
+                        elapsed=time.perf_counter() - start,
+                    )
+
+        # 只让有限数量的条目同时在途，估算随条目开始按需进行
+        pending_items = iter(_normalize_items(items, output_type))
+        window = 2 * (
+            jobs or (scheduler and scheduler.max_jobs) or default_max_jobs()
+        )
+        tasks: Set[asyncio.Future] = set()
+
+        def refill() -> None:
+            for input_path, item_type in itertools.islice(
+                pending_items, window - len(tasks)
+            ):
+                tasks.add(asyncio.ensure_future(run(input_path, item_type)))
+
+        try:
+            refill()
+            while tasks:
+                done, _ = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+                tasks.difference_update(done)
+                refill()
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,303 @@
+"""
+页面去重模块
+
+该模块为压缩包中的每一页计算内容哈希，建立跨压缩包的页面索引，用于找出在多个
+漫画中重复出现的页面（如汉化组的制作人员页、广告页）以及页面完全相同的漫画。
+哈希在读取成员时流式计算，不解压到磁盘；不同压缩包在线程池中并行处理。
+"""
+
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, Optional, Set, Tuple
+
+from .archive_handler import is_page_name, open_reader
+from .file_detector import is_archive_file
+from .scheduler import default_max_jobs
+from .utils import PARTIAL_SUFFIX, STAGING_PREFIX, natural_sort_key
+
+logger = logging.getLogger(__name__)
+
+# 页面哈希算法，与 sha256sum 的输出一致，便于手工生成黑名单
+HASH_ALGORITHM = "sha256"
+
+# 流式计算哈希时每次读取的字节数
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# 单个页面的索引记录：(页面成员名, 哈希, 字节数)
+PageHash = Tuple[str, str, int]
+
+
+def hash_stream(stream: BinaryIO) -> Tuple[str, int]:
+    """
+    分块读取流并计算哈希。
+
+    Args:
+        stream: 二进制只读流
+
+    Returns:
+        (十六进制哈希, 字节数)
+    """
+    digest = hashlib.new(HASH_ALGORITHM)
+    size = 0
+    while True:
+        chunk = stream.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def hash_pages(archive_path: Path) -> List[PageHash]:
+    """
+    按页面顺序计算压缩包中每一页的哈希，成员以流的方式读取，不解压到磁盘。
+
+    Args:
+        archive_path: 压缩包路径
+
+    Returns:
+        (页面成员名, 哈希, 字节数) 列表
+
+    Raises:
+        ArchiveError: 打开或读取压缩包失败时抛出
+    """
+    pages = []
+    with open_reader(archive_path) as reader:
+        for name in reader.pages:
+            with reader.open(name) as stream:
+                digest, size = hash_stream(stream)
+            pages.append((name, digest, size))
+    return pages
+
+
+def find_archives(paths: Iterable[Path]) -> List[Path]:
+    """
+    收集路径中的所有压缩包，目录会被递归遍历。
+
+    暂存目录和未完成的输出（.partial）会被跳过。
+
+    Args:
+        paths: 文件或目录路径
+
+    Returns:
+        按自然顺序排序、去除重复后的压缩包路径列表
+    """
+    found: Dict[Path, None] = {}
+    for path in paths:
+        path = Path(path)
+        if path.is_file():
+            if is_archive_file(path):
+                found[path] = None
+            continue
+        if not path.is_dir():
+            logger.warning(f"Path does not exist: {path}")
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = [d for d in dirs if not d.startswith(STAGING_PREFIX)]
+            for name in files:
+                candidate = Path(root) / name
+                if not name.endswith(PARTIAL_SUFFIX) and is_archive_file(candidate):
+                    found[candidate] = None
+    return sorted(found, key=lambda p: natural_sort_key(str(p)))
+
+
+class PageIndex:
+    """跨压缩包的页面内容哈希索引。"""
+
+    def __init__(self):
+        # 压缩包 -> 按页面顺序的 (页面成员名, 哈希, 字节数)
+        self.archives: Dict[Path, List[PageHash]] = {}
+        # 读取失败的压缩包 -> 错误信息
+        self.errors: Dict[Path, str] = {}
+        # 哈希 -> 出现位置 (压缩包, 页面成员名)
+        self._locations: Dict[str, List[Tuple[Path, str]]] = {}
+        # 哈希 -> 页面字节数
+        self._sizes: Dict[str, int] = {}
+
+    def add(self, archive_path: Path, pages: List[PageHash]) -> None:
+        """
+        将一个压缩包的页面哈希加入索引。
+
+        Args:
+            archive_path: 压缩包路径
+            pages: hash_pages() 的结果
+        """
+        self.archives[archive_path] = pages
+        for name, digest, size in pages:
+            self._locations.setdefault(digest, []).append((archive_path, name))
+            self._sizes[digest] = size
+
+    @property
+    def page_count(self) -> int:
+        """索引中的页面总数。"""
+        return sum(len(pages) for pages in self.archives.values())
+
+    def duplicate_pages(
+        self, min_archives: int = 2
+    ) -> List[Tuple[str, int, List[Tuple[Path, str]]]]:
+        """
+        获取出现在至少 min_archives 个压缩包中的页面。
+
+        Args:
+            min_archives: 页面至少出现在多少个不同的压缩包中
+
+        Returns:
+            (哈希, 页面字节数, 出现位置列表) 列表，按可节省的字节数从大到小排序
+        """
+        duplicates = []
+        for digest, locations in self._locations.items():
+            if len(locations) < 2:
+                continue
+            if len({archive for archive, _ in locations}) >= min_archives:
+                duplicates.append((digest, self._sizes[digest], locations))
+        duplicates.sort(key=lambda d: d[1] * (len(d[2]) - 1), reverse=True)
+        return duplicates
+
+    def duplicate_comics(self) -> List[List[Path]]:
+        """
+        获取所有页面（内容和顺序）完全相同的压缩包分组。
+
+        Returns:
+            每组至少包含两个压缩包的列表
+        """
+        groups: Dict[Tuple[str, ...], List[Path]] = {}
+        for archive_path, pages in self.archives.items():
+            if pages:
+                key = tuple(digest for _, digest, _ in pages)
+                groups.setdefault(key, []).append(archive_path)
+        return [group for group in groups.values() if len(group) > 1]
+
+    def wasted_bytes(self, min_archives: int = 2) -> int:
+        """
+        重复页面占用的额外字节数（每个重复页面只保留一份时可节省的空间）。
+
+        Args:
+            min_archives: 同 duplicate_pages()
+
+        Returns:
+            字节数
+        """
+        return sum(
+            size * (len(locations) - 1)
+            for _, size, locations in self.duplicate_pages(min_archives)
+        )
+
+
+def build_index(archives: Iterable[Path], jobs: Optional[int] = None) -> PageIndex:
+    """
+    并行计算多个压缩包的页面哈希并建立索引。
+
+    读取失败的压缩包记录在 PageIndex.errors 中，不会中断其他压缩包。
+
+    Args:
+        archives: 压缩包路径
+        jobs: 并行读取的压缩包数，None 表示 CPU 数 + 4（最多 32）
+
+    Returns:
+        PageIndex 实例
+    """
+    index = PageIndex()
+    archives = list(archives)
+
+    def _hash(archive_path: Path) -> Tuple[Path, Optional[List[PageHash]], str]:
+        try:
+            return archive_path, hash_pages(archive_path), ""
+        except Exception as e:
+            return archive_path, None, str(e)
+
+    with ThreadPoolExecutor(max_workers=jobs or default_max_jobs()) as pool:
+        for archive_path, pages, error in pool.map(_hash, archives):
+            if pages is None:
+                logger.warning(f"Failed to hash pages of {archive_path}: {error}")
+                index.errors[archive_path] = error
+            else:
+                index.add(archive_path, pages)
+    return index
+
+
+def load_blocklist(path: Path) -> Set[str]:
+    """
+    读取页面哈希黑名单。
+
+    每行一个哈希，哈希之后的内容（如 sha256sum 输出的文件名）和以 # 开头的注释行会被忽略。
+
+    Args:
+        path: 黑名单文件路径
+
+    Returns:
+        小写十六进制哈希集合
+
+    Raises:
+        ValueError: 某一行不是有效的哈希时抛出
+    """
+    expected = hashlib.new(HASH_ALGORITHM).digest_size * 2
+    blocklist = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            digest = line.split()[0].lower()
+            if len(digest) != expected or any(
+                c not in "0123456789abcdef" for c in digest
+            ):
+                raise ValueError(
+                    f"Invalid {HASH_ALGORITHM} hash on line {line_no} of {path}: "
+                    f"{digest}"
+                )
+            blocklist.add(digest)
+    return blocklist
+
+
+def write_blocklist(path: Path, digests: Iterable[str]) -> None:
+    """
+    将哈希写入黑名单文件，每行一个。
+
+    Args:
+        path: 黑名单文件路径
+        digests: 十六进制哈希
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        for digest in digests:
+            f.write(f"{digest}\n")
+
+
+def blocked_members(archive_path: Path, blocklist: Set[str]) -> Set[str]:
+    """
+    找出压缩包中哈希在黑名单内的页面。
+
+    Args:
+        archive_path: 压缩包路径
+        blocklist: 页面哈希黑名单
+
+    Returns:
+        需要丢弃的页面成员名集合
+    """
+    return {name for name, digest, _ in hash_pages(archive_path) if digest in blocklist}
+
+
+def blocked_files(directory: Path, blocklist: Set[str]) -> List[Path]:
+    """
+    找出目录中哈希在黑名单内的图片文件。
+
+    Args:
+        directory: 目录路径
+        blocklist: 页面哈希黑名单
+
+    Returns:
+        需要丢弃的文件路径列表
+    """
+    blocked = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not is_page_name(name):
+                continue
+            path = Path(root) / name
+            with open(path, "rb") as f:
+                digest, _ = hash_stream(f)
+            if digest in blocklist:
+                blocked.append(path)
+    return blocked
@@ -2,8 +2,10 @@
 文件类型检测模块
 
 该模块提供了检测文件类型、判断图片格式和压缩包格式等功能。
+压缩包类型以文件头签名为准，扩展名只在无法识别内容时使用。
 """
 
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 import logging
@@ -26,6 +28,17 @@ IMAGE_EXTENSIONS = {
     ".heic",
 }
 
+# 自身已压缩的图片格式，再次压缩几乎无法减小体积
+COMPRESSED_IMAGE_EXTENSIONS = {
+    ".jpg",
+    ".jpeg",
+    ".png",
+    ".gif",
+    ".webp",
+    ".avif",
+    ".heic",
+}
+
 # 支持的压缩格式映射
 ARCHIVE_EXTENSIONS = {
     ".cbz": "cbz",
@@ -38,6 +51,22 @@ ARCHIVE_EXTENSIONS = {
     ".tar": "tar",
 }
 
+# 压缩包文件头签名
+ZIP_SIGNATURES = (b"PK\x03\x04", b"PK\x05\x06")
+RAR_SIGNATURES = (b"Rar!\x1a\x07\x00", b"Rar!\x1a\x07\x01\x00")
+SEVENZIP_SIGNATURE = b"7z\xbc\xaf\x27\x1c"
+# POSIX tar 头中位于偏移 257 处的 "ustar" 标记
+TAR_MAGIC_OFFSET = 257
+TAR_MAGIC = b"ustar"
+# 流压缩签名（gzip、xz、zstd），本项目中只有 CBT 会使用流压缩
+STREAM_COMPRESSION_SIGNATURES = (
+    b"\x1f\x8b",
+    b"\xfd7zXZ\x00",
+    b"\x28\xb5\x2f\xfd",
+)
+# 识别签名需要读取的字节数
+SNIFF_SIZE = 512
+
 # 标准格式到漫画书格式的映射
 STANDARD_TO_COMIC = {
     "zip": "cbz",
@@ -77,10 +106,78 @@ def is_archive_file(path: Path) -> bool:
     return path.suffix.lower() in ARCHIVE_EXTENSIONS
 
 
+def sniff_archive_bytes(head: bytes) -> Optional[str]:
+    """
+    根据数据开头（至少 512 字节，数据更短时为全部内容）的签名识别压缩包容器格式。
+
+    Args:
+        head: 数据开头的字节
+
+    Returns:
+        "zip"、"rar"、"7z"、"tar"，流压缩数据返回 "compressed"，无法识别时返回None
+    """
+    if head.startswith(ZIP_SIGNATURES):
+        return "zip"
+    if head.startswith(RAR_SIGNATURES):
+        return "rar"
+    if head.startswith(SEVENZIP_SIGNATURE):
+        return "7z"
+    if head[TAR_MAGIC_OFFSET : TAR_MAGIC_OFFSET + len(TAR_MAGIC)] == TAR_MAGIC:
+        return "tar"
+    if head.startswith(STREAM_COMPRESSION_SIGNATURES):
+        return "compressed"
+    return None
+
+
+def sniff_archive_format(path: Path) -> Optional[str]:
+    """
+    读取文件开头的 512 字节，根据签名识别压缩包容器格式。
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        "zip"、"rar"、"7z"、"tar"，流压缩数据返回 "compressed"，
+        无法识别或读取失败时返回None
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(SNIFF_SIZE)
+    except OSError:
+        return None
+    return sniff_archive_bytes(head)
+
+
+@lru_cache(maxsize=4096)
+def _detect_archive_type(path_str: str, mtime_ns: int, size: int) -> Optional[str]:
+    """按路径、mtime 和大小缓存的压缩包类型检测，文件改变后自动重新识别。"""
+    path = Path(path_str)
+    by_extension = get_extension_type(path)
+    content = sniff_archive_format(path)
+    if content == "compressed":
+        # 流压缩的 TAR 没有可识别的 tar 头，只在扩展名是 TAR 时接受
+        content = "tar" if get_comic_format(by_extension or "") == "cbt" else None
+    if content is None or get_comic_format(content) == get_comic_format(
+        by_extension or ""
+    ):
+        return by_extension
+
+    # 扩展名与内容不符：保持扩展名的命名风格（标准格式或漫画书格式）
+    actual = content if by_extension in STANDARD_TO_COMIC else get_comic_format(content)
+    logger.warning(
+        f"{path} has a {path.suffix} extension but contains a {content} archive, "
+        f"treating it as {actual}"
+    )
+    return actual
+
+
 def detect_file_type(path: Path) -> Optional[str]:
     """
     检测文件或文件夹的类型。
 
+    压缩包以文件头签名为准（例如实际是 ZIP 的 .cbr 文件识别为 cbz），
+    签名无法识别时使用扩展名。签名检测结果按路径和 mtime 缓存。
+
     Args:
         path: 文件或文件夹路径
 
@@ -101,12 +198,26 @@ def detect_file_type(path: Path) -> Optional[str]:
     if path.is_file():
         extension = path.suffix.lower()
         if extension in ARCHIVE_EXTENSIONS:
-            return ARCHIVE_EXTENSIONS[extension]
+            st = path.stat()
+            return _detect_archive_type(str(path), st.st_mtime_ns, st.st_size)
 
     logger.warning(f"Cannot detect file type for: {path}")
     return None
 
 
+def get_extension_type(path: Path) -> Optional[str]:
+    """
+    仅根据扩展名获取压缩包类型，不读取文件内容。
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        类型字符串，扩展名不是支持的压缩格式时返回None
+    """
+    return ARCHIVE_EXTENSIONS.get(path.suffix.lower())
+
+
 def get_comic_format(standard_format: str) -> str:
     """
     将标准压缩格式转换为对应的漫画书格式。
@@ -120,6 +231,22 @@ def get_comic_format(standard_format: str) -> str:
     return STANDARD_TO_COMIC.get(standard_format, standard_format)
 
 
+def is_alias_conversion(input_type: str, output_type: str) -> bool:
+    """
+    判断转换是否只是同一容器格式之间的别名转换（如 zip -> cbz、cbr -> rar）。
+
+    Args:
+        input_type: 输入类型
+        output_type: 输出类型
+
+    Returns:
+        如果两种类型属于同一容器格式且不相同则返回True
+    """
+    if input_type == output_type or "folder" in (input_type, output_type):
+        return False
+    return get_comic_format(input_type) == get_comic_format(output_type)
+
+
 def is_valid_comic_format(format_type: str) -> bool:
     """
     检查格式是否为有效的漫画书格式。
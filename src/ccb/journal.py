@@ -0,0 +1,264 @@
+"""
+任务日志模块
+
+该模块以只追加的 JSON Lines 文件记录批量转换中每个条目的状态（进行中、完成、失败）
+及其输出路径，使中断的批量任务可以从停止的位置继续。写入在内存中攒批，
+按条数或时间间隔一次性写入文件，避免拖慢转换吞吐；后台定时器保证缓存的记录
+最迟在一个时间间隔后落盘，进程崩溃时最多丢失这段时间内的记录。
+"""
+
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .utils import STAGING_PREFIX, partial_path, safe_remove
+
+logger = logging.getLogger(__name__)
+
+STARTED = "started"
+DONE = "done"
+FAILED = "failed"
+
+
+class JournalState:
+    """从任务日志中读取的各条目最终状态。"""
+
+    def __init__(self, records: Dict[str, Dict[str, Optional[str]]]):
+        """初始化状态。
+
+        Args:
+            records: 输入路径到其最后一条记录的映射
+        """
+        self.records = records
+
+    def status(self, input_path: Path) -> Optional[str]:
+        """
+        获取条目的最后状态。
+
+        Args:
+            input_path: 输入路径
+
+        Returns:
+            "started"、"done"、"failed"，没有记录时返回None
+        """
+        record = self.records.get(Journal.key(input_path))
+        return record["status"] if record else None
+
+    def is_done(self, input_path: Path) -> bool:
+        """条目是否已经成功完成。"""
+        return self.status(input_path) == DONE
+
+    def in_progress(self) -> List[Dict[str, Optional[str]]]:
+        """
+        获取上次运行中断时仍在进行中的条目。
+
+        Returns:
+            记录列表
+        """
+        return [r for r in self.records.values() if r["status"] == STARTED]
+
+    def cleanup_in_progress(self) -> int:
+        """
+        删除中断条目遗留的未完成输出和暂存目录。
+
+        只删除属于这些条目的路径：未完成的输出文件（name.partial）、未完成的分卷或
+        拆分文件夹（stem.partial），以及 "started" 记录中登记的暂存目录。
+        其他进程的暂存目录即使位于同一目录中也不会被删除。
+
+        Returns:
+            删除的路径数
+        """
+        targets: List[Path] = []
+        for record in self.in_progress():
+            if record.get("output"):
+                output = Path(record["output"])
+                targets.append(partial_path(output))
+                if output.suffix:
+                    targets.append(partial_path(output.with_suffix("")))
+            for stage in record.get("staging") or []:
+                stage = Path(stage)
+                # 只删除暂存目录，日志被改动时也不会误删其他路径
+                if stage.name.startswith((STAGING_PREFIX, "ccb_")):
+                    targets.append(stage)
+
+        cleaned = 0
+        for target in targets:
+            if not target.exists():
+                continue
+            try:
+                safe_remove(target)
+                cleaned += 1
+                logger.info(f"Removed leftover from interrupted run: {target}")
+            except Exception as e:
+                logger.warning(f"Failed to remove leftover {target}: {e}")
+        return cleaned
+
+
+class Journal:
+    """只追加的批量任务日志。
+
+    每条记录是一行 JSON：{"status", "input", "output", "error", "time"}，
+    "started" 记录还包含条目已创建的暂存目录列表 "staging"。
+    记录先缓存在内存中，达到 batch_size 条或距离上次写入超过 flush_interval 秒时
+    一次性写入并 flush；没有新记录到来时，由定时器在 flush_interval 秒后写入缓存的记录；
+    close() 时写入剩余记录。
+    """
+
+    def __init__(self, path: Path, batch_size: int = 256, flush_interval: float = 1.0):
+        """打开（或创建）日志文件用于追加。
+
+        Args:
+            path: 日志文件路径
+            batch_size: 攒够多少条记录后写入
+            flush_interval: 最长写入间隔（秒）
+        """
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self._file.tell() > 0 and not self._ends_with_newline():
+            # 上次写入时崩溃留下了半行，先换行避免与新记录粘连
+            self._file.write("\n")
+        self._pending: List[str] = []
+        self._last_flush = time.monotonic()
+        self._timer: Optional[threading.Timer] = None
+        # 进行中条目的输出路径和暂存目录，创建新的暂存目录时重新写入 "started" 记录
+        self._active: Dict[str, Tuple[Optional[Path], List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, 2)
+            return f.read(1) == b"\n"
+
+    @staticmethod
+    def key(input_path: Path) -> str:
+        """日志中标识条目的键（绝对路径）。"""
+        return str(Path(input_path).absolute())
+
+    @staticmethod
+    def load(path: Path) -> JournalState:
+        """
+        读取日志文件，每个条目以最后一条记录为准。
+
+        末尾被截断的行（写入时崩溃）会被忽略。
+
+        Args:
+            path: 日志文件路径
+
+        Returns:
+            JournalState 实例，文件不存在时为空
+        """
+        records: Dict[str, Dict[str, Optional[str]]] = {}
+        path = Path(path)
+        if not path.exists():
+            return JournalState(records)
+        with open(path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    records[record["input"]] = record
+                except (ValueError, KeyError):
+                    logger.warning(f"Ignoring corrupt journal line {line_no} in {path}")
+        return JournalState(records)
+
+    def _append(
+        self,
+        status: str,
+        input_path: Path,
+        output_path: Optional[Path] = None,
+        error: Optional[str] = None,
+        staging: Optional[List[str]] = None,
+    ) -> None:
+        record = {
+            "status": status,
+            "input": self.key(input_path),
+            "output": str(output_path) if output_path is not None else None,
+            "error": error,
+            "time": round(time.time(), 3),
+        }
+        if staging is not None:
+            record["staging"] = staging
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._pending.append(line)
+            if (
+                len(self._pending) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            ):
+                self._flush_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def started(self, input_path: Path, output_path: Optional[Path] = None) -> None:
+        """记录条目开始处理。"""
+        with self._lock:
+            self._active[self.key(input_path)] = (output_path, [])
+        self._append(STARTED, input_path, output_path, staging=[])
+
+    def staged(self, input_path: Path, stage: Path) -> None:
+        """
+        登记条目创建的暂存目录，重新写入带有全部暂存目录的 "started" 记录。
+
+        Args:
+            input_path: 输入路径
+            stage: 新创建的暂存目录
+        """
+        with self._lock:
+            output_path, staging = self._active.setdefault(
+                self.key(input_path), (None, [])
+            )
+            staging.append(str(Path(stage).absolute()))
+            staging = list(staging)
+        self._append(STARTED, input_path, output_path, staging=staging)
+
+    def done(self, input_path: Path, output_path: Optional[Path] = None) -> None:
+        """记录条目成功完成。"""
+        with self._lock:
+            self._active.pop(self.key(input_path), None)
+        self._append(DONE, input_path, output_path)
+
+    def failed(self, input_path: Path, error: Optional[str] = None) -> None:
+        """记录条目处理失败。"""
+        with self._lock:
+            self._active.pop(self.key(input_path), None)
+        self._append(FAILED, input_path, error=error)
+
+    def _flush_locked(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._file.closed:
+            return
+        if self._pending:
+            self._file.write("".join(self._pending))
+            self._file.flush()
+            self._pending.clear()
+        self._last_flush = time.monotonic()
+
+    def flush(self) -> None:
+        """立即写入缓存的记录。"""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        """写入剩余记录并关闭文件。"""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._flush_locked()
+            self._file.close()
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
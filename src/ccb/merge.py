@@ -0,0 +1,228 @@
+"""
+合并模块
+
+该模块把多个章节（压缩包或文件夹）合并为一本漫画：每个输入的成员加上以输入名命名的
+前缀（如 ch01/001.jpg），按阅读顺序一次写入输出。CBZ 输入合并为 CBZ 时直接拷贝
+压缩数据，不解压也不重新压缩；其他输入通过各自的读取器以流的方式读取成员，
+不需要先把每个章节解压为文件夹。
+"""
+
+import logging
+import os
+import shutil
+from contextlib import ExitStack
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .archive_handler import LEVEL_FAMILIES, ArchiveReader, open_reader
+from .exceptions import ArchiveError
+from .file_detector import detect_file_type
+from .utils import (
+    iter_reading_order,
+    member_order_key,
+    natural_sort_key,
+    zip_output_timestamp,
+)
+from .zip_io import MmapZipFile, RawZipWriter
+
+logger = logging.getLogger(__name__)
+
+# 复制成员数据时每次读取的字节数
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def merge_prefixes(inputs: Iterable[Path]) -> List[str]:
+    """
+    为每个输入生成成员名前缀：输入名去掉扩展名，重名时依次加上 " (2)"、" (3)"。
+
+    Args:
+        inputs: 输入路径列表
+
+    Returns:
+        与输入一一对应的前缀列表
+    """
+    prefixes = []
+    seen: Set[str] = set()
+    for path in inputs:
+        stem = path.name if path.is_dir() else path.stem
+        prefix, n = stem, 1
+        while prefix.lower() in seen:
+            n += 1
+            prefix = f"{stem} ({n})"
+        seen.add(prefix.lower())
+        prefixes.append(prefix)
+    return prefixes
+
+
+def _is_safe_name(name: str) -> bool:
+    """成员名是否停留在前缀目录内（不是绝对路径且不含 ..）。"""
+    path = PurePosixPath(name)
+    if path.is_absolute() or ".." in path.parts:
+        logger.warning(f"Skipping member outside its chapter: {name}")
+        return False
+    return True
+
+
+class MergeSource:
+    """合并的一个输入：文件夹、可直接拷贝压缩数据的 ZIP 或其他压缩包。
+
+    成员索引在打开时建立，只读取目录或成员头。
+    """
+
+    def __init__(self, path: Path, prefix: str, skip: Optional[Set[str]] = None):
+        """打开输入并建立成员索引。
+
+        Args:
+            path: 输入文件夹或压缩包路径
+            prefix: 成员名前缀
+            skip: 需要丢弃的成员名（如黑名单页面）
+
+        Raises:
+            ArchiveError: 无法识别或打开输入时抛出
+        """
+        self.path = path
+        self.prefix = prefix
+        self.files: Dict[str, Path] = {}
+        self.zip: Optional[MmapZipFile] = None
+        self.reader: Optional[ArchiveReader] = None
+        skip = skip or set()
+
+        input_type = detect_file_type(path)
+        if input_type is None:
+            raise ArchiveError(f"Cannot detect input type: {path}")
+        if input_type == "folder":
+            self.files = {
+                arcname: file_path
+                for file_path, arcname in iter_reading_order(path)
+                if arcname not in skip
+            }
+            names = list(self.files)
+        elif LEVEL_FAMILIES.get(input_type) == "zip":
+            self.zip = MmapZipFile(path)
+            names = [
+                entry.filename
+                for entry in self.zip
+                if not entry.is_dir() and entry.filename not in skip
+            ]
+        else:
+            self.reader = open_reader(path, input_type)
+            names = [name for name in self.reader.names() if name not in skip]
+        self.names = [name for name in names if _is_safe_name(name)]
+        # 章节压缩包中所有成员都位于同一个顶层文件夹时去掉这一层，避免 ch01/ch01/001.jpg
+        tops = {name.split("/", 1)[0] for name in self.names if "/" in name}
+        nested = all("/" in name for name in self.names)
+        self._strip = len(tops.pop()) + 1 if nested and len(tops) == 1 else 0
+
+    def close(self) -> None:
+        """关闭底层压缩包。"""
+        if self.zip is not None:
+            self.zip.close()
+        if self.reader is not None:
+            self.reader.close()
+
+    def arcname(self, name: str) -> str:
+        """成员在合并结果中的名称。"""
+        return f"{self.prefix}/{name[self._strip:]}"
+
+    def write_zip_member(
+        self, writer: RawZipWriter, name: str, date_time: float
+    ) -> None:
+        """把成员写入 ZIP：ZIP 输入直接拷贝压缩数据，其他输入读取后按当前级别压缩。"""
+        arcname = self.arcname(name)
+        if self.zip is not None:
+            writer.copy_entry(self.zip, self.zip.getinfo(name), arcname)
+        elif self.reader is not None:
+            writer.write_bytes(arcname, self.reader.read(name), date_time=date_time)
+        else:
+            writer.write_file(self.files[name], arcname, date_time=date_time)
+
+    def write_file_member(self, root: Path, name: str) -> None:
+        """把成员以流的方式写入 root 下的同名文件，文件夹输入尽量使用硬链接。"""
+        target = root / self.arcname(name)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if self.zip is not None:
+            with open(target, "wb") as f:
+                f.write(self.zip.read(name))
+        elif self.reader is not None:
+            with self.reader.open(name) as stream, open(target, "wb") as f:
+                shutil.copyfileobj(stream, f, _COPY_CHUNK_SIZE)
+        else:
+            try:
+                os.link(self.files[name], target)
+            except OSError:
+                shutil.copyfile(self.files[name], target)
+
+
+def _merge_plan(sources: List[MergeSource]) -> List[Tuple[MergeSource, str]]:
+    """所有输入的成员按合并后名称的阅读顺序排列。"""
+    members = [(source, name) for source in sources for name in source.names]
+    members.sort(key=lambda member: member_order_key(member[0].arcname(member[1])))
+    return members
+
+
+def open_sources(
+    stack: ExitStack,
+    inputs: List[Path],
+    skip: Optional[Dict[Path, Set[str]]] = None,
+) -> List[MergeSource]:
+    """
+    打开所有输入，注册到 stack 中统一关闭。
+
+    输入按名称的自然顺序排列，与成员前缀的排序一致。
+
+    Args:
+        stack: 负责关闭输入的 ExitStack
+        inputs: 输入路径列表
+        skip: 每个输入需要丢弃的成员名
+
+    Returns:
+        MergeSource 列表
+    """
+    skip = skip or {}
+    ordered = sorted(inputs, key=lambda path: natural_sort_key(path.name))
+    sources = []
+    for path, prefix in zip(ordered, merge_prefixes(ordered)):
+        source = MergeSource(path, prefix, skip.get(path))
+        stack.callback(source.close)
+        sources.append(source)
+    return sources
+
+
+def merge_to_zip(
+    sources: List[MergeSource], output_path: Path, level: Optional[int] = None
+) -> int:
+    """
+    一次写入合并后的 ZIP/CBZ。
+
+    Args:
+        sources: 已打开的输入
+        output_path: 输出 ZIP 文件路径
+        level: 需要重新压缩的成员使用的 deflate 级别
+
+    Returns:
+        写入的成员数
+    """
+    date_time = zip_output_timestamp()
+    members = _merge_plan(sources)
+    with RawZipWriter(output_path, level) as writer:
+        for source, name in members:
+            source.write_zip_member(writer, name, date_time)
+    return len(members)
+
+
+def merge_to_directory(sources: List[MergeSource], output_path: Path) -> int:
+    """
+    把合并后的成员写入文件夹（供不能直接写入的输出格式压缩）。
+
+    Args:
+        sources: 已打开的输入
+        output_path: 输出文件夹路径
+
+    Returns:
+        写入的成员数
+    """
+    members = _merge_plan(sources)
+    output_path.mkdir(parents=True, exist_ok=True)
+    for source, name in members:
+        source.write_file_member(output_path, name)
+    return len(members)
@@ -0,0 +1,147 @@
+"""
+嵌套压缩包展开模块
+
+有些漫画压缩包里装的不是页面而是章节压缩包（如 vol1.rar 中的 ch01.zip ... ch10.zip）。
+该模块逐个读取外层压缩包的成员，按文件头签名而不是扩展名识别内层压缩包，
+内层压缩包在内存中缓冲（超过阈值后才溢出到暂存目录）并直接从流中解压，
+不会以独立文件的形式写入磁盘；其他成员原样写出。
+"""
+
+import logging
+import shutil
+import tempfile
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Callable, List, Optional
+
+from .archive_handler import ArchiveHandler, get_handler, open_reader
+from .exceptions import ArchiveError
+from .file_detector import SNIFF_SIZE, sniff_archive_bytes
+
+logger = logging.getLogger(__name__)
+
+# 内层压缩包在内存中缓冲的上限，超过后溢出到暂存目录中的临时文件
+NESTED_MEMORY_LIMIT = 256 * 1024 * 1024
+
+# 展开方式：合并为一本漫画，或每个内层压缩包输出一本
+FLATTEN_MODES = ("merge", "split")
+
+# 复制成员数据时每次读取的字节数
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def _nested_kind(name: str, head: bytes) -> Optional[str]:
+    """根据成员开头的字节判断是否为内层压缩包，返回其容器格式。"""
+    kind = sniff_archive_bytes(head)
+    if kind == "compressed":
+        # 流压缩数据只有在成员名表明是 TAR 时才当作压缩包，避免误解压单独的 .gz 文件
+        path = PurePosixPath(name.lower())
+        is_tar = ".tar" in path.suffixes or path.suffix in (".tgz", ".cbt")
+        return "tar" if is_tar else None
+    return kind
+
+
+def _target(root: Path, name: str) -> Optional[Path]:
+    """成员在输出目录中的路径，指向目录外的成员名返回None。"""
+    target = (root / name).resolve()
+    return target if target.is_relative_to(root) else None
+
+
+def _hoist_single_directory(directory: Path) -> None:
+    """内层压缩包只包含一个顶层文件夹时，把其内容上移一层，避免多出一级同名目录。"""
+    entries = list(directory.iterdir())
+    if len(entries) != 1 or not entries[0].is_dir():
+        return
+    moved = directory.with_name(directory.name + ".hoist")
+    entries[0].rename(moved)
+    directory.rmdir()
+    moved.rename(directory)
+
+
+def extract_flattened(
+    archive_path: Path,
+    output_path: Path,
+    handler_for: Callable[[str], ArchiveHandler] = get_handler,
+    memory_limit: int = NESTED_MEMORY_LIMIT,
+) -> List[Path]:
+    """
+    解压压缩包，内层压缩包直接从流中解压为去掉扩展名（包括 .tar.gz）的同名子文件夹。
+
+    只展开一层；无法解压的内层压缩包记录警告后按普通文件保留。
+
+    Args:
+        archive_path: 外层压缩包路径
+        output_path: 输出目录路径
+        handler_for: 按容器格式返回处理器的函数，用于解压内层压缩包
+        memory_limit: 单个内层压缩包在内存中缓冲的最大字节数
+
+    Returns:
+        内层压缩包解压得到的子文件夹列表（按成员顺序）
+
+    Raises:
+        ArchiveError: 打开或读取外层压缩包失败时抛出
+    """
+    output_path.mkdir(parents=True, exist_ok=True)
+    root = output_path.resolve()
+    nested: List[Path] = []
+    with open_reader(archive_path) as reader:
+        for name in reader.names():
+            target = _target(root, name)
+            if target is None:
+                logger.warning(f"Skipping member outside output directory: {name}")
+                continue
+            with reader.open(name) as stream:
+                head = stream.read(SNIFF_SIZE)
+                kind = _nested_kind(name, head)
+                if kind is None:
+                    _write_member(stream, head, target)
+                    continue
+                directory = target.with_suffix("")
+                if directory.suffix.lower() == ".tar":
+                    directory = directory.with_suffix("")
+                if directory.exists():
+                    directory = target.with_name(target.name + ".d")
+                flattened = _extract_nested(
+                    stream, head, kind, directory, handler_for, memory_limit
+                )
+            if flattened:
+                nested.append(directory)
+                logger.info(f"Flattened nested {kind} archive {name}")
+            else:
+                with reader.open(name) as stream:
+                    _write_member(stream, b"", target)
+    return nested
+
+
+def _write_member(stream: BinaryIO, head: bytes, target: Path) -> None:
+    """把已读取的开头字节和流的剩余内容写入目标文件。"""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with open(target, "wb") as f:
+        f.write(head)
+        shutil.copyfileobj(stream, f, _COPY_CHUNK_SIZE)
+
+
+def _extract_nested(
+    stream: BinaryIO,
+    head: bytes,
+    kind: str,
+    directory: Path,
+    handler_for: Callable[[str], ArchiveHandler],
+    memory_limit: int,
+) -> bool:
+    """把内层压缩包缓冲到内存（超出阈值时溢出到磁盘）并解压，失败时返回False。"""
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.SpooledTemporaryFile(
+        max_size=memory_limit, dir=directory.parent
+    ) as spool:
+        spool.write(head)
+        shutil.copyfileobj(stream, spool, _COPY_CHUNK_SIZE)
+        spool.seek(0)
+        try:
+            handler_for(kind).extract_stream(spool, directory)
+        except ArchiveError as e:
+            logger.warning(f"Keeping nested archive {directory.name} as a file: {e}")
+            if directory.exists():
+                shutil.rmtree(directory, ignore_errors=True)
+            return False
+    _hoist_single_directory(directory)
+    return True
@@ -0,0 +1,178 @@
+"""
+资源调度模块
+
+该模块根据临时磁盘空间、内存和并发数预算调度转换任务：每个任务在开始前声明
+预计占用的临时空间和内存，只有预算足够时才会被放行。放不下的大任务会等待资源释放，
+小任务则可以绕过它们继续执行；等待中的任务被越过一定次数后保持它的顺序，
+不会被源源不断的小任务饿死。
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def default_max_jobs() -> int:
+    """
+    默认并发任务数，与 ThreadPoolExecutor 的默认线程数一致。
+
+    Returns:
+        并发任务数
+    """
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def free_temp_bytes(temp_dir: Optional[str] = None) -> int:
+    """
+    获取临时目录所在文件系统的剩余空间。
+
+    Args:
+        temp_dir: 临时目录，None 表示系统默认临时目录
+
+    Returns:
+        剩余字节数
+    """
+    return shutil.disk_usage(temp_dir or tempfile.gettempdir()).free
+
+
+class _Waiter:
+    """等待预算的任务，记录被后来的任务越过的次数。"""
+
+    __slots__ = ("bypassed",)
+
+    def __init__(self):
+        self.bypassed = 0
+
+
+class ResourceScheduler:
+    """按临时空间、内存和并发数预算放行任务的异步调度器。
+
+    任务按申请顺序排队。放不下的任务等待时，后面放得下的任务可以越过它先执行，
+    但每个等待中的任务最多被越过 max_bypass 次，之后后来的任务都排在它后面，
+    直到它开始执行。单个任务的需求超过整个预算时不会失败，而是等到没有其他任务运行时单独执行。
+    """
+
+    def __init__(
+        self,
+        max_temp_bytes: Optional[int] = None,
+        max_memory: Optional[int] = None,
+        max_jobs: Optional[int] = None,
+        max_bypass: int = 16,
+    ):
+        """初始化调度器。
+
+        Args:
+            max_temp_bytes: 临时目录空间预算（字节），None 表示不限制
+            max_memory: 内存预算（字节），None 表示不限制
+            max_jobs: 最大并发任务数，None 表示不限制
+            max_bypass: 等待中的任务最多被后来的任务越过的次数，0 表示严格按顺序放行
+        """
+        self.max_temp_bytes = max_temp_bytes
+        self.max_memory = max_memory
+        self.max_jobs = max_jobs
+        self.max_bypass = max_bypass
+        self._waiters: List[_Waiter] = []
+        self._temp_in_use = 0
+        self._memory_in_use = 0
+        self._running = 0
+        self._condition: Optional[asyncio.Condition] = None
+
+    def _fits(self, temp_bytes: int, memory_bytes: int) -> bool:
+        """判断任务能否在当前剩余预算内运行。"""
+        if self._running == 0:
+            return True
+        if self.max_jobs is not None and self._running >= self.max_jobs:
+            return False
+        if (
+            self.max_temp_bytes is not None
+            and self._temp_in_use + temp_bytes > self.max_temp_bytes
+        ):
+            return False
+        if (
+            self.max_memory is not None
+            and self._memory_in_use + memory_bytes > self.max_memory
+        ):
+            return False
+        return True
+
+    def _admissible(self, waiter: _Waiter, temp_bytes: int, memory_bytes: int) -> bool:
+        """判断任务能否放行：预算足够，且排在前面的任务都还允许被越过。"""
+        if not self._fits(temp_bytes, memory_bytes):
+            return False
+        for earlier in self._waiters:
+            if earlier is waiter:
+                return True
+            if earlier.bypassed >= self.max_bypass:
+                return False
+        return True
+
+    @asynccontextmanager
+    async def reserve(
+        self, temp_bytes: int = 0, memory_bytes: int = 0
+    ) -> AsyncIterator[None]:
+        """
+        等待预算足够后占用资源，退出时释放。
+
+        Args:
+            temp_bytes: 任务预计占用的临时空间
+            memory_bytes: 任务预计占用的内存
+        """
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        condition = self._condition
+
+        waiter = _Waiter()
+        async with condition:
+            self._waiters.append(waiter)
+            if not self._admissible(waiter, temp_bytes, memory_bytes):
+                logger.debug(
+                    f"Waiting for resources (temp {temp_bytes}, memory {memory_bytes})"
+                )
+            try:
+                await condition.wait_for(
+                    lambda: self._admissible(waiter, temp_bytes, memory_bytes)
+                )
+            finally:
+                position = self._waiters.index(waiter)
+                del self._waiters[position]
+                # 离开队列可能使排在后面的任务可以放行
+                condition.notify_all()
+            for earlier in self._waiters[:position]:
+                earlier.bypassed += 1
+            if (
+                self.max_temp_bytes is not None and temp_bytes > self.max_temp_bytes
+            ) or (self.max_memory is not None and memory_bytes > self.max_memory):
+                logger.warning(
+                    "Job exceeds the resource budget, running it alone "
+                    f"(temp {temp_bytes}, memory {memory_bytes})"
+                )
+            self._running += 1
+            self._temp_in_use += temp_bytes
+            self._memory_in_use += memory_bytes
+        try:
+            yield
+        finally:
+            async with condition:
+                self._running -= 1
+                self._temp_in_use -= temp_bytes
+                self._memory_in_use -= memory_bytes
+                condition.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取当前资源占用。
+
+        Returns:
+            包含 running、temp_bytes、memory_bytes 的字典
+        """
+        return {
+            "running": self._running,
+            "temp_bytes": self._temp_in_use,
+            "memory_bytes": self._memory_in_use,
+        }
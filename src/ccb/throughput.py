@@ -0,0 +1,166 @@
+"""
+吞吐量测量模块
+
+该模块为转换计划估算耗时：在小型样本上实测各处理器的压缩和解压吞吐量以及
+文件复制吞吐量（字节/秒）。结果缓存在进程内和用户缓存目录中，同一配置只测量一次。
+测量只使用临时生成的样本，不会读取或解压用户的数据。
+"""
+
+import json
+import logging
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .archive_handler import ArchiveHandler
+from .backends import cache_dir, make_sample
+from .converter import (
+    PLAN_ALIAS_COPY,
+    PLAN_ALIAS_RENAME,
+    PLAN_COMPRESS,
+    PLAN_EXTRACT,
+    PLAN_RECOMPRESS,
+    PLAN_SKIP,
+    PLAN_ZIP_REWRITE,
+    ComicBookConverter,
+    ConversionPlan,
+)
+from .utils import fast_copy
+
+logger = logging.getLogger(__name__)
+
+# 缓存格式版本，测量方法变化时递增使旧结果失效
+_THROUGHPUT_VERSION = 1
+
+
+def default_cache_file() -> Path:
+    """吞吐量缓存文件的默认路径（与后端基准测试缓存位于同一目录）。"""
+    return cache_dir() / "throughput.json"
+
+
+class ThroughputTable:
+    """按处理器配置缓存的实测吞吐量表。
+
+    压缩和解压吞吐量以解压后的字节数计，复制吞吐量以文件字节数计。
+    无法测量的配置（如没有 rar 命令时的 RAR 压缩）吞吐量为None。
+    """
+
+    def __init__(self, cache_file: Optional[Path] = None):
+        """初始化吞吐量表并读取缓存。
+
+        Args:
+            cache_file: 缓存文件路径，None 表示用户缓存目录中的默认位置
+        """
+        self.cache_file = Path(cache_file) if cache_file else default_cache_file()
+        self._rates: Dict[str, List[Optional[float]]] = {}
+        self._lock = threading.Lock()
+        try:
+            cached = json.loads(self.cache_file.read_text(encoding="utf-8"))
+            if cached.get("version") == _THROUGHPUT_VERSION:
+                self._rates = cached.get("rates", {})
+        except (OSError, ValueError):
+            pass
+
+    def _save(self) -> None:
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            self.cache_file.write_text(
+                json.dumps({"version": _THROUGHPUT_VERSION, "rates": self._rates}),
+                encoding="utf-8",
+            )
+        except OSError as e:
+            logger.debug(f"Cannot write throughput cache {self.cache_file}: {e}")
+
+    @staticmethod
+    def _key(archive_type: str, handler: ArchiveHandler) -> str:
+        return (
+            f"{archive_type}|{handler.describe('write')}|{handler.describe('read')}"
+            f"|level={getattr(handler, 'level', None)}"
+            f"|compression={getattr(handler, 'compression', None)}"
+        )
+
+    def _measure(
+        self, archive_type: str, handler: ArchiveHandler
+    ) -> List[Optional[float]]:
+        """在样本上测量一次压缩和解压，返回 [压缩吞吐量, 解压吞吐量, 复制吞吐量]。"""
+        rates: List[Optional[float]] = [None, None, None]
+        with tempfile.TemporaryDirectory(prefix="ccb_bench_") as tmp:
+            tmp_path = Path(tmp)
+            sample = tmp_path / "sample"
+            make_sample(sample)
+            size = sum(p.stat().st_size for p in sample.iterdir())
+            archive = tmp_path / f"sample.{archive_type}"
+            try:
+                start = time.perf_counter()
+                handler.compress(sample, archive)
+                rates[0] = size / max(time.perf_counter() - start, 1e-6)
+
+                start = time.perf_counter()
+                handler.extract(archive, tmp_path / "out")
+                rates[1] = size / max(time.perf_counter() - start, 1e-6)
+
+                start = time.perf_counter()
+                fast_copy(archive, tmp_path / "copy")
+                rates[2] = archive.stat().st_size / max(
+                    time.perf_counter() - start, 1e-6
+                )
+            except Exception as e:
+                logger.debug(f"Throughput measurement failed for {archive_type}: {e}")
+        logger.debug(f"Measured throughput for {archive_type}: {rates}")
+        return rates
+
+    def rates(
+        self, archive_type: str, handler: ArchiveHandler
+    ) -> List[Optional[float]]:
+        """
+        获取处理器的吞吐量，首次使用时在样本上测量。
+
+        Args:
+            archive_type: 压缩包类型
+            handler: 处理器实例
+
+        Returns:
+            [压缩吞吐量, 解压吞吐量, 复制吞吐量]，单位为字节/秒，无法测量时为None
+        """
+        key = self._key(archive_type, handler)
+        with self._lock:
+            if key not in self._rates:
+                self._rates[key] = self._measure(archive_type, handler)
+                self._save()
+            return self._rates[key]
+
+    def estimate(
+        self, plan: ConversionPlan, converter: ComicBookConverter
+    ) -> Optional[float]:
+        """
+        估算计划条目的耗时并写入 plan.estimated_seconds。
+
+        Args:
+            plan: 转换计划条目
+            converter: 生成该计划的转换器，提供带相同选项的处理器
+
+        Returns:
+            估算的秒数，无法估算时为None
+        """
+        seconds: Optional[float] = None
+        unpacked = plan.uncompressed_bytes
+        if plan.method in (PLAN_SKIP, PLAN_ALIAS_RENAME):
+            seconds = 0.0
+        elif plan.method in (PLAN_ALIAS_COPY, PLAN_ZIP_REWRITE):
+            copy_rate = self.rates("cbz", converter.handler_for("cbz"))[2]
+            if copy_rate:
+                seconds = plan.input_bytes / copy_rate
+        else:
+            parts = []
+            if plan.method in (PLAN_EXTRACT, PLAN_RECOMPRESS):
+                handler = converter.handler_for(plan.input_type)
+                parts.append(self.rates(plan.input_type, handler)[1])
+            if plan.method in (PLAN_COMPRESS, PLAN_RECOMPRESS):
+                handler = converter.handler_for(plan.output_type)
+                parts.append(self.rates(plan.output_type, handler)[0])
+            if all(parts):
+                seconds = sum(unpacked / rate for rate in parts)
+        plan.estimated_seconds = seconds
+        return seconds
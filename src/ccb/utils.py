@@ -4,11 +4,23 @@
 该模块提供了各种实用工具函数，包括文件操作、路径处理等功能。
 """
 
+import errno
+import os
+import re
 import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Tuple, Union
 import logging
 
+from .file_detector import IMAGE_EXTENSIONS
+
 logger = logging.getLogger(__name__)
 
 
@@ -34,6 +46,312 @@ def safe_remove(path: Path) -> None:
         raise
 
 
+# 未完成输出的后缀，写完后才通过 os.replace 提交为最终文件名
+PARTIAL_SUFFIX = ".partial"
+
+# 输出旁边的隐藏暂存目录前缀
+STAGING_PREFIX = ".ccb_"
+
+
+def partial_path(path: Path) -> Path:
+    """
+    获取输出路径对应的未完成文件路径（name.partial）。
+
+    Args:
+        path: 最终输出路径
+
+    Returns:
+        未完成文件路径
+    """
+    return path.with_name(path.name + PARTIAL_SUFFIX)
+
+
+@contextmanager
+def atomic_output(path: Path) -> Iterator[Path]:
+    """
+    先写入 name.partial，成功后用 os.replace 原子地提交为最终文件名。
+
+    写入过程中出错或被中断时删除未完成的文件，已有的输出保持不变，
+    读取方永远不会看到写了一半的文件。
+
+    Args:
+        path: 最终输出路径
+
+    Yields:
+        应当写入的未完成文件路径
+    """
+    partial = partial_path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if partial.exists():
+        # 上次崩溃遗留的未完成文件
+        safe_remove(partial)
+    try:
+        yield partial
+        os.replace(partial, path)
+    except BaseException:
+        if partial.exists():
+            try:
+                safe_remove(partial)
+            except Exception:
+                pass
+        raise
+    logger.debug(f"Committed {path}")
+
+
+# Linux FICLONE ioctl，用于在支持的文件系统（btrfs、XFS 等）上创建写时复制的副本
+_FICLONE = 0x40049409
+
+
+def _reflink(src_fd: int, dst_fd: int) -> bool:
+    """尝试以写时复制方式克隆文件内容，不支持时返回False。"""
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        import fcntl
+
+        fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+        return True
+    except (ImportError, OSError):
+        return False
+
+
+def fast_copy(src: Path, dst: Path) -> str:
+    """
+    在内核中复制文件，尽量避免数据经过用户态。
+
+    依次尝试写时复制克隆（reflink）、copy_file_range，最后回退到 shutil.copyfile
+    （在 Linux 上使用 sendfile，在 macOS 上使用 fcopyfile）。同时复制文件的时间戳与权限。
+
+    Args:
+        src: 源文件路径
+        dst: 目标文件路径
+
+    Returns:
+        实际使用的复制方式 ("reflink", "copy_file_range" 或 "copyfile")
+
+    Raises:
+        OSError: 复制失败或复制后的大小与源文件不一致时抛出
+    """
+    method = "copyfile"
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        if _reflink(fsrc.fileno(), fdst.fileno()):
+            method = "reflink"
+        elif hasattr(os, "copy_file_range"):
+            remaining = os.fstat(fsrc.fileno()).st_size
+            try:
+                while remaining > 0:
+                    copied = os.copy_file_range(
+                        fsrc.fileno(), fdst.fileno(), min(remaining, 1 << 30)
+                    )
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                if remaining > 0:
+                    # 提前返回0（如文件在复制时被截断或文件系统不支持），改用 copyfile
+                    fdst.seek(0)
+                    fdst.truncate()
+                else:
+                    method = "copy_file_range"
+            except OSError as e:
+                if e.errno not in (
+                    errno.EXDEV,
+                    errno.ENOSYS,
+                    errno.EINVAL,
+                    errno.EOPNOTSUPP,
+                ):
+                    raise
+                fdst.seek(0)
+                fdst.truncate()
+    if method == "copyfile":
+        shutil.copyfile(src, dst)
+    src_size, dst_size = os.stat(src).st_size, os.stat(dst).st_size
+    if dst_size != src_size:
+        raise OSError(
+            errno.EIO, f"Incomplete copy of {src}: {dst_size} of {src_size} bytes"
+        )
+    shutil.copystat(src, dst)
+    logger.debug(f"Copied {src} to {dst} using {method}")
+    return method
+
+
+def move_or_copy(src: Path, dst: Path, remove_source: bool) -> str:
+    """
+    将文件移动或复制到新位置。
+
+    remove_source 为True时优先使用 os.replace 重命名（同一文件系统内为原子操作），
+    跨文件系统时回退为复制后删除源文件；否则使用 fast_copy 复制。
+
+    Args:
+        src: 源文件路径
+        dst: 目标文件路径
+        remove_source: 是否删除源文件
+
+    Returns:
+        实际使用的方式 ("rename" 或 fast_copy 的复制方式)
+    """
+    if remove_source:
+        try:
+            os.replace(src, dst)
+            logger.debug(f"Renamed {src} to {dst}")
+            return "rename"
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            logger.debug(f"{src} and {dst} are on different filesystems, copying")
+    with atomic_output(dst) as partial:
+        method = fast_copy(src, partial)
+    if remove_source:
+        src.unlink()
+    return method
+
+
+# 当前线程的取消事件，由 cancel_scope() 设置，run_tool() 在事件触发时终止外部进程
+_cancel_state = threading.local()
+
+
+@contextmanager
+def cancel_scope(event: Optional[threading.Event]) -> Iterator[None]:
+    """
+    在当前线程中登记取消事件，期间由 run_tool() 启动的外部进程会在事件触发时被终止。
+
+    Args:
+        event: 取消事件，None 表示不可取消
+    """
+    previous = getattr(_cancel_state, "event", None)
+    _cancel_state.event = event
+    try:
+        yield
+    finally:
+        _cancel_state.event = previous
+
+
+def _kill_process_tree(proc: subprocess.Popen) -> None:
+    """终止外部进程及其子进程。"""
+    if proc.poll() is not None:
+        return
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError):
+        proc.kill()
+
+
+# run_tool() 每次从标准输出读取的最大字节数
+_TOOL_OUTPUT_CHUNK = 1024 * 1024
+
+
+def run_tool(
+    cmd: Sequence[str],
+    timeout: Optional[float] = None,
+    cwd: Optional[Path] = None,
+    tail_lines: int = 50,
+    stdout: Optional[BinaryIO] = None,
+) -> Tuple[int, str]:
+    """
+    运行外部命令并流式读取输出，只保留最后 tail_lines 行，不把全部输出缓存在内存中。
+
+    命令在独立的进程组中运行；超时、当前线程的取消事件触发（见 cancel_scope）
+    或调用方被中断时，整个进程组会被终止并回收。
+
+    Args:
+        cmd: 命令及参数
+        timeout: 超时时间（秒），None 表示不限制
+        cwd: 工作目录
+        tail_lines: 保留的输出行数，用于错误信息
+        stdout: 接收标准输出的二进制流，输出按块写入；为 None 时标准输出与
+            标准错误合并，只保留最后若干行
+
+    Returns:
+        (返回码, 最后若干行输出)，指定 stdout 时只包含标准错误
+
+    Raises:
+        FileNotFoundError: 命令不存在时抛出
+        subprocess.TimeoutExpired: 超时时抛出
+        InterruptedError: 被取消时抛出
+    """
+    cancel = getattr(_cancel_state, "event", None)
+    if cancel is not None and cancel.is_set():
+        raise InterruptedError(f"Cancelled before starting {cmd[0]}")
+
+    if os.name == "posix":
+        group = {"start_new_session": True}
+    else:
+        group = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    proc = subprocess.Popen(
+        list(cmd),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT if stdout is None else subprocess.PIPE,
+        cwd=cwd,
+        **group,
+    )
+
+    reason = []
+    finished = threading.Event()
+
+    def _watchdog() -> None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not finished.wait(0.1):
+            if cancel is not None and cancel.is_set():
+                reason.append("cancelled")
+            elif deadline is not None and time.monotonic() > deadline:
+                reason.append("timeout")
+            else:
+                continue
+            _kill_process_tree(proc)
+            return
+
+    watchdog = None
+    if timeout is not None or cancel is not None:
+        watchdog = threading.Thread(target=_watchdog, daemon=True)
+        watchdog.start()
+
+    tail = deque(maxlen=tail_lines)
+
+    def _collect(pipe: BinaryIO) -> None:
+        for raw in pipe:
+            line = raw.decode(errors="ignore").rstrip()
+            if line:
+                tail.append(line)
+
+    stderr_reader = None
+    try:
+        if stdout is None:
+            _collect(proc.stdout)
+        else:
+            # 标准错误在单独的线程中读取，避免任一管道写满后阻塞子进程
+            stderr_reader = threading.Thread(
+                target=_collect, args=(proc.stderr,), daemon=True
+            )
+            stderr_reader.start()
+            while True:
+                chunk = proc.stdout.read1(_TOOL_OUTPUT_CHUNK)
+                if not chunk:
+                    break
+                stdout.write(chunk)
+        proc.wait()
+    except BaseException:
+        _kill_process_tree(proc)
+        proc.wait()
+        raise
+    finally:
+        finished.set()
+        if stderr_reader is not None:
+            stderr_reader.join()
+            proc.stderr.close()
+        proc.stdout.close()
+        if watchdog is not None:
+            watchdog.join()
+
+    if reason == ["timeout"]:
+        raise subprocess.TimeoutExpired(list(cmd), timeout)
+    if reason == ["cancelled"]:
+        raise InterruptedError(f"Cancelled {cmd[0]}")
+    return proc.returncode, "\n".join(tail)
+
+
 def ensure_output_dir(path: Path) -> None:
     """
     确保输出目录存在。
@@ -63,10 +381,302 @@ def is_empty_directory(path: Path) -> bool:
     return not any(path.iterdir())
 
 
+def iter_files(root: Path, ordered: bool = False) -> Iterator[Path]:
+    """
+    流式遍历文件夹下的所有文件（含子文件夹）。
+
+    使用 os.scandir 逐个目录列举，不会像 rglob 那样预先构建完整的路径列表，
+    内存占用只与目录深度和单个目录的条目数有关。不进入指向目录的符号链接。
+
+    Args:
+        root: 文件夹路径
+        ordered: 是否按相对路径的阅读顺序产出（与对成员名使用 reading_sort_key 排序的结果一致）
+
+    Yields:
+        文件路径
+    """
+
+    def _walk(directory: str) -> Iterator[Path]:
+        with os.scandir(directory) as it:
+            entries = [(entry, entry.is_dir(follow_symlinks=False)) for entry in it]
+        if ordered:
+            # 目录名加上分隔符参与比较，使子目录中的文件与同级文件按完整路径排序
+            entries.sort(key=lambda e: reading_sort_key(e[0].name + "/" * e[1]))
+        for entry, is_dir in entries:
+            if is_dir:
+                yield from _walk(entry.path)
+            elif entry.is_file():
+                yield Path(entry.path)
+
+    return _walk(os.fspath(root))
+
+
+# 写在压缩包最前面的元数据文件名（小写），阅读器打开压缩包时首先读取
+METADATA_FILENAMES = frozenset({"comicinfo.xml"})
+
+# 封面页的文件名（不含扩展名），如 cover、Cover_01、000-front-cover
+_COVER_STEM_RE = re.compile(
+    r"^(?:\d+[\s._-]*)?(?:front[\s._-]*)?cover(?:[\s._-]*\d+)?$", re.IGNORECASE
+)
+
+
+def reading_sort_key(name: str) -> List[Union[int, str]]:
+    """
+    生成阅读顺序的自然排序键：封面页排在同一目录中的其他成员之前，其余按自然顺序。
+
+    Args:
+        name: 以 / 分隔的成员名
+
+    Returns:
+        可用于 sorted() 的排序键
+    """
+    directory, slash, filename = name.rpartition("/")
+    stem, ext = os.path.splitext(filename)
+    if ext.lower() not in IMAGE_EXTENSIONS or not _COVER_STEM_RE.match(stem):
+        return natural_sort_key(name)
+    # 目录前缀的排序键总是以字符串结尾，同目录其他成员在这一位置是数字或更长的字符串，
+    # 插入 -1 使封面排在它们之前
+    return natural_sort_key(directory + slash) + [-1] + natural_sort_key(filename)
+
+
+def member_order_key(name: str) -> Tuple[int, List[Union[int, str]]]:
+    """
+    生成压缩包成员的阅读顺序排序键。
+
+    根目录的元数据文件（ComicInfo.xml）在最前，其次是图片页面，最后是其他文件。
+    页面按自然顺序排列，以 cover 命名的封面页排在所在目录的其他页面之前。
+
+    Args:
+        name: 以 / 分隔的成员名
+
+    Returns:
+        可用于 sorted() 的排序键
+    """
+    if "/" not in name and name.lower() in METADATA_FILENAMES:
+        group = 0
+    elif os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+        group = 1
+    else:
+        group = 2
+    return group, reading_sort_key(name)
+
+
+def iter_reading_order(source_path: Path) -> Iterator[Tuple[Path, str]]:
+    """
+    按阅读顺序流式遍历源文件或文件夹，顺序与 member_order_key 一致。
+
+    只有根目录的元数据文件和非图片文件会被暂存，页面边遍历边产出。
+
+    Args:
+        source_path: 源文件或文件夹路径
+
+    Yields:
+        (文件路径, 以 / 分隔的成员名)，单个文件的成员名为文件名
+    """
+    if source_path.is_file():
+        yield source_path, source_path.name
+        return
+    if not source_path.is_dir():
+        return
+    metadata = []
+    others = []
+    with os.scandir(source_path) as it:
+        for entry in it:
+            if entry.name.lower() in METADATA_FILENAMES and entry.is_file():
+                metadata.append((Path(entry.path), entry.name))
+    metadata.sort(key=lambda item: natural_sort_key(item[1]))
+    yield from metadata
+    root_len = len(os.fspath(source_path)) + 1
+    for file_path in iter_files(source_path, ordered=True):
+        arcname = os.fspath(file_path)[root_len:].replace(os.sep, "/")
+        group = member_order_key(arcname)[0]
+        if group == 1:
+            yield file_path, arcname
+        elif group == 2:
+            others.append((file_path, arcname))
+    yield from others
+
+
+# 未设置 SOURCE_DATE_EPOCH 时输出成员使用的固定修改时间：UTC 1980-01-01 00:00，
+# 即 ZIP 能表示的最早时间
+_DEFAULT_OUTPUT_TIMESTAMP = 315532800
+
+
+def _source_date_epoch() -> Optional[float]:
+    value = os.environ.get("SOURCE_DATE_EPOCH")
+    if value:
+        try:
+            return float(int(value))
+        except ValueError:
+            logger.warning(f"Ignoring invalid SOURCE_DATE_EPOCH: {value}")
+    return None
+
+
+def output_timestamp() -> float:
+    """
+    获取写入输出压缩包成员的修改时间，使相同输入得到逐字节相同的输出。
+
+    TAR 成员和 gzip 头部直接记录 Unix 时间戳，默认值与时区无关。
+
+    Returns:
+        环境变量 SOURCE_DATE_EPOCH 指定的时间戳，未设置或无效时为 UTC 1980-01-01 00:00
+    """
+    epoch = _source_date_epoch()
+    return float(_DEFAULT_OUTPUT_TIMESTAMP) if epoch is None else epoch
+
+
+def zip_output_timestamp() -> float:
+    """
+    获取写入 ZIP 输出成员的修改时间。
+
+    ZIP 的 DOS 时间按本地时区换算，默认值取本地时间 1980-01-01 00:00，
+    使任何时区写出的 DOS 时间都相同。
+
+    Returns:
+        环境变量 SOURCE_DATE_EPOCH 指定的时间戳，未设置或无效时为本地时间 1980-01-01 00:00
+    """
+    epoch = _source_date_epoch()
+    if epoch is None:
+        return time.mktime((1980, 1, 1, 0, 0, 0, 0, 1, -1))
+    return epoch
+
+
+def natural_sort_key(name: str) -> List[Union[int, str]]:
+    """
+    生成自然排序键，使 "page2" 排在 "page10" 之前。
+
+    Args:
+        name: 文件名或压缩包成员名
+
+    Returns:
+        可用于 sorted() 的排序键
+    """
+    return [
+        int(part) if part.isdigit() else part.lower()
+        for part in re.split(r"(\d+)", name)
+    ]
+
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def parse_size(value: str) -> int:
+    """
+    解析带单位的字节数，如 "512M"、"2G"、"1.5GiB"，单位按 1024 进制。
+
+    Args:
+        value: 字节数字符串，无单位时表示字节
+
+    Returns:
+        字节数
+
+    Raises:
+        ValueError: 格式无效时抛出
+    """
+    match = re.fullmatch(
+        r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:I?B)?\s*", value, re.IGNORECASE
+    )
+    if match is None:
+        raise ValueError(f"Invalid size: {value}")
+    number, unit = match.groups()
+    return int(float(number) * _SIZE_UNITS[unit.upper()])
+
+
+def format_size(size: int) -> str:
+    """
+    将字节数格式化为带单位的字符串，如 "1.5 MiB"，单位按 1024 进制。
+
+    Args:
+        size: 字节数
+
+    Returns:
+        格式化后的字符串
+    """
+    if size < 1024:
+        return f"{size} B"
+    unit = "K"
+    for candidate in ("M", "G", "T"):
+        if size < _SIZE_UNITS[candidate]:
+            break
+        unit = candidate
+    return f"{size / _SIZE_UNITS[unit]:.1f} {unit}iB"
+
+
+def path_size(path: Path) -> int:
+    """
+    获取文件的字节数，或文件夹中所有文件的总字节数。
+
+    Args:
+        path: 文件或文件夹路径
+
+    Returns:
+        字节数，路径不存在或无法读取时返回0
+    """
+    try:
+        if path.is_dir():
+            return sum(file_path.stat().st_size for file_path in iter_files(path))
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+class PeekableStream:
+    """可预读和退回数据的只读流包装，用于不可定位的输入（如标准输入）。
+
+    识别格式时预读的开头字节、解压后多读的数据都可以退回，后续 read() 会先返回这些字节。
+    """
+
+    def __init__(self, fileobj: BinaryIO):
+        """包装二进制只读流。
+
+        Args:
+            fileobj: 二进制只读流，不需要支持 seek()
+        """
+        self._fileobj = fileobj
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        """读取最多 size 个字节，size 为负数时读到流的结尾。"""
+        if size is None or size < 0:
+            data, self._buffer = self._buffer + self._fileobj.read(), b""
+            return data
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        if len(data) < size:
+            data += self._fileobj.read(size - len(data))
+        return data
+
+    def read_exact(self, size: int) -> bytes:
+        """读取恰好 size 个字节，流提前结束时抛出 EOFError。"""
+        data = self.read(size)
+        while len(data) < size:
+            chunk = self.read(size - len(data))
+            if not chunk:
+                raise EOFError(f"Unexpected end of stream ({len(data)}/{size} bytes)")
+            data += chunk
+        return data
+
+    def peek(self, size: int) -> bytes:
+        """返回接下来的最多 size 个字节而不消耗它们，只有流结束时才会少于 size。"""
+        while len(self._buffer) < size:
+            chunk = self._fileobj.read(size - len(self._buffer))
+            if not chunk:
+                break
+            self._buffer += chunk
+        return self._buffer[:size]
+
+    def unread(self, data: bytes) -> None:
+        """把数据退回到流的开头。"""
+        self._buffer = bytes(data) + self._buffer
+
+
 def get_output_path(
     input_path: Path,
     output_type: str,
     output_dir: Optional[Path] = None,
+    create_dir: bool = True,
 ) -> Path:
     """
     生成输出文件路径。
@@ -75,6 +685,7 @@ def get_output_path(
         input_path: 输入文件路径
         output_type: 输出类型 (folder, cbz, cbr, cb7, cbt)
         output_dir: 输出目录，如果为None则使用输入文件的目录
+        create_dir: 是否创建不存在的输出目录
 
     Returns:
         输出文件路径
@@ -82,7 +693,8 @@ def get_output_path(
     if output_dir is None:
         output_dir = input_path.parent
 
-    ensure_output_dir(output_dir)
+    if create_dir:
+        ensure_output_dir(output_dir)
 
     if output_type == "folder":
         # 如果是文件夹，使用输入路径的名称
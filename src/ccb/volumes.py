@@ -0,0 +1,94 @@
+"""
+分卷模块
+
+该模块把一本漫画按页面边界划分为多个分卷，使每个分卷的大小或页数不超过上限
+（如上传限制为 2 GB 的目标）。划分只依据压缩前的成员大小（或 ZIP 中已有的压缩大小），
+不需要先压缩一遍再决定；每个分卷都是独立有效的压缩包，可以并行写入。
+"""
+
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+from .utils import member_order_key
+
+logger = logging.getLogger(__name__)
+
+# 每个成员在输出中额外占用的字节数上限估计：ZIP 本地头和中央目录记录（含 ZIP64 扩展）、
+# TAR 头和块对齐填充、7Z 头中的文件记录，成员名较短时都在这个范围内
+VOLUME_MEMBER_OVERHEAD = 1024
+
+# 压缩不可再压缩数据（如 JPEG）时的最大膨胀比例的倒数：deflate 存储块和 LZMA2
+# 未压缩块的开销都远小于 1/1024
+VOLUME_EXPANSION_DIVISOR = 1024
+
+
+def member_cost(size: int) -> int:
+    """成员在分卷中按最坏情况占用的字节数。"""
+    return size + size // VOLUME_EXPANSION_DIVISOR + VOLUME_MEMBER_OVERHEAD
+
+
+def plan_volumes(
+    members: Iterable[Tuple[str, int]],
+    max_bytes: Optional[int] = None,
+    max_pages: Optional[int] = None,
+) -> List[List[str]]:
+    """
+    按阅读顺序把成员划分为分卷，只在页面之间切分。
+
+    根目录的元数据文件（ComicInfo.xml）复制到每个分卷，其大小计入每个分卷；
+    其他非图片文件跟随在最后一个分卷中。单个页面本身超过上限时单独成为一个分卷。
+
+    Args:
+        members: (以 / 分隔的成员名, 字节数) 列表
+        max_bytes: 每个分卷的最大字节数，None 表示不限制
+        max_pages: 每个分卷的最大页数，None 表示不限制
+
+    Returns:
+        各分卷的成员名列表，成员按阅读顺序排列；没有成员时返回一个空分卷
+    """
+    ordered = sorted(members, key=lambda member: member_order_key(member[0]))
+    metadata = [member for member in ordered if member_order_key(member[0])[0] == 0]
+    base_cost = sum(member_cost(size) for _, size in metadata)
+    metadata_names = [name for name, _ in metadata]
+
+    volumes: List[List[str]] = []
+    current: List[str] = []
+    current_cost = base_cost
+    current_pages = 0
+    for name, size in ordered:
+        group = member_order_key(name)[0]
+        if group == 0:
+            continue
+        cost = member_cost(size)
+        full = (max_bytes is not None and current_cost + cost > max_bytes) or (
+            group == 1 and max_pages is not None and current_pages >= max_pages
+        )
+        if full and current:
+            volumes.append(metadata_names + current)
+            current, current_cost, current_pages = [], base_cost, 0
+        if max_bytes is not None and base_cost + cost > max_bytes:
+            logger.warning(
+                f"Member {name} ({size} bytes) alone exceeds the volume size limit"
+            )
+        current.append(name)
+        current_cost += cost
+        current_pages += group == 1
+    if current or not volumes:
+        volumes.append(metadata_names + current)
+    return volumes
+
+
+def volume_stem(stem: str, index: int, count: int) -> str:
+    """
+    分卷的文件名（不含扩展名），如 "book.part01"，序号位数足以让分卷按名称排序。
+
+    Args:
+        stem: 未分卷时的输出文件名（不含扩展名）
+        index: 分卷序号（从0开始）
+        count: 分卷总数
+
+    Returns:
+        分卷文件名
+    """
+    width = max(2, len(str(count)))
+    return f"{stem}.part{index + 1:0{width}d}"
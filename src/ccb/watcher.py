@@ -0,0 +1,229 @@
+"""
+目录监视模块
+
+该模块实现 `ccb watch`：常驻进程轮询热文件夹，把新放入的压缩包转换为目标格式。
+轮询只重新扫描 mtime 发生变化的目录（scandir 差异比较），正在写入的文件通过
+大小/mtime 稳定性检查去抖，转换在常驻的线程池中执行，复用转换器缓存的处理器。
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .converter import ComicBookConverter
+from .file_detector import ARCHIVE_EXTENSIONS
+from .utils import PARTIAL_SUFFIX, STAGING_PREFIX, get_output_path
+
+logger = logging.getLogger(__name__)
+
+
+class DirectoryWatcher:
+    """基于目录 mtime 和 scandir 差异的轮询监视器。
+
+    只有 mtime 变化的目录才会被重新列举；新文件在大小和 mtime 连续
+    stable_seconds 秒不变后才会被报告，每个文件版本只报告一次。
+    只有等待稳定的文件会在每次轮询时单独 stat。
+    """
+
+    def __init__(self, root: Path, recursive: bool = True, stable_seconds: float = 2.0):
+        """初始化监视器。
+
+        Args:
+            root: 监视的目录
+            recursive: 是否监视子目录
+            stable_seconds: 文件大小和 mtime 保持不变多久后视为写入完成
+        """
+        self.root = Path(root)
+        self.recursive = recursive
+        self.stable_seconds = stable_seconds
+        # 目录 -> 上次列举时的 mtime_ns
+        self._dir_mtimes: Dict[Path, int] = {}
+        # 目录 -> 上次列举到的文件
+        self._dir_files: Dict[Path, Set[Path]] = {}
+        # 等待稳定的文件 -> (大小, mtime_ns, 首次观察到该状态的时间)
+        self._pending: Dict[Path, Tuple[int, int, float]] = {}
+        # 已报告的文件 -> (大小, mtime_ns)
+        self._reported: Dict[Path, Tuple[int, int]] = {}
+
+    @staticmethod
+    def _is_candidate(name: str) -> bool:
+        if name.startswith(".") or name.endswith(PARTIAL_SUFFIX):
+            return False
+        return os.path.splitext(name)[1].lower() in ARCHIVE_EXTENSIONS
+
+    def _scan_dir(self, directory: Path) -> List[Path]:
+        """重新列举目录，记录新出现的文件，返回新发现的子目录。"""
+        files: Set[Path] = set()
+        new_dirs: List[Path] = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if self.recursive and not entry.name.startswith(
+                            (".", STAGING_PREFIX)
+                        ):
+                            subdir = Path(entry.path)
+                            if subdir not in self._dir_mtimes:
+                                self._dir_mtimes[subdir] = -1
+                                new_dirs.append(subdir)
+                    elif entry.is_file() and self._is_candidate(entry.name):
+                        path = Path(entry.path)
+                        files.add(path)
+                        reported = self._reported.get(path)
+                        if reported is not None:
+                            st = entry.stat()
+                            if (st.st_size, st.st_mtime_ns) != reported:
+                                # 已报告的文件被替换为新版本，重新等待稳定
+                                self._pending.setdefault(path, (-1, -1, 0.0))
+        except OSError as e:
+            logger.warning(f"Error scanning {directory}: {e}")
+            return new_dirs
+        previous = self._dir_files.get(directory, set())
+        for path in previous - files:
+            self._pending.pop(path, None)
+            self._reported.pop(path, None)
+        for path in files - previous:
+            self._pending.setdefault(path, (-1, -1, 0.0))
+        self._dir_files[directory] = files
+        return new_dirs
+
+    def poll(self) -> List[Path]:
+        """
+        轮询一次，返回已经写入完成的新文件。
+
+        Returns:
+            新的稳定文件列表
+        """
+        self._dir_mtimes.setdefault(self.root, -1)
+        # 扫描中新发现的子目录追加到队列，在同一轮中继续检查
+        queue = list(self._dir_mtimes)
+        while queue:
+            directory = queue.pop()
+            try:
+                mtime = directory.stat().st_mtime_ns
+            except OSError:
+                # 目录已被删除
+                del self._dir_mtimes[directory]
+                for path in self._dir_files.pop(directory, set()):
+                    self._pending.pop(path, None)
+                    self._reported.pop(path, None)
+                continue
+            if mtime != self._dir_mtimes[directory]:
+                self._dir_mtimes[directory] = mtime
+                queue.extend(self._scan_dir(directory))
+
+        now = time.monotonic()
+        ready = []
+        for path, (size, mtime, since) in list(self._pending.items()):
+            try:
+                st = path.stat()
+            except OSError:
+                self._pending.pop(path, None)
+                continue
+            state = (st.st_size, st.st_mtime_ns)
+            if state != (size, mtime):
+                # 仍在写入，重新计时
+                self._pending[path] = (*state, now)
+            elif now - since >= self.stable_seconds:
+                del self._pending[path]
+                if self._reported.get(path) != state:
+                    self._reported[path] = state
+                    ready.append(path)
+        return ready
+
+
+def is_up_to_date(input_path: Path, output_path: Path) -> bool:
+    """
+    判断输出是否已存在且不早于输入。
+
+    Args:
+        input_path: 输入路径
+        output_path: 输出路径
+
+    Returns:
+        如果输出比输入新则返回True
+    """
+    try:
+        return output_path.stat().st_mtime >= input_path.stat().st_mtime
+    except OSError:
+        return False
+
+
+def watch(
+    converter: ComicBookConverter,
+    root: Path,
+    to_type: str,
+    output_dir: Optional[Path] = None,
+    remove_source: bool = False,
+    force: bool = False,
+    interval: float = 1.0,
+    stable_seconds: float = 2.0,
+    max_jobs: Optional[int] = None,
+    stop: Optional[threading.Event] = None,
+    on_result: Optional[Callable[[Path, Optional[Path]], None]] = None,
+) -> None:
+    """
+    持续监视目录并转换新放入的压缩包，直到 stop 被设置或收到 KeyboardInterrupt。
+
+    已经是目标格式的文件和输出比输入新的文件会被跳过（除非 force）。
+    启动时目录中已有的文件同样会被处理。
+
+    Args:
+        converter: 转换器实例，在整个监视期间复用
+        root: 监视的目录
+        to_type: 输出类型
+        output_dir: 输出目录，None 表示与输入相同的目录
+        remove_source: 是否在转换后删除源文件
+        force: 是否强制替换已有的输出
+        interval: 轮询间隔（秒）
+        stable_seconds: 文件大小和 mtime 保持不变多久后才开始转换
+        max_jobs: 线程池大小，None 使用 ThreadPoolExecutor 默认值
+        stop: 停止事件
+        on_result: 每个条目完成后的回调，参数为输入路径和输出路径（失败时为None）
+    """
+    stop = stop or threading.Event()
+    watcher = DirectoryWatcher(root, stable_seconds=stable_seconds)
+    running: Dict[Path, Future] = {}
+
+    def _convert(input_path: Path) -> Optional[Path]:
+        try:
+            return converter.convert(
+                input_path, to_type, output_dir, remove_source, force
+            )
+        except Exception as e:
+            logger.error(f"Failed to convert {input_path}: {e}")
+            return None
+
+    def _done(input_path: Path, future: Future) -> None:
+        running.pop(input_path, None)
+        result = future.result()
+        if result is not None:
+            logger.info(f"Converted {input_path} -> {result}")
+        if on_result is not None:
+            on_result(input_path, result)
+
+    logger.info(f"Watching {root} for new archives (converting to {to_type})")
+    with ThreadPoolExecutor(max_workers=max_jobs) as pool:
+        try:
+            while True:
+                for input_path in watcher.poll():
+                    if input_path in running:
+                        continue
+                    if ARCHIVE_EXTENSIONS[input_path.suffix.lower()] == to_type:
+                        continue
+                    output_path = get_output_path(input_path, to_type, output_dir)
+                    if not force and is_up_to_date(input_path, output_path):
+                        logger.debug(f"Output is up to date, skipping {input_path}")
+                        continue
+                    future = pool.submit(_convert, input_path)
+                    running[input_path] = future
+                    future.add_done_callback(lambda f, p=input_path: _done(p, f))
+                if stop.wait(interval):
+                    break
+        except KeyboardInterrupt:
+            logger.info("Interrupted by user, waiting for running conversions")
+    logger.info(f"Stopped watching {root}")
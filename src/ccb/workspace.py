@@ -0,0 +1,73 @@
+"""
+转换工作区模块
+
+每次转换拥有独立的工作区，工作区创建并负责清理自己的暂存目录，
+多个转换在同一个转换器上并发运行时不会删除彼此的暂存文件。
+"""
+
+import logging
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from .utils import STAGING_PREFIX
+
+logger = logging.getLogger(__name__)
+
+
+class Workspace:
+    """单次转换的工作区（上下文管理器），退出时只清理自己创建的暂存目录。"""
+
+    def __init__(
+        self,
+        temp_root: Optional[Path] = None,
+        on_create: Optional[Callable[[Path], None]] = None,
+    ):
+        """初始化工作区。
+
+        Args:
+            temp_root: 暂存目录的父目录，None 表示在输出旁边创建隐藏目录，
+                使暂存文件与输出位于同一文件系统
+            on_create: 每创建一个暂存目录时调用，参数为该目录（如登记到任务日志）
+        """
+        self.temp_root = Path(temp_root) if temp_root is not None else None
+        self.on_create = on_create
+        self.temp_dirs: List[Path] = []
+
+    def __enter__(self) -> "Workspace":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.cleanup()
+
+    def make_temp_dir(self, output_path: Path) -> Path:
+        """
+        创建属于该工作区的暂存目录。
+
+        Args:
+            output_path: 输出路径，未指定 temp_root 时暂存目录创建在它旁边
+
+        Returns:
+            暂存目录路径
+        """
+        if self.temp_root is not None:
+            self.temp_root.mkdir(parents=True, exist_ok=True)
+            temp_dir = tempfile.mkdtemp(prefix="ccb_", dir=self.temp_root)
+        else:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_dir = tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=output_path.parent)
+        self.temp_dirs.append(Path(temp_dir))
+        if self.on_create is not None:
+            self.on_create(Path(temp_dir))
+        return Path(temp_dir)
+
+    def cleanup(self) -> None:
+        """删除该工作区创建的所有暂存目录。"""
+        for temp_dir in self.temp_dirs:
+            try:
+                shutil.rmtree(temp_dir)
+                logger.debug(f"Cleaned up temp directory: {temp_dir}")
+            except Exception as e:
+                logger.warning(f"Failed to cleanup temp directory {temp_dir}: {e}")
+        self.temp_dirs.clear()
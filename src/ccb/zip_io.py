@@ -0,0 +1,1054 @@
+"""
+底层 ZIP 读写模块
+
+该模块直接解析 ZIP 文件结构，为页面读取和流式重打包提供标准库 zipfile 之外的快速路径：
+通过内存映射（mmap）读取本地 ZIP 文件的中央目录，存储（STORED）成员以零拷贝的
+memoryview 返回，压缩（DEFLATED）成员直接从映射中解压；重写 ZIP 时未修改的成员直接
+拷贝原有的压缩数据，不经过 zlib。
+"""
+
+import mmap
+import os
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+import logging
+
+from .exceptions import ArchiveError
+from .utils import PeekableStream
+
+logger = logging.getLogger(__name__)
+
+# ZIP 结构签名
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+CENTRAL_HEADER_SIGNATURE = b"PK\x01\x02"
+EOCD_SIGNATURE = b"PK\x05\x06"
+ZIP64_EOCD_SIGNATURE = b"PK\x06\x06"
+ZIP64_LOCATOR_SIGNATURE = b"PK\x06\x07"
+DATA_DESCRIPTOR_SIGNATURE = b"PK\x07\x08"
+
+# 压缩方法
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+
+LOCAL_HEADER_STRUCT = struct.Struct("<4s5H3L2H")
+CENTRAL_HEADER_STRUCT = struct.Struct("<4s6H3L5H2L")
+EOCD_STRUCT = struct.Struct("<4s4H2LH")
+ZIP64_EOCD_STRUCT = struct.Struct("<4sQ2H2L4Q")
+ZIP64_LOCATOR_STRUCT = struct.Struct("<4sLQL")
+DATA_DESCRIPTOR_STRUCT = struct.Struct("<4s3L")
+ZIP64_DATA_DESCRIPTOR_STRUCT = struct.Struct("<4sL2Q")
+
+# EOCD 记录最大长度：固定部分 + 最长注释
+_EOCD_SEARCH_SIZE = EOCD_STRUCT.size + 0xFFFF
+
+
+class ZipEntry:
+    """中央目录中的单个成员记录。
+
+    Attributes:
+        filename (str): 成员名
+        method (int): 压缩方法
+        flags (int): 通用标志位
+        crc (int): CRC-32 校验值
+        compress_size (int): 压缩后大小
+        file_size (int): 原始大小
+        header_offset (int): 本地文件头的偏移
+        dos_time (int): DOS 格式时间
+        dos_date (int): DOS 格式日期
+        external_attr (int): 外部文件属性
+    """
+
+    __slots__ = (
+        "filename",
+        "method",
+        "flags",
+        "crc",
+        "compress_size",
+        "file_size",
+        "header_offset",
+        "dos_time",
+        "dos_date",
+        "external_attr",
+        "data_offset",
+    )
+
+    def __init__(
+        self,
+        filename: str,
+        method: int,
+        flags: int,
+        crc: int,
+        compress_size: int,
+        file_size: int,
+        header_offset: int,
+        dos_time: int = 0,
+        dos_date: int = 0,
+        external_attr: int = 0,
+    ):
+        self.filename = filename
+        self.method = method
+        self.flags = flags
+        self.crc = crc
+        self.compress_size = compress_size
+        self.file_size = file_size
+        self.header_offset = header_offset
+        self.dos_time = dos_time
+        self.dos_date = dos_date
+        self.external_attr = external_attr
+        self.data_offset: Optional[int] = None
+
+    def is_dir(self) -> bool:
+        """判断成员是否为目录。"""
+        return self.filename.endswith("/")
+
+    @property
+    def is_encrypted(self) -> bool:
+        """成员是否加密。"""
+        return bool(self.flags & 0x1)
+
+    def __repr__(self) -> str:
+        return (
+            f"ZipEntry({self.filename!r}, method={self.method}, "
+            f"compress_size={self.compress_size}, file_size={self.file_size})"
+        )
+
+
+def _parse_zip64_extra(
+    extra: bytes, file_size: int, compress_size: int, header_offset: int
+) -> Tuple[int, int, int]:
+    """从 extra 字段中解析 ZIP64 扩展信息（字段 0x0001）。"""
+    pos = 0
+    while pos + 4 <= len(extra):
+        tag, size = struct.unpack_from("<2H", extra, pos)
+        pos += 4
+        if tag == 0x0001:
+            values = iter(
+                struct.unpack_from(f"<{size // 8}Q", extra, pos) if size >= 8 else ()
+            )
+            if file_size == 0xFFFFFFFF:
+                file_size = next(values)
+            if compress_size == 0xFFFFFFFF:
+                compress_size = next(values)
+            if header_offset == 0xFFFFFFFF:
+                header_offset = next(values)
+            break
+        pos += size
+    return file_size, compress_size, header_offset
+
+
+class MmapZipFile:
+    """基于内存映射的只读 ZIP 文件。
+
+    打开时直接从映射中解析中央目录（包括 ZIP64 结构），之后按名称查找成员为 O(1)。
+    STORED 成员通过 read_view() 以零拷贝 memoryview 返回；DEFLATED 成员直接从映射中解压，
+    不经过额外的 read 系统调用和缓冲区拷贝。仅支持 STORED 和 DEFLATED 的未加密成员，
+    其他成员由调用方回退到 zipfile 处理。
+    """
+
+    def __init__(self, path: Path):
+        """打开并映射 ZIP 文件。
+
+        Args:
+            path: ZIP 文件路径
+
+        Raises:
+            ArchiveError: 文件为空、无法映射或不是有效的 ZIP 文件时抛出
+        """
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError) as e:
+            self._file.close()
+            raise ArchiveError(f"Cannot memory-map {self.path}: {e}")
+        self._view = memoryview(self._mmap)
+        try:
+            self._entries: Dict[str, ZipEntry] = {}
+            self._order: List[ZipEntry] = []
+            self._read_central_directory()
+        except Exception as e:
+            self.close()
+            if isinstance(e, ArchiveError):
+                raise
+            raise ArchiveError(f"Bad ZIP file {self.path}: {e}")
+
+    def _read_central_directory(self) -> None:
+        size = len(self._mmap)
+        start = max(0, size - _EOCD_SEARCH_SIZE)
+        eocd_pos = self._mmap.rfind(EOCD_SIGNATURE, start)
+        if eocd_pos < 0 or eocd_pos + EOCD_STRUCT.size > size:
+            raise ArchiveError(f"End of central directory not found in {self.path}")
+
+        _, _, _, _, count, cd_size, cd_offset, _ = EOCD_STRUCT.unpack_from(
+            self._mmap, eocd_pos
+        )
+
+        cd_end = eocd_pos
+        locator_pos = eocd_pos - ZIP64_LOCATOR_STRUCT.size
+        if (
+            locator_pos >= ZIP64_EOCD_STRUCT.size
+            and self._mmap[locator_pos : locator_pos + 4] == ZIP64_LOCATOR_SIGNATURE
+        ):
+            cd_end = locator_pos - ZIP64_EOCD_STRUCT.size
+            fields = ZIP64_EOCD_STRUCT.unpack_from(self._mmap, cd_end)
+            if fields[0] != ZIP64_EOCD_SIGNATURE:
+                raise ArchiveError("Corrupt ZIP64 end of central directory")
+            count, cd_size, cd_offset = fields[7], fields[8], fields[9]
+
+        # 处理压缩包前有额外数据（如自解压头）的情况
+        self._concat = max(cd_end - cd_size - cd_offset, 0)
+
+        mm = self._mmap
+        pos = cd_offset + self._concat
+        unpack = CENTRAL_HEADER_STRUCT.unpack_from
+        header_size = CENTRAL_HEADER_STRUCT.size
+        # 按中央目录的字节范围而不是成员数遍历：部分工具在超过 65535 个成员时
+        # 不写 ZIP64 结构，只在 16 位的成员数字段中保留低位
+        cd_stop = min(pos + cd_size, cd_end)
+        if cd_stop - pos < count * header_size:
+            raise ArchiveError(f"Truncated central directory in {self.path}")
+        while pos < cd_stop:
+            (
+                signature,
+                _,
+                _,
+                flags,
+                method,
+                dos_time,
+                dos_date,
+                crc,
+                compress_size,
+                file_size,
+                name_len,
+                extra_len,
+                comment_len,
+                _,
+                _,
+                external_attr,
+                header_offset,
+            ) = unpack(mm, pos)
+            if signature != CENTRAL_HEADER_SIGNATURE:
+                raise ArchiveError(f"Bad central directory entry at offset {pos}")
+            pos += header_size
+            raw_name = mm[pos : pos + name_len]
+            name = raw_name.decode("utf-8" if flags & 0x800 else "cp437")
+            pos += name_len
+            if 0xFFFFFFFF in (file_size, compress_size, header_offset):
+                file_size, compress_size, header_offset = _parse_zip64_extra(
+                    mm[pos : pos + extra_len], file_size, compress_size, header_offset
+                )
+            pos += extra_len + comment_len
+            entry = ZipEntry(
+                name,
+                method,
+                flags,
+                crc,
+                compress_size,
+                file_size,
+                header_offset + self._concat,
+                dos_time,
+                dos_date,
+                external_attr,
+            )
+            self._order.append(entry)
+            self._entries[name] = entry
+        found = len(self._order)
+        if count != ZIP64_COUNT_LIMIT and found % 0x10000 != count % 0x10000:
+            raise ArchiveError(
+                f"Central directory of {self.path} lists {count} entries "
+                f"but contains {found}"
+            )
+
+    def __enter__(self) -> "MmapZipFile":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """释放映射并关闭文件。
+
+        如果调用方仍持有 read_view() 返回的 memoryview，映射会在这些视图释放后由垃圾回收关闭。
+        """
+        view = getattr(self, "_view", None)
+        if view is not None:
+            view.release()
+            self._view = None
+        mm = getattr(self, "_mmap", None)
+        if mm is not None:
+            try:
+                mm.close()
+            except BufferError:
+                logger.debug(f"Deferring unmap of {self.path}: views still exported")
+            self._mmap = None
+        f = getattr(self, "_file", None)
+        if f is not None:
+            f.close()
+            self._file = None
+
+    def infolist(self) -> List[ZipEntry]:
+        """
+        获取所有成员记录（保持中央目录顺序）。
+
+        Returns:
+            ZipEntry 列表
+        """
+        return list(self._order)
+
+    def __iter__(self) -> Iterator[ZipEntry]:
+        return iter(self._order)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def getinfo(self, name: str) -> ZipEntry:
+        """
+        按名称获取成员记录。
+
+        Args:
+            name: 成员名
+
+        Returns:
+            ZipEntry 实例
+
+        Raises:
+            KeyError: 成员不存在时抛出
+        """
+        return self._entries[name]
+
+    def supports(self, entry: ZipEntry) -> bool:
+        """
+        判断成员能否由本类直接读取（未加密且为 STORED 或 DEFLATED）。
+
+        Args:
+            entry: 成员记录
+
+        Returns:
+            可以直接读取时返回True
+        """
+        return not entry.is_encrypted and entry.method in (ZIP_STORED, ZIP_DEFLATED)
+
+    def _data_offset(self, entry: ZipEntry) -> int:
+        if entry.data_offset is None:
+            fields = LOCAL_HEADER_STRUCT.unpack_from(self._mmap, entry.header_offset)
+            if fields[0] != LOCAL_HEADER_SIGNATURE:
+                raise ArchiveError(
+                    f"Bad local file header for {entry.filename} in {self.path}"
+                )
+            name_len, extra_len = fields[9], fields[10]
+            entry.data_offset = (
+                entry.header_offset + LOCAL_HEADER_STRUCT.size + name_len + extra_len
+            )
+        return entry.data_offset
+
+    def raw_view(self, entry: ZipEntry) -> memoryview:
+        """
+        获取成员压缩数据的零拷贝视图（不解压）。
+
+        Args:
+            entry: 成员记录
+
+        Returns:
+            指向映射中压缩数据的 memoryview
+        """
+        offset = self._data_offset(entry)
+        return self._view[offset : offset + entry.compress_size]
+
+    def local_header_view(self, entry: ZipEntry) -> memoryview:
+        """
+        获取成员本地文件头（含文件名和 extra 字段）的零拷贝视图。
+
+        Args:
+            entry: 成员记录
+
+        Returns:
+            指向映射中本地文件头的 memoryview
+        """
+        return self._view[entry.header_offset : self._data_offset(entry)]
+
+    def read_view(self, entry: ZipEntry) -> memoryview:
+        """
+        读取成员内容。
+
+        STORED 成员直接返回映射的零拷贝切片；DEFLATED 成员从映射中解压并校验 CRC。
+
+        Args:
+            entry: 成员记录
+
+        Returns:
+            成员内容的 memoryview
+
+        Raises:
+            ArchiveError: 成员不受支持或数据损坏时抛出
+        """
+        if not self.supports(entry):
+            raise ArchiveError(
+                f"Unsupported ZIP member {entry.filename} "
+                f"(method={entry.method}, encrypted={entry.is_encrypted})"
+            )
+        raw = self.raw_view(entry)
+        if entry.method == ZIP_STORED:
+            return raw
+        data = zlib.decompressobj(-15).decompress(raw)
+        if len(data) != entry.file_size or zlib.crc32(data) != entry.crc:
+            raise ArchiveError(f"Bad CRC-32 for {entry.filename} in {self.path}")
+        return memoryview(data)
+
+    def read(self, name: str) -> bytes:
+        """
+        按名称读取成员内容。
+
+        Args:
+            name: 成员名
+
+        Returns:
+            成员内容
+        """
+        return bytes(self.read_view(self.getinfo(name)))
+
+
+# 超过该值的大小或偏移需要使用 ZIP64 扩展
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP64_COUNT_LIMIT = 0xFFFF
+
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def dos_datetime(timestamp: float) -> Tuple[int, int]:
+    """
+    将时间戳转换为 ZIP 使用的 DOS 日期和时间。
+
+    Args:
+        timestamp: Unix 时间戳
+
+    Returns:
+        (dos_time, dos_date)，早于 1980 年的时间按 1980-01-01 处理
+    """
+    t = time.localtime(timestamp)
+    if t.tm_year < 1980:
+        return 0, (0 << 9) | (1 << 5) | 1
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+
+class RawZipWriter:
+    """可直接拷贝压缩数据的 ZIP 写入器。
+
+    copy_entry() 从源 MmapZipFile 中原样拷贝成员的压缩数据、CRC 和大小，不经过 zlib；
+    只有内容发生变化的成员才通过 write_bytes() 或 write_file() 重新压缩。
+    自动为超过 4 GB 的成员、偏移或超过 65535 个成员写入 ZIP64 结构。
+    输出必须是可随机访问的文件。
+    """
+
+    def __init__(self, path: Path, level: Optional[int] = None):
+        """创建 ZIP 文件。
+
+        Args:
+            path: 输出 ZIP 文件路径
+            level: 新写入成员的 deflate 级别，0 表示仅存储，None 使用 zlib 默认级别
+        """
+        self.path = Path(path)
+        self.level = level
+        self._file = open(self.path, "wb")
+        self._entries: List[ZipEntry] = []
+        self._names: set = set()
+
+    def __enter__(self) -> "RawZipWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+    def _check_name(self, name: str) -> None:
+        """同名成员以最后写入的为准：从中央目录中去掉先前的条目，其数据成为无主数据。"""
+        if name in self._names:
+            logger.warning(f"Duplicate ZIP member name, keeping the last one: {name}")
+            self._entries = [e for e in self._entries if e.filename != name]
+        self._names.add(name)
+
+    @staticmethod
+    def _encode_name(name: str, flags: int) -> Tuple[bytes, int]:
+        try:
+            return name.encode("ascii"), flags & ~0x800
+        except UnicodeEncodeError:
+            return name.encode("utf-8"), flags | 0x800
+
+    def _write_local_header(self, entry: ZipEntry, zip64: bool) -> None:
+        name, entry.flags = self._encode_name(entry.filename, entry.flags)
+        extra = b""
+        compress_size, file_size = entry.compress_size, entry.file_size
+        if zip64:
+            extra = struct.pack("<2H2Q", 0x0001, 16, file_size, compress_size)
+            compress_size = file_size = ZIP64_LIMIT
+        entry.header_offset = self._file.tell()
+        self._file.write(
+            LOCAL_HEADER_STRUCT.pack(
+                LOCAL_HEADER_SIGNATURE,
+                45 if zip64 else 20,
+                entry.flags,
+                entry.method,
+                entry.dos_time,
+                entry.dos_date,
+                entry.crc,
+                compress_size,
+                file_size,
+                len(name),
+                len(extra),
+            )
+        )
+        self._file.write(name)
+        self._file.write(extra)
+
+    def copy_entry(
+        self, source: MmapZipFile, entry: ZipEntry, arcname: Optional[str] = None
+    ) -> None:
+        """
+        原样拷贝源压缩包中的成员，不解压也不重新压缩。
+
+        Args:
+            source: 源 ZIP 文件
+            entry: 源成员记录
+            arcname: 新的成员名，None 时保持原名
+
+        Raises:
+            ArchiveError: 成员已加密时抛出
+        """
+        if entry.is_encrypted:
+            raise ArchiveError(f"Cannot copy encrypted ZIP member {entry.filename}")
+        name = entry.filename if arcname is None else arcname
+        self._check_name(name)
+        new = ZipEntry(
+            name,
+            entry.method,
+            # 去掉数据描述符标志：大小和 CRC 已直接写入本地文件头
+            entry.flags & ~0x8,
+            entry.crc,
+            entry.compress_size,
+            entry.file_size,
+            0,
+            entry.dos_time,
+            entry.dos_date,
+            entry.external_attr,
+        )
+        zip64 = max(entry.compress_size, entry.file_size) >= ZIP64_LIMIT
+        self._write_local_header(new, zip64)
+        raw = source.raw_view(entry)
+        try:
+            self._file.write(raw)
+        finally:
+            raw.release()
+        self._entries.append(new)
+
+    def write_bytes(
+        self,
+        arcname: str,
+        data: bytes,
+        date_time: Optional[float] = None,
+        external_attr: int = 0o644 << 16,
+    ) -> None:
+        """
+        写入新内容的成员（按 level 压缩）。
+
+        Args:
+            arcname: 成员名
+            data: 成员内容
+            date_time: 修改时间戳，None 表示当前时间
+            external_attr: 外部文件属性
+        """
+        self._check_name(arcname)
+        crc = zlib.crc32(data)
+        if self.level == 0:
+            method, payload = ZIP_STORED, data
+        else:
+            compressor = zlib.compressobj(
+                -1 if self.level is None else self.level, zlib.DEFLATED, -15
+            )
+            method, payload = (
+                ZIP_DEFLATED,
+                compressor.compress(data) + compressor.flush(),
+            )
+        dos_time, dos_date = dos_datetime(
+            time.time() if date_time is None else date_time
+        )
+        entry = ZipEntry(
+            arcname,
+            method,
+            0,
+            crc,
+            len(payload),
+            len(data),
+            0,
+            dos_time,
+            dos_date,
+            external_attr,
+        )
+        self._write_local_header(entry, max(len(data), len(payload)) >= ZIP64_LIMIT)
+        self._file.write(payload)
+        self._entries.append(entry)
+
+    def write_file(
+        self, file_path: Path, arcname: str, date_time: Optional[float] = None
+    ) -> None:
+        """
+        以流式方式压缩写入本地文件，内存占用与文件大小无关。
+
+        Args:
+            file_path: 本地文件路径
+            arcname: 成员名
+            date_time: 修改时间戳，None 时使用文件的修改时间
+        """
+        self._check_name(arcname)
+        st = os.stat(file_path)
+        dos_time, dos_date = dos_datetime(
+            st.st_mtime if date_time is None else date_time
+        )
+        method = ZIP_STORED if self.level == 0 else ZIP_DEFLATED
+        entry = ZipEntry(
+            arcname,
+            method,
+            0,
+            0,
+            0,
+            st.st_size,
+            0,
+            dos_time,
+            dos_date,
+            (st.st_mode & 0xFFFF) << 16,
+        )
+        # 与 zipfile 相同：预估压缩后可能超过 4 GB 时预留 ZIP64 字段
+        zip64 = st.st_size * 1.05 >= ZIP64_LIMIT
+        self._write_local_header(entry, zip64)
+        data_start = self._file.tell()
+
+        with open(file_path, "rb") as f:
+            entry.crc, entry.file_size = self._write_data(f, method)
+        end = self._file.tell()
+        file_size = entry.file_size
+        entry.compress_size = end - data_start
+        if not zip64 and max(entry.compress_size, file_size) >= ZIP64_LIMIT:
+            raise ArchiveError(f"{file_path} grew beyond 4 GB while being archived")
+        # 回填本地文件头中的 CRC 和大小
+        self._file.seek(entry.header_offset)
+        self._write_local_header(entry, zip64)
+        self._file.seek(end)
+        self._entries.append(entry)
+
+    def _write_data(self, stream: BinaryIO, method: int) -> Tuple[int, int]:
+        """分块读取流，按 method 压缩后写入，返回 (CRC-32, 原始大小)。"""
+        crc = 0
+        file_size = 0
+        compressor = None
+        if method == ZIP_DEFLATED:
+            compressor = zlib.compressobj(
+                -1 if self.level is None else self.level, zlib.DEFLATED, -15
+            )
+        while True:
+            chunk = stream.read(_COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+            file_size += len(chunk)
+            self._file.write(compressor.compress(chunk) if compressor else chunk)
+        if compressor is not None:
+            self._file.write(compressor.flush())
+        return crc, file_size
+
+    def close(self) -> None:
+        """写入中央目录和结尾记录，然后关闭文件。"""
+        if self._file.closed:
+            return
+        f = self._file
+        cd_offset = f.tell()
+        for entry in self._entries:
+            name, flags = self._encode_name(entry.filename, entry.flags)
+            zip64_fields = []
+            compress_size, file_size, header_offset = (
+                entry.compress_size,
+                entry.file_size,
+                entry.header_offset,
+            )
+            if file_size >= ZIP64_LIMIT:
+                zip64_fields.append(file_size)
+                file_size = ZIP64_LIMIT
+            if compress_size >= ZIP64_LIMIT:
+                zip64_fields.append(compress_size)
+                compress_size = ZIP64_LIMIT
+            if header_offset >= ZIP64_LIMIT:
+                zip64_fields.append(header_offset)
+                header_offset = ZIP64_LIMIT
+            extra = b""
+            if zip64_fields:
+                extra = struct.pack(
+                    f"<2H{len(zip64_fields)}Q",
+                    0x0001,
+                    8 * len(zip64_fields),
+                    *zip64_fields,
+                )
+            version = 45 if zip64_fields else 20
+            # 带有 Unix 权限位时标记为 Unix 创建
+            made_by = version | (3 << 8 if entry.external_attr >> 16 else 0)
+            f.write(
+                CENTRAL_HEADER_STRUCT.pack(
+                    CENTRAL_HEADER_SIGNATURE,
+                    made_by,
+                    version,
+                    flags,
+                    entry.method,
+                    entry.dos_time,
+                    entry.dos_date,
+                    entry.crc,
+                    compress_size,
+                    file_size,
+                    len(name),
+                    len(extra),
+                    0,
+                    0,
+                    0,
+                    entry.external_attr,
+                    header_offset,
+                )
+            )
+            f.write(name)
+            f.write(extra)
+        cd_end = f.tell()
+        count = len(self._entries)
+        cd_size = cd_end - cd_offset
+
+        if (
+            count > ZIP64_COUNT_LIMIT
+            or cd_offset >= ZIP64_LIMIT
+            or cd_size >= ZIP64_LIMIT
+        ):
+            f.write(
+                ZIP64_EOCD_STRUCT.pack(
+                    ZIP64_EOCD_SIGNATURE,
+                    44,
+                    45,
+                    45,
+                    0,
+                    0,
+                    count,
+                    count,
+                    cd_size,
+                    cd_offset,
+                )
+            )
+            f.write(ZIP64_LOCATOR_STRUCT.pack(ZIP64_LOCATOR_SIGNATURE, 0, cd_end, 1))
+            count = min(count, ZIP64_COUNT_LIMIT)
+            cd_size = min(cd_size, ZIP64_LIMIT)
+            cd_offset = min(cd_offset, ZIP64_LIMIT)
+        f.write(
+            EOCD_STRUCT.pack(EOCD_SIGNATURE, 0, 0, count, count, cd_size, cd_offset, 0)
+        )
+        f.close()
+
+
+class _PositionWriter:
+    """记录已写入字节数的只写流包装，为不可定位的输出提供 tell()。"""
+
+    def __init__(self, fileobj: BinaryIO):
+        self._fileobj = fileobj
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> None:
+        self._fileobj.write(data)
+        self._position += memoryview(data).nbytes
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self) -> None:
+        """刷新底层流；底层流由调用方负责关闭。"""
+        self.closed = True
+        self._fileobj.flush()
+
+
+class StreamZipWriter(RawZipWriter):
+    """写入不可定位输出（如标准输出）的 ZIP 写入器。
+
+    大小事先未知的成员（write_stream()、write_file()）在本地文件头中设置数据描述符标志，
+    CRC 和大小写在成员数据之后的数据描述符中，不需要回填本地文件头；
+    中央目录中的偏移按已写入的字节数计算。通过数据描述符写入的成员不能超过 4 GB。
+    """
+
+    def __init__(self, fileobj: BinaryIO, level: Optional[int] = None):
+        """包装输出流。
+
+        Args:
+            fileobj: 二进制只写流，不需要支持 seek() 和 tell()
+            level: 新写入成员的 deflate 级别，0 表示仅存储，None 使用 zlib 默认级别
+        """
+        self.path = None
+        self.level = level
+        self._file = _PositionWriter(fileobj)
+        self._entries: List[ZipEntry] = []
+        self._names: set = set()
+
+    def write_stream(
+        self,
+        arcname: str,
+        stream: BinaryIO,
+        date_time: Optional[float] = None,
+        external_attr: int = 0o644 << 16,
+    ) -> None:
+        """
+        以流式方式压缩写入成员，CRC 和大小写入数据描述符。
+
+        Args:
+            arcname: 成员名
+            stream: 成员内容的二进制只读流
+            date_time: 修改时间戳，None 表示当前时间
+            external_attr: 外部文件属性
+
+        Raises:
+            ArchiveError: 成员超过 4 GB 时抛出
+        """
+        self._check_name(arcname)
+        dos_time, dos_date = dos_datetime(
+            time.time() if date_time is None else date_time
+        )
+        method = ZIP_STORED if self.level == 0 else ZIP_DEFLATED
+        entry = ZipEntry(
+            arcname, method, 0x8, 0, 0, 0, 0, dos_time, dos_date, external_attr
+        )
+        self._write_local_header(entry, False)
+        data_start = self._file.tell()
+        entry.crc, entry.file_size = self._write_data(stream, method)
+        entry.compress_size = self._file.tell() - data_start
+        if max(entry.compress_size, entry.file_size) >= ZIP64_LIMIT:
+            raise ArchiveError(f"{arcname} is too large for a streamed ZIP member")
+        self._file.write(
+            DATA_DESCRIPTOR_STRUCT.pack(
+                DATA_DESCRIPTOR_SIGNATURE,
+                entry.crc,
+                entry.compress_size,
+                entry.file_size,
+            )
+        )
+        self._entries.append(entry)
+
+    def write_file(
+        self, file_path: Path, arcname: str, date_time: Optional[float] = None
+    ) -> None:
+        """
+        以流式方式压缩写入本地文件，CRC 和大小写入数据描述符。
+
+        Args:
+            file_path: 本地文件路径
+            arcname: 成员名
+            date_time: 修改时间戳，None 时使用文件的修改时间
+        """
+        st = os.stat(file_path)
+        with open(file_path, "rb") as f:
+            self.write_stream(
+                arcname,
+                f,
+                st.st_mtime if date_time is None else date_time,
+                (st.st_mode & 0xFFFF) << 16,
+            )
+
+
+def iter_zip_stream(fileobj: BinaryIO) -> Iterator[Tuple[str, bytes]]:
+    """
+    按本地文件头顺序读取 ZIP 流中的文件成员，不需要定位，也不读取中央目录。
+
+    支持存储和 deflate 压缩的成员，包括使用数据描述符（大小写在数据之后）的成员：
+    deflate 成员读到压缩流结束为止，存储成员查找 CRC 和大小都匹配的数据描述符。
+    每次只在内存中保留一个成员。
+
+    Args:
+        fileobj: 二进制只读流（如标准输入）
+
+    Yields:
+        (成员名, 成员内容)，目录成员被跳过
+
+    Raises:
+        ArchiveError: 数据不是 ZIP、被截断、已加密、使用不支持的压缩方法或校验失败时抛出
+    """
+    stream = fileobj if isinstance(fileobj, PeekableStream) else PeekableStream(fileobj)
+    while True:
+        signature = stream.peek(len(LOCAL_HEADER_SIGNATURE))
+        if signature != LOCAL_HEADER_SIGNATURE:
+            if signature and signature not in (
+                CENTRAL_HEADER_SIGNATURE,
+                EOCD_SIGNATURE,
+                ZIP64_EOCD_SIGNATURE,
+            ):
+                raise ArchiveError(f"Invalid ZIP stream signature: {signature!r}")
+            # 读完中央目录，避免上游命令因管道关闭而报错
+            while stream.read(_COPY_CHUNK_SIZE):
+                pass
+            return
+        try:
+            name, data = _read_stream_member(stream)
+        except EOFError as e:
+            raise ArchiveError(f"Truncated ZIP stream: {e}")
+        if not name.endswith("/"):
+            yield name, data
+
+
+def _read_stream_member(stream: PeekableStream) -> Tuple[str, bytes]:
+    """读取 ZIP 流中的一个成员（本地文件头、数据和可能的数据描述符）。"""
+    (
+        _,
+        _,
+        flags,
+        method,
+        _,
+        _,
+        crc,
+        compress_size,
+        file_size,
+        name_len,
+        extra_len,
+    ) = LOCAL_HEADER_STRUCT.unpack(stream.read_exact(LOCAL_HEADER_STRUCT.size))
+    name = stream.read_exact(name_len).decode("utf-8" if flags & 0x800 else "cp437")
+    extra = stream.read_exact(extra_len)
+    zip64 = _has_zip64_extra(extra)
+    if zip64:
+        file_size, compress_size, _ = _parse_zip64_extra(
+            extra, file_size, compress_size, 0
+        )
+    if flags & 0x1:
+        raise ArchiveError(f"Cannot stream encrypted ZIP member {name}")
+    if method not in (ZIP_STORED, ZIP_DEFLATED):
+        raise ArchiveError(
+            f"Unsupported compression method {method} for streamed member {name}"
+        )
+
+    if not flags & 0x8:
+        raw = stream.read_exact(compress_size)
+        data = zlib.decompress(raw, -15) if method == ZIP_DEFLATED else raw
+    elif method == ZIP_DEFLATED:
+        data = _inflate_stream(stream)
+        if stream.peek(len(DATA_DESCRIPTOR_SIGNATURE)) == DATA_DESCRIPTOR_SIGNATURE:
+            stream.read_exact(len(DATA_DESCRIPTOR_SIGNATURE))
+        size_format = "<L2Q" if zip64 else "<3L"
+        crc, _, file_size = struct.unpack(
+            size_format, stream.read_exact(struct.calcsize(size_format))
+        )
+    else:
+        data, crc = _read_stored_stream(stream, zip64)
+        file_size = len(data)
+
+    if len(data) != file_size or zlib.crc32(data) != crc:
+        raise ArchiveError(f"Bad CRC or size for streamed ZIP member {name}")
+    return name, data
+
+
+def _has_zip64_extra(extra: bytes) -> bool:
+    """extra 字段中是否包含 ZIP64 扩展信息（字段 0x0001）。"""
+    pos = 0
+    while pos + 4 <= len(extra):
+        tag, size = struct.unpack_from("<2H", extra, pos)
+        if tag == 0x0001:
+            return True
+        pos += 4 + size
+    return False
+
+
+def _inflate_stream(stream: PeekableStream) -> bytes:
+    """解压到 deflate 流结束为止，多读的数据退回到流中。"""
+    decompressor = zlib.decompressobj(-15)
+    parts = []
+    while not decompressor.eof:
+        chunk = stream.read(_COPY_CHUNK_SIZE)
+        if not chunk:
+            raise EOFError("deflate data ended early")
+        parts.append(decompressor.decompress(chunk))
+    stream.unread(decompressor.unused_data)
+    return b"".join(parts)
+
+
+def _read_stored_stream(stream: PeekableStream, zip64: bool) -> Tuple[bytes, int]:
+    """
+    读取大小未知的存储成员：查找其后 CRC 和大小都与之前数据匹配的数据描述符。
+
+    Returns:
+        (成员内容, CRC-32)
+    """
+    descriptor = ZIP64_DATA_DESCRIPTOR_STRUCT if zip64 else DATA_DESCRIPTOR_STRUCT
+    buffer = bytearray()
+    search_from = 0
+    while True:
+        chunk = stream.read(_COPY_CHUNK_SIZE)
+        if not chunk:
+            raise EOFError("no data descriptor after stored member")
+        buffer += chunk
+        pos = buffer.find(DATA_DESCRIPTOR_SIGNATURE, search_from)
+        while pos != -1 and pos + descriptor.size <= len(buffer):
+            _, crc, compress_size, file_size = descriptor.unpack_from(buffer, pos)
+            if compress_size == file_size == pos and zlib.crc32(buffer[:pos]) == crc:
+                stream.unread(buffer[pos + descriptor.size :])
+                return bytes(buffer[:pos]), crc
+            pos = buffer.find(DATA_DESCRIPTOR_SIGNATURE, pos + 1)
+        search_from = pos if pos != -1 else max(0, len(buffer) - 3)
+
+
+def repack_zip(
+    input_path: Path,
+    output_path: Path,
+    select: Optional[Callable[[str], bool]] = None,
+    rename: Optional[Callable[[str], str]] = None,
+    sort_key: Optional[Callable[[str], object]] = None,
+    add_files: Optional[Dict[str, bytes]] = None,
+    level: Optional[int] = None,
+) -> Path:
+    """
+    重写 ZIP 文件：筛选、重命名、重新排序成员或添加新文件。
+
+    未修改内容的成员直接拷贝压缩数据，不经过 zlib；只有 add_files 中的新内容会被压缩。
+    add_files 中与已有成员同名的条目会替换该成员；源文件中重名的成员与 zipfile 一样
+    以最后一个为准，先前的成员不会被拷贝。
+
+    Args:
+        input_path: 源 ZIP 文件路径
+        output_path: 输出 ZIP 文件路径（不能与源文件相同）
+        select: 成员筛选函数，返回False的成员会被丢弃
+        rename: 成员重命名函数
+        sort_key: 成员排序键函数（作用于新成员名），None 时保持原顺序
+        add_files: 需要添加或替换的成员，成员名到内容的映射，写在最前面
+        level: 新内容的 deflate 级别
+
+    Returns:
+        输出 ZIP 文件路径
+
+    Raises:
+        ArchiveError: 读取或写入失败时抛出
+    """
+    add_files = add_files or {}
+    with MmapZipFile(input_path) as source:
+        selected: Dict[str, ZipEntry] = {}
+        for entry in source:
+            if entry.is_dir() or (select is not None and not select(entry.filename)):
+                continue
+            name = rename(entry.filename) if rename is not None else entry.filename
+            if name in add_files:
+                continue
+            if selected.pop(name, None) is not None:
+                logger.warning(
+                    f"Duplicate ZIP member name in {input_path}, keeping the last one: "
+                    f"{name}"
+                )
+            selected[name] = entry
+        members = list(selected.items())
+        if sort_key is not None:
+            members.sort(key=lambda item: sort_key(item[0]))
+
+        with RawZipWriter(output_path, level=level) as writer:
+            for name, data in add_files.items():
+                writer.write_bytes(name, data)
+            for name, entry in members:
+                writer.copy_entry(source, entry, arcname=name)
+    logger.debug(
+        f"Repacked {input_path} to {output_path} ({len(members)} members copied)"
+    )
+    return output_path
@@ -5,12 +5,20 @@ Archive handler 单元测试
 import pytest
 from pathlib import Path
 import tempfile
+import os
+import threading
+import time
 
 from ccb.archive_handler import (
     ZipHandler,
     TarHandler,
     RarHandler,
+    PageCache,
+    ReaderPool,
     get_handler,
+    open_reader,
+    resolve_level,
+    set_rar_concurrency,
 )
 from ccb.exceptions import ArchiveError
 
@@ -89,3 +97,473 @@ class TestArchiveHandler:
             handler.extract(Path("nonexistent.cbr"), tmp_path / "out")
 
         assert handler.is_valid(Path("nonexistent.cbr")) is False
+
+
+    def test_uncompressed_sizes_from_headers(self, tmp_path):
+        """测试从中央目录或成员头读取成员大小"""
+        import tarfile
+        import zipfile
+
+        archive = tmp_path / "a.cbz"
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr("dir/", b"")
+            zipf.writestr("dir/1.jpg", b"x" * 5000)
+            zipf.writestr("2.jpg", b"y" * 300)
+        assert sorted(ZipHandler().uncompressed_sizes(archive)) == [300, 5000]
+
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "1.jpg").write_bytes(b"z" * 7000)
+        tar_path = tmp_path / "a.cbt"
+        with tarfile.open(tar_path, "w") as tar:
+            tar.add(src, arcname="src")
+        assert TarHandler().uncompressed_sizes(tar_path) == [7000]
+
+    @pytest.mark.parametrize("data_filter", [True, False])
+    def test_tar_rejects_members_outside_output(
+        self, tmp_path, monkeypatch, data_filter
+    ):
+        """测试解压 TAR 时拒绝逃出输出目录的成员（有无 data 过滤器两种情况）"""
+        import io
+        import tarfile
+
+        if not data_filter:
+            monkeypatch.delattr(tarfile, "data_filter", raising=False)
+        elif not hasattr(tarfile, "data_filter"):
+            pytest.skip("tarfile has no extraction filters")
+        archive = tmp_path / "evil.cbt"
+        with tarfile.open(archive, "w") as tar:
+            info = tarfile.TarInfo("book/01.jpg")
+            info.size = 4
+            tar.addfile(info, io.BytesIO(b"page"))
+            info = tarfile.TarInfo("../escaped.jpg")
+            info.size = 4
+            tar.addfile(info, io.BytesIO(b"evil"))
+
+        out = tmp_path / "out" / "inner"
+        with pytest.raises(ArchiveError):
+            TarHandler().extract(archive, out)
+        with open(archive, "rb") as f, pytest.raises(ArchiveError):
+            TarHandler().extract_stream(f, out)
+        assert not (tmp_path / "out" / "escaped.jpg").exists()
+
+
+class TestArchiveReader:
+    def _make_cbz(self, path, names):
+        import zipfile
+
+        with zipfile.ZipFile(path, "w") as zipf:
+            for name in names:
+                zipf.writestr(name, f"data:{name}")
+        return path
+
+    def test_zip_reader_pages_in_natural_order(self, tmp_path):
+        """测试页面按自然顺序排列且可按页码读取"""
+        archive = self._make_cbz(
+            tmp_path / "a.cbz", ["p10.jpg", "p2.jpg", "notes.txt", "p1.jpg"]
+        )
+        with open_reader(archive) as reader:
+            assert reader.pages == ["p1.jpg", "p2.jpg", "p10.jpg"]
+            assert reader.read_page(2) == b"data:p10.jpg"
+            assert reader.open_page(0).read() == b"data:p1.jpg"
+            assert reader.read("notes.txt") == b"data:notes.txt"
+            with pytest.raises(ArchiveError):
+                reader.read_page(3)
+            with pytest.raises(ArchiveError):
+                reader.read("missing.jpg")
+
+    def test_tar_reader(self, tmp_path):
+        """测试 TarReader 读取页面"""
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "1.png").write_bytes(b"one")
+        (src / "2.png").write_bytes(b"two")
+        archive = tmp_path / "out.cbt"
+        TarHandler().compress(src, archive)
+
+        with open_reader(archive) as reader:
+            assert reader.page_count == 2
+            assert reader.read_page(1) == b"two"
+
+    def test_7z_reader_round_trip(self, tmp_path):
+        """测试 SevenZipReader 读取 Python 处理器写入的 CB7"""
+        pytest.importorskip("py7zr")
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "p10.jpg").write_bytes(b"ten")
+        (src / "p2.jpg").write_bytes(b"two")
+        (src / "notes.txt").write_bytes(b"notes")
+        archive = tmp_path / "out.cb7"
+        get_handler("cb7", backend="python").compress(src, archive)
+
+        with open_reader(archive) as reader:
+            assert reader.pages == ["p2.jpg", "p10.jpg"]
+            assert reader.read_page(1) == b"ten"
+            assert reader.read_page(0) == b"two"
+            assert reader.read("notes.txt") == b"notes"
+            with pytest.raises(ArchiveError):
+                reader.read("missing.jpg")
+
+    def test_reader_pool_cache_stats(self, tmp_path):
+        """测试读取器池复用读取器并统计缓存命中"""
+        archive = self._make_cbz(tmp_path / "b.cbz", ["1.jpg", "2.jpg"])
+        with ReaderPool(max_readers=1, cache=PageCache(max_bytes=1024)) as pool:
+            assert pool.read_page(archive, 0) == b"data:1.jpg"
+            assert pool.read_page(archive, 0) == b"data:1.jpg"
+            assert pool.open_page(archive, 1).read() == b"data:2.jpg"
+            with pool.reader(archive) as first, pool.reader(archive) as second:
+                assert first is second
+            stats = pool.stats()
+            assert stats["hits"] == 1
+            assert stats["misses"] == 2
+            assert stats["readers"] == 1
+
+    @staticmethod
+    def _is_open(reader):
+        return reader._mmap_zip is not None or reader._zip is not None
+
+    def test_reader_pool_defers_closing_leased_readers(self, tmp_path):
+        """测试被淘汰但仍被租用的读取器在归还后才关闭"""
+        first = self._make_cbz(tmp_path / "a.cbz", ["1.jpg"])
+        second = self._make_cbz(tmp_path / "b.cbz", ["1.jpg"])
+        with ReaderPool(max_readers=1) as pool:
+            with pool.reader(first) as reader:
+                with pool.reader(second):
+                    pass
+                assert pool.stats()["readers"] == 1
+                assert self._is_open(reader)
+                assert reader.read_page(0) == b"data:1.jpg"
+            assert not self._is_open(reader)
+            with pool.reader(second) as reader:
+                pool.close()
+                assert reader.read_page(0) == b"data:1.jpg"
+            assert not self._is_open(reader)
+
+    def test_reader_close_waits_for_read(self, tmp_path):
+        """测试关闭读取器会等待正在进行的读取完成"""
+        archive = self._make_cbz(tmp_path / "c.cbz", ["1.jpg"])
+        reader = open_reader(archive)
+        with reader._lock:
+            closer = threading.Thread(target=reader.close)
+            closer.start()
+            closer.join(0.1)
+            assert closer.is_alive()
+            assert self._is_open(reader)
+        closer.join()
+        assert not self._is_open(reader)
+
+    def test_reader_closes_on_invalid_archive(self, tmp_path, monkeypatch):
+        """测试建立索引失败时读取器会关闭已打开的句柄"""
+        from ccb.archive_handler import ZipReader
+
+        archive = self._make_cbz(tmp_path / "d.cbz", ["1.jpg"])
+        closed = []
+        monkeypatch.setattr(ZipReader, "_close", lambda self: closed.append(self))
+
+        def _build_index(self):
+            self._zip = object()
+            raise ArchiveError("bad index")
+
+        monkeypatch.setattr(ZipReader, "_build_index", _build_index)
+        with pytest.raises(ArchiveError, match="bad index"):
+            ZipReader(archive)
+        assert len(closed) == 1
+
+    def test_page_cache_evicts_by_size(self):
+        """测试页面缓存按字节数淘汰最久未使用的页面"""
+        cache = PageCache(max_bytes=10)
+        cache.put(("a",), b"12345")
+        cache.put(("b",), b"12345")
+        assert cache.get(("a",)) == b"12345"
+        cache.put(("c",), b"12345")
+        assert cache.get(("b",)) is None
+        assert cache.get(("a",)) is not None
+        assert cache.stats()["evictions"] == 1
+        assert cache.size == 10
+
+
+class TestCompressedTar:
+    @pytest.mark.parametrize("compression", ["gz", "xz", "zst"])
+    def test_compressed_round_trip(self, tmp_path, compression):
+        """测试压缩 TAR 的写入、识别与解压"""
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "01.txt").write_text("page " * 1000)
+        archive = tmp_path / "out.cbt"
+
+        handler = get_handler("cbt", tar_compression=compression)
+        try:
+            handler.compress(src, archive)
+        except ArchiveError as e:
+            pytest.skip(f"{compression} unavailable: {e}")
+
+        assert archive.stat().st_size < 5000
+        assert TarHandler().is_valid(archive)
+        out = tmp_path / "out"
+        TarHandler().extract(archive, out)
+        assert (out / "src" / "01.txt").read_text() == "page " * 1000
+        with open_reader(archive) as reader:
+            assert reader.read("src/01.txt") == ("page " * 1000).encode()
+
+    def test_external_threaded_compressor(self, tmp_path, monkeypatch):
+        """测试大数据量时通过管道使用外部多线程压缩工具"""
+        import shutil
+        import ccb.archive_handler as archive_handler
+
+        if shutil.which("xz") is None:
+            pytest.skip("xz command not available")
+        monkeypatch.setattr(archive_handler, "THREADED_COMPRESSION_THRESHOLD", 0)
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "a.txt").write_text("x" * 10000)
+        archive = tmp_path / "out.cbt"
+        TarHandler(compression="xz").compress(src, archive)
+        out = tmp_path / "out"
+        TarHandler().extract(archive, out)
+        assert (out / "src" / "a.txt").read_text() == "x" * 10000
+
+    def test_unsupported_compression(self):
+        """测试不支持的 TAR 压缩格式"""
+        with pytest.raises(ArchiveError):
+            TarHandler(compression="lz4")
+
+
+class TestCompressionLevels:
+    def test_resolve_level(self):
+        """测试预设与显式级别的解析"""
+        assert resolve_level("zip", "fast") == 1
+        assert resolve_level("rar", "max") == 5
+        assert resolve_level("zst", "max") == 19
+        assert resolve_level("7z", "3") == 3
+        assert resolve_level("zip", None) is None
+        with pytest.raises(ArchiveError):
+            resolve_level("rar", 9)
+        with pytest.raises(ArchiveError):
+            resolve_level("zip", "fastest")
+
+    def test_get_handler_per_format_levels(self):
+        """测试按格式指定的级别映射"""
+        levels = {"cbz": "max", "cbt": 19}
+        assert get_handler("zip", level=levels).level == 9
+        assert get_handler("cbt", tar_compression="zst", level=levels).level == 19
+        assert get_handler("cbt", level=levels).level is None
+        assert get_handler("cbr", level=levels).level is None
+
+    def test_zip_level_zero_stores(self, tmp_path):
+        """测试 ZIP 级别 0 仅存储不压缩"""
+        import zipfile
+
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "a.txt").write_text("a" * 1000)
+        archive = tmp_path / "stored.cbz"
+        ZipHandler(level=0).compress(src, archive)
+        with zipfile.ZipFile(archive) as zipf:
+            assert zipf.getinfo("a.txt").compress_type == zipfile.ZIP_STORED
+
+        fast = tmp_path / "fast.cbz"
+        ZipHandler(level="max").compress(src, fast)
+        assert fast.stat().st_size < archive.stat().st_size
+
+    def _make_comic(self, root):
+        (root / "ch2").mkdir(parents=True)
+        for name in ("10.jpg", "2.jpg", "1.jpg", "notes.txt", "ComicInfo.xml"):
+            (root / name).write_bytes(os.urandom(1000))
+        (root / "ch2" / "1.jpg").write_bytes(b"x")
+        return [
+            "ComicInfo.xml",
+            "1.jpg",
+            "2.jpg",
+            "10.jpg",
+            "ch2/1.jpg",
+            "notes.txt",
+        ]
+
+    def test_zip_reading_order_and_reproducible(self, tmp_path):
+        """测试 ZIP 成员按阅读顺序写入，且修改时间固定使输出可复现"""
+        import zipfile
+
+        src = tmp_path / "src"
+        expected = self._make_comic(src)
+        first = tmp_path / "first.cbz"
+        ZipHandler().compress(src, first)
+        with zipfile.ZipFile(first) as zipf:
+            assert zipf.namelist() == expected
+            assert zipf.getinfo("1.jpg").date_time == (1980, 1, 1, 0, 0, 0)
+
+        os.utime(src / "1.jpg", (1_700_000_000, 1_700_000_000))
+        second = tmp_path / "second.cbz"
+        ZipHandler().compress(src, second)
+        assert first.read_bytes() == second.read_bytes()
+
+    def test_tar_reading_order(self, tmp_path):
+        """测试 TAR 成员按阅读顺序写入并统一修改时间"""
+        import tarfile
+
+        src = tmp_path / "src"
+        expected = self._make_comic(src)
+        archive = tmp_path / "out.cbt"
+        TarHandler().compress(src, archive)
+        with tarfile.open(archive) as tar:
+            members = tar.getmembers()
+        assert [m.name for m in members] == ["src"] + [f"src/{n}" for n in expected]
+        assert {m.mtime for m in members} == {members[0].mtime}
+
+    def test_7z_solid_blocks(self, tmp_path):
+        """测试 CB7 按固实块大小分块，成员按阅读顺序写入"""
+        py7zr = pytest.importorskip("py7zr")
+        src = tmp_path / "src"
+        expected = self._make_comic(src)
+        archive = tmp_path / "out.cb7"
+        handler = get_handler("cb7", backend="python")
+        handler.solid_block_size = 1500
+        handler.compress(src, archive)
+        with py7zr.SevenZipFile(archive) as szf:
+            assert szf.getnames() == expected
+            assert szf.header.main_streams.unpackinfo.numfolders == 3
+
+        out = tmp_path / "out"
+        handler.extract(archive, out)
+        assert (out / "ch2" / "1.jpg").read_bytes() == b"x"
+
+    def test_7z_blocks_single_pass(self, tmp_path, monkeypatch):
+        """测试 CB7 分块写入只打开一次压缩包，每个块的字典不超过块内数据量"""
+        py7zr = pytest.importorskip("py7zr")
+        src = tmp_path / "src"
+        src.mkdir()
+        for i in range(50):
+            (src / f"{i:02d}.jpg").write_bytes(os.urandom(2000))
+        opened = []
+        original = py7zr.SevenZipFile.__init__
+
+        def _init(self, file, mode="r", *args, **kwargs):
+            opened.append(mode)
+            original(self, file, mode, *args, **kwargs)
+
+        monkeypatch.setattr(py7zr.SevenZipFile, "__init__", _init)
+        archive = tmp_path / "out.cb7"
+        get_handler("cb7", backend="python", solid_block="off").compress(src, archive)
+        assert opened == ["w"]
+        with py7zr.SevenZipFile(archive) as szf:
+            assert szf.testzip() is None
+            folders = szf.header.main_streams.unpackinfo.folders
+            assert len(folders) == 50
+            # LZMA2 的字典属性字节 0 表示 4 KB 字典
+            lzma2 = [c for f in folders for c in f.coders if c["method"] == b"\x21"]
+            assert len(lzma2) == 50
+            assert {c["properties"] for c in lzma2} == {b"\x00"}
+
+    def test_resolve_solid_block(self):
+        """测试 CB7 固实块设置的解析"""
+        from ccb.archive_handler import SOLID_BLOCK_SIZE, resolve_solid_block
+
+        assert resolve_solid_block(None) == (SOLID_BLOCK_SIZE, None)
+        assert resolve_solid_block("solid") == (None, None)
+        assert resolve_solid_block("off") == (None, 1)
+        assert resolve_solid_block("32p") == (None, 32)
+        assert resolve_solid_block("4M") == (4 * 1024 * 1024, None)
+        for invalid in ("0p", "huge", "0"):
+            with pytest.raises(ArchiveError):
+                resolve_solid_block(invalid)
+
+    def test_7z_block_reader(self, tmp_path, monkeypatch):
+        """测试 CB7 读取器只解压页面所在的块，并缓存块内后续页面"""
+        py7zr = pytest.importorskip("py7zr")
+        from ccb.archive_handler import SevenZipReader
+
+        src = tmp_path / "src"
+        src.mkdir()
+        pages = {}
+        for i in range(12):
+            pages[f"{i:02d}.jpg"] = os.urandom(2000)
+            (src / f"{i:02d}.jpg").write_bytes(pages[f"{i:02d}.jpg"])
+        archive = tmp_path / "out.cb7"
+        get_handler("cb7", backend="python", solid_block="off").compress(src, archive)
+        with py7zr.SevenZipFile(archive) as szf:
+            assert szf.header.main_streams.unpackinfo.numfolders == 12
+
+        archive = tmp_path / "blocks.cb7"
+        get_handler("cb7", backend="python", solid_block="4p").compress(src, archive)
+        extracted = []
+        original = SevenZipReader._extract
+
+        def _extract(self, names):
+            extracted.append(list(names))
+            return original(self, names)
+
+        monkeypatch.setattr(SevenZipReader, "_extract", _extract)
+        with open_reader(archive) as reader:
+            assert reader.read_page(9) == pages["09.jpg"]
+            assert extracted == [["09.jpg", "10.jpg", "11.jpg"]]
+            for i in range(12):
+                assert reader.read_page(i) == pages[f"{i:02d}.jpg"]
+        # 顺序翻页时每个块只解压一次
+        assert extracted[1:] == [
+            [f"{i:02d}.jpg" for i in range(start, start + 4)] for start in (0, 4, 8)
+        ]
+
+
+@pytest.mark.skipif(os.name != "posix", reason="uses a shell script as fake rar")
+class TestExternalRar:
+    """外部 rar 命令调用测试（使用假的 rar 脚本）"""
+
+    def _fake_rar(self, tmp_path, monkeypatch, body):
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        script = bin_dir / "rar"
+        script.write_text(f"#!/bin/sh\n{body}\n")
+        script.chmod(0o755)
+        monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+        return RarHandler()
+
+    def test_extract_failure_raises(self, tmp_path, monkeypatch):
+        """测试所有命令变体都失败时抛出错误并带上命令输出"""
+        handler = self._fake_rar(tmp_path, monkeypatch, "echo 'CRC failed'; exit 3")
+        with pytest.raises(ArchiveError, match="CRC failed"):
+            handler.extract(tmp_path / "book.cbr", tmp_path / "out")
+
+    def test_reader_streams_members(self, tmp_path, monkeypatch):
+        """测试外部 rar 读取器跳过目录条目，并可在读取时取消"""
+        from ccb.archive_handler import RarReader
+        from ccb.utils import cancel_scope
+
+        body = """case "$1" in
+lb) printf 'ch1\\nch1/01.jpg\\ncover.jpg\\n' ;;
+p) if [ "$4" = cover.jpg ]; then printf 'data:%s' "$4"; else sleep 30; fi ;;
+esac"""
+        self._fake_rar(tmp_path, monkeypatch, body)
+        with RarReader(tmp_path / "book.cbr", external_tool="rar") as reader:
+            assert reader.names() == ["ch1/01.jpg", "cover.jpg"]
+            assert reader.read("cover.jpg") == b"data:cover.jpg"
+            cancel = threading.Event()
+            threading.Timer(0.2, cancel.set).start()
+            start = time.monotonic()
+            with cancel_scope(cancel):
+                with pytest.raises(ArchiveError):
+                    reader.read("ch1/01.jpg")
+            assert time.monotonic() - start < 10
+
+    def test_rar_concurrency_limit(self, tmp_path, monkeypatch):
+        """测试同时运行的 rar 进程数不超过上限"""
+        log = tmp_path / "log"
+        handler = self._fake_rar(
+            tmp_path,
+            monkeypatch,
+            f"echo start >> {log}; sleep 0.2; echo end >> {log}",
+        )
+        set_rar_concurrency(1)
+        try:
+            threads = [
+                threading.Thread(
+                    target=handler.extract,
+                    args=(tmp_path / f"{i}.cbr", tmp_path / f"out{i}"),
+                )
+                for i in range(3)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            set_rar_concurrency()
+        assert log.read_text().split() == ["start", "end"] * 3
@@ -0,0 +1,169 @@
+"""
+外部压缩后端模块的单元测试
+"""
+
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+import ccb.backends as backends
+from ccb.archive_handler import BackendHandler, TarHandler, get_handler
+from ccb.backends import (
+    BsdtarBackend,
+    SevenZipBackend,
+    available_backends,
+    benchmark_backends,
+    select_backend,
+    tar_compression_of,
+)
+from ccb.exceptions import ArchiveError
+from ccb.utils import cancel_scope
+
+
+@pytest.fixture
+def isolated_cache(tmp_path, monkeypatch):
+    """将基准测试缓存隔离到临时目录，并重置进程内缓存"""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setattr(backends, "_scores", {})
+    return tmp_path / "cache" / "ccb" / "backends.json"
+
+
+def _make_source(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "01.jpg").write_bytes(b"page one")
+    (src / "02.jpg").write_bytes(b"page two")
+    return src
+
+
+class TestBackends:
+    def test_tar_compression_of(self, tmp_path):
+        """测试根据文件头识别 TAR 流压缩格式"""
+        gz = tmp_path / "a.cbt"
+        with gzip.open(gz, "wb") as f:
+            f.write(b"data")
+        plain = tmp_path / "b.cbt"
+        plain.write_bytes(b"\0" * 512)
+        assert tar_compression_of(gz) == "gz"
+        assert tar_compression_of(plain) is None
+
+    def test_python_preference_and_unknown(self):
+        """测试 python 偏好不选择外部后端，未知名称报错"""
+        assert select_backend("7z", "write", "python") is None
+        assert select_backend("7z", "write", None) is None
+        with pytest.raises(ArchiveError):
+            select_backend("7z", "write", "winrar")
+
+    def test_get_handler_wraps_backend(self):
+        """测试指定后端时 CB7/CBR/CBT 使用 BackendHandler，CBZ 不受影响"""
+        handler = get_handler("cbt", backend="auto")
+        assert isinstance(handler, BackendHandler)
+        assert isinstance(handler.fallback, TarHandler)
+        assert not isinstance(get_handler("cbz", backend="auto"), BackendHandler)
+        assert not isinstance(get_handler("cbt", backend="python"), BackendHandler)
+
+    def test_bsdtar_round_trip(self, tmp_path):
+        """测试 bsdtar 后端读取 Python 处理器写入的 TAR"""
+        backend = available_backends().get("bsdtar")
+        if backend is None:
+            pytest.skip("bsdtar not available")
+        src = _make_source(tmp_path)
+        archive = tmp_path / "out.cbt"
+        TarHandler().compress(src, archive)
+        out = tmp_path / "out"
+        get_handler("cbt", backend="bsdtar").extract(archive, out)
+        assert (out / "src" / "02.jpg").read_bytes() == b"page two"
+
+    def test_tar_writes_stay_in_python(self, tmp_path):
+        """测试指定原生后端时 CBT 仍按阅读顺序和固定修改时间写入"""
+        src = tmp_path / "src"
+        src.mkdir()
+        for name in ("p10.jpg", "p3.jpg", "p2.jpg", "p1.jpg", "ComicInfo.xml"):
+            (src / name).write_bytes(name.encode())
+        for name in ("7z", "bsdtar"):
+            backend = available_backends().get(name)
+            if backend is not None:
+                assert not backend.supports("tar", "write")
+            archive = tmp_path / f"{name}.cbt"
+            get_handler("cbt", backend=name).compress(src, archive)
+            expected = tmp_path / "python.cbt"
+            TarHandler().compress(src, expected)
+            assert archive.read_bytes() == expected.read_bytes()
+
+    def test_backend_failure_falls_back(self, tmp_path, monkeypatch):
+        """测试后端失败时回退到 Python 处理器"""
+
+        class BrokenBackend(BsdtarBackend):
+            def supports(self, archive_format, operation, compression=None):
+                return True
+
+            def compress(self, *args, **kwargs):
+                raise ArchiveError("boom")
+
+        monkeypatch.setattr(
+            backends, "_detected", {"bsdtar": BrokenBackend("/nonexistent/bsdtar")}
+        )
+        src = _make_source(tmp_path)
+        archive = tmp_path / "out.cbt"
+        get_handler("cbt", backend="bsdtar").compress(src, archive)
+        assert TarHandler().is_valid(archive)
+
+    @pytest.mark.skipif(os.name != "posix", reason="kills a POSIX process group")
+    def test_run_is_cancellable(self):
+        """测试外部后端命令通过 run_tool 运行，取消时整个进程被终止且不回退"""
+        cancel = threading.Event()
+        threading.Timer(0.1, cancel.set).start()
+        start = time.monotonic()
+        with cancel_scope(cancel), pytest.raises(ArchiveError) as info:
+            backends._run([sys.executable, "-c", "import time; time.sleep(30)"])
+        assert time.monotonic() - start < 10
+        assert isinstance(info.value.__cause__, InterruptedError)
+
+        with pytest.raises(ArchiveError, match="timed out"):
+            backends._run(
+                [sys.executable, "-c", "import time; time.sleep(30)"], timeout=0.1
+            )
+
+    def test_7z_list_file_is_utf8(self, tmp_path, monkeypatch):
+        """测试 7z 使用列表文件时声明其字符集为 UTF-8"""
+        commands = []
+        monkeypatch.setattr(
+            backends, "_run", lambda cmd, cwd=None, **kwargs: commands.append(cmd)
+        )
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "第01话.jpg").write_bytes(b"page")
+        SevenZipBackend("7z").compress(src, tmp_path / "out.cb7", "7z")
+        assert "-scsUTF-8" in commands[0]
+        assert commands[0][-1].startswith("@")
+
+    def test_benchmark_is_cached(self, tmp_path, monkeypatch, isolated_cache):
+        """测试基准测试结果写入缓存并在后续调用中复用"""
+        monkeypatch.setattr(backends, "_detected", {})
+        scores = benchmark_backends("tar", python_handler=TarHandler())
+        assert set(scores) == {"python"}
+        cached = json.loads(isolated_cache.read_text(encoding="utf-8"))
+        assert "tar" in cached["scores"]
+
+        monkeypatch.setattr(backends, "_scores", {})
+        monkeypatch.setattr(
+            backends, "_time_round_trip", lambda *a: pytest.fail("not cached")
+        )
+        assert benchmark_backends("tar", python_handler=TarHandler()) == scores
+
+    def test_auto_selects_fastest(self, monkeypatch, isolated_cache):
+        """测试自动模式按基准测试耗时选择后端"""
+        bsdtar = BsdtarBackend("/usr/bin/bsdtar")
+        monkeypatch.setattr(bsdtar, "_version", "libzstd")
+        monkeypatch.setattr(backends, "_detected", {"bsdtar": bsdtar})
+        monkeypatch.setattr(backends, "_scores", {"tar": {"bsdtar": 0.1, "python": 1.0}})
+        assert select_backend("tar", "read", "auto", python_handler=object()) is bsdtar
+        assert select_backend("tar", "write", "auto", python_handler=object()) is None
+        monkeypatch.setattr(backends, "_scores", {"tar": {"bsdtar": 2.0, "python": 1.0}})
+        assert select_backend("tar", "read", "auto", python_handler=object()) is None
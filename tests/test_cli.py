@@ -3,7 +3,6 @@
 """
 
 import sys
-import asyncio
 import tempfile
 import argparse
 from unittest.mock import Mock
@@ -12,11 +11,17 @@ from pathlib import Path
 from ccb.cli import (
     parse_args,
     collect_sources,
-    convert_single,
     ComicBookConverter,
     process_paths,
+    parse_level,
+    parse_watch_args,
+    parse_dedupe_args,
+    parse_merge_args,
+    run_dedupe,
+    run_merge,
 )
 import importlib
+import pytest
 
 
 class TestCLI:
@@ -50,6 +55,148 @@ class TestCLI:
         assert args.remove is True
         assert args.force is True
 
+    def test_parse_resource_budgets(self, monkeypatch):
+        monkeypatch.setattr(
+            "sys.argv",
+            [
+                "ccb",
+                "in",
+                "-j",
+                "2",
+                "--rar-jobs",
+                "3",
+                "--max-temp-bytes",
+                "1G",
+                "--max-memory",
+                "512M",
+            ],
+        )
+        args = parse_args()
+        assert args.jobs == 2
+        assert args.rar_jobs == 3
+        assert args.max_temp_bytes == 1024**3
+        assert args.max_memory == 512 * 1024**2
+
+    def test_parse_watch_args(self):
+        args = parse_watch_args(["hot", "-t", "cb7", "--settle", "0.5", "-R", "--solid-block", "32p"])
+        assert args.directory == "hot"
+        assert args.to_type == "cb7"
+        assert args.settle == 0.5
+        assert args.remove is True
+        assert args.interval == 1.0
+        assert args.solid_block == "32p"
+        with pytest.raises(SystemExit):
+            parse_watch_args(["hot", "--solid-block", "huge"])
+
+    def test_plan_does_not_convert(self, tmp_path, capsys, monkeypatch):
+        import zipfile
+
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+        source = tmp_path / "book.zip"
+        with zipfile.ZipFile(source, "w") as zipf:
+            zipf.writestr("1.jpg", b"page")
+        args = parse_args([str(source), "-t", "cbt", "--plan", "-q"])
+        process_paths(args)
+        out = capsys.readouterr().out
+        assert "Plan for 1 item(s)" in out
+        assert "zip -> cbt  extract-recompress" in out
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["book.zip", "cache"]
+
+    def test_jsonl_output(self, tmp_path, capsys):
+        import json
+        import zipfile
+
+        source = tmp_path / "book.zip"
+        with zipfile.ZipFile(source, "w") as zipf:
+            zipf.writestr("1.jpg", b"page")
+        broken = tmp_path / "broken.cbr"
+        broken.write_bytes(b"Rar!\x1a\x07\x00 truncated")
+        args = parse_args(
+            [str(source), str(broken), "-t", "cbt", "--output-format", "jsonl"]
+        )
+        process_paths(args)
+        lines = capsys.readouterr().out.splitlines()
+        records = {Path(r["input"]).name: r for r in map(json.loads, lines)}
+        assert len(lines) == 2
+
+        ok = records["book.zip"]
+        assert ok["status"] == "ok"
+        assert ok["output"] == str(tmp_path / "book.cbt")
+        assert ok["bytes_in"] == source.stat().st_size
+        assert ok["bytes_out"] == (tmp_path / "book.cbt").stat().st_size
+        assert {"queue", "extract", "compress"} <= set(ok["phases"])
+        assert ok["handlers"]["write"] == "TarHandler"
+        assert ok["error_class"] is None
+
+        failed = records["broken.cbr"]
+        assert failed["status"] == "failed"
+        assert failed["error_class"] == "ConversionError"
+        assert failed["output"] is None
+
+    def test_dedupe_report_and_blocklist(self, tmp_path, capsys):
+        import zipfile
+
+        for name, first in (("a.cbz", b"a"), ("b.cbz", b"b")):
+            with zipfile.ZipFile(tmp_path / name, "w") as zipf:
+                zipf.writestr("1.jpg", first)
+                zipf.writestr("2.jpg", b"credits")
+        blocklist = tmp_path / "blocklist.txt"
+        args = parse_dedupe_args(
+            [str(tmp_path), "-q", "--write-blocklist", str(blocklist)]
+        )
+        assert args.min_archives == 2
+        run_dedupe(args)
+        out = capsys.readouterr().out
+        assert "Indexed 4 page(s) in 2 archive(s)" in out
+        assert "Duplicate pages: 1" in out
+        assert "Duplicate comics: 0 group(s)" in out
+        assert len(blocklist.read_text().split()) == 1
+
+    def test_merge_command(self, tmp_path, capsys):
+        import zipfile
+
+        for name in ("ch10.cbz", "ch2.cbz"):
+            with zipfile.ZipFile(tmp_path / name, "w") as zipf:
+                zipf.writestr("1.jpg", name)
+        output = tmp_path / "vol.cbz"
+        args = parse_merge_args(
+            [str(tmp_path / "ch10.cbz"), str(tmp_path / "ch2.cbz"), "-o", str(output)]
+        )
+        run_merge(args)
+        assert "Merged 2 input(s)" in capsys.readouterr().out
+        with zipfile.ZipFile(output) as zipf:
+            assert zipf.namelist() == ["ch2/1.jpg", "ch10/1.jpg"]
+
+    def test_stream_mode(self, tmp_path, monkeypatch):
+        import io
+        import tarfile
+        import zipfile
+
+        source = io.BytesIO()
+        with zipfile.ZipFile(source, "w") as zipf:
+            zipf.writestr("1.jpg", b"page")
+        stdin = io.TextIOWrapper(io.BytesIO(source.getvalue()))
+        stdout = io.TextIOWrapper(io.BytesIO())
+        monkeypatch.setattr(sys, "stdin", stdin)
+        monkeypatch.setattr(sys, "stdout", stdout)
+        process_paths(parse_args(["-", "--from", "cbz", "-t", "cbt", "-q"]))
+        stdout.buffer.seek(0)
+        with tarfile.open(fileobj=stdout.buffer) as tar:
+            assert tar.extractfile("1.jpg").read() == b"page"
+
+        # 标准输入只能写入标准输出
+        process_paths(parse_args(["-", "-o", str(tmp_path), "-q"]))
+        assert list(tmp_path.iterdir()) == []
+
+    def test_parse_level(self):
+        assert parse_level("fast") == "fast"
+        assert parse_level("7") == "7"
+        assert parse_level("cbz=9, cb7=MAX") == {"cbz": "9", "cb7": "max"}
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_level("fastest")
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_level("pdf=9")
+
     def test_collect_sources_leaf_and_archive(self):
         with tempfile.TemporaryDirectory() as tmpdir:
             tmp = Path(tmpdir)
@@ -65,19 +212,25 @@ class TestCLI:
             sources2 = collect_sources(tmp)
             assert archive in sources2
 
-    def test_convert_single_with_dummy_converter(self):
-        # 使用 Mock(spec=...) 作为替身，避免真实 I/O 并让类型检查器识别接口
-        converter = Mock(spec=ComicBookConverter)
-        converter.convert.return_value = Path("output.mock")
+    def test_process_paths_with_dummy_converter(self, tmp_path, monkeypatch):
+        # 使用 Mock(spec=...) 替换转换器的 convert，避免真实 I/O，验证批量路径与日志
+        import json
 
-        with tempfile.TemporaryDirectory() as tmpdir:
-            input_path = Path(tmpdir) / "input"
-            input_path.mkdir()
-            result = asyncio.run(
-                convert_single(converter, input_path, None, "cbz", None, False, False)
-            )
-            assert isinstance(result, Path)
-            assert result.name == "output.mock"
+        converter = ComicBookConverter()
+        converter.convert = Mock(
+            spec=converter.convert, return_value=tmp_path / "out.cbz"
+        )
+        monkeypatch.setattr("ccb.cli._make_converter", lambda args: converter)
+
+        input_path = tmp_path / "input"
+        input_path.mkdir()
+        journal = tmp_path / "journal.jsonl"
+        process_paths(parse_args([str(input_path), "--journal", str(journal), "-q"]))
+
+        converter.convert.assert_called_once_with(input_path, "cbz", None, False, False)
+        records = [json.loads(line) for line in journal.read_text().splitlines()]
+        assert [r["status"] for r in records] == ["started", "done"]
+        assert records[-1]["output"] == str(tmp_path / "out.cbz")
 
     def test_paths_with_spaces_quoted(self, monkeypatch):
         # 模拟带空格路径，并且在命令行中以引号包裹的情况
@@ -96,12 +249,60 @@ class TestCLI:
             args.quiet = True
             args.remove = False
             args.force = False
+            args.tar_compression = "none"
+            args.level = None
+            args.backend = "python"
+            args.jobs = None
+            args.rar_jobs = None
+            args.drop_pages = None
+            args.solid_block = None
+            args.flatten_nested = None
+            args.split_size = None
+            args.split_pages = None
+            args.temp_dir = None
+            args.journal = None
+            args.resume = False
+            args.plan = False
+            args.output_format = "text"
+            args.max_temp_bytes = None
+            args.max_memory = None
 
             # 使用 Mock(spec=...) 作为替身，避免真实 I/O
             mock_converter = Mock(spec=ComicBookConverter)
             mock_converter.convert.return_value = Path("output.mock")
+            mock_converter.estimate_resources.return_value = (0, 0)
             # 使用 monkeypatch 替换转换器构造函数以返回 mock 实例
             module = importlib.import_module("ccb.cli")
-            monkeypatch.setattr(module, "ComicBookConverter", lambda: mock_converter)
+            monkeypatch.setattr(module, "ComicBookConverter", lambda **kwargs: mock_converter)
             # 调用 process_paths 不应抛异常
             process_paths(args)
+
+    def test_resume_skips_completed_items(self, tmp_path, monkeypatch):
+        """测试 --resume 跳过日志中已完成的条目"""
+        import zipfile
+
+        inputs = []
+        for name in ("a", "b"):
+            path = tmp_path / f"{name}.zip"
+            with zipfile.ZipFile(path, "w") as zipf:
+                zipf.writestr("1.jpg", b"page")
+            inputs.append(path)
+        journal_path = tmp_path / "run.jsonl"
+
+        def run(paths, resume):
+            monkeypatch.setattr(
+                "sys.argv",
+                ["ccb", *map(str, paths), "-t", "cb7", "-q"]
+                + ["--journal", str(journal_path)]
+                + (["--resume"] if resume else []),
+            )
+            args = parse_args()
+            convert = Mock(side_effect=lambda p, *a: p.with_suffix(".cb7"))
+            monkeypatch.setattr(
+                ComicBookConverter, "convert", lambda self, *a: convert(*a)
+            )
+            process_paths(args)
+            return [call.args[0] for call in convert.call_args_list]
+
+        assert run(inputs[:1], resume=False) == inputs[:1]
+        assert run(inputs, resume=True) == inputs[1:]
@@ -149,3 +149,541 @@ class TestComicBookConverter:
                     "invalid_format",
                     remove_source=False,
                 )
+
+    def test_convert_zip_to_cbz_alias_copy(self, tmp_path):
+        """测试 zip -> cbz 别名转换直接复制字节"""
+        zip_path = tmp_path / "test.zip"
+        with zipfile.ZipFile(zip_path, "w") as zipf:
+            zipf.writestr("01.jpg", "page")
+
+        converter = ComicBookConverter()
+        output_path = converter.convert(zip_path, "cbz", output_dir=tmp_path / "out")
+
+        assert output_path.suffix == ".cbz"
+        assert output_path.read_bytes() == zip_path.read_bytes()
+        assert zip_path.exists()
+
+    def test_convert_zip_to_cbz_alias_rename(self, tmp_path):
+        """测试删除源文件时别名转换直接重命名"""
+        zip_path = tmp_path / "test.zip"
+        with zipfile.ZipFile(zip_path, "w") as zipf:
+            zipf.writestr("01.jpg", "page")
+        data = zip_path.read_bytes()
+        inode = zip_path.stat().st_ino
+
+        converter = ComicBookConverter()
+        output_path = converter.convert(zip_path, "cbz", remove_source=True)
+
+        assert not zip_path.exists()
+        assert output_path.read_bytes() == data
+        if os.name == "posix":
+            assert output_path.stat().st_ino == inode
+
+    def test_convert_alias_rejects_invalid_archive(self, tmp_path):
+        """测试别名转换前的快速检查拒绝无效压缩包"""
+        bad = tmp_path / "bad.zip"
+        bad.write_bytes(b"not a zip file")
+
+        converter = ComicBookConverter()
+        with pytest.raises(ConversionError):
+            converter.convert(bad, "cbz")
+        assert not (tmp_path / "bad.cbz").exists()
+
+    def test_convert_misnamed_archive_by_content(self, tmp_path):
+        """测试扩展名与内容不符的压缩包按内容路由到对应的处理器"""
+        misnamed = tmp_path / "book.cbr"
+        with zipfile.ZipFile(misnamed, "w") as zipf:
+            zipf.writestr("01.jpg", "page")
+
+        converter = ComicBookConverter()
+        output_path = converter.convert(misnamed, "cbz")
+        assert output_path == tmp_path / "book.cbz"
+        assert output_path.read_bytes() == misnamed.read_bytes()
+
+        folder = converter.convert(misnamed, "folder", output_dir=tmp_path / "out")
+        assert (folder / "01.jpg").read_text() == "page"
+
+    def test_force_convert_misnamed_archive_in_place(self, tmp_path):
+        """测试输出路径就是输入本身时 -F 不会预先删除输入"""
+        import tarfile
+
+        misnamed = tmp_path / "book.cbt"
+        with zipfile.ZipFile(misnamed, "w") as zipf:
+            zipf.writestr("01.jpg", "page")
+
+        output_path = ComicBookConverter().convert(misnamed, "cbt", force=True)
+        assert output_path == misnamed
+        with tarfile.open(output_path) as tar:
+            assert tar.extractfile("book/01.jpg").read() == b"page"
+        assert [p.name for p in tmp_path.iterdir()] == ["book.cbt"]
+
+    def test_in_place_conversion_reported_ok(self, tmp_path):
+        """测试原地转换扩展名不符的压缩包时结果状态为 ok 而不是 skipped"""
+        misnamed = tmp_path / "book.cbt"
+        with zipfile.ZipFile(misnamed, "w") as zipf:
+            zipf.writestr("01.jpg", "page")
+        done = tmp_path / "done.cbz"
+        with zipfile.ZipFile(done, "w") as zipf:
+            zipf.writestr("01.jpg", "page")
+
+        converter = ComicBookConverter()
+        results = {
+            r.input_path: r
+            for r in converter.convert_many([misnamed, (done, "cbz")], "cbt", force=True)
+        }
+        assert results[misnamed].output_path == misnamed
+        assert results[misnamed].status == "ok"
+        assert results[done].status == "skipped"
+
+    def test_plan_reads_headers_only(self, tmp_path):
+        """测试转换计划选择与 convert() 相同的执行方式且不创建输出"""
+        zip_path = tmp_path / "book.zip"
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr("01.jpg", "page" * 1000)
+        folder = tmp_path / "folder"
+        folder.mkdir()
+        (folder / "01.jpg").write_bytes(b"x" * 10)
+
+        converter = ComicBookConverter()
+        out = tmp_path / "out"
+        alias = converter.plan(zip_path, "cbz", out)
+        assert alias.method == "alias-copy"
+        assert alias.output_path == out / "book.cbz"
+        assert alias.input_bytes == zip_path.stat().st_size
+        assert alias.uncompressed_bytes == 4000
+        assert converter.plan(zip_path, "cbz", remove_source=True).method == (
+            "alias-rename"
+        )
+        assert converter.plan(zip_path, "cbt", out).method == "extract-recompress"
+        assert converter.plan(zip_path, "folder", out).method == "extract"
+        assert converter.plan(folder, "cbz", out).method == "compress"
+        cbz_path = tmp_path / "book.cbz"
+        cbz_path.write_bytes(zip_path.read_bytes())
+        assert converter.plan(cbz_path, "cbz").method == "skip"
+
+        blocking = ComicBookConverter(page_blocklist=set())
+        assert blocking.plan(zip_path, "cbz").method == "alias-copy"
+        blocking = ComicBookConverter(page_blocklist={"0" * 64})
+        assert blocking.plan(zip_path, "cbz").method == "zip-rewrite"
+        assert not out.exists()
+
+    def test_rewrite_zip_copies_members(self, tmp_path):
+        """测试重写 CBZ 时原样拷贝未修改的成员"""
+        cbz_path = tmp_path / "test.cbz"
+        with zipfile.ZipFile(cbz_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr("2.jpg", "two" * 100)
+            zipf.writestr("1.jpg", "one" * 100)
+
+        converter = ComicBookConverter(level="max")
+        output_path = converter.rewrite_zip(
+            cbz_path,
+            tmp_path / "out" / "test.cbz",
+            sort_key=str,
+            add_files={"ComicInfo.xml": b"<ComicInfo/>"},
+        )
+
+        with zipfile.ZipFile(output_path) as zipf:
+            assert zipf.namelist() == ["ComicInfo.xml", "1.jpg", "2.jpg"]
+            assert zipf.read("1.jpg") == b"one" * 100
+            assert zipf.testzip() is None
+
+    def test_estimate_resources(self, tmp_path):
+        """测试转换前按成员头估算临时空间和内存"""
+        cbz_path = tmp_path / "test.cbz"
+        with zipfile.ZipFile(cbz_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr("1.jpg", b"a" * 4000)
+            zipf.writestr("2.jpg", b"b" * 1000)
+
+        converter = ComicBookConverter()
+        assert converter.estimate_resources(cbz_path, "cbt") == (5000, 4000)
+        assert converter.estimate_resources(cbz_path, "folder") == (0, 4000)
+        assert converter.estimate_resources(cbz_path, "cbz") == (0, 0)
+
+    def test_archive_to_archive_staging(self, tmp_path):
+        """测试暂存目录位置、成员路径和失败时不留下未完成文件"""
+        import tarfile
+        from unittest.mock import patch
+
+        cbz_path = tmp_path / "book.cbz"
+        with zipfile.ZipFile(cbz_path, "w") as zipf:
+            zipf.writestr("01.jpg", "page")
+        staging = tmp_path / "staging"
+
+        converter = ComicBookConverter(temp_dir=staging)
+        output_path = converter.convert(cbz_path, "cbt", output_dir=tmp_path / "out")
+        with tarfile.open(output_path) as tar:
+            assert tar.getnames() == ["book", "book/01.jpg"]
+        assert list(staging.iterdir()) == []
+        assert sorted(p.name for p in output_path.parent.iterdir()) == ["book.cbt"]
+
+        # 压缩中途失败时，已有输出保持不变且不留下 .partial 和暂存目录
+        original = output_path.read_bytes()
+        converter = ComicBookConverter()
+        with patch(
+            "ccb.archive_handler.TarHandler.compress",
+            side_effect=RuntimeError("disk full"),
+        ):
+            with pytest.raises(ConversionError):
+                converter.convert(cbz_path, "cbt", output_dir=tmp_path / "out")
+        assert output_path.read_bytes() == original
+        assert sorted(p.name for p in output_path.parent.iterdir()) == ["book.cbt"]
+
+    def test_flatten_nested(self, tmp_path):
+        """测试展开内层压缩包：合并为一本、按内层压缩包拆分和解压为文件夹"""
+        import io
+
+        def inner(pages):
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, "w") as zipf:
+                for name in pages:
+                    zipf.writestr(name, name)
+            return buffer.getvalue()
+
+        cbz_path = tmp_path / "vol1.cbz"
+        with zipfile.ZipFile(cbz_path, "w") as zipf:
+            zipf.writestr("cover.jpg", "cover")
+            zipf.writestr("ch01.zip", inner(["01.jpg", "02.jpg"]))
+            zipf.writestr("ch02.rar", inner(["01.jpg"]))
+
+        # 未展开时同类型转换直接跳过
+        assert ComicBookConverter().convert(cbz_path, "cbz") == cbz_path
+
+        merged = ComicBookConverter(flatten_nested="merge").convert(
+            cbz_path, "cbz", output_dir=tmp_path / "merge"
+        )
+        with zipfile.ZipFile(merged) as zipf:
+            assert zipf.namelist() == [
+                "cover.jpg",
+                "ch01/01.jpg",
+                "ch01/02.jpg",
+                "ch02/01.jpg",
+            ]
+
+        split = ComicBookConverter(flatten_nested="split").convert(
+            cbz_path, "cbz", output_dir=tmp_path / "split"
+        )
+        assert split == tmp_path / "split" / "vol1"
+        assert sorted(p.name for p in split.iterdir()) == [
+            "ch01.cbz",
+            "ch02.cbz",
+            "vol1.cbz",
+        ]
+        with zipfile.ZipFile(split / "ch01.cbz") as zipf:
+            assert zipf.namelist() == ["01.jpg", "02.jpg"]
+        with zipfile.ZipFile(split / "vol1.cbz") as zipf:
+            assert zipf.namelist() == ["cover.jpg"]
+
+        folder = ComicBookConverter(flatten_nested="split").convert(
+            cbz_path, "folder", output_dir=tmp_path / "folder"
+        )
+        assert (folder / "ch02" / "01.jpg").read_text() == "01.jpg"
+
+        with pytest.raises(ConversionError):
+            ComicBookConverter(flatten_nested="deep")
+
+    def test_split_volumes(self, tmp_path):
+        """测试按页数和大小拆分为独立有效的分卷"""
+        import tarfile
+
+        folder = tmp_path / "book"
+        folder.mkdir()
+        (folder / "ComicInfo.xml").write_text("<ComicInfo/>")
+        for i in range(5):
+            (folder / f"{i + 1}.jpg").write_bytes(os.urandom(2000))
+
+        result = ComicBookConverter(split_pages=2).convert(
+            folder, "cbz", output_dir=tmp_path / "pages"
+        )
+        assert result == tmp_path / "pages" / "book"
+        assert sorted(p.name for p in result.iterdir()) == [
+            "book.part01.cbz",
+            "book.part02.cbz",
+            "book.part03.cbz",
+        ]
+        with zipfile.ZipFile(result / "book.part03.cbz") as zipf:
+            assert zipf.namelist() == ["ComicInfo.xml", "5.jpg"]
+            assert zipf.testzip() is None
+        assert [p.name for p in tmp_path.iterdir() if p.name.startswith(".")] == []
+
+        # ZIP -> ZIP 按压缩大小拆分，直接拷贝压缩数据
+        cbz_path = ComicBookConverter().convert(folder, "cbz", output_dir=tmp_path)
+        result = ComicBookConverter(split_size=7000).convert(
+            cbz_path, "cbz", output_dir=tmp_path / "size"
+        )
+        names = []
+        for volume in sorted(result.iterdir()):
+            assert volume.stat().st_size <= 7000
+            with zipfile.ZipFile(volume) as zipf:
+                names += zipf.namelist()
+        assert [n for n in names if n.endswith(".jpg")] == [
+            f"{i + 1}.jpg" for i in range(5)
+        ]
+
+        # 解压重压缩时各分卷的顶层目录以分卷命名
+        result = ComicBookConverter(split_pages=3).convert(
+            cbz_path, "cbt", output_dir=tmp_path / "cbt"
+        )
+        with tarfile.open(result / "book.part02.cbt") as tar:
+            assert tar.getnames() == [
+                "book.part02",
+                "book.part02/ComicInfo.xml",
+                "book.part02/4.jpg",
+                "book.part02/5.jpg",
+            ]
+
+        # 未超出上限时输出单个文件
+        result = ComicBookConverter(split_pages=10).convert(
+            folder, "cb7", output_dir=tmp_path / "single"
+        )
+        assert result == tmp_path / "single" / "book.cb7"
+
+    def test_convert_stream(self, tmp_path):
+        """测试流式转换：标准输入的 TAR 转为写入不可定位输出的 CBZ"""
+        import hashlib
+        import io
+        import tarfile
+
+        class Pipe(io.RawIOBase):
+            def __init__(self):
+                self.data = bytearray()
+
+            def writable(self):
+                return True
+
+            def write(self, b):
+                self.data += b
+                return len(b)
+
+        source = io.BytesIO()
+        with tarfile.open(fileobj=source, mode="w:gz") as tar:
+            for name, data in [("b/2.jpg", b"two"), ("b/1.jpg", b"ad"), ("b/x/", b"")]:
+                info = tarfile.TarInfo(name)
+                if name.endswith("/"):
+                    info.type = tarfile.DIRTYPE
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+        source.seek(0)
+
+        blocklist = {hashlib.sha256(b"ad").hexdigest()}
+        pipe = Pipe()
+        count = ComicBookConverter(page_blocklist=blocklist).convert_stream(
+            source, pipe, "cbz"
+        )
+        assert count == 1
+        with zipfile.ZipFile(io.BytesIO(bytes(pipe.data))) as zipf:
+            assert zipf.namelist() == ["b/2.jpg"]
+
+        # 文件输入按阅读顺序写出，CBT 输出可以再从流中读回
+        folder = tmp_path / "book"
+        folder.mkdir()
+        for name in ("10.jpg", "2.jpg"):
+            (folder / name).write_bytes(name.encode())
+        cbt = io.BytesIO()
+        ComicBookConverter(tar_compression="xz").convert_stream(folder, cbt, "cbt")
+        cbt.seek(0)
+        pipe = Pipe()
+        ComicBookConverter().convert_stream(cbt, pipe, "cbz", input_type="cbt")
+        with zipfile.ZipFile(io.BytesIO(bytes(pipe.data))) as zipf:
+            assert zipf.namelist() == ["2.jpg", "10.jpg"]
+
+        with pytest.raises(UnsupportedFormatError):
+            ComicBookConverter().convert_stream(folder, io.BytesIO(), "cb7")
+        with pytest.raises(UnsupportedFormatError):
+            ComicBookConverter().convert_stream(
+                io.BytesIO(b"7z\xbc\xaf\x27\x1c"), io.BytesIO(), "cbz"
+            )
+
+
+class TestConvertMany:
+    """批量转换 API 测试类"""
+
+    def _make_zips(self, root, count):
+        paths = []
+        for i in range(count):
+            path = root / f"book{i}.zip"
+            with zipfile.ZipFile(path, "w") as zipf:
+                zipf.writestr("01.jpg", f"page {i}")
+            paths.append(path)
+        return paths
+
+    def test_convert_many_yields_results_and_errors(self, tmp_path):
+        """测试按完成顺序产出结果，单个条目失败不影响其他条目"""
+        paths = self._make_zips(tmp_path, 3)
+        missing = tmp_path / "missing.zip"
+        converter = ComicBookConverter()
+
+        results = list(
+            converter.convert_many(
+                [*paths, (missing, "cb7")], "cbz", output_dir=tmp_path / "out", jobs=2
+            )
+        )
+
+        assert len(results) == 4
+        by_input = {r.input_path: r for r in results}
+        for path in paths:
+            assert by_input[path].ok
+            assert by_input[path].output_path == tmp_path / "out" / f"{path.stem}.cbz"
+            assert by_input[path].elapsed >= 0
+        assert not by_input[missing].ok
+        assert by_input[missing].output_type == "cb7"
+        assert isinstance(by_input[missing].error, ConversionError)
+
+    def test_result_records(self, tmp_path):
+        """测试结果记录包含字节数、各阶段耗时和使用的处理器"""
+        paths = self._make_zips(tmp_path, 2)
+        empty = tmp_path / "empty"
+        empty.mkdir()
+        converter = ComicBookConverter()
+        results = list(
+            converter.convert_many(
+                [paths[0], (paths[1], "cbt"), empty],
+                "cbz",
+                output_dir=tmp_path / "out",
+            )
+        )
+        records = {(r.input_path, r.output_type): r.to_record() for r in results}
+
+        alias = records[(paths[0], "cbz")]
+        assert alias["status"] == "ok"
+        assert set(alias["phases"]) == {"queue", "check", "alias"}
+        assert alias["handlers"] == {"read": "ZipHandler"}
+        assert alias["bytes_in"] == paths[0].stat().st_size
+        assert alias["bytes_out"] == (tmp_path / "out" / "book0.cbz").stat().st_size
+
+        recompress = records[(paths[1], "cbt")]
+        assert {"queue", "extract", "compress"} <= set(recompress["phases"])
+        assert recompress["handlers"]["write"] == "TarHandler"
+        assert records[(empty, "cbz")]["status"] == "skipped"
+
+    def test_aconvert_many_timeout_and_cancel(self, tmp_path, monkeypatch):
+        """测试异步批量转换的单条超时和提前停止"""
+        import asyncio
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+
+        paths = self._make_zips(tmp_path, 4)
+        release = threading.Event()
+        started = []
+
+        def slow_convert(self, input_path, *args):
+            started.append(input_path)
+            if input_path == paths[0]:
+                release.wait(5)
+            return input_path
+
+        monkeypatch.setattr(ComicBookConverter, "convert", slow_convert)
+        converter = ComicBookConverter()
+        executor = ThreadPoolExecutor(max_workers=4)
+
+        async def first_results(count, **kwargs):
+            results = []
+            agen = converter.aconvert_many(paths, "cbz", executor=executor, **kwargs)
+            async for result in agen:
+                results.append(result)
+                if len(results) == count:
+                    break
+            await agen.aclose()
+            return results
+
+        results = asyncio.run(first_results(4, jobs=4, timeout=0.2))
+        release.set()
+        timed_out = [r for r in results if not r.ok]
+        assert [r.input_path for r in timed_out] == [paths[0]]
+        assert "Timed out" in str(timed_out[0].error)
+
+        # 只允许一个并发，取到第一个结果后停止，其余条目不会开始
+        release.clear()
+        started.clear()
+        results = asyncio.run(first_results(1, jobs=1, timeout=0.2))
+        release.set()
+        executor.shutdown(wait=True)
+        assert len(results) == 1
+        assert len(started) <= 2
+
+    def test_aconvert_many_reports_staging_dirs(self, tmp_path):
+        """测试批量转换把每个条目创建的暂存目录报告给 on_stage"""
+        import asyncio
+
+        paths = self._make_zips(tmp_path, 2)
+        staged = []
+
+        async def main():
+            return [
+                result
+                async for result in ComicBookConverter().aconvert_many(
+                    paths,
+                    "cbt",
+                    output_dir=tmp_path / "out",
+                    on_stage=lambda path, stage: staged.append((path, stage)),
+                )
+            ]
+
+        results = asyncio.run(main())
+        assert all(r.ok for r in results)
+        assert sorted({path for path, _ in staged}) == paths
+        for _, stage in staged:
+            assert stage.name.startswith(".ccb_")
+            assert stage.parent == tmp_path / "out"
+            assert not stage.exists()
+
+    def test_aconvert_many_estimates_lazily(self, tmp_path, monkeypatch):
+        """测试调度模式下只估算有限数量的在途条目，而不是一次估算整个批次"""
+        import asyncio
+
+        from ccb.scheduler import ResourceScheduler
+
+        paths = [tmp_path / f"book{i:02d}.zip" for i in range(20)]
+        estimated = []
+
+        def estimate(self, input_path, output_type):
+            estimated.append(input_path)
+            return 0, 0
+
+        monkeypatch.setattr(ComicBookConverter, "estimate_resources", estimate)
+        monkeypatch.setattr(
+            ComicBookConverter, "convert", lambda self, input_path, *a: input_path
+        )
+
+        async def main():
+            scheduler = ResourceScheduler(max_jobs=2)
+            agen = ComicBookConverter().aconvert_many(paths, "cbz", scheduler=scheduler)
+            results = [await agen.__anext__()]
+            # 在途上限为并发数的两倍，产出第一个结果前最多再补充一个条目
+            assert len(estimated) <= 5
+            results += [result async for result in agen]
+            return results
+
+        results = asyncio.run(main())
+        assert sorted(r.input_path for r in results) == paths
+        assert sorted(estimated) == paths
+
+    def test_parallel_stress_shared_converter(self, tmp_path):
+        """压力测试：一个转换器并发执行大量需要暂存目录的转换"""
+        import tarfile
+
+        sources = tmp_path / "src"
+        sources.mkdir()
+        paths = []
+        for i in range(48):
+            path = sources / f"book{i:02d}.zip"
+            with zipfile.ZipFile(path, "w") as zipf:
+                for page in range(3):
+                    zipf.writestr(f"{page:02d}.jpg", os.urandom(2048) + bytes([i]))
+            paths.append(path)
+        out = tmp_path / "out"
+        converter = ComicBookConverter()
+
+        results = list(converter.convert_many(paths, "cbt", output_dir=out, jobs=16))
+
+        failures = [r for r in results if not r.ok]
+        assert failures == []
+        assert len(results) == len(paths)
+        for path in paths:
+            with tarfile.open(out / f"{path.stem}.cbt") as tar:
+                names = sorted(m.name for m in tar if m.isfile())
+                assert names == [f"{path.stem}/{p:02d}.jpg" for p in range(3)]
+                data = tar.extractfile(f"{path.stem}/00.jpg").read()
+                assert data[-1] == int(path.stem[4:])
+        assert sorted(p.name for p in out.iterdir()) == sorted(
+            f"{p.stem}.cbt" for p in paths
+        )
@@ -0,0 +1,116 @@
+"""
+页面去重模块的单元测试
+"""
+
+import hashlib
+import zipfile
+
+import pytest
+
+from ccb.converter import ComicBookConverter
+from ccb.dedupe import (
+    build_index,
+    find_archives,
+    hash_pages,
+    load_blocklist,
+    write_blocklist,
+)
+
+CREDITS = b"credits page"
+
+
+def _make_cbz(path, pages):
+    with zipfile.ZipFile(path, "w") as zipf:
+        for name, data in pages.items():
+            zipf.writestr(name, data)
+    return path
+
+
+class TestPageIndex:
+    """页面索引测试类"""
+
+    def test_hash_pages_in_page_order(self, tmp_path):
+        """测试按自然页序计算页面哈希，非图片成员被忽略"""
+        archive = _make_cbz(
+            tmp_path / "a.cbz",
+            {"10.jpg": b"ten", "2.jpg": b"two", "ComicInfo.xml": b"<x/>"},
+        )
+        pages = hash_pages(archive)
+        assert [name for name, _, _ in pages] == ["2.jpg", "10.jpg"]
+        assert pages[0][1] == hashlib.sha256(b"two").hexdigest()
+        assert pages[0][2] == 3
+
+    def test_duplicate_pages_and_comics(self, tmp_path):
+        """测试找出跨压缩包的重复页面和完全相同的漫画"""
+        library = tmp_path / "library"
+        (library / "sub").mkdir(parents=True)
+        _make_cbz(library / "ch1.cbz", {"1.jpg": b"one", "99.jpg": CREDITS})
+        _make_cbz(library / "sub" / "ch2.cbz", {"1.jpg": b"two", "99.jpg": CREDITS})
+        _make_cbz(library / "copy.cbz", {"a.jpg": b"one", "b.jpg": CREDITS})
+        (library / "broken.cbz").write_bytes(b"PK\x03\x04 not really")
+        (library / "ch3.cbz.partial").write_bytes(b"")
+
+        archives = find_archives([library])
+        assert len(archives) == 4
+        index = build_index(archives, jobs=2)
+
+        assert list(index.errors) == [library / "broken.cbz"]
+        assert index.page_count == 6
+
+        duplicates = index.duplicate_pages()
+        digests = [digest for digest, _, _ in duplicates]
+        assert digests[0] == hashlib.sha256(CREDITS).hexdigest()
+        assert len(duplicates[0][2]) == 3
+        assert hashlib.sha256(b"one").hexdigest() in digests
+        assert len(index.duplicate_pages(min_archives=3)) == 1
+        assert index.wasted_bytes() == 2 * len(CREDITS) + 3
+
+        assert index.duplicate_comics() == [[library / "ch1.cbz", library / "copy.cbz"]]
+
+    def test_blocklist_round_trip(self, tmp_path):
+        """测试黑名单读写，兼容 sha256sum 输出格式"""
+        digest = hashlib.sha256(CREDITS).hexdigest()
+        path = tmp_path / "blocklist.txt"
+        write_blocklist(path, [digest])
+        with open(path, "a") as f:
+            f.write("# comment\n\n")
+            f.write(f"{hashlib.sha256(b'ad').hexdigest().upper()}  ad.jpg\n")
+        assert load_blocklist(path) == {digest, hashlib.sha256(b"ad").hexdigest()}
+
+        path.write_text("not-a-hash\n")
+        with pytest.raises(ValueError):
+            load_blocklist(path)
+
+
+class TestDropPages:
+    """转换时按黑名单丢弃页面的测试类"""
+
+    def _converter(self):
+        return ComicBookConverter(page_blocklist={hashlib.sha256(CREDITS).hexdigest()})
+
+    def test_archive_to_archive(self, tmp_path):
+        """测试 ZIP 重写和解压重压缩两条路径都会丢弃页面"""
+        source = _make_cbz(tmp_path / "ch1.zip", {"1.jpg": b"one", "99.jpg": CREDITS})
+        converter = self._converter()
+
+        cbz = converter.convert(source, "cbz")
+        with zipfile.ZipFile(cbz) as zipf:
+            assert zipf.namelist() == ["1.jpg"]
+
+        cbt = converter.convert(source, "cbt")
+        folder = converter.convert(cbt, "folder", output_dir=tmp_path / "out")
+        pages = sorted(p.name for p in folder.rglob("*") if p.is_file())
+        assert pages == ["1.jpg"]
+
+    def test_folder_source_is_untouched(self, tmp_path):
+        """测试文件夹输入在暂存副本中丢弃页面，源文件夹保持不变"""
+        folder = tmp_path / "ch1"
+        folder.mkdir()
+        (folder / "1.jpg").write_bytes(b"one")
+        (folder / "99.jpg").write_bytes(CREDITS)
+
+        output = self._converter().convert(folder, "cbz", output_dir=tmp_path / "out")
+        with zipfile.ZipFile(output) as zipf:
+            assert [n.rsplit("/", 1)[-1] for n in zipf.namelist()] == ["1.jpg"]
+        assert sorted(p.name for p in folder.iterdir()) == ["1.jpg", "99.jpg"]
+        assert not [p for p in (tmp_path / "out").iterdir() if p != output]
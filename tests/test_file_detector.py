@@ -13,6 +13,9 @@ from ccb.file_detector import (
     is_archive_file,
     get_comic_format,
     is_valid_comic_format,
+    is_alias_conversion,
+    get_extension_type,
+    sniff_archive_format,
 )
 
 
@@ -97,3 +100,50 @@ class TestFileDetector:
         assert is_valid_comic_format("cbt") is True
         assert is_valid_comic_format("zip") is False
         assert is_valid_comic_format("unknown") is False
+
+    def test_is_alias_conversion(self):
+        """测试同一容器格式之间的别名转换判断"""
+        assert is_alias_conversion("zip", "cbz") is True
+        assert is_alias_conversion("cbr", "rar") is True
+        assert is_alias_conversion("tar", "cbt") is True
+        assert is_alias_conversion("cbz", "cbz") is False
+        assert is_alias_conversion("zip", "cb7") is False
+        assert is_alias_conversion("folder", "cbz") is False
+
+    def test_detect_by_content_signature(self, tmp_path):
+        """测试以文件头签名为准识别扩展名不符的压缩包"""
+        import tarfile
+        import zipfile
+
+        misnamed = tmp_path / "book.cbr"
+        with zipfile.ZipFile(misnamed, "w") as zipf:
+            zipf.writestr("001.jpg", b"x")
+        assert detect_file_type(misnamed) == "cbz"
+        assert get_extension_type(misnamed) == "cbr"
+
+        standard = tmp_path / "book.rar"
+        standard.write_bytes(misnamed.read_bytes())
+        assert detect_file_type(standard) == "zip"
+
+        tar_path = tmp_path / "book.cbz"
+        with tarfile.open(tar_path, "w") as tar:
+            tar.add(misnamed, arcname="001.jpg")
+        assert sniff_archive_format(tar_path) == "tar"
+        assert detect_file_type(tar_path) == "cbt"
+
+        # 流压缩数据只在扩展名是 TAR 时视为 CBT
+        gz = tmp_path / "book.cbt"
+        gz.write_bytes(b"\x1f\x8b" + b"\0" * 100)
+        assert detect_file_type(gz) == "cbt"
+        gz_zip = tmp_path / "other.cbz"
+        gz_zip.write_bytes(b"\x1f\x8b" + b"\0" * 100)
+        assert detect_file_type(gz_zip) == "cbz"
+
+    def test_detect_cache_follows_mtime(self, tmp_path):
+        """测试文件内容改变后重新识别"""
+        path = tmp_path / "book.cbz"
+        path.write_bytes(b"Rar!\x1a\x07\x01\x00")
+        assert detect_file_type(path) == "cbr"
+        path.write_bytes(b"PK\x05\x06" + b"\0" * 18)
+        os.utime(path, ns=(0, 10**9))
+        assert detect_file_type(path) == "cbz"
@@ -0,0 +1,82 @@
+"""
+任务日志模块的单元测试
+"""
+
+import json
+import time
+
+from ccb.journal import Journal
+
+
+class TestJournal:
+    """Journal 测试类"""
+
+    def test_batched_writes_and_last_status_wins(self, tmp_path):
+        """测试攒批写入，以及每个条目以最后一条记录为准"""
+        path = tmp_path / "run.jsonl"
+        journal = Journal(path, batch_size=3, flush_interval=3600)
+        journal.started(tmp_path / "a.zip", tmp_path / "a.cbz")
+        journal.done(tmp_path / "a.zip", tmp_path / "a.cbz")
+        assert path.read_text() == ""
+        journal.started(tmp_path / "b.zip", tmp_path / "b.cbz")
+        assert len(path.read_text().splitlines()) == 3
+        journal.failed(tmp_path / "c.zip", "boom")
+        journal.close()
+
+        state = Journal.load(path)
+        assert state.is_done(tmp_path / "a.zip")
+        assert state.status(tmp_path / "b.zip") == "started"
+        assert state.status(tmp_path / "c.zip") == "failed"
+        assert state.status(tmp_path / "d.zip") is None
+
+    def test_cleanup_in_progress_and_truncated_line(self, tmp_path):
+        """测试清理中断条目的 .partial 输出并容忍被截断的最后一行"""
+        path = tmp_path / "run.jsonl"
+        output = tmp_path / "b.cbz"
+        (tmp_path / "b.cbz.partial").write_bytes(b"half")
+        record = {"status": "started", "input": str(tmp_path / "b.zip")}
+        record["output"] = str(output)
+        path.write_text(json.dumps(record) + "\n" + '{"status": "do')
+
+        state = Journal.load(path)
+        assert state.cleanup_in_progress() == 1
+        assert not (tmp_path / "b.cbz.partial").exists()
+
+        with Journal(path) as journal:
+            journal.done(tmp_path / "b.zip", output)
+        assert Journal.load(path).is_done(tmp_path / "b.zip")
+
+    def test_cleanup_staging_leftovers(self, tmp_path):
+        """测试只清理中断条目自己的分卷文件夹和登记过的暂存目录，其他进程的保留"""
+        out_dir = tmp_path / "out"
+        temp_root = tmp_path / "tmp"
+        (out_dir / "b.partial").mkdir(parents=True)
+        (out_dir / "b.partial" / "b.part01.cbz").write_bytes(b"half")
+        (out_dir / ".ccb_abc" / "b").mkdir(parents=True)
+        (out_dir / ".ccb_x").mkdir()
+        (temp_root / "ccb_def").mkdir(parents=True)
+        (temp_root / "ccb_bench_other").mkdir()
+        (out_dir / "keep.cbz").write_bytes(b"done")
+        path = tmp_path / "run.jsonl"
+        with Journal(path) as journal:
+            journal.started(tmp_path / "b.zip", out_dir / "b.cbz")
+            journal.staged(tmp_path / "b.zip", out_dir / ".ccb_abc")
+            journal.staged(tmp_path / "b.zip", temp_root / "ccb_def")
+            journal.started(tmp_path / "c.zip", out_dir / "c.cbz")
+            journal.staged(tmp_path / "c.zip", out_dir / ".ccb_c")
+            journal.done(tmp_path / "c.zip", out_dir / "c.cbz")
+
+        assert Journal.load(path).cleanup_in_progress() == 3
+        assert sorted(p.name for p in out_dir.iterdir()) == [".ccb_x", "keep.cbz"]
+        assert [p.name for p in temp_root.iterdir()] == ["ccb_bench_other"]
+
+    def test_timer_flushes_idle_batch(self, tmp_path):
+        """测试没有新记录时，定时器在间隔后写入缓存的记录"""
+        path = tmp_path / "run.jsonl"
+        journal = Journal(path, batch_size=100, flush_interval=0.05)
+        journal.done(tmp_path / "a.zip", tmp_path / "a.cbz")
+        deadline = time.monotonic() + 5
+        while not path.read_text() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert Journal.load(path).is_done(tmp_path / "a.zip")
+        journal.close()
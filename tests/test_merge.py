@@ -0,0 +1,106 @@
+"""
+合并模块的单元测试
+"""
+
+import hashlib
+import tarfile
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from ccb.converter import ComicBookConverter
+from ccb.exceptions import ConversionError, UnsupportedFormatError
+from ccb.merge import merge_prefixes
+from ccb.zip_io import RawZipWriter
+
+
+@pytest.fixture
+def chapters(tmp_path):
+    """三个 CBZ 章节（ch01 的成员位于同名顶层文件夹中）、一个 CBT 章节和一个文件夹章节。"""
+    paths = []
+    for i, prefix in ((1, "ch01/"), (2, ""), (10, "")):
+        path = tmp_path / f"ch{i:02d}.cbz"
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr(f"{prefix}2.jpg", f"{i}-2" * 100)
+            zipf.writestr(f"{prefix}10.jpg", f"{i}-10" * 100)
+        paths.append(path)
+    cbt = tmp_path / "ch03.cbt"
+    folder = tmp_path / "src" / "ch03"
+    folder.mkdir(parents=True)
+    (folder / "1.jpg").write_bytes(b"tar page")
+    with tarfile.open(cbt, "w") as tar:
+        tar.add(folder / "1.jpg", "1.jpg")
+    extra = tmp_path / "ch04"
+    extra.mkdir()
+    (extra / "1.jpg").write_bytes(b"folder page")
+    (extra / "ComicInfo.xml").write_text("<ComicInfo/>")
+    return paths + [cbt, extra]
+
+
+class TestMerge:
+    """合并测试类"""
+
+    def test_merge_to_cbz(self, chapters, tmp_path):
+        """测试合并为 CBZ：前缀、自然顺序，CBZ 章节直接拷贝压缩数据"""
+        output = tmp_path / "out" / "vol01.cbz"
+        written = []
+        original = RawZipWriter.write_bytes
+
+        def spy(self, arcname, data, *args, **kwargs):
+            written.append(arcname)
+            return original(self, arcname, data, *args, **kwargs)
+
+        with patch.object(RawZipWriter, "write_bytes", spy):
+            result = ComicBookConverter().merge(reversed(chapters), output)
+
+        assert result == output
+        with zipfile.ZipFile(output) as zipf:
+            assert zipf.namelist() == [
+                "ch01/2.jpg",
+                "ch01/10.jpg",
+                "ch02/2.jpg",
+                "ch02/10.jpg",
+                "ch03/1.jpg",
+                "ch04/1.jpg",
+                "ch10/2.jpg",
+                "ch10/10.jpg",
+                "ch04/ComicInfo.xml",
+            ]
+            assert zipf.read("ch01/10.jpg") == b"1-10" * 100
+            assert zipf.getinfo("ch02/2.jpg").compress_type == zipfile.ZIP_DEFLATED
+            assert zipf.testzip() is None
+        # 只有不能直接拷贝的 CBT 成员需要重新压缩
+        assert written == ["ch03/1.jpg"]
+        assert sorted(p.name for p in output.parent.iterdir()) == ["vol01.cbz"]
+
+    def test_merge_to_cbt_with_blocklist(self, chapters, tmp_path):
+        """测试合并为其他格式时经暂存目录压缩，并丢弃黑名单页面"""
+        converter = ComicBookConverter(
+            page_blocklist={hashlib.sha256(b"folder page").hexdigest()}
+        )
+        output = converter.merge(chapters[2:], tmp_path / "vol.cbt")
+        with tarfile.open(output) as tar:
+            names = [m.name for m in tar.getmembers() if m.isfile()]
+        assert names == [
+            "vol/ch03/1.jpg",
+            "vol/ch10/2.jpg",
+            "vol/ch10/10.jpg",
+            "vol/ch04/ComicInfo.xml",
+        ]
+
+    def test_merge_errors(self, chapters, tmp_path):
+        """测试无效的输出格式和不存在的输入"""
+        converter = ComicBookConverter()
+        with pytest.raises(UnsupportedFormatError):
+            converter.merge(chapters, tmp_path / "vol.pdf")
+        with pytest.raises(ConversionError):
+            converter.merge([tmp_path / "missing.cbz"], tmp_path / "vol.cbz")
+        with pytest.raises(ConversionError):
+            converter.merge([], tmp_path / "vol.cbz")
+
+    def test_merge_prefixes(self):
+        """测试重名章节的前缀"""
+        paths = [Path("a/ch01.cbz"), Path("b/ch01.cbr"), Path("c/CH01.zip")]
+        assert merge_prefixes(paths) == ["ch01", "ch01 (2)", "CH01 (3)"]
@@ -0,0 +1,96 @@
+"""
+嵌套压缩包展开模块的单元测试
+"""
+
+import io
+import tarfile
+import zipfile
+from unittest.mock import patch
+
+import pytest
+
+from ccb.archive_handler import get_handler
+from ccb.nested import extract_flattened
+
+
+def _zip_bytes(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zipf:
+        for name, data in members.items():
+            zipf.writestr(name, data)
+    return buffer.getvalue()
+
+
+def _tar_gz_bytes(members):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def volume(tmp_path):
+    """外层 CBZ：封面、两个章节压缩包（扩展名不可信）和一个损坏的压缩包。"""
+    path = tmp_path / "vol1.cbz"
+    with zipfile.ZipFile(path, "w") as zipf:
+        zipf.writestr("cover.jpg", b"cover")
+        # 内层压缩包只有一个顶层文件夹时应被上移一层
+        zipf.writestr(
+            "ch01.zip", _zip_bytes({"ch01/01.jpg": b"a", "ch01/02.jpg": b"b"})
+        )
+        zipf.writestr("extra/ch02.bin", _tar_gz_bytes({"01.jpg": b"c"}))
+        zipf.writestr("notes.tar.gz", b"\x1f\x8b not really gzip")
+        zipf.writestr("broken.cbz", b"PK\x03\x04 truncated")
+    return path
+
+
+class TestExtractFlattened:
+    """嵌套压缩包展开测试类"""
+
+    def test_flattens_by_signature(self, volume, tmp_path):
+        """测试按签名识别内层压缩包并解压为同名子文件夹"""
+        out = tmp_path / "out"
+        nested = extract_flattened(volume, out)
+
+        assert nested == [(out / "ch01").resolve()]
+        assert (out / "cover.jpg").read_bytes() == b"cover"
+        assert (out / "ch01" / "01.jpg").read_bytes() == b"a"
+        assert not (out / "ch01.zip").exists()
+        # 流压缩数据只有成员名表明是 TAR 时才展开，扩展名 .bin 不展开
+        assert (out / "extra" / "ch02.bin").exists()
+        # 无法解压的内层压缩包按普通文件保留
+        assert (out / "broken.cbz").read_bytes() == b"PK\x03\x04 truncated"
+        assert (out / "notes.tar.gz").exists()
+
+    def test_streams_without_temporary_files(self, tmp_path):
+        """测试内层压缩包在内存中解压，超过阈值时才溢出到临时文件"""
+        path = tmp_path / "vol.cbz"
+        with zipfile.ZipFile(path, "w") as zipf:
+            zipf.writestr("ch01.tar.gz", _tar_gz_bytes({"01.jpg": b"x" * 1000}))
+
+        with patch("tempfile.TemporaryFile", side_effect=AssertionError("spilled")):
+            nested = extract_flattened(path, tmp_path / "mem")
+        assert [p.name for p in nested] == ["ch01"]
+        assert (tmp_path / "mem" / "ch01" / "01.jpg").read_bytes() == b"x" * 1000
+
+        nested = extract_flattened(path, tmp_path / "disk", memory_limit=16)
+        assert (nested[0] / "01.jpg").read_bytes() == b"x" * 1000
+        assert sorted(p.name for p in (tmp_path / "disk").iterdir()) == ["ch01"]
+
+    def test_nested_7z(self, tmp_path):
+        """测试 7z 内层压缩包直接从流中解压"""
+        pytest.importorskip("py7zr")
+        source = tmp_path / "ch01"
+        source.mkdir()
+        (source / "01.jpg").write_bytes(b"page")
+        inner = tmp_path / "ch01.cb7"
+        get_handler("cb7").compress(source, inner)
+        path = tmp_path / "vol.cbz"
+        with zipfile.ZipFile(path, "w") as zipf:
+            zipf.write(inner, "ch01.cb7")
+
+        nested = extract_flattened(path, tmp_path / "out")
+        assert (nested[0] / "01.jpg").read_bytes() == b"page"
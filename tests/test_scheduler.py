@@ -0,0 +1,88 @@
+"""
+资源调度模块的单元测试
+"""
+
+import asyncio
+
+from ccb.scheduler import ResourceScheduler
+
+
+class TestResourceScheduler:
+    """ResourceScheduler 测试类"""
+
+    def _run(self, scheduler, jobs):
+        """按顺序提交 (名称, 临时空间, 耗时) 任务，返回开始顺序"""
+        started = []
+
+        async def job(name, temp_bytes, duration):
+            async with scheduler.reserve(temp_bytes=temp_bytes):
+                started.append(name)
+                assert scheduler.stats()["temp_bytes"] <= max(
+                    scheduler.max_temp_bytes, temp_bytes
+                )
+                await asyncio.sleep(duration)
+
+        async def main():
+            await asyncio.gather(*(job(*spec) for spec in jobs))
+
+        asyncio.run(main())
+        return started
+
+    def test_small_jobs_flow_around_large(self):
+        """测试放不下的大任务等待，小任务继续执行"""
+        scheduler = ResourceScheduler(max_temp_bytes=100)
+        started = self._run(
+            scheduler,
+            [("a", 60, 0.05), ("big", 80, 0.01), ("b", 30, 0.01), ("c", 10, 0.01)],
+        )
+        assert started.index("b") < started.index("big")
+        assert started.index("c") < started.index("big")
+        assert scheduler.stats() == {"running": 0, "temp_bytes": 0, "memory_bytes": 0}
+
+    def test_oversized_job_runs_alone(self):
+        """测试超过整个预算的任务不会失败，而是单独运行"""
+        scheduler = ResourceScheduler(max_temp_bytes=100)
+        started = self._run(scheduler, [("huge", 500, 0.01), ("small", 10, 0.01)])
+        assert sorted(started) == ["huge", "small"]
+
+    def test_max_jobs_and_memory(self):
+        """测试并发数和内存预算"""
+        scheduler = ResourceScheduler(max_memory=100, max_jobs=2)
+        peak = {"running": 0, "memory": 0}
+
+        async def job(memory_bytes):
+            async with scheduler.reserve(memory_bytes=memory_bytes):
+                stats = scheduler.stats()
+                peak["running"] = max(peak["running"], stats["running"])
+                peak["memory"] = max(peak["memory"], stats["memory_bytes"])
+                await asyncio.sleep(0.01)
+
+        async def main():
+            await asyncio.gather(*(job(40) for _ in range(6)))
+
+        asyncio.run(main())
+        assert peak == {"running": 2, "memory": 80}
+
+    def test_waiting_job_keeps_its_turn(self):
+        """测试等待中的大任务被越过 max_bypass 次后，后来的小任务排在它后面"""
+        scheduler = ResourceScheduler(max_temp_bytes=100, max_bypass=2)
+        started = []
+
+        async def job(name, temp_bytes, duration):
+            async with scheduler.reserve(temp_bytes=temp_bytes):
+                started.append(name)
+                await asyncio.sleep(duration)
+
+        async def main():
+            # 小任务源源不断地到来，始终占用一部分预算
+            tasks = [asyncio.ensure_future(job("s0", 30, 0.02))]
+            await asyncio.sleep(0)
+            tasks.append(asyncio.ensure_future(job("big", 90, 0.01)))
+            for i in range(1, 8):
+                await asyncio.sleep(0.005)
+                tasks.append(asyncio.ensure_future(job(f"s{i}", 30, 0.02)))
+            await asyncio.gather(*tasks)
+
+        asyncio.run(main())
+        assert started.index("big") <= 3
+        assert scheduler.stats() == {"running": 0, "temp_bytes": 0, "memory_bytes": 0}
@@ -0,0 +1,46 @@
+"""
+吞吐量测量模块的单元测试
+"""
+
+import zipfile
+
+from ccb.converter import ComicBookConverter
+from ccb.throughput import ThroughputTable
+
+
+class TestThroughputTable:
+    """吞吐量表测试类"""
+
+    def test_estimate_and_cache(self, tmp_path, monkeypatch):
+        """测试按实测吞吐量估算耗时，测量结果写入缓存"""
+        zip_path = tmp_path / "book.zip"
+        with zipfile.ZipFile(zip_path, "w") as zipf:
+            zipf.writestr("01.jpg", b"x" * 100000)
+        converter = ComicBookConverter()
+        cache_file = tmp_path / "cache" / "throughput.json"
+
+        table = ThroughputTable(cache_file)
+        alias = converter.plan(zip_path, "cbz")
+        assert table.estimate(alias, converter) > 0
+        recompress = converter.plan(zip_path, "cbt")
+        seconds = table.estimate(recompress, converter)
+        assert seconds is not None and seconds > 0
+        assert recompress.estimated_seconds == seconds
+        assert cache_file.exists()
+
+        def no_measure(*args):
+            raise AssertionError("should use the cached measurement")
+
+        monkeypatch.setattr(ThroughputTable, "_measure", no_measure)
+        cached = ThroughputTable(cache_file)
+        assert cached.estimate(converter.plan(zip_path, "cbt"), converter) == seconds
+
+    def test_skip_and_rename_cost_nothing(self, tmp_path):
+        """测试跳过和重命名不需要测量"""
+        cbz = tmp_path / "book.cbz"
+        with zipfile.ZipFile(cbz, "w") as zipf:
+            zipf.writestr("01.jpg", b"x")
+        converter = ComicBookConverter()
+        table = ThroughputTable(tmp_path / "throughput.json")
+        assert table.estimate(converter.plan(cbz, "cbz"), converter) == 0.0
+        assert not (tmp_path / "throughput.json").exists()
@@ -6,11 +6,28 @@ import pytest
 from pathlib import Path
 import tempfile
 import os
+import subprocess
+import sys
+import threading
+import time
 
 from ccb.utils import (
     safe_remove,
     ensure_output_dir,
     get_output_path,
+    natural_sort_key,
+    fast_copy,
+    move_or_copy,
+    parse_size,
+    format_size,
+    iter_files,
+    iter_reading_order,
+    member_order_key,
+    output_timestamp,
+    zip_output_timestamp,
+    atomic_output,
+    run_tool,
+    cancel_scope,
 )
 
 
@@ -75,3 +92,187 @@ class TestUtils:
             output_path = get_output_path(input_path, "cbz", output_dir)
             assert output_path.parent == output_dir
             assert output_path.suffix == ".cbz"
+
+    def test_natural_sort_key(self):
+        """测试自然排序"""
+        names = ["p10.jpg", "P2.jpg", "p1.jpg"]
+        assert sorted(names, key=natural_sort_key) == ["p1.jpg", "P2.jpg", "p10.jpg"]
+
+    def test_fast_copy(self, tmp_path):
+        """测试内核复制保留内容与修改时间"""
+        src = tmp_path / "src.bin"
+        src.write_bytes(os.urandom(100_000))
+        os.utime(src, (1_000_000, 1_000_000))
+        dst = tmp_path / "dst.bin"
+
+        method = fast_copy(src, dst)
+        assert method in ("reflink", "copy_file_range", "copyfile")
+        assert dst.read_bytes() == src.read_bytes()
+        assert dst.stat().st_mtime == 1_000_000
+
+    def test_fast_copy_short_copy_file_range(self, tmp_path, monkeypatch):
+        """测试 copy_file_range 提前返回0时回退到 copyfile，而不是留下截断的文件"""
+        import ccb.utils as utils
+
+        src = tmp_path / "src.bin"
+        src.write_bytes(os.urandom(100_000))
+        monkeypatch.setattr(utils, "_reflink", lambda src_fd, dst_fd: False)
+        monkeypatch.setattr(
+            os, "copy_file_range", lambda src_fd, dst_fd, count: 0, raising=False
+        )
+
+        assert fast_copy(src, tmp_path / "dst.bin") == "copyfile"
+        assert (tmp_path / "dst.bin").read_bytes() == src.read_bytes()
+
+    def test_move_or_copy(self, tmp_path):
+        """测试移动与复制"""
+        src = tmp_path / "a.zip"
+        src.write_bytes(b"data")
+        copied = tmp_path / "b.cbz"
+        assert move_or_copy(src, copied, remove_source=False) != "rename"
+        assert src.exists()
+
+        moved = tmp_path / "c.cbz"
+        assert move_or_copy(src, moved, remove_source=True) == "rename"
+        assert not src.exists()
+        assert moved.read_bytes() == b"data"
+
+    def test_parse_size(self):
+        """测试带单位的字节数解析"""
+        assert parse_size("100") == 100
+        assert parse_size("4k") == 4096
+        assert parse_size("1.5GiB") == 1536 * 1024**2
+        assert parse_size("2TB") == 2 * 1024**4
+        with pytest.raises(ValueError):
+            parse_size("ten megs")
+
+    def test_format_size(self):
+        """测试字节数格式化"""
+        assert format_size(512) == "512 B"
+        assert format_size(1536) == "1.5 KiB"
+        assert format_size(3 * 1024**3) == "3.0 GiB"
+
+    def test_iter_files(self, tmp_path):
+        """测试流式遍历文件夹，不进入指向目录的符号链接"""
+        (tmp_path / "a" / "b").mkdir(parents=True)
+        (tmp_path / "1.jpg").write_bytes(b"1")
+        (tmp_path / "a" / "2.jpg").write_bytes(b"2")
+        (tmp_path / "a" / "b" / "3.jpg").write_bytes(b"3")
+        (tmp_path / "link").symlink_to(tmp_path / "a", target_is_directory=True)
+
+        files = iter_files(tmp_path)
+        assert not isinstance(files, list)
+        assert sorted(p.relative_to(tmp_path).as_posix() for p in files) == [
+            "1.jpg",
+            "a/2.jpg",
+            "a/b/3.jpg",
+        ]
+
+    def test_reading_order(self, tmp_path):
+        """测试阅读顺序：ComicInfo.xml 在前，页面按自然顺序，其他文件在后"""
+        names = ["notes.txt", "p10.jpg", "a/p1.png", "comicinfo.XML", "p2.jpg"]
+        ordered = ["comicinfo.XML", "a/p1.png", "p2.jpg", "p10.jpg", "notes.txt"]
+        assert sorted(names, key=member_order_key) == ordered
+
+        for name in names:
+            (tmp_path / name).parent.mkdir(exist_ok=True)
+            (tmp_path / name).write_bytes(b"")
+        assert [arc for _, arc in iter_reading_order(tmp_path)] == ordered
+
+    def test_cover_first(self, tmp_path):
+        """测试以 cover 命名的封面页排在同一目录的其他页面之前"""
+        names = ["001.jpg", "cover.jpg", "ch1/002.jpg", "ch1/Cover_01.png", "back.jpg"]
+        names += ["backcover.jpg", "cover.txt"]
+        ordered = [
+            "cover.jpg",
+            "001.jpg",
+            "back.jpg",
+            "backcover.jpg",
+            "ch1/Cover_01.png",
+            "ch1/002.jpg",
+            "cover.txt",
+        ]
+        assert sorted(names, key=member_order_key) == ordered
+
+        for name in names:
+            (tmp_path / name).parent.mkdir(exist_ok=True)
+            (tmp_path / name).write_bytes(b"")
+        assert [arc for _, arc in iter_reading_order(tmp_path)] == ordered
+
+    @pytest.mark.skipif(not hasattr(time, "tzset"), reason="requires time.tzset")
+    def test_output_timestamp(self, monkeypatch):
+        """测试输出时间戳默认固定且与时区无关，可由 SOURCE_DATE_EPOCH 指定"""
+        monkeypatch.delenv("SOURCE_DATE_EPOCH", raising=False)
+        try:
+            for tz in ("UTC", "Asia/Shanghai", "America/New_York"):
+                monkeypatch.setenv("TZ", tz)
+                time.tzset()
+                assert output_timestamp() == 315532800
+                assert time.localtime(zip_output_timestamp())[:5] == (1980, 1, 1, 0, 0)
+        finally:
+            monkeypatch.undo()
+            time.tzset()
+        monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+        assert output_timestamp() == 1_700_000_000
+        assert zip_output_timestamp() == 1_700_000_000
+
+    def test_atomic_output(self, tmp_path):
+        """测试先写 .partial 再原子提交，失败时保留原输出"""
+        target = tmp_path / "out.cbz"
+        with atomic_output(target) as partial:
+            assert partial.name == "out.cbz.partial"
+            partial.write_bytes(b"new")
+        assert target.read_bytes() == b"new"
+        assert not partial.exists()
+
+        with pytest.raises(RuntimeError):
+            with atomic_output(target) as partial:
+                partial.write_bytes(b"half")
+                raise RuntimeError("interrupted")
+        assert target.read_bytes() == b"new"
+        assert not partial.exists()
+
+    def test_run_tool_keeps_output_tail(self):
+        """测试流式读取外部命令输出，只保留最后几行"""
+        cmd = [sys.executable, "-c", "for i in range(1000): print(i)"]
+        rc, tail = run_tool(cmd, timeout=30, tail_lines=3)
+        assert rc == 0
+        assert tail.splitlines() == ["997", "998", "999"]
+
+    def test_run_tool_streams_stdout(self):
+        """测试标准输出按块写入指定的流，返回的输出只包含标准错误"""
+        import io
+
+        cmd = [
+            sys.executable,
+            "-c",
+            "import sys; sys.stdout.buffer.write(bytes(range(256)) * 8192);"
+            "print('warning', file=sys.stderr)",
+        ]
+        out = io.BytesIO()
+        rc, tail = run_tool(cmd, timeout=30, stdout=out)
+        assert rc == 0
+        assert out.getvalue() == bytes(range(256)) * 8192
+        assert tail == "warning"
+
+    def test_run_tool_timeout_kills_process(self):
+        """测试超时后终止外部命令"""
+        cmd = [sys.executable, "-c", "import time; time.sleep(30)"]
+        start = time.monotonic()
+        with pytest.raises(subprocess.TimeoutExpired):
+            run_tool(cmd, timeout=0.2)
+        assert time.monotonic() - start < 10
+
+    def test_run_tool_cancel(self):
+        """测试取消事件触发后终止外部命令"""
+        cmd = [sys.executable, "-c", "import time; time.sleep(30)"]
+        cancel = threading.Event()
+        threading.Timer(0.2, cancel.set).start()
+        start = time.monotonic()
+        with cancel_scope(cancel):
+            with pytest.raises(InterruptedError):
+                run_tool(cmd)
+        assert time.monotonic() - start < 10
+        with cancel_scope(cancel):
+            with pytest.raises(InterruptedError):
+                run_tool(cmd)
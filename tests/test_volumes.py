@@ -0,0 +1,48 @@
+"""
+分卷模块的单元测试
+"""
+
+from ccb.volumes import VOLUME_MEMBER_OVERHEAD, member_cost, plan_volumes, volume_stem
+
+
+class TestPlanVolumes:
+    """分卷划分测试类"""
+
+    def test_split_by_pages(self):
+        """测试按页数切分，元数据复制到每个分卷，其他文件跟随最后一卷"""
+        members = [
+            ("notes.txt", 10),
+            ("10.jpg", 1),
+            ("2.jpg", 1),
+            ("ComicInfo.xml", 5),
+            ("1.jpg", 1),
+        ]
+        assert plan_volumes(members, max_pages=2) == [
+            ["ComicInfo.xml", "1.jpg", "2.jpg"],
+            ["ComicInfo.xml", "10.jpg", "notes.txt"],
+        ]
+
+    def test_split_by_size(self):
+        """测试按压缩前的大小切分，单页超过上限时单独成卷"""
+        page = 10_000
+        limit = 2 * member_cost(page)
+        members = [(f"{i:02d}.jpg", page) for i in range(5)] + [("99.jpg", limit)]
+        volumes = plan_volumes(members, max_bytes=limit)
+        assert volumes == [
+            ["00.jpg", "01.jpg"],
+            ["02.jpg", "03.jpg"],
+            ["04.jpg"],
+            ["99.jpg"],
+        ]
+        assert member_cost(page) > page + VOLUME_MEMBER_OVERHEAD
+
+    def test_no_split(self):
+        """测试未超出上限或没有成员时只有一个分卷"""
+        assert plan_volumes([("1.jpg", 1)], max_bytes=1 << 30) == [["1.jpg"]]
+        assert plan_volumes([], max_pages=1) == [[]]
+
+    def test_volume_stem(self):
+        """测试分卷序号补零，保证按名称排序"""
+        assert volume_stem("book", 0, 3) == "book.part01"
+        assert volume_stem("book", 99, 120) == "book.part100"
+        assert volume_stem("book", 0, 120) == "book.part001"
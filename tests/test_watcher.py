@@ -0,0 +1,84 @@
+"""
+目录监视模块的单元测试
+"""
+
+import os
+import threading
+import zipfile
+
+from ccb.converter import ComicBookConverter
+from ccb.watcher import DirectoryWatcher, watch
+
+
+class TestDirectoryWatcher:
+    """DirectoryWatcher 测试类"""
+
+    def test_reports_stable_new_files_once(self, tmp_path):
+        """测试新文件在稳定后只报告一次，忽略非压缩包和未完成文件"""
+        watcher = DirectoryWatcher(tmp_path, stable_seconds=0)
+        (tmp_path / "a.zip").write_bytes(b"a")
+        (tmp_path / "notes.txt").write_text("x")
+        (tmp_path / "b.cbz.partial").write_bytes(b"b")
+        sub = tmp_path / "sub"
+        sub.mkdir()
+        (sub / "c.rar").write_bytes(b"c")
+
+        assert watcher.poll() == []  # 首次观察，记录大小和 mtime
+        assert sorted(p.name for p in watcher.poll()) == ["a.zip", "c.rar"]
+        assert watcher.poll() == []
+
+    def test_debounces_growing_file(self, tmp_path):
+        """测试仍在写入的文件不会被报告"""
+        watcher = DirectoryWatcher(tmp_path, stable_seconds=0)
+        growing = tmp_path / "big.zip"
+        growing.write_bytes(b"x")
+        watcher.poll()
+        with open(growing, "ab") as f:
+            f.write(b"more")
+        assert watcher.poll() == []
+        assert watcher.poll() == [growing]
+
+    def test_replaced_file_is_reported_again(self, tmp_path):
+        """测试已报告的文件被新版本替换后再次报告"""
+        watcher = DirectoryWatcher(tmp_path, stable_seconds=0)
+        path = tmp_path / "a.zip"
+        path.write_bytes(b"v1")
+        watcher.poll()
+        assert watcher.poll() == [path]
+
+        new = tmp_path / "a.zip.tmp"
+        new.write_bytes(b"version 2")
+        os.replace(new, path)
+        watcher.poll()
+        assert watcher.poll() == [path]
+
+
+def test_watch_converts_dropped_archive(tmp_path):
+    """测试 watch 转换放入热文件夹的压缩包"""
+    with zipfile.ZipFile(tmp_path / "book.zip", "w") as zipf:
+        zipf.writestr("01.jpg", b"page")
+    out = tmp_path / "out"
+    stop = threading.Event()
+    results = []
+
+    def on_result(input_path, output_path):
+        results.append((input_path.name, output_path))
+        stop.set()
+
+    thread = threading.Thread(
+        target=watch,
+        args=(ComicBookConverter(), tmp_path, "cbt"),
+        kwargs={
+            "output_dir": out,
+            "interval": 0.05,
+            "stable_seconds": 0,
+            "stop": stop,
+            "on_result": on_result,
+        },
+    )
+    thread.start()
+    thread.join(timeout=10)
+    stop.set()
+
+    assert results == [("book.zip", out / "book.cbt")]
+    assert (out / "book.cbt").exists()
@@ -0,0 +1,30 @@
+"""
+转换工作区模块的单元测试
+"""
+
+from ccb.workspace import Workspace
+
+
+class TestWorkspace:
+    """Workspace 测试类"""
+
+    def test_cleans_only_its_own_dirs(self, tmp_path):
+        """测试工作区退出时只删除自己创建的暂存目录"""
+        output = tmp_path / "out" / "book.cbt"
+        with Workspace() as first:
+            with Workspace() as second:
+                mine = second.make_temp_dir(output)
+                theirs = first.make_temp_dir(output)
+                assert mine.parent == output.parent
+                assert mine.name.startswith(".ccb_")
+            assert not mine.exists()
+            assert theirs.exists()
+        assert not theirs.exists()
+
+    def test_temp_root(self, tmp_path):
+        """测试指定暂存根目录"""
+        root = tmp_path / "staging"
+        with Workspace(root) as workspace:
+            temp_dir = workspace.make_temp_dir(tmp_path / "book.cbz")
+            assert temp_dir.parent == root
+        assert list(root.iterdir()) == []
@@ -0,0 +1,259 @@
+"""
+底层 ZIP 读写模块的单元测试
+"""
+
+import io
+import mmap
+import zipfile
+
+import pytest
+
+from ccb.archive_handler import ZipReader
+from ccb.exceptions import ArchiveError
+from ccb.zip_io import (
+    EOCD_SIGNATURE,
+    EOCD_STRUCT,
+    ZIP64_EOCD_SIGNATURE,
+    ZIP64_EOCD_STRUCT,
+    MmapZipFile,
+    RawZipWriter,
+    StreamZipWriter,
+    iter_zip_stream,
+    repack_zip,
+)
+
+
+class _PipeWriter(io.RawIOBase):
+    """模拟管道的只写流：不支持 seek() 和 tell()。"""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.data += b
+        return len(b)
+
+
+class _PipeReader(io.RawIOBase):
+    """模拟管道的只读流：不支持定位，每次最多返回 7 个字节。"""
+
+    def __init__(self, data):
+        self._stream = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        chunk = self._stream.read(min(len(b), 7))
+        b[: len(chunk)] = chunk
+        return len(chunk)
+
+
+class TestMmapZipFile:
+    """MmapZipFile 测试类"""
+
+    def _make_zip(self, path, compression=zipfile.ZIP_DEFLATED, **kwargs):
+        with zipfile.ZipFile(path, "w", compression) as zipf:
+            zipf.writestr("a.jpg", b"A" * 1000)
+            zipf.writestr("dir/b.txt", b"hello")
+            with zipf.open("big.bin", "w", **kwargs) as f:
+                f.write(b"xyz" * 100)
+        return path
+
+    def test_read_deflated_members(self, tmp_path):
+        """测试从映射中解压 DEFLATED 成员"""
+        archive = self._make_zip(tmp_path / "a.zip")
+        with MmapZipFile(archive) as zf:
+            assert [e.filename for e in zf] == ["a.jpg", "dir/b.txt", "big.bin"]
+            assert zf.read("a.jpg") == b"A" * 1000
+            assert zf.read("dir/b.txt") == b"hello"
+            assert zf.getinfo("big.bin").file_size == 300
+
+    def test_stored_member_is_zero_copy(self, tmp_path):
+        """测试 STORED 成员以映射的零拷贝视图返回"""
+        archive = self._make_zip(tmp_path / "s.zip", zipfile.ZIP_STORED)
+        with MmapZipFile(archive) as zf:
+            view = zf.read_view(zf.getinfo("a.jpg"))
+            assert isinstance(view.obj, mmap.mmap)
+            assert bytes(view) == b"A" * 1000
+            view.release()
+
+    def test_zip64_and_prefixed_archive(self, tmp_path):
+        """测试 ZIP64 结构和带前置数据的压缩包"""
+        archive = self._make_zip(tmp_path / "z.zip", force_zip64=True)
+        prefixed = tmp_path / "prefixed.zip"
+        prefixed.write_bytes(b"#!stub\n" * 10 + archive.read_bytes())
+        with MmapZipFile(prefixed) as zf:
+            assert zf.read("big.bin") == b"xyz" * 100
+
+    def test_invalid_files(self, tmp_path):
+        """测试空文件和非 ZIP 文件"""
+        empty = tmp_path / "empty.zip"
+        empty.touch()
+        with pytest.raises(ArchiveError):
+            MmapZipFile(empty)
+        junk = tmp_path / "junk.zip"
+        junk.write_bytes(b"not a zip" * 100)
+        with pytest.raises(ArchiveError):
+            MmapZipFile(junk)
+
+    def test_reader_falls_back_for_unsupported_method(self, tmp_path):
+        """测试 ZipReader 对不支持的压缩方法回退到 zipfile"""
+        archive = tmp_path / "bz.cbz"
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_BZIP2) as zipf:
+            zipf.writestr("1.jpg", b"bzip2 page")
+        with ZipReader(archive) as reader:
+            assert reader.read_page(0) == b"bzip2 page"
+            assert bytes(reader.read_view("1.jpg")) == b"bzip2 page"
+
+
+class TestRawZipWriter:
+    """RawZipWriter 和 repack_zip 测试类"""
+
+    def _make_zip(self, path):
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr("10.jpg", b"ten" * 500)
+            zipf.writestr("2.jpg", b"two" * 500)
+            zipf.writestr("Thumbs.db", b"junk")
+        return path
+
+    def test_copy_preserves_compressed_bytes(self, tmp_path):
+        """测试原样拷贝成员的压缩数据和 CRC"""
+        source = self._make_zip(tmp_path / "in.zip")
+        output = repack_zip(source, tmp_path / "out.zip")
+        with MmapZipFile(source) as src, MmapZipFile(output) as dst:
+            for a, b in zip(src, dst):
+                assert (a.filename, a.crc, a.compress_size) == (
+                    b.filename,
+                    b.crc,
+                    b.compress_size,
+                )
+                assert bytes(src.raw_view(a)) == bytes(dst.raw_view(b))
+        with zipfile.ZipFile(output) as zipf:
+            assert zipf.testzip() is None
+
+    def test_select_rename_sort_and_add(self, tmp_path):
+        """测试筛选、重命名、排序和添加新成员"""
+        source = self._make_zip(tmp_path / "in.zip")
+        output = repack_zip(
+            source,
+            tmp_path / "out.zip",
+            select=lambda name: name != "Thumbs.db",
+            rename=lambda name: "p" + name,
+            sort_key=lambda name: len(name),
+            add_files={"ComicInfo.xml": b"<ComicInfo/>", "p2.jpg": b"new"},
+        )
+        with zipfile.ZipFile(output) as zipf:
+            assert zipf.namelist() == ["ComicInfo.xml", "p2.jpg", "p10.jpg"]
+            assert zipf.read("p2.jpg") == b"new"
+            assert zipf.read("p10.jpg") == b"ten" * 500
+            assert zipf.testzip() is None
+
+    def test_write_file_and_stored_level(self, tmp_path):
+        """测试流式写入文件和仅存储级别"""
+        page = tmp_path / "page.jpg"
+        page.write_bytes(b"page data" * 100)
+        output = tmp_path / "out.zip"
+        with RawZipWriter(output, level=0) as writer:
+            writer.write_file(page, "page.jpg")
+            writer.write_bytes("note.txt", b"note")
+            # 同名成员以最后写入的为准
+            writer.write_bytes("note.txt", b"again")
+        with zipfile.ZipFile(output) as zipf:
+            assert zipf.getinfo("page.jpg").compress_type == zipfile.ZIP_STORED
+            assert zipf.read("page.jpg") == page.read_bytes()
+            assert zipf.namelist() == ["page.jpg", "note.txt"]
+            assert zipf.read("note.txt") == b"again"
+            assert zipf.testzip() is None
+
+    def test_repack_keeps_last_duplicate(self, tmp_path):
+        """测试重打包源文件中的重名成员时与 zipfile 一样以最后一个为准"""
+        source = tmp_path / "dup.zip"
+        with pytest.warns(UserWarning), zipfile.ZipFile(source, "w") as zipf:
+            zipf.writestr("01.jpg", b"first")
+            zipf.writestr("02.jpg", b"two")
+            zipf.writestr("01.jpg", b"last")
+        output = repack_zip(source, tmp_path / "out.cbz")
+        with zipfile.ZipFile(output) as zipf:
+            assert zipf.namelist() == ["02.jpg", "01.jpg"]
+            assert zipf.read("01.jpg") == b"last"
+        assert output.stat().st_size < source.stat().st_size
+
+    def test_many_members_use_zip64(self, tmp_path):
+        """测试超过 65535 个成员时写入 ZIP64 目录结构"""
+        output = tmp_path / "many.zip"
+        with RawZipWriter(output, level=0) as writer:
+            for i in range(65536):
+                writer.write_bytes(f"{i}.txt", b"")
+        with zipfile.ZipFile(output) as zipf:
+            assert len(zipf.infolist()) == 65536
+        with MmapZipFile(output) as zf:
+            assert len(zf) == 65536
+
+    def test_member_count_without_zip64_record(self, tmp_path):
+        """测试超过 65535 个成员但只有截断的 16 位成员数（无 ZIP64 结构）的压缩包"""
+        output = tmp_path / "many.zip"
+        with RawZipWriter(output, level=0) as writer:
+            for i in range(65537):
+                writer.write_bytes(f"{i}.txt", b"")
+        data = output.read_bytes()
+        zip64_pos = data.rindex(ZIP64_EOCD_SIGNATURE)
+        fields = ZIP64_EOCD_STRUCT.unpack_from(data, zip64_pos)
+        cd_size, cd_offset = fields[8], fields[9]
+        # 模拟不支持 ZIP64 的工具：去掉 ZIP64 记录，成员数只保留低 16 位
+        eocd = EOCD_STRUCT.pack(EOCD_SIGNATURE, 0, 0, 1, 1, cd_size, cd_offset, 0)
+        output.write_bytes(data[:zip64_pos] + eocd)
+        with MmapZipFile(output) as zf:
+            assert len(zf) == 65537
+            assert zf.getinfo("65536.txt").file_size == 0
+
+
+class TestZipStreams:
+    """StreamZipWriter 和 iter_zip_stream 测试类"""
+
+    @pytest.mark.parametrize("level", [0, None])
+    def test_stream_writer_round_trip(self, tmp_path, level):
+        """测试写入不可定位的流得到有效 ZIP，并能按本地文件头流式读回"""
+        page = tmp_path / "page.jpg"
+        page.write_bytes(b"PK\x07\x08 looks like a descriptor" * 50)
+        pipe = _PipeWriter()
+        with StreamZipWriter(pipe, level) as writer:
+            writer.write_stream("01.jpg", io.BytesIO(b"one" * 1000))
+            writer.write_file(page, "sub/02.jpg")
+            writer.write_bytes("ComicInfo.xml", b"<ComicInfo/>")
+        data = bytes(pipe.data)
+
+        with zipfile.ZipFile(io.BytesIO(data)) as zipf:
+            assert zipf.testzip() is None
+            assert zipf.getinfo("01.jpg").flag_bits & 0x8
+            assert zipf.read("sub/02.jpg") == page.read_bytes()
+        assert list(iter_zip_stream(_PipeReader(data))) == [
+            ("01.jpg", b"one" * 1000),
+            ("sub/02.jpg", page.read_bytes()),
+            ("ComicInfo.xml", b"<ComicInfo/>"),
+        ]
+
+    def test_reads_zipfile_streams(self):
+        """测试读取 zipfile 写入不可定位流时产生的数据描述符成员"""
+        pipe = _PipeWriter()
+        with zipfile.ZipFile(pipe, "w", zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr("dir/", b"")
+            zipf.writestr("a.jpg", b"A" * 1000)
+        assert list(iter_zip_stream(_PipeReader(bytes(pipe.data)))) == [
+            ("a.jpg", b"A" * 1000)
+        ]
+
+    def test_invalid_streams(self):
+        """测试截断、损坏和非 ZIP 数据"""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr("a.jpg", b"A" * 1000)
+        data = buffer.getvalue()
+        with pytest.raises(ArchiveError):
+            list(iter_zip_stream(io.BytesIO(data[:40])))
+        with pytest.raises(ArchiveError):
+            list(iter_zip_stream(io.BytesIO(b"not a zip")))
+        assert list(iter_zip_stream(io.BytesIO(b""))) == []